@@ -71,7 +71,7 @@ services:
       retries: 24
   bot:
     image: ${bot_image}
-    command: ["python", "bot_runner.py"]
+    command: ["sh", "-c", "python migrate.py && python bot_runner.py"]
     environment:
       SECRET_KEY: ci-secret
       DB_HOST: mariadb
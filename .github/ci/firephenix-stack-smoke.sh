@@ -108,6 +108,22 @@ export BACKEND_IMAGE="$backend_image"
 export WEBSITE_IMAGE="$website_image"
 docker compose -f "$workdir/docker-compose.ci.yml" up -d
 
+# Schema migrations run once per deploy, before traffic; mariadb may still be
+# initialising, so retry until it accepts connections.
+echo "Applying schema migrations..."
+migrated=0
+for _ in $(seq 1 30); do
+  if docker compose -f "$workdir/docker-compose.ci.yml" exec -T backend python3 migrate.py; then
+    migrated=1
+    break
+  fi
+  sleep 2
+done
+if [ "$migrated" -ne 1 ]; then
+  echo "Schema migrations failed" >&2
+  exit 1
+fi
+
 backend_port="$(docker compose -f "$workdir/docker-compose.ci.yml" port backend 5000 | awk -F: '{print $NF}')"
 edge_port="$(docker compose -f "$workdir/docker-compose.ci.yml" port edge 80 | awk -F: '{print $NF}')"
 
@@ -0,0 +1,31 @@
+from app.achievements.engine import (
+    ACHIEVEMENT_LEVEL_KEYS,
+    AchievementInputs,
+    evaluate_achievements,
+    evaluate_batch,
+)
+from app.achievements.snapshot import (
+    USER_ACHIEVEMENTS_SELECT,
+    USER_ACHIEVEMENTS_UPSERT,
+    achievement_levels_from_row,
+    backfill_user_achievements,
+    parse_special_types,
+    refresh_user_achievements,
+    user_achievement_rows,
+    user_achievement_source_queries,
+)
+
+__all__ = [
+    'ACHIEVEMENT_LEVEL_KEYS',
+    'AchievementInputs',
+    'USER_ACHIEVEMENTS_SELECT',
+    'USER_ACHIEVEMENTS_UPSERT',
+    'achievement_levels_from_row',
+    'backfill_user_achievements',
+    'evaluate_achievements',
+    'evaluate_batch',
+    'parse_special_types',
+    'refresh_user_achievements',
+    'user_achievement_rows',
+    'user_achievement_source_queries',
+]
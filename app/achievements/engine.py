@@ -0,0 +1,117 @@
+"""Achievement rules, evaluated for one user or a column-oriented batch.
+
+Every tiered achievement is "how many thresholds does this value reach",
+a lookup on one of the compiled tier curves in ``app.utils.rank_curves``
+(``bisect_right`` on the sorted thresholds). The batch path maps those over
+whole columns (one C-level call per value, no per-rule Python branching), so
+the hall of fame scores thousands of users from one bulk query without a
+per-user function call chain.
+
+Inputs per user (``AchievementInputs`` / batch column names):
+
+* ``longest_streak``, ``total_logins``: login_streak aggregates
+* ``total_minutes``: combined ``user_totals.total_time``
+* ``active_days``, ``active_slots``: distinct heatmap days and day/slot pairs
+  with activity
+* ``special_types``: ``special_achievements.achievement_type`` values
+* ``ttt_rounds_played``, ``ttt_rounds_won``, ``ttt_kills``: TTT counters
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Sequence
+
+from app.utils.database import (
+    SEASON_APEX_ACHIEVEMENT,
+    get_best_division_from_season_achievements,
+    is_season_division_achievement_type,
+)
+from app.utils.rank_curves import rank_curves
+
+__all__ = [
+    'ACHIEVEMENT_LEVEL_KEYS',
+    'AchievementInputs',
+    'evaluate_achievements',
+    'evaluate_batch',
+]
+
+HEATMAP_SLOT_COUNT = 28
+HEATMAP_MAX_LEVEL = 4
+OLD_MEMBER_ACHIEVEMENT = 1
+LEGACY_SUPPORTER_ACHIEVEMENT = 2
+
+#: per-user levels returned by both entry points; ``score`` sums the tiers
+#: (division counted per earned season marker, like the hall of fame always did)
+ACHIEVEMENT_LEVEL_KEYS = (
+    'streak',
+    'logins',
+    'time',
+    'heatmap',
+    'old_member',
+    'legacy_supporter',
+    'division',
+    'apex',
+    'ttt',
+)
+
+
+class AchievementInputs(NamedTuple):
+    longest_streak: int = 0
+    total_logins: int = 0
+    total_minutes: int = 0
+    active_days: int = 0
+    active_slots: int = 0
+    special_types: Iterable[int] = ()
+    ttt_rounds_played: int = 0
+    ttt_rounds_won: int = 0
+    ttt_kills: int = 0
+
+
+def _column(values: Sequence) -> List[int]:
+    return [int(value or 0) for value in values]
+
+
+def evaluate_batch(columns: Dict[str, Sequence]) -> Dict[str, List[int]]:
+    """Evaluate equally long input columns (keys = ``AchievementInputs``
+    fields; missing columns count as zero) into one list per level key plus
+    ``division_markers`` and ``score``."""
+    size = max((len(values) for values in columns.values()), default=0)
+    zeros = [0] * size
+
+    def column(name):
+        return columns.get(name) or zeros
+
+    curves = rank_curves()
+    special = [set(types or ()) for types in columns.get('special_types') or [()] * size]
+    days = curves.heatmap_days.ranks_for(column('active_days'))
+    slots = _column(column('active_slots'))
+    ttt_played = curves.ttt_rounds_played.ranks_for(column('ttt_rounds_played'))
+    ttt_won = curves.ttt_rounds_won.ranks_for(column('ttt_rounds_won'))
+    ttt_kills = curves.ttt_kills.ranks_for(column('ttt_kills'))
+
+    levels = {
+        'streak': curves.streak.ranks_for(column('longest_streak')).tolist(),
+        'logins': curves.logins.ranks_for(column('total_logins')).tolist(),
+        'time': curves.minutes.ranks_for(column('total_minutes')).tolist(),
+        'heatmap': [
+            HEATMAP_MAX_LEVEL if slot_count >= HEATMAP_SLOT_COUNT else day_level
+            for day_level, slot_count in zip(days, slots)
+        ],
+        'old_member': [int(OLD_MEMBER_ACHIEVEMENT in types) for types in special],
+        'legacy_supporter': [int(LEGACY_SUPPORTER_ACHIEVEMENT in types) for types in special],
+        'division': [get_best_division_from_season_achievements(types) for types in special],
+        'apex': [int(SEASON_APEX_ACHIEVEMENT in types) for types in special],
+        'ttt': list(map(sum, zip(ttt_played, ttt_won, ttt_kills))),
+    }
+    levels['division_markers'] = [
+        sum(1 for achievement_type in types if is_season_division_achievement_type(achievement_type))
+        for types in special
+    ]
+    levels['score'] = list(map(sum, zip(*(
+        levels[key] for key in ACHIEVEMENT_LEVEL_KEYS if key != 'division'
+    ), levels['division_markers'])))
+    return levels
+
+
+def evaluate_achievements(inputs: AchievementInputs) -> Dict[str, int]:
+    """Levels of a single user; same rules and keys as ``evaluate_batch``."""
+    batch = evaluate_batch({field: [value] for field, value in inputs._asdict().items()})
+    return {key: values[0] for key, values in batch.items()}
@@ -0,0 +1,227 @@
+"""``user_achievements``: the engine's output persisted per ``user.id``.
+
+Profile views read one snapshot row instead of re-aggregating
+``login_streak``, the heatmap slot masks on ``time``, ``user_totals``,
+``special_achievements`` and ``ttt_player_stats``. Writers refresh only the
+users they touched, in bulk:
+
+* the ranking tick, once per platform, for the credited users whose inputs
+  changed: a new heatmap slot, a crossed time tier or no row yet
+* login streak updates for the joining user
+* TTT ingest for the event's player
+* admin special-achievement grants/revokes, rank transfers, unlinks and
+  account merges for the users involved
+* the season close for every participant that received markers
+
+``refresh_user_achievements`` runs the refresh on a PyMySQL cursor; the bot's
+asyncmy cursors use the same ``user_achievement_source_queries`` /
+``user_achievement_rows`` / ``USER_ACHIEVEMENTS_UPSERT`` pieces.
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+from app.achievements.engine import evaluate_batch
+from app.utils.database import active_days_from_mask, active_slots_from_mask
+
+__all__ = [
+    'USER_ACHIEVEMENTS_SELECT',
+    'USER_ACHIEVEMENTS_UPSERT',
+    'achievement_levels_from_row',
+    'backfill_user_achievements',
+    'parse_special_types',
+    'refresh_user_achievements',
+    'user_achievement_rows',
+    'user_achievement_source_queries',
+]
+
+#: snapshot columns after ``user_id``, in ``user_achievement_rows`` order
+USER_ACHIEVEMENT_COLUMNS = (
+    'longest_streak',
+    'total_logins',
+    'active_days',
+    'active_slots',
+    'special_types',
+    'streak_level',
+    'logins_level',
+    'time_level',
+    'heatmap_level',
+    'old_member',
+    'legacy_supporter',
+    'division_level',
+    'apex',
+    'ttt_level',
+    'division_markers',
+    'score',
+)
+
+#: engine key per ``*_level``/flag column
+_LEVEL_COLUMNS = {
+    'streak_level': 'streak',
+    'logins_level': 'logins',
+    'time_level': 'time',
+    'heatmap_level': 'heatmap',
+    'old_member': 'old_member',
+    'legacy_supporter': 'legacy_supporter',
+    'division_level': 'division',
+    'apex': 'apex',
+    'ttt_level': 'ttt',
+    'division_markers': 'division_markers',
+    'score': 'score',
+}
+
+USER_ACHIEVEMENTS_UPSERT = f"""
+    INSERT INTO user_achievements (user_id, {', '.join(USER_ACHIEVEMENT_COLUMNS)})
+    VALUES ({', '.join(['%s'] * (len(USER_ACHIEVEMENT_COLUMNS) + 1))})
+    ON DUPLICATE KEY UPDATE
+        {', '.join(f'{column} = VALUES({column})' for column in USER_ACHIEVEMENT_COLUMNS)}
+"""
+
+#: select list for readers joining ``user_achievements ua``; parse the
+#: result with ``achievement_levels_from_row``
+USER_ACHIEVEMENTS_SELECT = ", ".join(f"ua.{column}" for column in USER_ACHIEVEMENT_COLUMNS)
+
+
+def _in_clause(column: str, user_ids: Optional[List[int]]) -> Tuple[str, list]:
+    if user_ids is None:
+        return "", []
+    return f"WHERE {column} IN ({','.join(['%s'] * len(user_ids))})", list(user_ids)
+
+
+def user_achievement_source_queries(user_ids: Optional[Iterable[int]] = None) -> List[Tuple[str, tuple]]:
+    """(sql, params) for the engine inputs of ``user_ids`` (every user when
+    None): one row per user, then one (user_id, achievement_type) row per
+    special achievement of any linked platform identity."""
+    ids = None if user_ids is None else sorted({int(user_id) for user_id in user_ids})
+    identity_filter, identity_params = _in_clause("ui.user_id", ids)
+    user_filter, user_params = _in_clause("u.id", ids)
+    sources = f"""
+        SELECT
+            u.id,
+            COALESCE(ut.total_time, 0),
+            ls.longest_streak,
+            ls.total_logins,
+            am.active_slot_mask,
+            COALESCE(ttt.rounds_played, 0),
+            COALESCE(ttt.rounds_won, 0),
+            COALESCE(ttt.kills, 0)
+        FROM user u
+        LEFT JOIN user_totals ut ON ut.user_id = u.id
+        LEFT JOIN (
+            SELECT ui.user_id, MAX(ls.longest_streak) AS longest_streak, SUM(ls.logins) AS total_logins
+            FROM login_streak ls
+            INNER JOIN user_identity ui ON ui.platform = ls.platform AND ui.platform_uid = ls.platform_uid
+            {identity_filter}
+            GROUP BY ui.user_id
+        ) ls ON ls.user_id = u.id
+        LEFT JOIN (
+            SELECT ui.user_id, BIT_OR(t.active_slot_mask) AS active_slot_mask
+            FROM time t
+            INNER JOIN user_identity ui ON ui.platform = t.platform AND ui.platform_uid = t.platform_uid
+            {identity_filter}
+            GROUP BY ui.user_id
+        ) am ON am.user_id = u.id
+        LEFT JOIN ttt_player_stats ttt ON ttt.steam_id = u.steam_id
+        {user_filter}
+    """
+    specials = f"""
+        SELECT ui.user_id, sa.achievement_type
+        FROM special_achievements sa
+        INNER JOIN user_identity ui ON ui.platform = sa.platform AND ui.platform_uid = sa.platform_id
+        {identity_filter}
+    """
+    return [
+        (sources, tuple(identity_params * 2 + user_params) or None),
+        (specials, tuple(identity_params) or None),
+    ]
+
+
+def user_achievement_rows(source_rows, special_rows) -> List[tuple]:
+    """Evaluate the fetched inputs as one engine batch into
+    ``USER_ACHIEVEMENTS_UPSERT`` parameter tuples."""
+    rows = list(source_rows or [])
+    if not rows:
+        return []
+    special_by_user = {}
+    for user_id, achievement_type in special_rows or []:
+        special_by_user.setdefault(user_id, set()).add(int(achievement_type))
+
+    (
+        user_ids, total_minutes, longest_streaks, total_logins, slot_masks,
+        ttt_rounds_played, ttt_rounds_won, ttt_kills,
+    ) = zip(*rows)
+    active_slots = [active_slots_from_mask(mask) for mask in slot_masks]
+    active_days = [active_days_from_mask(mask) for mask in slot_masks]
+    special_types = [special_by_user.get(user_id, set()) for user_id in user_ids]
+    levels = evaluate_batch({
+        'longest_streak': longest_streaks,
+        'total_logins': total_logins,
+        'total_minutes': total_minutes,
+        'active_days': active_days,
+        'active_slots': active_slots,
+        'special_types': special_types,
+        'ttt_rounds_played': ttt_rounds_played,
+        'ttt_rounds_won': ttt_rounds_won,
+        'ttt_kills': ttt_kills,
+    })
+    return [
+        (
+            user_id,
+            int(longest_streaks[index] or 0),
+            int(total_logins[index] or 0),
+            active_days[index],
+            active_slots[index],
+            ",".join(str(achievement_type) for achievement_type in sorted(special_types[index])),
+            *(levels[key][index] for key in _LEVEL_COLUMNS.values()),
+        )
+        for index, user_id in enumerate(user_ids)
+    ]
+
+
+def refresh_user_achievements(cursor, user_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute the snapshot of ``user_ids`` (all users when None) on a
+    PyMySQL cursor, inside the caller's transaction."""
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+    results = []
+    for sql, params in user_achievement_source_queries(user_ids):
+        cursor.execute(sql, params)
+        results.append(cursor.fetchall())
+    rows = user_achievement_rows(*results)
+    if rows:
+        cursor.executemany(USER_ACHIEVEMENTS_UPSERT, rows)
+    return len(rows)
+
+
+def backfill_user_achievements(cursor) -> int:
+    """Refresh the users without a snapshot row: all of them right after
+    the ``user_achievements`` migration, none on later deploys. Run by
+    ``migrate.py`` once the schema is at the latest version."""
+    cursor.execute("""
+        SELECT u.id
+        FROM user u
+        LEFT JOIN user_achievements ua ON ua.user_id = u.id
+        WHERE ua.user_id IS NULL
+    """)
+    user_ids = [row[0] for row in cursor.fetchall()]
+    return refresh_user_achievements(cursor, user_ids)
+
+
+def parse_special_types(value: Optional[str]) -> List[int]:
+    return [int(part) for part in (value or "").split(",") if part]
+
+
+def achievement_levels_from_row(row) -> dict:
+    """Snapshot columns (``USER_ACHIEVEMENTS_SELECT`` order) as a dict with
+    the engine's level keys; a missing snapshot reads as nothing earned."""
+    values = dict(zip(USER_ACHIEVEMENT_COLUMNS, row or ()))
+    levels = {key: int(values.get(column) or 0) for column, key in _LEVEL_COLUMNS.items()}
+    levels.update({
+        'longest_streak': int(values.get('longest_streak') or 0),
+        'total_logins': int(values.get('total_logins') or 0),
+        'active_days': int(values.get('active_days') or 0),
+        'active_slots': int(values.get('active_slots') or 0),
+        'special_types': parse_special_types(values.get('special_types')),
+    })
+    return levels
@@ -3,12 +3,21 @@ from datetime import datetime
 
 from flask import Blueprint, jsonify, request, session
 
+from app.achievements import refresh_user_achievements
 from app.config import Config
 from app.utils.database import (
     DatabaseManager,
+    PERIOD_TIME_COLUMNS,
+    current_epoch_sql,
     get_ttt_season_reward_item_uuid,
     get_ttt_season_reward_key,
+    period_epoch_column,
+    period_minutes_sql,
+    time_merge_query,
+    user_identity_sync_statements,
+    user_totals_refresh_query,
 )
+from app.utils.name_search import id_search_subqueries, name_index_statements, name_search_filter
 from app.utils.security import admin_required, csrf_required, handle_errors
 from app.utils.steam import steamid64_to_steam2
 from app.utils.valkey_manager import ValkeyManager
@@ -133,17 +142,11 @@ def _admin_error(db, action, target_identifiers, summary, message, status_code=4
 
 
 def _recalculate_user_rank(db, user_id):
-    db.cursor.execute("""
-        SELECT
-            COALESCE(SUM(CASE WHEN t.platform = 'discord' THEN t.total_time ELSE 0 END), 0) +
-            COALESCE(SUM(CASE WHEN t.platform = 'teamspeak' THEN t.total_time ELSE 0 END), 0),
-            COALESCE(SUM(CASE WHEN t.platform = 'discord' THEN t.season_time ELSE 0 END), 0) +
-            COALESCE(SUM(CASE WHEN t.platform = 'teamspeak' THEN t.season_time ELSE 0 END), 0)
-        FROM user u
-        LEFT JOIN time t ON
-            (t.platform = 'discord' AND t.platform_uid = u.discord_id) OR
-            (t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id)
-        WHERE u.id = %s
+    db.cursor.execute(user_totals_refresh_query(1), (user_id,))
+    db.cursor.execute(f"""
+        SELECT total_time, {period_minutes_sql('user_totals', 'season_time')}
+        FROM user_totals
+        WHERE user_id = %s
     """, (user_id,))
     total_time, season_time = db.cursor.fetchone() or (0, 0)
     level = Config.get_level_for_minutes(total_time or 0)
@@ -156,25 +159,13 @@ def _recalculate_user_rank(db, user_id):
     return {"level": level, "division": division}
 
 
+def _sync_user_identity(db, *user_ids):
+    for statement, params in user_identity_sync_statements(user_ids):
+        db.cursor.execute(statement, params)
+
+
 def _move_time(db, platform, source_uid, target_uid):
-    db.cursor.execute("""
-        INSERT INTO time (
-            platform_uid, platform, total_time, daily_time, weekly_time,
-            monthly_time, season_time, last_update
-        )
-        SELECT
-            %s, platform, total_time, daily_time, weekly_time,
-            monthly_time, season_time, last_update
-        FROM time src
-        WHERE src.platform = %s AND src.platform_uid = %s
-        ON DUPLICATE KEY UPDATE
-            time.total_time = time.total_time + VALUES(total_time),
-            time.daily_time = time.daily_time + VALUES(daily_time),
-            time.weekly_time = time.weekly_time + VALUES(weekly_time),
-            time.monthly_time = time.monthly_time + VALUES(monthly_time),
-            time.season_time = time.season_time + VALUES(season_time),
-            time.last_update = GREATEST(time.last_update, VALUES(last_update))
-    """, (target_uid, platform, source_uid))
+    db.cursor.execute(time_merge_query(), (target_uid, platform, source_uid))
     db.cursor.execute(
         "DELETE FROM time WHERE platform = %s AND platform_uid = %s",
         (platform, source_uid),
@@ -254,22 +245,26 @@ def search_players():
         return jsonify({"players": []})
 
     db = DatabaseManager()
-    like = f"%{q}%"
-    db.cursor.execute("""
+    name_filter, name_params = name_search_filter(q, "user")
+    lookups = [(f"SELECT id, 0 AS by_name FROM user WHERE {name_filter}", name_params)]
+    lookups += [
+        (subquery.replace("SELECT id", "SELECT id, 1 AS by_name", 1), params)
+        for subquery, params in id_search_subqueries(q)
+    ]
+    db.cursor.execute(f"""
         SELECT
-            id, steam_id, discord_id, teamspeak_id, COALESCE(name, 'Unknown'),
-            COALESCE(level, 1), COALESCE(division, 1),
-            COALESCE(ranking_disabled, 0)
-        FROM user
-        WHERE name LIKE %s
-           OR CAST(steam_id AS CHAR) LIKE %s
-           OR discord_id LIKE %s
-           OR teamspeak_id LIKE %s
-        ORDER BY
-            CASE WHEN name LIKE %s THEN 0 ELSE 1 END,
-            id DESC
+            u.id, u.steam_id, u.discord_id, u.teamspeak_id, COALESCE(u.name, 'Unknown'),
+            COALESCE(u.level, 1), COALESCE(u.division, 1),
+            COALESCE(u.ranking_disabled, 0)
+        FROM (
+            SELECT id, MIN(by_name) AS by_name
+            FROM ({" UNION ALL ".join(sql for sql, _ in lookups)}) AS hits
+            GROUP BY id
+        ) AS matches
+        JOIN user u ON u.id = matches.id
+        ORDER BY matches.by_name, u.id DESC
         LIMIT 20
-    """, (like, like, like, like, like))
+    """, tuple(param for _, params in lookups for param in params))
     rows = db.cursor.fetchall()
     db.close()
 
@@ -335,8 +330,11 @@ def get_player_detail(user_id):
         if not platform_uid:
             platform_times[platform] = None
             continue
-        db.cursor.execute("""
-            SELECT total_time, daily_time, weekly_time, monthly_time, season_time, last_update
+        db.cursor.execute(f"""
+            SELECT
+                total_time,
+                {', '.join(period_minutes_sql('time', column) for column in PERIOD_TIME_COLUMNS)},
+                last_update
             FROM time
             WHERE platform = %s AND platform_uid = %s
         """, (platform, platform_uid))
@@ -462,13 +460,10 @@ def update_player_time(user_id):
         if error:
             return _admin_error(db, action, target_identifiers, {}, error, status)
 
-        db.cursor.execute("""
+        db.cursor.execute(f"""
             SELECT
                 COALESCE(total_time, 0),
-                COALESCE(daily_time, 0),
-                COALESCE(weekly_time, 0),
-                COALESCE(monthly_time, 0),
-                COALESCE(season_time, 0)
+                {', '.join(f"COALESCE({period_minutes_sql('time', column)}, 0)" for column in PERIOD_TIME_COLUMNS)}
             FROM time
             WHERE platform = %s AND platform_uid = %s
             FOR UPDATE
@@ -485,18 +480,19 @@ def update_player_time(user_id):
         next_weekly = min(old_time["weekly_time"], total_time)
         next_monthly = min(old_time["monthly_time"], total_time)
 
-        db.cursor.execute("""
+        epoch_columns = [period_epoch_column(column) for column in PERIOD_TIME_COLUMNS]
+        db.cursor.execute(f"""
             INSERT INTO time (
-                platform_uid, platform, total_time, daily_time, weekly_time,
-                monthly_time, season_time, last_update
+                platform_uid, platform, total_time, {', '.join(PERIOD_TIME_COLUMNS)},
+                {', '.join(epoch_columns)}, last_update
+            )
+            VALUES (
+                %s, %s, %s, %s, %s, %s, %s,
+                {', '.join(current_epoch_sql(column) for column in PERIOD_TIME_COLUMNS)}, CURRENT_TIMESTAMP
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
             ON DUPLICATE KEY UPDATE
                 total_time = VALUES(total_time),
-                daily_time = VALUES(daily_time),
-                weekly_time = VALUES(weekly_time),
-                monthly_time = VALUES(monthly_time),
-                season_time = VALUES(season_time),
+                {', '.join(f"{column} = VALUES({column})" for column in (*PERIOD_TIME_COLUMNS, *epoch_columns))},
                 last_update = CURRENT_TIMESTAMP
         """, (
             platform_uid,
@@ -508,6 +504,7 @@ def update_player_time(user_id):
             season_time,
         ))
         rank = _recalculate_user_rank(db, user["id"])
+        refresh_user_achievements(db.cursor, [user["id"]])
         summary = {
             "platform_uid": platform_uid,
             "old_time": old_time,
@@ -522,6 +519,7 @@ def update_player_time(user_id):
             "reason": reason,
         }
         _write_audit(db, action, target_identifiers, summary, "success")
+        valkey_manager.invalidate_leaderboards()
         return jsonify({"ok": True, **summary})
     except Exception:
         db.conn.rollback()
@@ -566,6 +564,7 @@ def update_player_join_date(user_id):
             "reason": reason,
         }
         _write_audit(db, action, target_identifiers, summary, "success")
+        valkey_manager.touch_profiles(user["id"])
         return jsonify({"ok": True, **summary})
     except Exception:
         db.conn.rollback()
@@ -629,6 +628,8 @@ def _special_achievement_request(action):
                 """, (platform, platform_uid, achievement_type))
             changed_key = "deleted"
             changed = existing is not None
+        if changed:
+            refresh_user_achievements(db.cursor, [user["id"]])
 
         summary = {
             "platform_uid": platform_uid,
@@ -638,6 +639,8 @@ def _special_achievement_request(action):
             "reason": reason,
         }
         _write_audit(db, action, target_identifiers, summary, "success")
+        if changed:
+            valkey_manager.touch_profiles(user["id"])
         return jsonify({"ok": True, **summary})
     except Exception:
         db.conn.rollback()
@@ -715,6 +718,9 @@ def transfer_ranking():
             moved.append({"platform": platform, "source_uid": source_uid, "target_uid": target_uid})
 
         target_rank = _recalculate_user_rank(db, target["id"])
+        db.cursor.execute(user_totals_refresh_query(1), (source["id"],))
+        _sync_user_identity(db, source["id"], target["id"])
+        refresh_user_achievements(db.cursor, [source["id"], target["id"]])
         db.cursor.execute("""
             UPDATE user
             SET ranking_disabled = 1,
@@ -725,6 +731,7 @@ def transfer_ranking():
 
         summary = {"moved": moved, "target_rank": target_rank, "reason": reason}
         _write_audit(db, action, target_identifiers, summary, "success")
+        valkey_manager.invalidate_leaderboards()
         return jsonify({"ok": True, **summary})
     except Exception:
         db.conn.rollback()
@@ -776,8 +783,8 @@ def unlink_steam_platform():
         if db.cursor.fetchone():
             return _admin_error(db, action, target_identifiers, {}, f"{platform} id already exists on another user")
 
-        db.cursor.execute("""
-            SELECT COALESCE(total_time, 0), COALESCE(season_time, 0)
+        db.cursor.execute(f"""
+            SELECT COALESCE(total_time, 0), COALESCE({period_minutes_sql('time', 'season_time')}, 0)
             FROM time
             WHERE platform = %s AND platform_uid = %s
         """, (platform, platform_uid))
@@ -790,6 +797,8 @@ def unlink_steam_platform():
             VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
         """, (platform_uid, user["name"], new_level, new_division))
         new_user_id = db.cursor.lastrowid
+        for statement, params in name_index_statements(new_user_id, user["name"]):
+            db.cursor.execute(statement, params)
 
         remaining_platforms = [
             existing_platform
@@ -817,7 +826,10 @@ def unlink_steam_platform():
             reason[:255],
             user["id"],
         ))
+        _sync_user_identity(db, user["id"], new_user_id)
         original_rank = _recalculate_user_rank(db, user["id"])
+        db.cursor.execute(user_totals_refresh_query(1), (new_user_id,))
+        refresh_user_achievements(db.cursor, [user["id"], new_user_id])
 
         summary = {
             "new_user_id": new_user_id,
@@ -828,6 +840,7 @@ def unlink_steam_platform():
             "reason": reason,
         }
         _write_audit(db, action, target_identifiers, summary, "success")
+        valkey_manager.invalidate_leaderboards()
         return jsonify({"ok": True, **summary})
     except Exception:
         db.conn.rollback()
@@ -904,6 +917,7 @@ def assign_ignore_role():
         """, (reason[:255], user_id))
         summary["ranking_disabled"] = True
         _write_audit(db, action, target_identifiers, summary, result_status)
+        valkey_manager.invalidate_leaderboards()
         return jsonify({"ok": True, **summary})
     finally:
         db.close()
@@ -0,0 +1,105 @@
+"""Keyset (cursor) pages for the ranking routes.
+
+Rows are ordered by ``(minutes DESC, user id DESC)`` and a cursor carries the
+``(minutes, user id)`` of the row it continues from, so every page is an index
+range scan on ``user_totals (<period>_epoch, <period>_time, user_id)`` (or
+``(total_time, user_id)``) no matter how deep it is. The cursor also carries
+that row's ``RANK()`` and its offset within its tie group, so the page's
+ranks continue from it without counting the rows above. Only a ``prev`` page
+whose top tie group continues above it counts that group's remaining rows,
+an index range of the tie itself.
+"""
+
+from app.api.request_args import encode_ranking_cursor
+from app.utils.database import DatabaseManager, current_period_filter
+from app.utils.name_search import name_search_filter
+
+
+def ranking_page_from_cursor(column, cursor, limit, search):
+    """Return ``(rows, next_cursor, prev_cursor)`` where rows are shaped like
+    ``_ranking_page_from_db`` rows: (id, name, level, division, minutes,
+    last_update, rank, discord_uid, teamspeak_uid)."""
+    filters = f"""
+        WHERE COALESCE(user.ranking_disabled, 0) = 0
+            AND {current_period_filter('user_totals', column)}
+            AND user_totals.{column} > 0
+    """
+    params = []
+    if search:
+        name_filter, params = name_search_filter(search)
+        filters += f" AND {name_filter}"
+
+    backwards = cursor.direction == "prev"
+    query = f"""
+        SELECT
+            user.id,
+            COALESCE(user.name, 'Unknown') AS name,
+            COALESCE(user.level, 1) AS level,
+            COALESCE(user.division, 1) AS division,
+            user_totals.{column} AS minutes,
+            COALESCE(user_totals.last_seen, '1970-01-01 00:00:00') AS last_update,
+            user.discord_id AS discord_uid,
+            user.teamspeak_id AS teamspeak_uid
+        FROM user_totals
+        JOIN user ON user.id = user_totals.user_id
+        {filters}
+    """
+    page_params = list(params)
+    if cursor.minutes is not None:
+        op = ">" if backwards else "<"
+        query += f"""
+            AND (user_totals.{column} {op} %s
+                 OR (user_totals.{column} = %s AND user_totals.user_id {op} %s))
+        """
+        page_params += [cursor.minutes, cursor.minutes, cursor.user_id]
+    order = "ASC" if backwards else "DESC"
+    query += f" ORDER BY user_totals.{column} {order}, user_totals.user_id {order} LIMIT %s"
+    page_params.append(limit + 1)
+
+    db = DatabaseManager()
+    try:
+        rows = db.execute_query(query, tuple(page_params))
+        has_more = len(rows) > limit
+        beyond = rows[limit] if has_more else None
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+        if not rows:
+            return [], None, None
+
+        # row number (1-based position) of the cursor row; 0 above the top
+        anchor = cursor.rank + cursor.tie if cursor.minutes is not None else 0
+        first_number = anchor - len(rows) if backwards else anchor + 1
+        top_ties = 0
+        if backwards and beyond is not None and beyond[4] == rows[0][4]:
+            # the top tie group starts above this page
+            top_ties = db.execute_query(f"""
+                SELECT COUNT(*)
+                FROM user_totals
+                JOIN user ON user.id = user_totals.user_id
+                {filters}
+                    AND user_totals.{column} = %s AND user_totals.user_id > %s
+            """, tuple(params + [rows[0][4], rows[0][0]]))[0][0]
+    finally:
+        db.close()
+
+    result = []
+    rank = None
+    for index, row in enumerate(rows):
+        number = first_number + index
+        if cursor.minutes is not None and row[4] == cursor.minutes:
+            rank = cursor.rank
+        elif index == 0:
+            rank = number - top_ties
+        elif row[4] < rows[index - 1][4]:
+            rank = number
+        result.append((*row[:6], rank, *row[6:]))
+
+    first, last = result[0], result[-1]
+    more_after = has_more if not backwards else True
+    more_before = has_more if backwards else cursor.minutes is not None
+    next_cursor = (encode_ranking_cursor("next", last[4], last[0], last[6], first_number + len(rows) - 1 - last[6])
+                   if more_after else None)
+    prev_cursor = (encode_ranking_cursor("prev", first[4], first[0], first[6], first_number - first[6])
+                   if more_before else None)
+    return result, next_cursor, prev_cursor
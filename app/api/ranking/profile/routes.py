@@ -1,7 +1,8 @@
 from flask import Blueprint, jsonify, request
 from app.config import Config
 from app.api.request_args import positive_int_arg
-from app.utils.database import DatabaseManager, get_best_division_from_season_achievements
+from app.utils.database import DatabaseManager, get_best_division_from_season_achievements, period_minutes_sql
+from app.utils.response_cache import conditional_response
 from app.utils.security import limiter, handle_errors
 
 ranking_profile_bp = Blueprint('ranking_profile', __name__)
@@ -9,6 +10,7 @@ ranking_profile_bp = Blueprint('ranking_profile', __name__)
 @ranking_profile_bp.route('/api/ranking/profile', methods=['GET'])
 @handle_errors
 @limiter.limit("60 per minute")
+@conditional_response(user_arg='id')
 def get_ranking():
     try:
         user_id = positive_int_arg(request.args, 'id', 1)
@@ -20,36 +22,36 @@ def get_ranking():
     
     db = DatabaseManager()
     
-    query = """
+    query = f"""
     WITH user_stats AS (
         SELECT 
-            COUNT(DISTINCT u.id) as total_users,
-            AVG(COALESCE(d.total_time, 0) + COALESCE(t.total_time, 0)) as mean_time,
-            MAX(COALESCE(d.total_time, 0) + COALESCE(t.total_time, 0)) as best_time
-        FROM user u
-        LEFT JOIN time d ON d.platform = 'discord' AND d.platform_uid = u.discord_id
-        LEFT JOIN time t ON t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id
+            COUNT(*) as total_users,
+            AVG(ut.total_time) as mean_time,
+            MAX(ut.total_time) as best_time
+        FROM user_totals ut
+        JOIN user u ON u.id = ut.user_id
         WHERE COALESCE(u.ranking_disabled, 0) = 0
-            AND COALESCE(d.total_time, 0) + COALESCE(t.total_time, 0) > 0
+            AND ut.total_time > 0
     ),
     ranked_users AS (
         SELECT 
             u.id,
-            RANK() OVER (ORDER BY (COALESCE(d.total_time, 0) + COALESCE(t.total_time, 0)) DESC) as rank,
+            RANK() OVER (ORDER BY COALESCE(ut.total_time, 0) DESC) as rank,
             COALESCE(u.name, 'Unknown') as name,
             COALESCE(u.level, 1) as level,
             COALESCE(u.division, 1) as division,
-            COALESCE(d.total_time, 0) + COALESCE(t.total_time, 0) as total_time,
-            COALESCE(d.monthly_time, 0) + COALESCE(t.monthly_time, 0) as monthly_time,
-            COALESCE(d.weekly_time, 0) + COALESCE(t.weekly_time, 0) as weekly_time,
-            COALESCE(d.season_time, 0) + COALESCE(t.season_time, 0) as season_time,
-            COALESCE(d.daily_time, 0) + COALESCE(t.daily_time, 0) as daily_time,
+            COALESCE(ut.total_time, 0) as total_time,
+            COALESCE({period_minutes_sql('ut', 'monthly_time')}, 0) as monthly_time,
+            COALESCE({period_minutes_sql('ut', 'weekly_time')}, 0) as weekly_time,
+            COALESCE({period_minutes_sql('ut', 'season_time')}, 0) as season_time,
+            COALESCE({period_minutes_sql('ut', 'daily_time')}, 0) as daily_time,
             COALESCE(d.total_time, 0) as discord_time,
             COALESCE(t.total_time, 0) as teamspeak_time,
             u.discord_id,
             u.teamspeak_id,
             u.created_at
         FROM user u
+        LEFT JOIN user_totals ut ON ut.user_id = u.id
         LEFT JOIN time d ON d.platform = 'discord' AND d.platform_uid = u.discord_id
         LEFT JOIN time t ON t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id
         WHERE COALESCE(u.ranking_disabled, 0) = 0
@@ -103,18 +105,10 @@ def get_ranking():
         h.day_of_week,
         h.time_category,
         SUM(h.activity_minutes) as total_minutes
-    FROM user u
-    LEFT JOIN (
-        SELECT 
-            day_of_week,
-            time_category,
-            platform_uid,
-            platform,
-            activity_minutes
-        FROM activity_heatmap
-        WHERE platform IN ('discord', 'teamspeak')
-    ) h ON (h.platform = 'discord' AND h.platform_uid = u.discord_id)
-            OR (h.platform = 'teamspeak' AND h.platform_uid = u.teamspeak_id)
+    FROM activity_heatmap h
+    INNER JOIN user_identity ui
+        ON ui.platform = h.platform AND ui.platform_uid = h.platform_uid
+    INNER JOIN user u ON u.id = ui.user_id
     WHERE u.id = %s
         AND (u.discord_id IS NOT NULL OR u.teamspeak_id IS NOT NULL)
         AND COALESCE(u.ranking_disabled, 0) = 0
@@ -145,18 +139,17 @@ def get_ranking():
 
     time_to_next_level = 0
     time_to_next_division = 0
-    if level < 25:
+    if level < Config.get_max_level():
         next_level_req = Config.get_level_requirement(level + 1)
         time_to_next_level = max(0, next_level_req - total_time)
     if division < 5:
         next_division_req = Config.get_division_requirement(division + 1)
         time_to_next_division = max(0, next_division_req - season_time)
     elif division == 5:
-        div6_query = """
-        SELECT COUNT(u.id), MIN(COALESCE(d.season_time, 0) + COALESCE(t.season_time, 0))
+        div6_query = f"""
+        SELECT COUNT(u.id), MIN(COALESCE({period_minutes_sql('ut', 'season_time')}, 0))
         FROM user u
-        LEFT JOIN time d ON d.platform = 'discord' AND d.platform_uid = u.discord_id
-        LEFT JOIN time t ON t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id
+        LEFT JOIN user_totals ut ON ut.user_id = u.id
         WHERE u.division = 6
             AND COALESCE(u.ranking_disabled, 0) = 0
         """
@@ -1,8 +1,12 @@
 from flask import Blueprint, jsonify, request
 from app.utils.database import DatabaseManager
 from app.utils.valkey_manager import ValkeyManager
+from app.utils.response_cache import conditional_response
 from app.utils.security import limiter, handle_errors
-from app.api.request_args import clamp_page_to_total, pages_for, ranking_request_args
+from app.api.ranking.keyset import ranking_page_from_cursor
+from app.api.request_args import clamp_page_to_total, pages_for, ranking_cursor_arg, ranking_request_args
+from app.utils.leaderboard import leaderboard_size, read_leaderboard_rows
+from app.utils.name_search import name_search_filter
 from datetime import datetime
 
 valkey_manager = ValkeyManager()
@@ -11,6 +15,7 @@ ranking_bp = Blueprint('ranking', __name__)
 @ranking_bp.route('/api/ranking', methods=['GET'])
 @handle_errors
 @limiter.limit("60 per minute")
+@conditional_response(presence=True)
 def get_ranking():
     try:
         page, limit, search = ranking_request_args(
@@ -18,68 +23,30 @@ def get_ranking():
             default_limit=10,
             max_limit=50,
         )
+        cursor = ranking_cursor_arg(request.args)
     except ValueError as error:
         return jsonify({'error': str(error)}), 400
-    
-    db = DatabaseManager()
-    
 
     discord_users = valkey_manager.get_online_users('discord')
     teamspeak_users = valkey_manager.get_online_users('teamspeak')
     online_users = set(discord_users) | set(teamspeak_users)
-    
-    count_query = """
-        SELECT COUNT(*) 
-        FROM user
-        LEFT JOIN time AS discord_time 
-            ON user.discord_id = discord_time.platform_uid 
-            AND discord_time.platform = 'discord'
-        LEFT JOIN time AS teamspeak_time 
-            ON user.teamspeak_id = teamspeak_time.platform_uid 
-            AND teamspeak_time.platform = 'teamspeak'
-        WHERE COALESCE(user.ranking_disabled, 0) = 0
-            AND (COALESCE(discord_time.total_time, 0) + COALESCE(teamspeak_time.total_time, 0)) > 0
-    """
-
-    query = """
-        SELECT 
-            user.id,
-            COALESCE(user.name, 'Unknown') AS name,
-            COALESCE(user.level, 1) AS level,
-            COALESCE(user.division, 1) AS division,
-            (COALESCE(discord_time.total_time, 0) + COALESCE(teamspeak_time.total_time, 0)) AS minutes,
-            GREATEST(
-                COALESCE(discord_time.last_update, '1970-01-01'), 
-                COALESCE(teamspeak_time.last_update, '1970-01-01')
-            ) AS last_update,
-            RANK() OVER (ORDER BY (COALESCE(discord_time.total_time, 0) + COALESCE(teamspeak_time.total_time, 0)) DESC) AS rank,
-            user.discord_id AS discord_uid,
-            user.teamspeak_id AS teamspeak_uid
-        FROM user
-        LEFT JOIN time AS discord_time 
-            ON user.discord_id = discord_time.platform_uid 
-            AND discord_time.platform = 'discord'
-        LEFT JOIN time AS teamspeak_time 
-            ON user.teamspeak_id = teamspeak_time.platform_uid 
-            AND teamspeak_time.platform = 'teamspeak'
-        WHERE COALESCE(user.ranking_disabled, 0) = 0
-            AND (COALESCE(discord_time.total_time, 0) + COALESCE(teamspeak_time.total_time, 0)) > 0
-        """
-    
-    params = []
-    if search:
-        count_query += " AND name LIKE %s"
-        query += " AND name LIKE %s"
-        params.append(f"%{search}%")
-    total_count = db.execute_query(count_query, tuple(params) if search else None)[0][0]
-    page = clamp_page_to_total(page, total_count, limit)
-    offset = (page - 1) * limit
 
-    query += " ORDER BY minutes DESC LIMIT %s OFFSET %s"
-    params.extend([limit, offset])
-    result = db.execute_query(query, params)
+    # Unfiltered pages come from the tick-maintained Valkey leaderboard; name
+    # search (and an unavailable board) still goes to MariaDB. An explicit
+    # ``cursor`` switches to keyset pages over user_totals.
+    result = None
+    total_count = None
+    if cursor is not None:
+        result, next_cursor, prev_cursor = ranking_page_from_cursor(
+            'total_time', cursor, limit, search)
+    elif not search:
+        total_count = leaderboard_size(valkey_manager.valkey, 'total')
+    if total_count is not None:
+        page = clamp_page_to_total(page, total_count, limit)
+        result = read_leaderboard_rows(valkey_manager.valkey, 'total', (page - 1) * limit, limit)
+    if result is None:
+        total_count, page, result = _ranking_page_from_db(page, limit, search)
     current_time = datetime.now()
-    db.close()
 
     players = []
     for row in result:
@@ -118,6 +85,14 @@ def get_ranking():
             'rank': row[6]
         })
     
+    if cursor is not None:
+        return jsonify({
+            'players': players,
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
+        })
+
     return jsonify({
         'players': players,
         'total': total_count,
@@ -125,3 +100,46 @@ def get_ranking():
         'pages': pages_for(total_count, limit),
         'limit': limit
     })
+
+
+def _ranking_page_from_db(page, limit, search):
+    count_query = """
+        SELECT COUNT(*)
+        FROM user_totals
+        JOIN user ON user.id = user_totals.user_id
+        WHERE COALESCE(user.ranking_disabled, 0) = 0
+            AND user_totals.total_time > 0
+    """
+
+    query = """
+        SELECT
+            user.id,
+            COALESCE(user.name, 'Unknown') AS name,
+            COALESCE(user.level, 1) AS level,
+            COALESCE(user.division, 1) AS division,
+            user_totals.total_time AS minutes,
+            COALESCE(user_totals.last_seen, '1970-01-01 00:00:00') AS last_update,
+            RANK() OVER (ORDER BY user_totals.total_time DESC) AS rank,
+            user.discord_id AS discord_uid,
+            user.teamspeak_id AS teamspeak_uid
+        FROM user_totals
+        JOIN user ON user.id = user_totals.user_id
+        WHERE COALESCE(user.ranking_disabled, 0) = 0
+            AND user_totals.total_time > 0
+        """
+
+    db = DatabaseManager()
+    params = []
+    if search:
+        name_filter, params = name_search_filter(search)
+        count_query += f" AND {name_filter}"
+        query += f" AND {name_filter}"
+    total_count = db.execute_query(count_query, tuple(params) if search else None)[0][0]
+    page = clamp_page_to_total(page, total_count, limit)
+    offset = (page - 1) * limit
+
+    query += " ORDER BY minutes DESC LIMIT %s OFFSET %s"
+    params.extend([limit, offset])
+    result = db.execute_query(query, params)
+    db.close()
+    return total_count, page, result
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify
 from app.utils.database import DatabaseManager
 from app.utils.valkey_manager import ValkeyManager
+from app.utils.response_cache import cached_response, conditional_response
 from app.utils.security import limiter, handle_errors
 
 valkey_manager = ValkeyManager()
@@ -10,25 +11,20 @@ ranking_stats_bp = Blueprint('ranking_stats', __name__)
 @ranking_stats_bp.route('/api/ranking/stats', methods=['GET'])
 @handle_errors
 @limiter.limit("60 per minute")
+@conditional_response()
+@cached_response
 def get_stats():
     db = DatabaseManager()
     users_time_query = """
     SELECT 
         COUNT(DISTINCT user.id) as total_users,
-        COALESCE(SUM(discord_time.total_time), 0) + 
-        COALESCE(SUM(teamspeak_time.total_time), 0) as total_time
-    FROM user
-    LEFT JOIN time AS discord_time 
-        ON user.discord_id = discord_time.platform_uid 
-        AND discord_time.platform = 'discord'
-    LEFT JOIN time AS teamspeak_time 
-        ON user.teamspeak_id = teamspeak_time.platform_uid 
-        AND teamspeak_time.platform = 'teamspeak'
+        COALESCE(SUM(time.total_time), 0) as total_time
+    FROM time
+    INNER JOIN user_identity
+        ON user_identity.platform = time.platform
+        AND user_identity.platform_uid = time.platform_uid
+    INNER JOIN user ON user.id = user_identity.user_id
     WHERE COALESCE(user.ranking_disabled, 0) = 0
-        AND (
-            discord_time.platform_uid IS NOT NULL
-            OR teamspeak_time.platform_uid IS NOT NULL
-        )
     """
     
     result = db.execute_query(users_time_query)
@@ -43,9 +39,10 @@ def get_stats():
         day_of_week, 
         SUM(activity_minutes) as total_activity
     FROM activity_heatmap
-    INNER JOIN user u ON
-        (activity_heatmap.platform = 'discord' AND activity_heatmap.platform_uid = u.discord_id) OR
-        (activity_heatmap.platform = 'teamspeak' AND activity_heatmap.platform_uid = u.teamspeak_id)
+    INNER JOIN user_identity ui
+        ON ui.platform = activity_heatmap.platform
+        AND ui.platform_uid = activity_heatmap.platform_uid
+    INNER JOIN user u ON u.id = ui.user_id
     WHERE COALESCE(u.ranking_disabled, 0) = 0
     GROUP BY day_of_week
     ORDER BY total_activity DESC
@@ -62,9 +59,10 @@ def get_stats():
     total_logins_query = """
     SELECT SUM(logins) as total_logins
     FROM login_streak
-    INNER JOIN user u ON
-        (login_streak.platform = 'discord' AND login_streak.platform_uid = u.discord_id) OR
-        (login_streak.platform = 'teamspeak' AND login_streak.platform_uid = u.teamspeak_id)
+    INNER JOIN user_identity ui
+        ON ui.platform = login_streak.platform
+        AND ui.platform_uid = login_streak.platform_uid
+    INNER JOIN user u ON u.id = ui.user_id
     WHERE COALESCE(u.ranking_disabled, 0) = 0
     """
     
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from app.utils.database import DatabaseManager
+from app.utils.response_cache import cached_response, conditional_response
 from app.utils.security import limiter, handle_errors
 
 ranking_usage_bp = Blueprint('ranking_usage', __name__)
@@ -7,6 +8,8 @@ ranking_usage_bp = Blueprint('ranking_usage', __name__)
 @ranking_usage_bp.route('/api/ranking/usage', methods=['GET'])
 @handle_errors
 @limiter.limit("60 per minute")
+@conditional_response()
+@cached_response
 def get_usage():
     period = request.args.get('period', 'daily')
     hours = 24 * 7 if period == 'weekly' else 24
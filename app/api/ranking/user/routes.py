@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify
 from app.utils.database import DatabaseManager
 from app.utils.valkey_manager import ValkeyManager
+from app.utils.response_cache import cached_response, conditional_response
 from app.utils.security import limiter, handle_errors
 
 valkey_manager = ValkeyManager()
@@ -10,6 +11,8 @@ ranking_user_bp = Blueprint('ranking_user', __name__)
 @ranking_user_bp.route('/api/ranking/user', methods=['GET'])
 @handle_errors
 @limiter.limit("60 per minute")
+@conditional_response()
+@cached_response
 def get_stats():
     db = DatabaseManager()
     query = """
@@ -1,4 +1,21 @@
+import base64
+import binascii
+from typing import NamedTuple, Optional
+
 RANKING_SEARCH_MAX_LENGTH = 255
+RANKING_CURSOR_DIRECTIONS = ("next", "prev")
+
+
+class RankingCursor(NamedTuple):
+    """Keyset position in a ranking: rows after (``next``) or before
+    (``prev``) the row with ``minutes``/``user_id``, whose ``RANK()`` is
+    ``rank`` and which is the ``tie``-th (0-based) row of its tie group. An
+    empty ``cursor`` parameter starts at the top (all fields None)."""
+    direction: str
+    minutes: Optional[int] = None
+    user_id: Optional[int] = None
+    rank: Optional[int] = None
+    tie: Optional[int] = None
 
 
 def positive_int_arg(args, name, default, *, max_value=None):
@@ -38,3 +55,28 @@ def pages_for(total_count, limit):
 
 def clamp_page_to_total(page, total_count, limit):
     return min(page, max(1, pages_for(total_count, limit)))
+
+
+def encode_ranking_cursor(direction, minutes, user_id, rank, tie=0):
+    raw = f"{direction}:{int(minutes)}:{int(user_id)}:{int(rank)}:{int(tie)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def ranking_cursor_arg(args, name="cursor"):
+    """Opt-in keyset pagination: None when ``cursor`` is absent, so callers
+    keep the page/limit contract."""
+    if name not in args:
+        return None
+    value = (args.get(name) or "").strip()
+    if not value:
+        return RankingCursor("next")
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        direction, minutes, user_id, rank, tie = raw.split(":")
+        cursor = RankingCursor(direction, int(minutes), int(user_id), int(rank), int(tie))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError(f"{name} is invalid") from exc
+    if (cursor.direction not in RANKING_CURSOR_DIRECTIONS or cursor.minutes < 0 or cursor.user_id < 1
+            or cursor.rank < 1 or cursor.tie < 0):
+        raise ValueError(f"{name} is invalid")
+    return cursor
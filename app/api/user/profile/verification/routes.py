@@ -1,7 +1,12 @@
 import secrets
 
 from flask import Blueprint, jsonify, request, session
-from app.utils.database import DatabaseManager
+from app.achievements import refresh_user_achievements
+from app.utils.database import (
+    DatabaseManager,
+    user_identity_sync_statements,
+    user_totals_refresh_query,
+)
 from app.utils.security import csrf_required, limiter, login_required, generate_verification_code, handle_errors
 from app.utils.valkey_manager import ValkeyManager
 
@@ -200,6 +205,12 @@ def verify_code():
                 or ("Merged with ranking-disabled account" if final_ranking_disabled else None)
             )
             
+            for table in ('user_totals', 'user_identity', 'user_name_trigram', 'user_achievements'):
+                db.cursor.execute(f"""
+                    DELETE x FROM {table} x
+                    JOIN user u ON u.id = x.user_id
+                    WHERE u.id != %s AND u.{platform}_id = %s
+                """, (primary_id, platform_id))
             db.cursor.execute(f"""
                 DELETE FROM user
                 WHERE id != %s AND {platform}_id = %s
@@ -228,11 +239,16 @@ def verify_code():
                   int(final_ranking_disabled), int(final_ranking_disabled),
                   final_ranking_disabled_at, final_ranking_disabled_reason,
                   primary_id))
+            for statement, params in user_identity_sync_statements([primary_id]):
+                db.cursor.execute(statement, params)
+            db.cursor.execute(user_totals_refresh_query(1), (primary_id,))
+            refresh_user_achievements(db.cursor, [primary_id])
 
         db.conn.commit()
         db.close()
 
         valkey_manager.publish_command(platform, 'check_ranks', platform_id=platform_id)
+        valkey_manager.invalidate_leaderboards()
         
     except Exception as e:
         db.conn.rollback()
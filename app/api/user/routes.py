@@ -1,9 +1,11 @@
 from flask import Blueprint, jsonify, session
+from app.achievements import parse_special_types
 from app.config import Config
 from app.utils.database import (
     DatabaseManager,
     get_best_division_from_season_achievements,
     parse_ttt_season_skin_unlockable_type,
+    period_minutes_sql,
 )
 from app.utils.security import login_required, handle_errors
 from app.utils.security import limiter
@@ -22,7 +24,7 @@ def get_connected_users():
     
     db = DatabaseManager()
 
-    query = """
+    query = f"""
         SELECT 
             u.id,
             u.name, 
@@ -34,23 +36,16 @@ def get_connected_users():
             u.teamspeak_channel,
             u.discord_moveable,
             u.teamspeak_moveable,
-            COALESCE(SUM(CASE WHEN t.platform = 'discord' THEN t.total_time ELSE 0 END) + 
-                     SUM(CASE WHEN t.platform = 'teamspeak' THEN t.total_time ELSE 0 END), 0) as total_time,
-            COALESCE(SUM(CASE WHEN t.platform = 'discord' THEN t.daily_time ELSE 0 END) + 
-                     SUM(CASE WHEN t.platform = 'teamspeak' THEN t.daily_time ELSE 0 END), 0) as daily_time,
-            COALESCE(SUM(CASE WHEN t.platform = 'discord' THEN t.weekly_time ELSE 0 END) + 
-                     SUM(CASE WHEN t.platform = 'teamspeak' THEN t.weekly_time ELSE 0 END), 0) as weekly_time,
-            COALESCE(SUM(CASE WHEN t.platform = 'discord' THEN t.monthly_time ELSE 0 END) + 
-                     SUM(CASE WHEN t.platform = 'teamspeak' THEN t.monthly_time ELSE 0 END), 0) as monthly_time,
-            COALESCE(SUM(CASE WHEN t.platform = 'discord' THEN t.season_time ELSE 0 END) + 
-                     SUM(CASE WHEN t.platform = 'teamspeak' THEN t.season_time ELSE 0 END), 0) as season_time
+            COALESCE(ut.total_time, 0) as total_time,
+            COALESCE({period_minutes_sql('ut', 'daily_time')}, 0) as daily_time,
+            COALESCE({period_minutes_sql('ut', 'weekly_time')}, 0) as weekly_time,
+            COALESCE({period_minutes_sql('ut', 'monthly_time')}, 0) as monthly_time,
+            COALESCE({period_minutes_sql('ut', 'season_time')}, 0) as season_time,
+            ua.special_types
         FROM user u
-        LEFT JOIN time t ON 
-            (t.platform = 'discord' AND t.platform_uid = u.discord_id) OR
-            (t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id)
+        LEFT JOIN user_totals ut ON ut.user_id = u.id
+        LEFT JOIN user_achievements ua ON ua.user_id = u.id
         WHERE u.steam_id = %s
-        GROUP BY u.name, u.discord_id, u.teamspeak_id, u.level,
-                 u.division, u.discord_channel, u.teamspeak_channel
     """
 
     heatmap_query = """
@@ -58,18 +53,10 @@ def get_connected_users():
             h.day_of_week,
             h.time_category,
             SUM(h.activity_minutes) as total_minutes
-        FROM user u
-        LEFT JOIN (
-            SELECT 
-                day_of_week,
-                time_category,
-                platform_uid,
-                platform,
-                activity_minutes
-            FROM activity_heatmap
-            WHERE platform IN ('discord', 'teamspeak')
-        ) h ON (h.platform = 'discord' AND h.platform_uid = u.discord_id)
-                OR (h.platform = 'teamspeak' AND h.platform_uid = u.teamspeak_id)
+        FROM activity_heatmap h
+        INNER JOIN user_identity ui
+            ON ui.platform = h.platform AND ui.platform_uid = h.platform_uid
+        INNER JOIN user u ON u.id = ui.user_id
         WHERE u.steam_id = %s
             AND (u.discord_id IS NOT NULL OR u.teamspeak_id IS NOT NULL)
         GROUP BY h.day_of_week, h.time_category
@@ -170,7 +157,7 @@ def get_connected_users():
 
         time_to_next_level = 0
         time_to_next_division = 0
-        if user_data[4] < 25:
+        if user_data[4] < Config.get_max_level():
             next_level_req = Config.get_level_requirement(user_data[4] + 1)
             time_to_next_level = max(0, next_level_req - user_data[10])
         
@@ -178,11 +165,10 @@ def get_connected_users():
             next_division_req = Config.get_division_requirement(user_data[5] + 1)
             time_to_next_division = max(0, next_division_req - int(user_data[14]))
         elif user_data[5] == 5:
-            div6_query = """
-            SELECT COUNT(u.id), MIN(COALESCE(d.season_time, 0) + COALESCE(t.season_time, 0))
+            div6_query = f"""
+            SELECT COUNT(u.id), MIN(COALESCE({period_minutes_sql('ut', 'season_time')}, 0))
             FROM user u
-            LEFT JOIN time d ON d.platform = 'discord' AND d.platform_uid = u.discord_id
-            LEFT JOIN time t ON t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id
+            LEFT JOIN user_totals ut ON ut.user_id = u.id
             WHERE u.division = 6
             """
             db.cursor.execute(div6_query)
@@ -197,30 +183,9 @@ def get_connected_users():
                 next_division_req = Config.get_division_requirement(5)
                 time_to_next_division = max(0, next_division_req - int(user_data[14]))
 
-        special_achievements_query = """
-        SELECT achievement_type
-        FROM special_achievements
-        WHERE (platform = 'discord' AND platform_id = %s)
-           OR (platform = 'teamspeak' AND platform_id = %s)
-        """
-
-        special_achievements_params = []
-        if discord_id:
-            special_achievements_params.append(discord_id)
-        else:
-            special_achievements_params.append(None)
-
-        if teamspeak_id:
-            special_achievements_params.append(teamspeak_id)
-        else:
-            special_achievements_params.append(None) 
-
-        special_achievements_data = []
-        if discord_id or teamspeak_id:
-                special_achievements_data = db.execute_query(special_achievements_query, tuple(special_achievements_params))
+        special_types = parse_special_types(user_data[15])
 
         best_division_achieved = 0
-        apex_division = False
         apex_rank = False
         discord_upgraded = False
         teamspeak_upgraded = False
@@ -228,23 +193,14 @@ def get_connected_users():
         season_skins = {1: {2: False, 3: False, 4: False, 5: False, 6: False}}
         season_one_skins = season_skins[1]
 
-        if special_achievements_data:
-            for achievement in special_achievements_data:
-                achievement_type = achievement[0]
-                if achievement_type == 200:
-                    apex_division = True
+        apex_division = 200 in special_types
 
-        best_division_achieved = get_best_division_from_season_achievements(
-            [achievement[0] for achievement in special_achievements_data],
-        )
+        best_division_achieved = get_best_division_from_season_achievements(special_types)
         best_division_by_season = {
             1: best_division_achieved,
-            2: get_best_division_from_season_achievements(
-                [achievement[0] for achievement in special_achievements_data],
-                season_number=2,
-            ),
+            2: get_best_division_from_season_achievements(special_types, season_number=2),
         }
-        apex_rank = user_data[4] >= 25
+        apex_rank = user_data[4] >= Config.get_max_level()
 
         unlockable_query = """SELECT platform, unlockable_type
         FROM unlockables
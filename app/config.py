@@ -61,12 +61,22 @@ class Config:
     TS3_APEX_PARENT_CHANNEL = 47
     TS3_OWNER_GROUP_ID = 5
     TS3_MOVE_BLOCK_ID = 41
+    # ServerQuery commands handed to the atsq client at once; the rest wait
+    # by priority (see app.rankingsystem.bots.teamspeak.query_scheduler)
+    TS3_QUERY_WINDOW = 2
+    # How often newly seen uid -> client database id pairs are written to
+    # Valkey (see app.rankingsystem.bots.teamspeak.cldbid_map; seconds)
+    TS3_CLDBID_FLUSH_INTERVAL = 60
     # Database
     DB_HOST=os.getenv("DB_HOST", "127.0.0.1")
     DB_PORT=os.getenv("DB_PORT", "3306")
     DB_USER=os.getenv("DB_USER")
     DB_NAME="firephenix"
     DB_PASSWORD=os.getenv("DB_PASSWORD")
+    # Per-process connection pool for the Flask API (one per gunicorn worker)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+    DB_POOL_MAX_LIFETIME = int(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+    DB_POOL_PING_INTERVAL = int(os.getenv("DB_POOL_PING_INTERVAL", "30"))
     # Valkey
     VALKEY_HOST = os.getenv("VALKEY_HOST", "localhost")
     VALKEY_PORT = int(os.getenv("VALKEY_PORT", "6379"))
@@ -74,6 +84,32 @@ class Config:
     VALKEY_USERNAME = os.getenv("VALKEY_USERNAME") or None
     VALKEY_PASSWORD = os.getenv("VALKEY_PASSWORD") or None
     VALKEY_UPDATE_INTERVAL = 2
+    # Leaderboard ZSETs: full rebuild interval and how long the API trusts a
+    # rebuild before falling back to SQL (seconds)
+    LEADERBOARD_REBUILD_INTERVAL = 900
+    LEADERBOARD_READY_TTL = 1800
+    # Cached public ranking responses are keyed on the tick version; the TTL
+    # only bounds staleness while the bot is not bumping it (seconds)
+    RESPONSE_CACHE_TTL = 120
+    # Hall of fame materialization: recompute interval, and how long the API
+    # trusts the last run before computing the boards itself (seconds)
+    HALL_OF_FAME_INTERVAL = 300
+    HALL_OF_FAME_TTL = 1800
+    # Role sync queue per platform (see app.rankingsystem.role_sync): checks
+    # running at once, checks started per second, queued users, and the
+    # interval of the reconciliation pass over everyone online (seconds)
+    ROLE_SYNC_CONCURRENCY = {'discord': 2, 'teamspeak': 1}
+    ROLE_SYNC_RATE = {'discord': 5.0, 'teamspeak': 10.0}
+    ROLE_SYNC_QUEUE_SIZE = 1000
+    ROLE_SYNC_RECONCILE_INTERVAL = 1800
+    # Last-applied role state cache (see app.rankingsystem.role_state): how
+    # long a cached entry is trusted and how often it is snapshotted to
+    # Valkey (seconds)
+    ROLE_STATE_MAX_AGE = 3600
+    ROLE_STATE_SNAPSHOT_INTERVAL = 60
+    # Shared caches (nginx/CDN) may serve public ranking responses this long
+    # before revalidating their ETag (seconds)
+    PUBLIC_CACHE_S_MAXAGE = int(os.getenv("PUBLIC_CACHE_S_MAXAGE", "30"))
     # Public Source server status query. This is intentionally read-only and
     # does not use RCON credentials.
     TTT_STATUS_HOST = os.getenv("TTT_STATUS_HOST", "firephenix.de")
@@ -126,7 +162,25 @@ class Config:
     EMBER_CONTEXT_CHAR_LIMIT = 6000
     # VPNApi.io
     VPNAPI_API_KEY = os.getenv("VPNAPI_API_KEY")
+    VPNAPI_URL = os.getenv("VPNAPI_URL", "https://vpnapi.io/api")
+    # VPN/Tor verdicts per IP cached in Valkey (see app.utils.ip_reputation):
+    # flagged and clean IPs (seconds); and how long the TeamSpeak bot trusts
+    # a user's level for the VPN check (seconds)
+    VPN_REPUTATION_TTL = 86400
+    VPN_REPUTATION_CLEAN_TTL = 21600
+    VPN_LEVEL_CACHE_TTL = 600
     # Rankingsystem
+    # Optional JSON file replacing any of the rank curves (see
+    # app.utils.rank_curves), e.g. for seasonal experiments
+    RANK_CURVES_FILE = os.getenv("RANK_CURVES_FILE")
+    # Write-behind minute accumulator (see app.utils.minute_accumulator):
+    # credit tick minutes to Valkey and flush them to MariaDB every N minutes;
+    # 0 writes every tick straight to MariaDB
+    MINUTE_FLUSH_INTERVAL = int(os.getenv("MINUTE_FLUSH_INTERVAL", "0"))
+    # Session-based presence accounting (see app.utils.presence): credit
+    # join/leave sessions every N minutes instead of a sampled minute per
+    # tick; takes precedence over MINUTE_FLUSH_INTERVAL. 0 samples every tick
+    PRESENCE_CHECKPOINT_INTERVAL = int(os.getenv("PRESENCE_CHECKPOINT_INTERVAL", "0"))
     LEVEL_REQUIREMENTS = {
         1: 0,
         2: 300,     
@@ -257,27 +311,33 @@ class Config:
         25: 1330574154415603744
     }
 
+    # Lookups go through the compiled curves in app.utils.rank_curves, which
+    # also apply RANK_CURVES_FILE overrides (imported lazily: that module
+    # imports Config).
     @classmethod
     def get_division_requirement(cls, division: int) -> int:
-        return cls.DIVISION_REQUIREMENTS.get(division, 0)
+        from app.utils.rank_curves import rank_curves
+        return rank_curves().division.requirement(division)
     
     @classmethod
     def get_division_for_minutes(cls, minutes: int) -> int:
-        for division, requirement in sorted(cls.DIVISION_REQUIREMENTS.items(), reverse=True):
-            if minutes >= requirement:
-                return division
-        return 0
+        from app.utils.rank_curves import rank_curves
+        return rank_curves().division.rank_for(minutes)
     
     @classmethod
     def get_level_requirement(cls, level: int) -> int:
-        return cls.LEVEL_REQUIREMENTS.get(level, 0)
+        from app.utils.rank_curves import rank_curves
+        return rank_curves().level.requirement(level)
     
     @classmethod
     def get_level_for_minutes(cls, minutes: int) -> int:
-        for level, requirement in sorted(cls.LEVEL_REQUIREMENTS.items(), reverse=True):
-            if minutes >= requirement:
-                return level
-        return 0
+        from app.utils.rank_curves import rank_curves
+        return rank_curves().level.rank_for(minutes)
+
+    @classmethod
+    def get_max_level(cls) -> int:
+        from app.utils.rank_curves import rank_curves
+        return rank_curves().level.max_rank
 
     @classmethod
     def get_ttt_achievement_level(cls, value: int, thresholds: list[int]) -> int:
@@ -289,18 +349,18 @@ class Config:
 
     @classmethod
     def get_ttt_achievement_levels(cls, stats: dict) -> dict:
+        from app.utils.rank_curves import rank_curves
         stats = stats or {}
+        curves = rank_curves()
+
+        def counter(field):
+            try:
+                return int(stats.get(field, 0))
+            except (TypeError, ValueError):
+                return 0
+
         return {
-            "rounds_played": cls.get_ttt_achievement_level(
-                stats.get("rounds_played", 0),
-                cls.TTT_ROUNDS_PLAYED_THRESHOLDS,
-            ),
-            "rounds_won": cls.get_ttt_achievement_level(
-                stats.get("rounds_won", 0),
-                cls.TTT_ROUNDS_WON_THRESHOLDS,
-            ),
-            "kills": cls.get_ttt_achievement_level(
-                stats.get("kills", 0),
-                cls.TTT_KILLS_THRESHOLDS,
-            ),
+            "rounds_played": curves.ttt_rounds_played.rank_for(counter("rounds_played")),
+            "rounds_won": curves.ttt_rounds_won.rank_for(counter("rounds_won")),
+            "kills": curves.ttt_kills.rank_for(counter("kills")),
         }
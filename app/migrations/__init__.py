@@ -0,0 +1,165 @@
+"""Versioned schema migrations.
+
+Every ``vNNNN_<name>.py`` module in this package is one migration: the number
+is the schema version it produces, ``DESCRIPTION`` is a short label and
+``upgrade(cursor)`` runs the DDL/backfill on a PyMySQL cursor. Applied
+versions are recorded in ``schema_migrations``.
+
+Migrations run once per deploy via ``python migrate.py``. The bot and the API
+workers never migrate; they only compare ``MAX(version)`` against
+``LATEST_SCHEMA_VERSION``, so no ALTER takes metadata locks on ``time`` or
+``user`` while the ranking tick is writing.
+
+MariaDB commits DDL implicitly, so a migration that fails halfway is not
+rolled back: keep every statement idempotent (``IF NOT EXISTS`` and friends)
+so a re-run finishes the job.
+
+A migration never imports app code: that code follows the latest schema, so
+a from-scratch run would execute it against an older one. Freeze the SQL a
+migration needs in the migration itself; backfills that need the live code
+(the achievement snapshots) run in ``migrate.py`` once the schema is at the
+latest version.
+"""
+
+import importlib
+import pkgutil
+import re
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+import pymysql
+
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+__all__ = [
+    'LATEST_SCHEMA_VERSION',
+    'MIGRATIONS',
+    'Migration',
+    'SchemaVersionError',
+    'apply_migrations',
+    'check_schema_version',
+    'get_schema_version',
+    'pending_migrations',
+]
+
+#: Advisory lock so two deploy jobs never migrate concurrently.
+MIGRATION_LOCK_NAME = "firephenix_schema_migrations"
+MIGRATION_LOCK_TIMEOUT = 60
+
+_MODULE_PATTERN = re.compile(r"^v(\d{4})_\w+$")
+
+# MariaDB error code for "Table doesn't exist"
+_ER_NO_SUCH_TABLE = 1146
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    description: str
+    upgrade: Callable
+
+
+class SchemaVersionError(Exception):
+    """The database schema is older than this code expects."""
+    def __init__(self, current: int, expected: int):
+        self.current = current
+        self.expected = expected
+        super().__init__(
+            f"Database schema is at version {current}, code expects {expected}; "
+            f"run `python migrate.py` first"
+        )
+
+
+def discover_migrations() -> List[Migration]:
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_PATTERN.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=module_info.name,
+            description=getattr(module, "DESCRIPTION", module_info.name),
+            upgrade=module.upgrade,
+        ))
+    migrations.sort(key=lambda migration: migration.version)
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+
+MIGRATIONS = discover_migrations()
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def get_schema_version(cursor) -> int:
+    """Highest applied migration, 0 for a database that predates migrations."""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_migrations")
+    except pymysql.err.ProgrammingError as e:
+        if e.args and e.args[0] == _ER_NO_SUCH_TABLE:
+            return 0
+        raise
+    row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else 0
+
+
+def check_schema_version(cursor) -> int:
+    """Raise SchemaVersionError unless the schema is at least the latest version."""
+    current = get_schema_version(cursor)
+    if current < LATEST_SCHEMA_VERSION:
+        raise SchemaVersionError(current, LATEST_SCHEMA_VERSION)
+    return current
+
+
+def pending_migrations(current: int, target: Optional[int] = None) -> List[Migration]:
+    target = LATEST_SCHEMA_VERSION if target is None else target
+    return [m for m in MIGRATIONS if current < m.version <= target]
+
+
+def apply_migrations(conn, target: Optional[int] = None) -> List[int]:
+    """Apply every pending migration up to ``target`` and return the versions run."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+        row = cursor.fetchone()
+        if not row or row[0] != 1:
+            raise RuntimeError("Could not acquire the schema migration lock")
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    duration_ms INT NOT NULL DEFAULT 0
+                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+            """)
+            conn.commit()
+
+            applied = []
+            for migration in pending_migrations(get_schema_version(cursor), target):
+                logging.info(f"Applying migration {migration.version}: {migration.description}")
+                started = time.perf_counter()
+                try:
+                    migration.upgrade(cursor)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name, duration_ms) VALUES (%s, %s, %s)",
+                        (migration.version, migration.name,
+                         int((time.perf_counter() - started) * 1000)),
+                    )
+                    conn.commit()
+                except pymysql.Error as e:
+                    logging.error(f"Migration {migration.version} failed: {e}")
+                    conn.rollback()
+                    raise
+                applied.append(migration.version)
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
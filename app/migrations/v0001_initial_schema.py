@@ -0,0 +1,209 @@
+"""Baseline schema: every table the ranking system had before versioned
+migrations. All statements are idempotent so existing databases adopt this
+version without changes."""
+
+DESCRIPTION = "initial schema"
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            steam_id BIGINT UNIQUE,
+            discord_id VARCHAR(255) UNIQUE,
+            teamspeak_id VARCHAR(255) UNIQUE,
+            name VARCHAR(255),
+            level INT DEFAULT 1,
+            division INT DEFAULT 1,
+            discord_channel BIGINT,
+            teamspeak_channel BIGINT,
+            discord_moveable BOOL DEFAULT 1,
+            teamspeak_moveable BOOL DEFAULT 1,
+            ranking_disabled BOOLEAN DEFAULT 0,
+            ranking_disabled_at TIMESTAMP NULL,
+            ranking_disabled_reason VARCHAR(255) NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_steam (steam_id),
+            INDEX idx_discord (discord_id),
+            INDEX idx_teamspeak (teamspeak_id),
+            INDEX idx_ranking_disabled (ranking_disabled)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+    cursor.execute("""
+        ALTER TABLE user
+        ADD COLUMN IF NOT EXISTS ranking_disabled BOOLEAN DEFAULT 0
+    """)
+    cursor.execute("""
+        ALTER TABLE user
+        ADD COLUMN IF NOT EXISTS ranking_disabled_at TIMESTAMP NULL
+    """)
+    cursor.execute("""
+        ALTER TABLE user
+        ADD COLUMN IF NOT EXISTS ranking_disabled_reason VARCHAR(255) NULL
+    """)
+    # Stable myTeamSpeak account id, captured live from client_myteamspeak_id on
+    # connect. Unlike teamspeak_id (the SHA-1/SHA-256 UID) it is identical across
+    # TS3 and TS6, so it bridges a returning user's old UID to their new one.
+    cursor.execute("""
+        ALTER TABLE user
+        ADD COLUMN IF NOT EXISTS myteamspeak_id VARCHAR(255) NULL
+    """)
+    cursor.execute("""
+        ALTER TABLE user
+        ADD INDEX IF NOT EXISTS idx_myteamspeak (myteamspeak_id)
+    """)
+    # TeamSpeak 6 UID (SHA-256 fingerprint). Distinct from teamspeak_id, which holds
+    # the legacy TS3 UID (SHA-1). Kept separate so both can coexist during the TS3→TS6
+    # transition (either can identify a user); populated when a user is recognised on TS6.
+    cursor.execute("""
+        ALTER TABLE user
+        ADD COLUMN IF NOT EXISTS teamspeak6_id VARCHAR(255) NULL
+    """)
+    cursor.execute("""
+        ALTER TABLE user
+        ADD INDEX IF NOT EXISTS idx_teamspeak6 (teamspeak6_id)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS time (
+            platform_uid VARCHAR(255) NOT NULL,
+            platform ENUM('discord', 'teamspeak') NOT NULL,
+            total_time INT DEFAULT 0,
+            daily_time INT DEFAULT 0,
+            weekly_time INT DEFAULT 0,
+            monthly_time INT DEFAULT 0,
+            season_time INT DEFAULT 0,
+            last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (platform, platform_uid)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS usage_stats (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            timestamp DATETIME NOT NULL,
+            user_count INT NOT NULL,
+            platform ENUM('discord', 'teamspeak') NOT NULL,
+            INDEX idx_timestamp (timestamp),
+            INDEX idx_platform (platform)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS activity_heatmap (
+            platform_uid VARCHAR(255) NOT NULL,
+            platform ENUM('discord', 'teamspeak') NOT NULL,
+            day_of_week TINYINT NOT NULL CHECK (day_of_week BETWEEN 0 AND 6),
+            time_category ENUM('morning', 'noon', 'evening', 'night') NOT NULL,
+            activity_minutes INT DEFAULT 0,
+            last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (platform, platform_uid, day_of_week, time_category)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS verification (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            steam_id BIGINT NOT NULL,
+            platform_id VARCHAR(255) NOT NULL,
+            platform ENUM('discord', 'teamspeak') NOT NULL,
+            verification_code VARCHAR(6) NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            INDEX idx_user_platform (steam_id, platform),
+            INDEX idx_expires (expires_at)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+    cursor.execute("""
+        ALTER TABLE verification
+        ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS login_streak (
+            platform_uid VARCHAR(255) NOT NULL,
+            platform ENUM('discord', 'teamspeak') NOT NULL,
+            logins INT DEFAULT 1,
+            current_streak INT DEFAULT 1,
+            longest_streak INT DEFAULT 1,
+            last_login DATE NOT NULL,
+            PRIMARY KEY (platform, platform_uid)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS special_achievements (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            platform ENUM('discord', 'teamspeak') NOT NULL,
+            platform_id VARCHAR(255) NOT NULL,
+            achievement_type INT NOT NULL,
+            awarded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY unique_user_achievement (platform, platform_id, achievement_type),
+            INDEX idx_platform_id (platform_id),
+            INDEX idx_achievement_type (achievement_type)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS unlockables (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            steam_id BIGINT NOT NULL,
+            platform ENUM('discord', 'teamspeak', 'gameserver') NOT NULL,
+            unlockable_type INT NOT NULL,
+            unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY unique_user_unlockable (steam_id, platform, unlockable_type),
+            INDEX idx_platform_uid (steam_id),
+            INDEX idx_unlockable_type (unlockable_type)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ttt_player_stats (
+            steam_id BIGINT NOT NULL PRIMARY KEY,
+            last_ttt_name VARCHAR(255),
+            rounds_played INT NOT NULL DEFAULT 0,
+            rounds_won INT NOT NULL DEFAULT 0,
+            innocent_wins INT NOT NULL DEFAULT 0,
+            detective_wins INT NOT NULL DEFAULT 0,
+            traitor_wins INT NOT NULL DEFAULT 0,
+            kills INT NOT NULL DEFAULT 0,
+            deaths INT NOT NULL DEFAULT 0,
+            last_played_at TIMESTAMP NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_ttt_last_played_at (last_played_at)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reset_log (
+            id INT PRIMARY KEY DEFAULT 1,
+            last_daily_reset DATETIME,
+            last_weekly_reset DATETIME,
+            last_monthly_reset DATETIME,
+            last_season_reset DATETIME
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS admin_audit_log (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            admin_steam_id VARCHAR(32) NOT NULL,
+            action VARCHAR(64) NOT NULL,
+            target_identifiers JSON,
+            summary JSON,
+            result_status ENUM('success', 'failed') NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_admin_audit_created (created_at),
+            INDEX idx_admin_audit_action (action),
+            INDEX idx_admin_audit_admin (admin_steam_id)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+    cursor.execute("""
+        ALTER TABLE reset_log
+        ADD COLUMN IF NOT EXISTS last_season_reset DATETIME
+    """)
+    cursor.execute("""
+        INSERT IGNORE INTO reset_log (
+            id, last_daily_reset, last_weekly_reset, last_monthly_reset, last_season_reset
+        )
+        VALUES (1, NULL, NULL, NULL, NULL)
+    """)
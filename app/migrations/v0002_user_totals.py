@@ -0,0 +1,53 @@
+"""Denormalized combined minutes per user.
+
+``user_totals`` holds Discord + TeamSpeak minutes per ``user.id`` for every
+ranking period, so leaderboards and rank checks read one indexed table instead
+of joining ``time`` twice per user. The ranking tick keeps it in sync; this
+migration backfills it from ``time``."""
+
+DESCRIPTION = "user_totals table"
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_totals (
+            user_id INT PRIMARY KEY,
+            total_time INT NOT NULL DEFAULT 0,
+            season_time INT NOT NULL DEFAULT 0,
+            weekly_time INT NOT NULL DEFAULT 0,
+            monthly_time INT NOT NULL DEFAULT 0,
+            daily_time INT NOT NULL DEFAULT 0,
+            last_seen TIMESTAMP NULL,
+            INDEX idx_total_time (total_time, user_id),
+            INDEX idx_season_time (season_time, user_id),
+            INDEX idx_weekly_time (weekly_time, user_id),
+            INDEX idx_monthly_time (monthly_time, user_id),
+            INDEX idx_daily_time (daily_time, user_id)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+    cursor.execute("""
+        INSERT INTO user_totals (user_id, total_time, season_time, weekly_time,
+                                 monthly_time, daily_time, last_seen)
+        SELECT
+            u.id,
+            COALESCE(d.total_time, 0) + COALESCE(t.total_time, 0),
+            COALESCE(d.season_time, 0) + COALESCE(t.season_time, 0),
+            COALESCE(d.weekly_time, 0) + COALESCE(t.weekly_time, 0),
+            COALESCE(d.monthly_time, 0) + COALESCE(t.monthly_time, 0),
+            COALESCE(d.daily_time, 0) + COALESCE(t.daily_time, 0),
+            CASE
+                WHEN d.last_update IS NULL THEN t.last_update
+                WHEN t.last_update IS NULL THEN d.last_update
+                ELSE GREATEST(d.last_update, t.last_update)
+            END
+        FROM user u
+        LEFT JOIN time d ON d.platform = 'discord' AND d.platform_uid = u.discord_id
+        LEFT JOIN time t ON t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id
+        ON DUPLICATE KEY UPDATE
+            total_time = VALUES(total_time),
+            season_time = VALUES(season_time),
+            weekly_time = VALUES(weekly_time),
+            monthly_time = VALUES(monthly_time),
+            daily_time = VALUES(daily_time),
+            last_seen = VALUES(last_seen)
+    """)
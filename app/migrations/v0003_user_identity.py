@@ -0,0 +1,29 @@
+"""Platform identity -> user lookup table.
+
+``user_identity`` maps every (platform, platform_uid) that keys the
+per-platform tables (``time``, ``activity_heatmap``, ``login_streak``) to its
+``user.id``. Reads join through it with two equality predicates instead of
+``(platform = 'discord' AND ... ) OR (platform = 'teamspeak' AND ...)``,
+which MariaDB cannot serve from an index."""
+
+DESCRIPTION = "user_identity table"
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_identity (
+            platform ENUM('discord', 'teamspeak') NOT NULL,
+            platform_uid VARCHAR(255) NOT NULL,
+            user_id INT NOT NULL,
+            PRIMARY KEY (platform, platform_uid),
+            INDEX idx_user (user_id, platform)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+    cursor.execute("""
+        INSERT IGNORE INTO user_identity (platform, platform_uid, user_id)
+        SELECT 'discord', discord_id, id FROM user WHERE discord_id IS NOT NULL
+    """)
+    cursor.execute("""
+        INSERT IGNORE INTO user_identity (platform, platform_uid, user_id)
+        SELECT 'teamspeak', teamspeak_id, id FROM user WHERE teamspeak_id IS NOT NULL
+    """)
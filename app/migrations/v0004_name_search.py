@@ -0,0 +1,53 @@
+"""Indexed player-name search: ``user.name_normalized`` plus the
+``user_name_trigram`` side table (see ``app.utils.name_search``), backfilled
+for every existing user.
+
+The backfill carries its own copy of the name folding as it was when this
+version shipped: migrations never import app code, which keeps changing
+after them."""
+
+import unicodedata
+
+DESCRIPTION = "name search index"
+
+
+def _normalize_name(name):
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())[:255]
+
+
+def _name_trigrams(normalized):
+    return sorted({normalized[index:index + 3] for index in range(len(normalized) - 2)})
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        ALTER TABLE user
+        ADD COLUMN IF NOT EXISTS name_normalized VARCHAR(255)
+            CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NULL
+    """)
+    cursor.execute("""
+        ALTER TABLE user
+        ADD INDEX IF NOT EXISTS idx_name_normalized (name_normalized)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_name_trigram (
+            trigram CHAR(3) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+            user_id INT NOT NULL,
+            PRIMARY KEY (trigram, user_id),
+            INDEX idx_user (user_id)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
+    cursor.execute("SELECT id, name FROM user")
+    for user_id, name in cursor.fetchall():
+        normalized = _normalize_name(name)
+        cursor.execute("UPDATE user SET name_normalized = %s WHERE id = %s", (normalized, user_id))
+        cursor.execute("DELETE FROM user_name_trigram WHERE user_id = %s", (user_id,))
+        trigrams = _name_trigrams(normalized)
+        if trigrams:
+            cursor.execute(
+                f"INSERT IGNORE INTO user_name_trigram (trigram, user_id) VALUES "
+                f"{','.join(['(%s, %s)'] * len(trigrams))}",
+                tuple(value for trigram in trigrams for value in (trigram, user_id)),
+            )
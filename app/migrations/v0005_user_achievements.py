@@ -0,0 +1,37 @@
+"""Persisted achievement levels per user.
+
+``user_achievements`` stores the achievement engine's inputs and levels for
+every ``user.id`` (see ``app.achievements.snapshot``), so profile views read
+one row. The ranking tick, TTT ingest and admin changes keep it in sync.
+
+The table starts empty: its rows come from the achievement engine, which
+reads columns later migrations add, so ``migrate.py`` backfills users
+without a row once the schema is at the latest version."""
+
+DESCRIPTION = "user_achievements table"
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_achievements (
+            user_id INT PRIMARY KEY,
+            longest_streak INT NOT NULL DEFAULT 0,
+            total_logins INT NOT NULL DEFAULT 0,
+            active_days TINYINT NOT NULL DEFAULT 0,
+            active_slots TINYINT NOT NULL DEFAULT 0,
+            special_types VARCHAR(1024) NOT NULL DEFAULT '',
+            streak_level TINYINT NOT NULL DEFAULT 0,
+            logins_level TINYINT NOT NULL DEFAULT 0,
+            time_level TINYINT NOT NULL DEFAULT 0,
+            heatmap_level TINYINT NOT NULL DEFAULT 0,
+            old_member TINYINT NOT NULL DEFAULT 0,
+            legacy_supporter TINYINT NOT NULL DEFAULT 0,
+            division_level TINYINT NOT NULL DEFAULT 0,
+            apex TINYINT NOT NULL DEFAULT 0,
+            ttt_level TINYINT NOT NULL DEFAULT 0,
+            division_markers SMALLINT NOT NULL DEFAULT 0,
+            score SMALLINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_score (score, user_id)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
@@ -0,0 +1,31 @@
+"""Heatmap slot bitmask per platform identity.
+
+``time.active_slot_mask`` has one bit per (day_of_week, time_category) slot
+that ever saw activity (see ``app.utils.database.heatmap_slot_bit``), so the
+heatmap achievement inputs are a BIT_OR/BIT_COUNT over at most two ``time``
+rows instead of a DISTINCT scan of ``activity_heatmap``. The ranking tick
+sets the bits; this migration backfills them from ``activity_heatmap``."""
+
+DESCRIPTION = "time.active_slot_mask"
+
+
+# bit of a (day_of_week, time_category) slot, as
+# ``app.utils.database.HEATMAP_SLOT_BIT_SQL`` defined it for this version
+_SLOT_BIT_SQL = "1 << (day_of_week * 4 + FIELD(time_category, 'morning', 'noon', 'evening', 'night') - 1)"
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        ALTER TABLE time
+        ADD COLUMN IF NOT EXISTS active_slot_mask INT UNSIGNED NOT NULL DEFAULT 0
+    """)
+    cursor.execute(f"""
+        UPDATE time t
+        INNER JOIN (
+            SELECT platform, platform_uid, BIT_OR({_SLOT_BIT_SQL}) AS active_slot_mask
+            FROM activity_heatmap
+            WHERE activity_minutes > 0
+            GROUP BY platform, platform_uid
+        ) h ON h.platform = t.platform AND h.platform_uid = t.platform_uid
+        SET t.active_slot_mask = t.active_slot_mask | h.active_slot_mask
+    """)
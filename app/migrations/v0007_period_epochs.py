@@ -0,0 +1,40 @@
+"""Epoch-stamped period counters.
+
+``reset_log`` keeps a current epoch per period and every ``time`` /
+``user_totals`` row stamps each of its period columns with the epoch it was
+last written in (see ``app.utils.database.PERIOD_TIME_COLUMNS``). A daily,
+weekly, monthly or season reset then bumps one ``reset_log`` epoch instead of
+rewriting both tables. All epochs start at 0, so existing counters stay
+current.
+
+The leaderboard indexes on ``user_totals`` are rebuilt as
+``(<period>_epoch, <period>_time, user_id)`` so the boards can filter to the
+current epoch and still read in index order, and ``user.division`` is
+indexed for the season close, which only rewrites promoted users."""
+
+DESCRIPTION = "period epochs"
+
+
+_PERIOD_TIME_COLUMNS = ('daily_time', 'weekly_time', 'monthly_time', 'season_time')
+
+
+def upgrade(cursor):
+    epoch_columns = [f"{column.removesuffix('_time')}_epoch" for column in _PERIOD_TIME_COLUMNS]
+    for table in ("reset_log", "time", "user_totals"):
+        for epoch_column in epoch_columns:
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                ADD COLUMN IF NOT EXISTS {epoch_column} INT UNSIGNED NOT NULL DEFAULT 0
+            """)
+
+    for column, epoch_column in zip(_PERIOD_TIME_COLUMNS, epoch_columns):
+        cursor.execute(f"""
+            ALTER TABLE user_totals
+            ADD INDEX IF NOT EXISTS idx_{epoch_column}_time ({epoch_column}, {column}, user_id)
+        """)
+        cursor.execute(f"ALTER TABLE user_totals DROP INDEX IF EXISTS idx_{column}")
+
+    cursor.execute("""
+        ALTER TABLE user
+        ADD INDEX IF NOT EXISTS idx_division (division)
+    """)
@@ -0,0 +1,19 @@
+"""Applied minute accumulator batches.
+
+With the write-behind accumulator enabled (``MINUTE_FLUSH_INTERVAL``) the bot
+credits minutes in batches drained from Valkey (see
+``app.utils.minute_accumulator``). Each batch id is inserted here in the same
+transaction as its minutes, so a batch replayed after a crash between the
+commit and the Valkey cleanup is recognised and skipped."""
+
+DESCRIPTION = "minute_flushes table"
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS minute_flushes (
+            batch_id VARCHAR(64) PRIMARY KEY,
+            flushed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_flushed_at (flushed_at)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
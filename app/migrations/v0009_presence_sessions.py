@@ -0,0 +1,25 @@
+"""Presence session history.
+
+With session-based presence accounting enabled
+(``PRESENCE_CHECKPOINT_INTERVAL``, see ``app.utils.presence``) every closed
+voice session is written here at the next checkpoint, in the same
+transaction as the minutes it credited. Sessions carry second-accurate
+durations, so totals per user, day or hour can be aggregated from this
+table."""
+
+DESCRIPTION = "presence_sessions table"
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS presence_sessions (
+            id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+            platform ENUM('discord', 'teamspeak') NOT NULL,
+            platform_uid VARCHAR(255) NOT NULL,
+            started_at DATETIME NOT NULL,
+            ended_at DATETIME NOT NULL,
+            seconds INT UNSIGNED NOT NULL,
+            INDEX idx_platform_uid_started (platform, platform_uid, started_at),
+            INDEX idx_started_at (started_at)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
+    """)
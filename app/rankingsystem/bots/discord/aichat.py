@@ -6,7 +6,7 @@ from decimal import Decimal, InvalidOperation
 import aiohttp
 
 from app.config import Config
-from app.utils.database import DatabaseManager
+from app.utils.database import DatabaseManager, period_minutes_sql
 from app.utils.logger import RankingLogger
 
 logging = RankingLogger(__name__).get_logger()
@@ -550,7 +550,7 @@ def format_minutes(minutes):
 async def fetch_user_info_string(id):
     try:
         db = DatabaseManager()
-        query = """
+        query = f"""
             SELECT
                 u.id,
                 u.name,
@@ -558,17 +558,11 @@ async def fetch_user_info_string(id):
                 u.teamspeak_id,
                 u.level,
                 u.division,
-                COALESCE(SUM(CASE WHEN t.platform = 'discord' THEN t.total_time ELSE 0 END) +
-                        SUM(CASE WHEN t.platform = 'teamspeak' THEN t.total_time ELSE 0 END), 0) as total_time,
-                COALESCE(SUM(CASE WHEN t.platform = 'discord' THEN t.season_time ELSE 0 END) +
-                        SUM(CASE WHEN t.platform = 'teamspeak' THEN t.season_time ELSE 0 END), 0) as season_time
+                COALESCE(ut.total_time, 0) as total_time,
+                COALESCE({period_minutes_sql('ut', 'season_time')}, 0) as season_time
             FROM user u
-            LEFT JOIN time t ON
-                (t.platform = 'discord' AND t.platform_uid = u.discord_id) OR
-                (t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id)
+            LEFT JOIN user_totals ut ON ut.user_id = u.id
             WHERE discord_id = %s
-            GROUP BY u.name, u.discord_id, u.teamspeak_id, u.level,
-                    u.division, u.discord_channel, u.teamspeak_channel
         """
 
         results = db.execute_query(query, (id,))
@@ -595,7 +589,7 @@ async def fetch_user_info_string(id):
             }
             division = division_names.get(user[5], "Unbekannt")
 
-            if user[4] < 25:
+            if user[4] < Config.get_max_level():
                 time_to_next_level = max(0, Config.get_level_requirement(user[4] + 1) - user[6])
             else:
                 time_to_next_level = None
@@ -4,9 +4,11 @@ import discord
 from discord.ext import commands, tasks
 from app.utils.database import DatabaseConnectionError
 from app.utils.async_database import get_async_db
+from app.utils.presence import get_presence_log
 from app.utils.logger import RankingLogger
 from app.config import Config
 from app.rankingsystem.bots.discord.utils import set_ranks
+from app.rankingsystem.role_state import get_role_state
 from app.rankingsystem.bots.discord.aichat import handle_chat_message
 
 logging = RankingLogger(__name__).get_logger()
@@ -94,12 +96,6 @@ class ClientManager(commands.Cog):
             user_id: Discord user ID
             check_type: What to check - "rank", "division", or "both" (default)
         """
-        try:
-            member = await self.guild.fetch_member(user_id)
-        except discord.NotFound:
-            logging.error(f"User {user_id} not found anymore in guild")
-            return None
-
         try:
             rank, division = await self.database.get_user_roles(user_id, "discord")
         except DatabaseConnectionError:
@@ -117,6 +113,19 @@ class ClientManager(commands.Cog):
                 rank = 1
                 division = 1
 
+        role_state = get_role_state('discord')
+        if role_state.matches(user_id, Config.DISCORD_LEVEL_MAP.get(rank), Config.DISCORD_DIVISION_MAP.get(division)):
+            logging.debug(f"User {user_id} roles match the cached state")
+            return None
+
+        try:
+            member = await self.guild.fetch_member(user_id)
+        except discord.NotFound:
+            logging.error(f"User {user_id} not found anymore in guild")
+            role_state.invalidate(user_id)
+            return None
+        role_state.record(user_id, [role.id for role in member.roles])
+
         if check_type in ["rank", "both"]:
             correct_rank = False
             rank_roles_count = 0
@@ -181,6 +190,8 @@ class ClientManager(commands.Cog):
             self.user_name_map.pop(user_id, None)
             logging.debug(f"User {user_id} removed during voice channel scan (no longer in voice).")
 
+        get_presence_log().sync('discord', self.connected_users)
+
         if users_to_add or users_to_remove:
             logging.info(
                 f"Voice channel scan complete. Added: {len(users_to_add)}, Removed: {len(users_to_remove)}. Total connected: {len(self.connected_users)}"
@@ -194,6 +205,7 @@ class ClientManager(commands.Cog):
         """Remove a user from in-memory tracking."""
         self.connected_users.discard(user_id)
         self.user_name_map.pop(user_id, None)
+        get_presence_log().leave('discord', user_id)
 
     async def check_default_roles(self):
         """Check all members for rank roles and gives user the base role if none present"""
@@ -271,6 +283,7 @@ class ClientManager(commands.Cog):
                 ):
                     self.connected_users.add(member.id)
                     self.user_name_map[member.id] = member.display_name
+                    get_presence_log().join('discord', member.id)
                     await self.check_user_roles(member.id)
 
             elif before.channel is not None and after.channel is None:
@@ -279,6 +292,7 @@ class ClientManager(commands.Cog):
                 ):
                     self.connected_users.remove(member.id)
                     self.user_name_map.pop(member.id, None)
+                    get_presence_log().leave('discord', member.id)
 
             elif before.channel and after.channel:
                 if discord.utils.get(member.roles, id=Config.DISCORD_MOVE_BLOCK_ID):
@@ -301,6 +315,14 @@ class ClientManager(commands.Cog):
         except Exception as e:
             logging.error(f"Error updating voice state: {e}")
 
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Keep the role state cache in step with role changes, ours and
+        anyone else's."""
+        if after.bot or before.roles == after.roles:
+            return
+        get_role_state('discord').record(after.id, [role.id for role in after.roles])
+
     @commands.Cog.listener()
     async def on_member_join(self, member):
         try:
@@ -6,12 +6,9 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
+from app.achievements import USER_ACHIEVEMENTS_SELECT, achievement_levels_from_row
 from app.config import Config
-from app.utils.database import (
-    DatabaseManager,
-    build_ttt_achievement_payload,
-    get_best_division_from_season_achievements,
-)
+from app.utils.database import DatabaseManager, build_ttt_achievement_payload, period_minutes_sql
 from app.utils.logger import RankingLogger
 from app.utils.source_server import (
     SourceServerQueryError,
@@ -119,7 +116,7 @@ class DiscordProfileService:
     def get_profile(self, discord_id):
         db = self.db_factory()
         try:
-            query = """
+            query = f"""
             WITH ranked_users AS (
                 SELECT
                     u.id,
@@ -131,10 +128,10 @@ class DiscordProfileService:
                     COALESCE(u.division, 1) AS division,
                     COALESCE(u.ranking_disabled, 0) AS ranking_disabled,
                     COALESCE(d.total_time, 0) + COALESCE(t.total_time, 0) AS total_time,
-                    COALESCE(d.daily_time, 0) + COALESCE(t.daily_time, 0) AS daily_time,
-                    COALESCE(d.weekly_time, 0) + COALESCE(t.weekly_time, 0) AS weekly_time,
-                    COALESCE(d.monthly_time, 0) + COALESCE(t.monthly_time, 0) AS monthly_time,
-                    COALESCE(d.season_time, 0) + COALESCE(t.season_time, 0) AS season_time,
+                    COALESCE({period_minutes_sql('d', 'daily_time')}, 0) + COALESCE({period_minutes_sql('t', 'daily_time')}, 0) AS daily_time,
+                    COALESCE({period_minutes_sql('d', 'weekly_time')}, 0) + COALESCE({period_minutes_sql('t', 'weekly_time')}, 0) AS weekly_time,
+                    COALESCE({period_minutes_sql('d', 'monthly_time')}, 0) + COALESCE({period_minutes_sql('t', 'monthly_time')}, 0) AS monthly_time,
+                    COALESCE({period_minutes_sql('d', 'season_time')}, 0) + COALESCE({period_minutes_sql('t', 'season_time')}, 0) AS season_time,
                     COALESCE(d.total_time, 0) AS discord_time,
                     COALESCE(t.total_time, 0) AS teamspeak_time,
                     RANK() OVER (
@@ -192,8 +189,9 @@ class DiscordProfileService:
 
             profile["time_to_next_level"] = self._time_to_next_level(profile)
             profile["time_to_next_division"] = self._time_to_next_division(db, profile)
-            profile["special_achievements"] = self._special_achievements(db, profile)
-            profile["achievement_summary"] = self._achievement_summary(db, profile)
+            levels = self._achievement_levels(db, profile)
+            profile["special_achievements"] = levels["special_types"]
+            profile["achievement_summary"] = self._achievement_summary(levels)
             profile["ttt_stats"] = (
                 db.get_ttt_player_stats(profile["steam_id"])
                 if profile["steam_id"]
@@ -206,7 +204,7 @@ class DiscordProfileService:
                 close()
 
     def _time_to_next_level(self, profile):
-        if profile["level"] >= 25:
+        if profile["level"] >= Config.get_max_level():
             return None
         return max(0, Config.get_level_requirement(profile["level"] + 1) - profile["total_time"])
 
@@ -217,8 +215,8 @@ class DiscordProfileService:
                 Config.get_division_requirement(profile["division"] + 1) - profile["season_time"],
             )
         if profile["division"] == 5:
-            rows = db.execute_query("""
-                SELECT COUNT(u.id), MIN(COALESCE(d.season_time, 0) + COALESCE(t.season_time, 0))
+            rows = db.execute_query(f"""
+                SELECT COUNT(u.id), MIN(COALESCE({period_minutes_sql('d', 'season_time')}, 0) + COALESCE({period_minutes_sql('t', 'season_time')}, 0))
                 FROM user u
                 LEFT JOIN time d ON d.platform = 'discord' AND d.platform_uid = u.discord_id
                 LEFT JOIN time t ON t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id
@@ -231,69 +229,30 @@ class DiscordProfileService:
             return max(0, Config.get_division_requirement(5) - profile["season_time"])
         return None
 
-    def _special_achievements(self, db, profile):
-        if not profile["discord_id"] and not profile["teamspeak_id"]:
-            return []
+    def _achievement_levels(self, db, profile):
         rows = db.execute_query(
-            """
-            SELECT achievement_type
-            FROM special_achievements
-            WHERE (platform = 'discord' AND platform_id = %s)
-               OR (platform = 'teamspeak' AND platform_id = %s)
+            f"""
+            SELECT {USER_ACHIEVEMENTS_SELECT}
+            FROM user_achievements ua
+            WHERE ua.user_id = %s
             """,
-            (profile["discord_id"], profile["teamspeak_id"]),
+            (profile["id"],),
         ) or []
-        return [row[0] for row in rows]
-
-    def _achievement_summary(self, db, profile):
-        streak_rows = db.execute_query(
-            """
-            SELECT
-                SUM(logins) AS total_logins,
-                MAX(longest_streak) AS longest_streak
-            FROM login_streak
-            WHERE (platform = 'discord' AND platform_uid = %s)
-               OR (platform = 'teamspeak' AND platform_uid = %s)
-            """,
-            (profile["discord_id"], profile["teamspeak_id"]),
-        ) or [(0, 0)]
-        total_logins, longest_streak = streak_rows[0]
-        total_logins = int(total_logins or 0)
-        longest_streak = int(longest_streak or 0)
-
-        heatmap_rows = db.execute_query(
-            """
-            SELECT
-                COUNT(DISTINCT day_of_week),
-                COUNT(DISTINCT CONCAT(day_of_week, '_', time_category))
-            FROM activity_heatmap
-            WHERE activity_minutes > 0
-                AND (
-                    (platform = 'discord' AND platform_uid = %s)
-                    OR (platform = 'teamspeak' AND platform_uid = %s)
-                )
-            """,
-            (profile["discord_id"], profile["teamspeak_id"]),
-        ) or [(0, 0)]
-        active_days, active_slots = heatmap_rows[0]
-        active_days = int(active_days or 0)
-        active_slots = int(active_slots or 0)
-
-        def threshold_level(value, thresholds):
-            return sum(1 for threshold in thresholds if value >= threshold)
+        return achievement_levels_from_row(rows[0] if rows else None)
 
+    def _achievement_summary(self, levels):
         return {
-            "streak": threshold_level(longest_streak, [2, 7, 14, 30]),
-            "logins": threshold_level(total_logins, [2, 30, 365, 3650]),
-            "time": threshold_level(profile["total_time"] / 60, [1, 10, 100, 1000]),
-            "heatmap": 4 if active_slots >= 28 else threshold_level(active_days, [3, 5, 7]),
-            "division": get_best_division_from_season_achievements(profile["special_achievements"]),
-            "old_member": 1 if 1 in profile["special_achievements"] else 0,
-            "legacy_supporter": 1 if 2 in profile["special_achievements"] else 0,
-            "apex": 1 if 200 in profile["special_achievements"] else 0,
-            "total_logins": total_logins,
-            "longest_streak": longest_streak,
-            "active_days": active_days,
+            "streak": levels["streak"],
+            "logins": levels["logins"],
+            "time": levels["time"],
+            "heatmap": levels["heatmap"],
+            "division": levels["division"],
+            "old_member": levels["old_member"],
+            "legacy_supporter": levels["legacy_supporter"],
+            "apex": levels["apex"],
+            "total_logins": levels["total_logins"],
+            "longest_streak": levels["longest_streak"],
+            "active_days": levels["active_days"],
         }
 
 
@@ -311,7 +270,7 @@ def build_status_embed(profile, member):
         return unavailable_embed(member, profile["state"])
 
     level_req = Config.get_level_requirement(profile["level"])
-    next_level_req = Config.get_level_requirement(profile["level"] + 1) if profile["level"] < 25 else level_req
+    next_level_req = Config.get_level_requirement(profile["level"] + 1) if profile["level"] < Config.get_max_level() else level_req
     level_span = max(0, next_level_req - level_req)
     level_current = max(0, profile["total_time"] - level_req)
     level_bar, level_percent = progress_bar(level_current, level_span)
@@ -1,6 +1,7 @@
 import discord
 from app.utils.logger import RankingLogger
 from app.config import Config
+from app.rankingsystem.role_state import get_role_state
 
 logging = RankingLogger(__name__).get_logger()
 
@@ -44,6 +45,7 @@ async def set_ranks(bot, user_id, level: int = None, division: int = None):
             level_role = discord.utils.get(guild.roles, id=Config.DISCORD_LEVEL_MAP.get(level))
             if level_role:
                 await member.add_roles(level_role)
+                get_role_state('discord').set_groups(user_id, level_groups=[level_role.id])
                 logging.debug(f"User {user_id} updated to level {level}")
             else:
                 logging.error(f"Could not find level role for level {level}")
@@ -59,6 +61,7 @@ async def set_ranks(bot, user_id, level: int = None, division: int = None):
             division_role = discord.utils.get(guild.roles, id=Config.DISCORD_DIVISION_MAP.get(division))
             if division_role:
                 await member.add_roles(division_role)
+                get_role_state('discord').set_groups(user_id, division_groups=[division_role.id])
                 logging.debug(f"User {user_id} updated to division {division}")
             else:
                 logging.error(f"Could not find division role for division {division}")
@@ -66,9 +69,11 @@ async def set_ranks(bot, user_id, level: int = None, division: int = None):
         return True
         
     except discord.Forbidden:
+        get_role_state('discord').invalidate(user_id)
         logging.error(f"Bot lacks permission to modify roles for user {user_id}")
         return None
     except Exception as e:
+        get_role_state('discord').invalidate(user_id)
         logging.error(f"Error setting roles for user {user_id}: {e}")
         return None
     
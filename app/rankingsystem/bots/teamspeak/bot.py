@@ -7,6 +7,7 @@ from app.config import Config
 from app.rankingsystem.bots.teamspeak.client_manager import ClientManager
 from app.rankingsystem.bots.teamspeak.rank_manager import RankManager
 from app.rankingsystem.bots.teamspeak.channel_manager import ChannelManager
+from app.rankingsystem.bots.teamspeak.query_scheduler import QueryPriority, QueryScheduler, query_priority
 
 logging = RankingLogger(__name__).get_logger()
 
@@ -16,7 +17,8 @@ class TeamspeakBot:
     user connections, ranks, and time tracking.
 
     Runs as a task on the shared event loop; all query traffic shares one
-    atsq client with automatic keepalive/reconnect.
+    atsq client with automatic keepalive/reconnect, and the managers queue
+    their commands on it by priority through a QueryScheduler.
     """
     _instance = None
     VALIDATION_INTERVAL = 300  # Validate every 5 minutes
@@ -42,9 +44,10 @@ class TeamspeakBot:
             server_id=int(Config.TS3_SERVER_ID),
             register_events="server",
         )
-        self.rank_manager = RankManager(Config, self.database, self.client)
-        self.client_manager = ClientManager(Config, self.rank_manager, self.client)
-        self.channel_manager = ChannelManager(Config, self.client)
+        self.query = QueryScheduler(self.client)
+        self.rank_manager = RankManager(Config, self.database, self.query)
+        self.client_manager = ClientManager(Config, self.rank_manager, self.query)
+        self.channel_manager = ChannelManager(Config, self.query)
         self._validation_task = None
         self._register_event_handlers()
 
@@ -63,6 +66,28 @@ class TeamspeakBot:
             if uid:
                 logging.debug(f"User disconnected with reason {event.get('reasonid')}: {uid}")
 
+        @self.client.on("servergroupclientadded")
+        async def on_server_group_added(event):
+            self._apply_server_group_event(event, added=True)
+
+        @self.client.on("servergroupclientdeleted")
+        async def on_server_group_deleted(event):
+            self._apply_server_group_event(event, added=False)
+
+    def _apply_server_group_event(self, event, added):
+        """Keep the role state cache in step with group changes, ours and
+        anyone else's"""
+        sgid = event.get("sgid")
+        if not sgid:
+            return
+        uid = (
+            event.get("cluid")
+            or self.client_manager.client_uid_map.get(event.get("clid"))
+            or self.rank_manager.cldbids.uid_for(event.get("cldbid"))
+        )
+        if uid:
+            self.rank_manager.role_state.apply_group_event(sgid, added, uid)
+
     async def run_async(self):
         """Own the TeamSpeak session on the shared loop; atsq handles reconnection"""
         self.running = True
@@ -80,13 +105,14 @@ class TeamspeakBot:
 
     async def _on_ready(self, client):
         """Runs after every (re)connect: rescan clients and sync their roles"""
-        await self.client_manager.handle_initial_clients()
+        with query_priority(QueryPriority.BACKGROUND):
+            await self.client_manager.handle_initial_clients()
 
-        for uid in list(self.client_manager.connected_users):
-            try:
-                await self.rank_manager.check_user_roles(uid)
-            except Exception as e:
-                logging.error(f"Error checking roles for {uid}: {e}")
+            for uid in list(self.client_manager.connected_users):
+                try:
+                    await self.rank_manager.check_user_roles(uid)
+                except Exception as e:
+                    logging.error(f"Error checking roles for {uid}: {e}")
 
         if self._validation_task is None or self._validation_task.done():
             self._validation_task = asyncio.get_running_loop().create_task(self._validation_loop())
@@ -97,7 +123,8 @@ class TeamspeakBot:
             await asyncio.sleep(self.VALIDATION_INTERVAL)
             try:
                 logging.debug("Performing periodic user validation")
-                await self.client_manager.validate_connected_users()
+                with query_priority(QueryPriority.BACKGROUND):
+                    await self.client_manager.validate_connected_users()
                 self.last_validation = time.time()
             except Exception as e:
                 logging.error(f"Error during periodic validation: {e}")
@@ -126,6 +153,10 @@ class TeamspeakBot:
         """Check if user has the correct rank and/or division roles and update if necessary"""
         return await self.rank_manager.check_user_roles(user_id)
 
+    def forget_levels(self, user_ids):
+        """Invalidate the VPN check's cached levels of these users"""
+        self.client_manager.forget_levels(user_ids)
+
     async def set_server_group(self, client_id, group_id):
         """Set a server group for a user"""
         return await self.rank_manager.set_server_group(client_id, group_id)
@@ -142,7 +173,8 @@ class TeamspeakBot:
         """Manually trigger user validation - useful for testing or when inconsistencies are detected"""
         try:
             logging.info("Forcing user validation")
-            await self.client_manager.validate_connected_users()
+            with query_priority(QueryPriority.BACKGROUND):
+                await self.client_manager.validate_connected_users()
             self.last_validation = time.time()
             return True
         except Exception as e:
@@ -153,3 +185,4 @@ class TeamspeakBot:
         """Gracefully stop the bot"""
         self.running = False
         await self.client.close()
+        await self.client_manager.reputation.close()
@@ -1,6 +1,7 @@
 import atsq
 from atsq import TargetMode
 from app.config import Config
+from app.rankingsystem.bots.teamspeak.cldbid_map import get_cldbid_map
 from app.utils.logger import RankingLogger
 from app.utils.security import generate_verification_code
 
@@ -12,6 +13,11 @@ class ChannelManager:
     def __init__(self, config, client: atsq.Client):
         self.config = config
         self.client = client
+        self.cldbids = get_cldbid_map()
+
+    async def _cldbid(self, uid):
+        """The client database id, from the uid -> cldbid map if known."""
+        return await self.cldbids.resolve(uid, self.client.client_dbid_from_uid)
 
     async def create_owned_channel(self, user_id, channel_name):
         """Creates a new owned channel for the user"""
@@ -23,7 +29,7 @@ class ChannelManager:
                 channel_codec=4,
                 channel_codec_quality=10
             )
-            cldbid = await self.client.client_dbid_from_uid(user_id)
+            cldbid = await self._cldbid(user_id)
 
             await self.client.set_client_channel_group(
                 cgid=self.config.TS3_OWNER_GROUP_ID,
@@ -77,6 +83,7 @@ class ChannelManager:
                 except Exception as e:
                     logging.error(f"Error creating owned channel: {e}")
                     return None
+            self.cldbids.forget(user_id)
             logging.error(f"Error creating owned channel: {e}")
             return None
 
@@ -92,7 +99,7 @@ class ChannelManager:
     async def send_verification(self, user_id, code):
         """Send verification code to TeamSpeak user"""
         try:
-            cldbid = await self.client.client_dbid_from_uid(user_id)
+            cldbid = await self._cldbid(user_id)
 
             clients = await self.client.client_list()
             for client in clients:
@@ -103,7 +110,10 @@ class ChannelManager:
                         targetmode=TargetMode.CLIENT
                     )
                     return True
+            # an offline user, or a remembered id the server no longer has
+            self.cldbids.forget(user_id)
             return False
         except atsq.QueryError as e:
+            self.cldbids.forget(user_id)
             logging.error(f"Error sending verification message: {e}")
             return False
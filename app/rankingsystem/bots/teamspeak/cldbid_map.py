@@ -0,0 +1,144 @@
+"""Persistent TeamSpeak uid -> client database id map.
+
+Rank, server group and channel operations address a client by its database
+id, and each used to start with a ``clientgetdbidfromuid`` round trip. The
+database id of a uid does not change while the server keeps the client's
+database entry, so ``CldbidMap`` remembers every pair the bot sees: connect
+events, rescans and the lookups it still has to do. It is loaded from the
+Valkey hash ``teamspeak:cldbid`` on startup and new pairs are written back
+every ``TS3_CLDBID_FLUSH_INTERVAL`` seconds. The reverse direction maps
+server group events, which carry only the cldbid, back to a uid.
+
+A client whose database entry was deleted gets a new id when it returns; the
+connect event overwrites the pair, and a query error on a remembered id
+forgets it so the next operation looks it up again.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+import valkey
+
+from app.config import Config
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+__all__ = ['CldbidMap', 'get_cldbid_map']
+
+CLDBID_KEY = "teamspeak:cldbid"
+
+
+class CldbidMap:
+    """uid <-> cldbid, both kept as strings."""
+
+    def __init__(self):
+        self._cldbids: Dict[str, str] = {}
+        self._uids: Dict[str, str] = {}
+        self._unsaved: Dict[str, Optional[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cldbids)
+
+    def get(self, uid) -> Optional[str]:
+        return self._cldbids.get(str(uid))
+
+    def uid_for(self, cldbid) -> Optional[str]:
+        return self._uids.get(str(cldbid))
+
+    def _set(self, uid: str, cldbid: str) -> None:
+        previous = self._cldbids.get(uid)
+        if previous is not None and self._uids.get(previous) == uid:
+            del self._uids[previous]
+        self._cldbids[uid] = cldbid
+        self._uids[cldbid] = uid
+
+    def remember(self, uid, cldbid) -> None:
+        if not uid or not cldbid:
+            return
+        uid, cldbid = str(uid), str(cldbid)
+        if self._cldbids.get(uid) != cldbid:
+            self._set(uid, cldbid)
+            self._unsaved[uid] = cldbid
+
+    def forget(self, uid) -> None:
+        cldbid = self._cldbids.pop(str(uid), None)
+        if cldbid is not None:
+            if self._uids.get(cldbid) == str(uid):
+                del self._uids[cldbid]
+            self._unsaved[str(uid)] = None
+
+    async def resolve(self, uid, lookup: Callable[[str], Awaitable[str]]) -> str:
+        """The cldbid of ``uid``, from the map or else from ``lookup``
+        (``client.client_dbid_from_uid``)."""
+        cldbid = self.get(uid)
+        if cldbid is not None:
+            self.hits += 1
+            return cldbid
+        self.misses += 1
+        cldbid = await lookup(uid)
+        self.remember(uid, cldbid)
+        return cldbid
+
+    # -- Valkey persistence ------------------------------------------------
+
+    async def load(self, valkey_client) -> None:
+        """Merge the stored pairs under the ones seen since startup."""
+        fields = await valkey_client.hgetall(CLDBID_KEY)
+        for uid, cldbid in (fields or {}).items():
+            if uid not in self._cldbids:
+                self._set(uid, cldbid)
+        logging.debug(f"Loaded {len(self._cldbids)} TeamSpeak database ids")
+
+    async def flush(self, valkey_client) -> None:
+        """Write the pairs changed since the last flush."""
+        unsaved, self._unsaved = self._unsaved, {}
+        if not unsaved:
+            return
+        try:
+            pipe = valkey_client.pipeline(transaction=False)
+            for uid, cldbid in unsaved.items():
+                if cldbid is None:
+                    pipe.hdel(CLDBID_KEY, uid)
+                else:
+                    pipe.hset(CLDBID_KEY, uid, cldbid)
+            await pipe.execute()
+        except Exception:
+            self._unsaved = {**unsaved, **self._unsaved}
+            raise
+
+    async def run_forever(self, valkey_client, running, interval: float = None) -> None:
+        """Load the stored pairs, then flush every ``interval`` seconds and
+        once more when cancelled."""
+        interval = Config.TS3_CLDBID_FLUSH_INTERVAL if interval is None else interval
+        try:
+            await self.load(valkey_client)
+        except valkey.ValkeyError as e:
+            logging.error(f"Loading TeamSpeak database ids failed: {e}")
+        try:
+            while running():
+                await asyncio.sleep(interval)
+                try:
+                    await self.flush(valkey_client)
+                    logging.debug(
+                        f"TeamSpeak database id map: {len(self)} entries, {self.hits} hits, {self.misses} misses")
+                except valkey.ValkeyError as e:
+                    logging.error(f"TeamSpeak database id flush failed: {e}")
+        finally:
+            try:
+                await self.flush(valkey_client)
+            except Exception as e:
+                logging.debug(f"Final TeamSpeak database id flush failed: {e}")
+
+
+_shared_instance: Optional[CldbidMap] = None
+
+
+def get_cldbid_map() -> CldbidMap:
+    """Shared CldbidMap for the bot process."""
+    global _shared_instance
+    if _shared_instance is None:
+        _shared_instance = CldbidMap()
+    return _shared_instance
@@ -1,15 +1,34 @@
-import asyncio
 import ipaddress
+import time
 import atsq
-import requests
 from atsq import ClientType
 from app.utils.logger import RankingLogger
 from app.config import Config
 from app.utils.async_database import get_async_db
+from app.utils.ip_reputation import get_ip_reputation
+from app.utils.presence import get_presence_log
 from app.rankingsystem.bots.teamspeak.rank_manager import RankManager
+from app.rankingsystem.bots.teamspeak.cldbid_map import get_cldbid_map
+from app.rankingsystem.role_state import get_role_state
 
 logging = RankingLogger(__name__).get_logger()
 
+#: Users below this level are kicked when connecting through a VPN/Tor.
+VPN_ALLOWED_LEVEL = 9
+
+#: ``cliententerview`` fields the connect fast path needs; without any of
+#: them the connect falls back to ``clientinfo`` + ``servergroupsbyclientid``.
+CONNECT_EVENT_FIELDS = ("client_unique_identifier", "client_nickname", "client_database_id", "client_servergroups")
+
+
+#: ``clientlist`` switches a rescan needs (see ``_list_voice_clients``).
+RESCAN_CLIENTLIST_OPTIONS = ("uid", "groups", "info", "ip")
+
+
+def parse_server_groups(value):
+    """``client_servergroups`` ("6,8,12") as a list of group ids."""
+    return [int(group) for group in str(value or "").split(",") if group.strip().isdigit()]
+
 class ClientManager:
     """Manages TeamSpeak client information and tracking"""
 
@@ -21,6 +40,38 @@ class ClientManager:
         self.rank_manager = rank_manager
         self.client = client
         self.db = get_async_db()
+        self.reputation = get_ip_reputation()
+        # teamspeak uid -> (level, monotonic expiry) for the VPN check
+        self._levels = {}
+
+    async def _list_voice_clients(self):
+        """Every trackable voice client from ONE ``clientlist -uid -groups
+        -info -ip`` (plus ``-mytsid`` on TS6): the rows carry the uid,
+        nickname, cldbid, server groups and IP, so a rescan needs no
+        per-client ``clientinfo`` / ``servergroupsbyclientid``. The groups
+        refresh the role state cache on the way."""
+        options = RESCAN_CLIENTLIST_OPTIONS + (("mytsid",) if self._is_ts6() else ())
+        clients = await self.client.client_list(*options)
+        role_state = get_role_state('teamspeak')
+        cldbids = get_cldbid_map()
+        voice_clients = []
+        for client in clients:
+            if client.get("client_type") != ClientType.VOICE:
+                continue
+            uid = client.get("client_unique_identifier")
+            name = client.get("client_nickname")
+            if not uid or not name:
+                logging.warning(f"Client with clid {client.get('clid')} has no UID or Name. Skipping.")
+                continue
+            group_ids = parse_server_groups(client.get("client_servergroups"))
+            if client.get("client_database_id"):
+                role_state.record(uid, group_ids)
+                cldbids.remember(uid, client["client_database_id"])
+            if self.excluded_role_id in group_ids:
+                logging.debug(f"Excluding client {name} due to excluded role.")
+                continue
+            voice_clients.append(client)
+        return voice_clients
 
     async def handle_initial_clients(self):
         """Process existing clients after connection. This serves as a full rescan."""
@@ -30,41 +81,20 @@ class ClientManager:
 
         logging.debug("Starting initial client scan (handle_initial_clients).")
         try:
-            clients = await self.client.client_list()
-            for client in clients:
-                if client.get("client_type") != ClientType.VOICE:
-                    continue
-
-                client_info_full = await self.client.client_info(client["clid"])
-                cldbid = client_info_full.get("client_database_id")
-
-                try:
-                    groups_info = await self.client.server_groups_by_client(cldbid)
-                    group_ids = [int(group.get("sgid", 0)) for group in groups_info]
-                    if self.excluded_role_id in group_ids:
-                        logging.debug(f"Excluding client {client_info_full.get('client_nickname')} due to excluded role.")
-                        continue
-                except atsq.QueryError as group_error:
-                    logging.warning(f"Could not get group info for cldbid {cldbid} (client: {client.get('client_nickname')}): {group_error}. Skipping client.")
-                    continue
-
-                uid = client_info_full.get("client_unique_identifier")
-                name = client_info_full.get("client_nickname")
-
-                if not uid or not name:
-                    logging.warning(f"Client with clid {client['clid']} has no UID or Name. Skipping.")
-                    continue
-
+            for client in await self._list_voice_clients():
+                uid = client["client_unique_identifier"]
+                name = client["client_nickname"]
                 self.connected_users.add(uid)
                 self.client_uid_map[client["clid"]] = uid
                 self.client_name_map[uid] = name
                 logging.debug(f"Tracking initial client: {name} ({uid})")
 
                 await self._capture_myteamspeak_identity(
-                    uid, client_info_full.get("client_myteamspeak_id"), is_ts6=self._is_ts6()
+                    uid, client.get("client_myteamspeak_id"), is_ts6=self._is_ts6()
                 )
-                await self.check_vpn_and_kick_if_needed(client_info_full, client["clid"])
+                await self.check_vpn_and_kick_if_needed(client, client["clid"])
 
+            get_presence_log().sync('teamspeak', self.connected_users)
             logging.info(f"Initial client scan complete. Tracking {len(self.connected_users)} users.")
         except atsq.QueryError as e:
             logging.error(f"Error handling initial clients: {e}")
@@ -96,7 +126,14 @@ class ClientManager:
             return None
 
         try:
-            client_info = await self.client.client_info(clid)
+            if all(event.get(field) for field in CONNECT_EVENT_FIELDS):
+                # fast path: the notification carries everything tracking
+                # needs, so no clientinfo / servergroupsbyclientid round trip
+                client_info = dict(event)
+                group_ids = parse_server_groups(event.get("client_servergroups"))
+            else:
+                client_info = await self.client.client_info(clid)
+                group_ids = None
             cldbid = client_info.get("client_database_id")
             uid = client_info.get("client_unique_identifier")
             name = client_info.get("client_nickname")
@@ -104,6 +141,7 @@ class ClientManager:
             if not cldbid or not uid or not name:
                 logging.warning(f"Could not get full info for connecting clid {clid}. UID: {uid}, Name: {name}. Skipping.")
                 return None
+            get_cldbid_map().remember(uid, cldbid)
 
             # TS3->TS6 identity bridge: capture the stable myTeamSpeak account id (identical
             # across TS3/TS6) so returning users are recognised after the UID hash change.
@@ -112,8 +150,11 @@ class ClientManager:
                 uid, client_info.get("client_myteamspeak_id"), is_ts6=self._is_ts6()
             )
 
-            groups_info = await self.client.server_groups_by_client(cldbid)
-            group_ids = [int(group.get("sgid", 0)) for group in groups_info]
+            if group_ids is None:
+                groups_info = await self.client.server_groups_by_client(cldbid)
+                group_ids = [int(group.get("sgid", 0)) for group in groups_info]
+            # the join's role check can then answer from the cache
+            get_role_state('teamspeak').record(uid, group_ids)
 
             if self.excluded_role_id in group_ids:
                 logging.debug(f"Ignoring connect for excluded user: {name} ({uid})")
@@ -122,6 +163,7 @@ class ClientManager:
             self.connected_users.add(uid)
             self.client_uid_map[clid] = uid
             self.client_name_map[uid] = name
+            get_presence_log().join('teamspeak', uid)
             logging.debug(f"User connected: {name} ({uid})")
 
             await self.check_vpn_and_kick_if_needed(client_info, clid)
@@ -156,14 +198,36 @@ class ClientManager:
             logging.error(f"myTeamSpeak identity capture failed for uid {uid}: {e}")
 
     async def _get_user_level(self, teamspeak_id):
+        now = time.monotonic()
+        cached = self._levels.get(teamspeak_id)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        # expired entries of users who never reconnect would pile up otherwise
+        self._levels = {uid: entry for uid, entry in self._levels.items() if entry[1] > now}
         result = await self.db.execute_query(
             "SELECT level FROM user WHERE teamspeak_id = %s", (teamspeak_id,))
-        return result[0][0] if result else 0
+        level = result[0][0] if result else 0
+        self._levels[teamspeak_id] = (level, time.monotonic() + Config.VPN_LEVEL_CACHE_TTL)
+        return level
+
+    def forget_levels(self, teamspeak_ids):
+        """Drop the cached levels of users whose level just changed, so a user
+        who reached VPN_ALLOWED_LEVEL is not kicked until the entry expires."""
+        for teamspeak_id in teamspeak_ids:
+            self._levels.pop(teamspeak_id, None)
 
     async def check_vpn_and_kick_if_needed(self, client_info, clid):
         """Check if the user's IP is VPN/Tor and kick if level is too low."""
         try:
+            level = None
             ip = client_info.get("connection_client_ip")
+            if not ip and "client_servergroups" in client_info:
+                # connect notifications carry no IP; fetch it only for users
+                # the check applies to
+                level = await self._get_user_level(client_info["client_unique_identifier"])
+                if level >= VPN_ALLOWED_LEVEL:
+                    return
+                ip = (await self.client.client_info(clid)).get("connection_client_ip")
             if not ip:
                 logging.warning(f"No IP found for client {clid} ({client_info.get('client_nickname')}) during VPN check.")
                 return
@@ -180,19 +244,11 @@ class ClientManager:
                 logging.debug(f"Skipping VPN check for non-global IP {address} (clid {clid}).")
                 return
 
-            level = await self._get_user_level(client_info["client_unique_identifier"])
-            if level < 9:
-                # requests is blocking; keep it off the event loop
-                resp = await asyncio.to_thread(
-                    requests.get, f"https://vpnapi.io/api/{address}?key={Config.VPNAPI_API_KEY}", timeout=5
-                )
-                if resp.status_code != 200:
-                    logging.warning(f"vpnapi.io error: {resp.status_code}")
-                    return
-                data = resp.json()
-                is_vpn = data.get("security", {}).get("vpn", False)
-                is_tor = data.get("security", {}).get("tor", False)
-                if is_vpn or is_tor:
+            if level is None:
+                level = await self._get_user_level(client_info["client_unique_identifier"])
+            if level < VPN_ALLOWED_LEVEL:
+                verdict = await self.reputation.verdict(address)
+                if verdict is not None and verdict.flagged:
                     try:
                         await self.client.client_kick(clid, reasonid=5, reasonmsg="VPNs sind aus Abuse Gründen erst ab Level 9 erlaubt. Bei dringendem Bedarf bitte an admin@firephenix.de wenden.")
                         logging.info(f"Kicked user {clid} for VPN/Tor usage (level {level})")
@@ -212,6 +268,7 @@ class ClientManager:
         if uid:
             if uid in self.connected_users:
                 self.connected_users.remove(uid)
+                get_presence_log().leave('teamspeak', uid)
             name = self.client_name_map.pop(uid, "Unknown")
             logging.debug(f"User disconnected: {name} ({uid}). Reason ID: {event.get('reasonid', 'N/A')}")
         else:
@@ -235,35 +292,9 @@ class ClientManager:
     async def validate_connected_users(self):
         """Validate that all tracked users are actually still connected and remove stale entries"""
         try:
-            # Get current clients from server
-            current_clients = await self.client.client_list()
-            current_uids = set()
-            current_clid_to_uid = {}
-
-            for client in current_clients:
-                if client.get("client_type") != ClientType.VOICE:  # Skip non-user clients
-                    continue
-
-                try:
-                    client_info = await self.client.client_info(client["clid"])
-                    uid = client_info.get("client_unique_identifier")
-                    cldbid = client_info.get("client_database_id")
-
-                    if not uid or not cldbid:
-                        continue
-
-                    # Check if user should be excluded
-                    groups_info = await self.client.server_groups_by_client(cldbid)
-                    group_ids = [int(group.get("sgid", 0)) for group in groups_info]
-                    if self.excluded_role_id in group_ids:
-                        continue
-
-                    current_uids.add(uid)
-                    current_clid_to_uid[client["clid"]] = uid
-
-                except atsq.QueryError as e:
-                    logging.warning(f"Error getting info for client {client.get('clid')}: {e}")
-                    continue
+            current_clients = await self._list_voice_clients()
+            current_clid_to_uid = {client["clid"]: client["client_unique_identifier"] for client in current_clients}
+            current_uids = set(current_clid_to_uid.values())
 
             # Find users in our tracking that are no longer connected
             stale_users = self.connected_users - current_uids
@@ -278,23 +309,16 @@ class ClientManager:
             missing_users = current_uids - self.connected_users
             if missing_users:
                 logging.warning(f"Found {len(missing_users)} missing users, adding them")
-                for uid in missing_users:
-                    self.connected_users.add(uid)
-                    # Find the name for this UID
-                    for clid, tracked_uid in current_clid_to_uid.items():
-                        if tracked_uid == uid:
-                            try:
-                                client_info = await self.client.client_info(clid)
-                                name = client_info.get("client_nickname", "Unknown")
-                                self.client_name_map[uid] = name
-                                self.client_uid_map[clid] = uid
-                                logging.debug(f"Added missing user: {name} ({uid})")
-                                break
-                            except atsq.QueryError:
-                                continue
-
-            # Update client_uid_map to reflect current state
-            self.client_uid_map = current_clid_to_uid.copy()
+                self.connected_users |= missing_users
+
+            # Update the maps to reflect current state (names may have changed)
+            self.client_uid_map = current_clid_to_uid
+            for client in current_clients:
+                uid = client["client_unique_identifier"]
+                if uid in missing_users:
+                    logging.debug(f"Added missing user: {client['client_nickname']} ({uid})")
+                self.client_name_map[uid] = client["client_nickname"]
+            get_presence_log().sync('teamspeak', self.connected_users)
 
             logging.debug(f"Validation complete. Tracking {len(self.connected_users)} users.")
 
@@ -0,0 +1,159 @@
+"""Prioritised ServerQuery scheduling.
+
+All TeamSpeak work goes through one atsq client, and a ServerQuery session
+answers one command at a time: atsq holds each command until the previous
+``error`` line arrived, first come first served. A rescan or a role
+reconciliation pass could therefore queue hundreds of commands ahead of a
+website action such as ``set_server_group``.
+
+``QueryScheduler`` wraps the client for the rank, client and channel
+managers. At most ``TS3_QUERY_WINDOW`` commands are handed to atsq at once,
+enough to keep the session busy; the others wait in a priority queue:
+website commands first, event handling next, rescans and reconciliation
+last, first come first served within a priority. Identical read-only
+commands already waiting or running share one round trip.
+
+A command's priority comes from the calling task's context
+(``query_priority``), so the managers need no extra arguments; tasks inherit
+the priority of the code that created them.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import heapq
+import inspect
+import itertools
+from enum import IntEnum
+
+from app.config import Config
+
+__all__ = [
+    'QueryPriority',
+    'QueryScheduler',
+    'query_priority',
+]
+
+
+class QueryPriority(IntEnum):
+    INTERACTIVE = 0
+    EVENT = 1
+    BACKGROUND = 2
+
+
+_current_priority = contextvars.ContextVar('ts_query_priority', default=QueryPriority.EVENT)
+
+
+@contextlib.contextmanager
+def query_priority(priority: QueryPriority):
+    """Run the ServerQuery commands of the enclosed code at ``priority``."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+# read-only commands whose concurrent identical calls share one round trip
+COALESCED_COMMANDS = frozenset({
+    'client_list',
+    'client_info',
+    'client_dbid_from_uid',
+    'server_groups_by_client',
+    'whoami',
+})
+# connection lifecycle and event plumbing, never queued
+PASSTHROUGH = frozenset({'start', 'close', 'run_forever', 'wait_for_event', 'send_keepalive'})
+
+
+class QueryScheduler:
+    """Stands in for an ``atsq.Client``: its command coroutines are queued by
+    priority, everything else is the client's own attribute."""
+
+    def __init__(self, client, window: int = None):
+        self.client = client
+        self.window = max(1, Config.TS3_QUERY_WINDOW if window is None else window)
+        self._in_flight = 0
+        self._waiting = []
+        self._order = itertools.count()
+        self._shared = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        """Commands waiting for a slot."""
+        return sum(1 for _, _, future in self._waiting if not future.done())
+
+    def __getattr__(self, name):
+        if name == 'client':
+            raise AttributeError(name)
+        attribute = getattr(self.client, name)
+        if name in PASSTHROUGH or not inspect.iscoroutinefunction(attribute):
+            return attribute
+        return functools.partial(self.call, name)
+
+    async def call(self, name: str, *args, **kwargs):
+        """``await client.<name>(*args, **kwargs)`` at the current priority."""
+        priority = _current_priority.get()
+        if name not in COALESCED_COMMANDS:
+            return await self._run(priority, name, args, kwargs)
+
+        key = (name, args, tuple(sorted(kwargs.items())))
+        shared = self._shared.get(key)
+        # never wait behind a lower priority copy of the same command
+        if shared is not None and shared[0] <= priority:
+            self.coalesced += 1
+            shared[2] += 1
+        else:
+            task = asyncio.ensure_future(self._run(priority, name, args, kwargs))
+            shared = self._shared[key] = [priority, task, 1]
+            task.add_done_callback(functools.partial(self._forget, key))
+        task = shared[1]
+        try:
+            # a cancelled caller must not cancel the round trip others share
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            shared[2] -= 1
+            if not shared[2]:
+                task.cancel()
+            raise
+
+    def _forget(self, key, task) -> None:
+        shared = self._shared.get(key)
+        if shared is not None and shared[1] is task:
+            del self._shared[key]
+        if not task.cancelled():
+            task.exception()  # retrieved even when every caller gave up
+
+    async def _run(self, priority, name, args, kwargs):
+        await self._acquire(priority)
+        try:
+            self.executed += 1
+            return await getattr(self.client, name)(*args, **kwargs)
+        finally:
+            self._release()
+
+    async def _acquire(self, priority) -> None:
+        if self._in_flight < self.window and not len(self):
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._order), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # cancelled waiters are skipped by _release; one that was already
+            # handed a slot passes it on
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        """Hand the slot to the most urgent waiter, or free it."""
+        while self._waiting:
+            _, _, future = heapq.heappop(self._waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_flight -= 1
@@ -1,4 +1,6 @@
 import atsq
+from app.rankingsystem.bots.teamspeak.cldbid_map import get_cldbid_map
+from app.rankingsystem.role_state import get_role_state
 from app.utils.database import DatabaseConnectionError
 from app.utils.logger import RankingLogger
 
@@ -11,13 +13,17 @@ class RankManager:
         self.config = config
         self.db = db_manager
         self.client = client
+        self.role_state = get_role_state('teamspeak')
+        self.cldbids = get_cldbid_map()
+
+    async def _cldbid(self, uid):
+        """The client database id, from the uid -> cldbid map if known."""
+        return await self.cldbids.resolve(uid, self.client.client_dbid_from_uid)
 
     async def check_user_roles(self, uid):
         """Check if user rank needs to be updated"""
         try:
             logging.debug(f"Checking rank for user: {uid}")
-            cldbid = await self.client.client_dbid_from_uid(uid)
-
             try:
                 rank, division = await self.db.get_user_roles(uid, "teamspeak")
             except DatabaseConnectionError:
@@ -33,8 +39,15 @@ class RankManager:
                     rank = 1
                     division = 1
 
+            if self.role_state.matches(
+                    uid, self.config.TEAMSPEAK_LEVEL_MAP.get(rank), self.config.TEAMSPEAK_DIVISION_MAP.get(division)):
+                logging.debug(f"User {uid} roles match the cached state")
+                return
+
+            cldbid = await self._cldbid(uid)
             groups_info = await self.client.server_groups_by_client(cldbid)
             group_ids = [int(group.get("sgid", 0)) for group in groups_info]
+            self.role_state.record(uid, group_ids)
 
             logging.debug(f"User {uid} database rank and division: {rank} and {division}")
             logging.debug(f"User {uid} should have group {self.config.TEAMSPEAK_LEVEL_MAP.get(rank)} and {self.config.TEAMSPEAK_DIVISION_MAP.get(division)}")
@@ -64,6 +77,7 @@ class RankManager:
                 await self.set_ranks(uid, division=division)
 
         except atsq.QueryError as e:
+            self.cldbids.forget(uid)
             logging.error(f"Error checking user roles: {e}")
         except Exception as e:
             logging.error(f"Error getting server groups for client {uid}: {e}")
@@ -75,7 +89,7 @@ class RankManager:
             return None
 
         try:
-            cldbid = await self.client.client_dbid_from_uid(client_id)
+            cldbid = await self._cldbid(client_id)
 
             if level is not None:
                 await self._update_server_group(
@@ -106,7 +120,7 @@ class RankManager:
         cldbid = None
         step = "client_lookup"
         try:
-            cldbid = await self.client.client_dbid_from_uid(client_id)
+            cldbid = await self._cldbid(client_id)
             if not cldbid:
                 return {"ok": False, "error": "client_dbid_missing"}
 
@@ -165,6 +179,8 @@ class RankManager:
             }
 
         except Exception as e:
+            if isinstance(e, atsq.QueryError):
+                self.cldbids.forget(client_id)
             logging.error(f"Failed to set TeamSpeak group {group_id} for user {client_id} at {step}: {e}")
             return {
                 "ok": False,
@@ -177,7 +193,7 @@ class RankManager:
     async def remove_server_group(self, client_id, group_id):
         """Remove a specific server group from a user"""
         try:
-            cldbid = await self.client.client_dbid_from_uid(client_id)
+            cldbid = await self._cldbid(client_id)
 
             groups_info = await self.client.server_groups_by_client(cldbid)
             group_ids = [int(group.get("sgid", 0)) for group in groups_info]
@@ -191,6 +207,8 @@ class RankManager:
             return True
 
         except Exception as e:
+            if isinstance(e, atsq.QueryError):
+                self.cldbids.forget(client_id)
             logging.error(f"Failed to remove server group for user {client_id}: {e}")
             return False
 
@@ -210,8 +228,12 @@ class RankManager:
                 await self.client.server_group_add_client(sgid=new_group_id, cldbid=cldbid)
 
                 logging.debug(f"Updated {rank_type} for user {client_id} to {new_value}")
+                self.role_state.set_groups(client_id, **{f"{rank_type}_groups": [new_group_id]})
             else:
                 logging.error(f"Invalid {rank_type} value: {new_value}")
+                self.role_state.set_groups(client_id, **{f"{rank_type}_groups": []})
 
         except atsq.QueryError as err:
+            self.role_state.invalidate(client_id)
+            self.cldbids.forget(client_id)
             logging.error(f"TS3 Query Error updating {rank_type}: {err}")
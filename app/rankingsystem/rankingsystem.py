@@ -1,5 +1,6 @@
 import asyncio
 from datetime import datetime, timedelta
+from functools import partial
 import json
 import os
 import valkey
@@ -7,6 +8,10 @@ import valkey.asyncio as avalkey
 from app.config import Config
 from app.rankingsystem.bots.discord.bot import DiscordBot
 from app.rankingsystem.bots.teamspeak.bot import TeamspeakBot
+from app.rankingsystem.bots.teamspeak.cldbid_map import get_cldbid_map
+from app.rankingsystem.bots.teamspeak.query_scheduler import QueryPriority, query_priority
+from app.rankingsystem.role_state import get_role_state
+from app.rankingsystem.role_sync import RoleSyncQueue
 from app.utils.async_database import get_async_db
 from app.utils.database import (
     DatabaseManager,
@@ -14,7 +19,11 @@ from app.utils.database import (
     SEASON_RESET_DAY,
     SEASON_RESET_MONTH,
 )
+from app.utils.hall_of_fame import HallOfFameJob
+from app.utils.leaderboard import RANKING_VERSION_KEY, LeaderboardMaintainer
 from app.utils.logger import RankingLogger
+from app.utils.minute_accumulator import MinuteAccumulator
+from app.utils.presence import get_presence_log
 from app.utils.ttt_achievement_consumer import TttAchievementStreamConsumer
 
 logging = RankingLogger(__name__).get_logger()
@@ -36,13 +45,25 @@ class RankingSystem:
     def __init__(self):
         self.ts = None
         self.dc = None
-        # The sync manager creates/migrates the schema on connect; the async
-        # manager assumes it exists.
-        DatabaseManager().close()
+        # Migrations run at deploy (migrate.py); refuse to start on an old
+        # schema instead of failing query by query later.
+        db = DatabaseManager()
+        try:
+            db.check_schema_version()
+        finally:
+            db.close()
         self.database = get_async_db()
 
         self.valkey = avalkey.Valkey(**Config.valkey_connection_kwargs())
         self.ttt_achievement_consumer = TttAchievementStreamConsumer(self.valkey, self.database)
+        self.minutes = MinuteAccumulator(self.valkey, self.database)
+        self.presence = get_presence_log()
+        self.leaderboards = LeaderboardMaintainer(self.valkey, self.database, accumulator=self.minutes)
+        self.hall_of_fame = HallOfFameJob(self.valkey, self.database)
+        self.role_sync = {
+            'discord': RoleSyncQueue('discord', self._check_discord_roles),
+            'teamspeak': RoleSyncQueue('teamspeak', self._check_teamspeak_roles),
+        }
         self.running = True
         self.platforms = ['discord', 'teamspeak']
         self._loop = None
@@ -77,6 +98,28 @@ class RankingSystem:
                 name="ttt-achievements",
             ),
             asyncio.create_task(self._main_loop(), name="ranking-tick"),
+            asyncio.create_task(
+                self.hall_of_fame.run_forever(lambda: self.running),
+                name="hall-of-fame",
+            ),
+            *(
+                asyncio.create_task(
+                    queue.run_forever(lambda: self.running, partial(self._online_user_ids, platform)),
+                    name=f"{platform}-role-sync",
+                )
+                for platform, queue in self.role_sync.items()
+            ),
+            *(
+                asyncio.create_task(
+                    get_role_state(platform).run_forever(self.valkey, lambda: self.running),
+                    name=f"{platform}-role-state",
+                )
+                for platform in self.platforms
+            ),
+            asyncio.create_task(
+                get_cldbid_map().run_forever(self.valkey, lambda: self.running),
+                name="teamspeak-cldbid",
+            ),
         ]
         try:
             await self._stop_event.wait()
@@ -101,6 +144,11 @@ class RankingSystem:
         for task in tasks:
             task.cancel()
         await asyncio.gather(*tasks, return_exceptions=True)
+        # the bots are gone, so no role sync for this last batch; the next
+        # start's rank checks catch up
+        await self._flush_minutes(force=True, sync_roles=False)
+        self.presence.close_all()
+        await self._checkpoint_presence(force=True, sync_roles=False)
         try:
             await self.valkey.aclose()
         except Exception as e:
@@ -123,6 +171,9 @@ class RankingSystem:
     def _get_online_users(self, platform):
         return self.ts.get_online_users() if platform == 'teamspeak' else self.dc.get_online_users()
 
+    def _online_user_ids(self, platform):
+        return self._get_online_users(platform)[0]
+
     async def _main_loop(self):
         """Main loop for the ranksystem"""
         last_users = {platform: [] for platform in self.platforms}
@@ -141,26 +192,45 @@ class RankingSystem:
                 first_of_month = now.day == 1
                 season_reset_due = (now.month, now.day) >= (SEASON_RESET_MONTH, SEASON_RESET_DAY)
 
-                if not last_daily or (last_daily.date() != today):
+                daily_due = not last_daily or (last_daily.date() != today)
+                weekly_due = weekday == 0 and (not last_weekly or last_weekly.date() != today)
+                monthly_due = first_of_month and (
+                    not last_monthly or last_monthly.month != now.month or last_monthly.year != now.year)
+                season_due = season_reset_due and (not last_season or last_season.year < now.year)
+                # accumulated minutes belong to the period that is ending
+                period_ending = daily_due or weekly_due or monthly_due or season_due
+                await self._flush_minutes(force=period_ending)
+                await self._checkpoint_presence(force=period_ending)
+
+                periods_reset = False
+                if daily_due:
                     await self.database.reset_time('daily')
+                    periods_reset = True
                     logging.info(f"Performed daily time reset at {now}")
 
-                if weekday == 0 and (not last_weekly or last_weekly.date() != today):
+                if weekly_due:
                     await self.database.reset_time('weekly')
+                    periods_reset = True
                     logging.info(f"Performed weekly time reset at {now}")
 
-                if first_of_month and (not last_monthly or last_monthly.month != now.month or last_monthly.year != now.year):
+                if monthly_due:
                     await self.database.reset_time('monthly')
+                    periods_reset = True
                     logging.info(f"Performed monthly time reset at {now}")
 
-                if season_reset_due and (not last_season or last_season.year < now.year):
+                if season_due:
                     result = await self.database.close_season(now)
+                    periods_reset = True
                     logging.info(
                         f"Closed season at {now}: "
                         f"{result['participants']} participants, "
                         f"{result['achievement_rows']} achievement rows"
                     )
 
+                await self._refresh_leaderboards(force=periods_reset)
+                if periods_reset:
+                    await self._bump_ranking_version()
+
                 for _ in range(valkey_update_count):
                     if not self.running:
                         return
@@ -189,6 +259,10 @@ class RankingSystem:
                                 platform=platform
                             )
 
+                        # safety net for missed join/leave events; credited
+                        # at the next presence checkpoint
+                        self.presence.sync(platform, connected_users)
+
                         if connected_users and names:
                             for user_id in connected_users:
                                 if user_id not in last_users[platform]:
@@ -196,19 +270,19 @@ class RankingSystem:
                                     await self.database.update_login_streak(user_id, platform)
 
                             last_users[platform] = connected_users
-                            await self.database.update_times(connected_users, platform)
-                            await self.database.update_heatmap(connected_users, platform)
-                            await self.database.update_ranks(connected_users, platform)
-                            await self.database.update_seasonal_ranks(connected_users, platform)
-                            for user_id in connected_users:
-                                if platform == 'discord':
-                                    asyncio.create_task(self.dc.check_ranks(user_id, check_type="both"))
-                                elif platform == 'teamspeak':
-                                    asyncio.create_task(self.ts.check_ranks(user_id))
+                            if self.presence.enabled:
+                                continue
+                            changes = await self._credit_minute(platform, connected_users)
+                            try:
+                                await self.leaderboards.update(platform, connected_users)
+                            except valkey.ValkeyError as e:
+                                logging.error(f"Leaderboard update failed: {e}")
+                            self._sync_changed_roles({platform: changes})
 
                     except DatabaseConnectionError:
                         logging.error("Database connection error")
                         continue
+                await self._bump_ranking_version()
             except asyncio.CancelledError:
                 raise
             except Exception as e:
@@ -216,6 +290,84 @@ class RankingSystem:
                 await asyncio.sleep(1)
                 continue
 
+    async def _credit_minute(self, platform, connected_users):
+        """This minute for the online users: buffered in Valkey with the
+        minute accumulator enabled (straight to MariaDB if Valkey is down),
+        otherwise one ``apply_tick`` transaction. Returns the
+        ``(level_changes, division_changes)`` written now."""
+        if self.minutes.enabled:
+            try:
+                await self.minutes.add(platform, connected_users)
+                return [], []
+            except valkey.ValkeyError as e:
+                logging.error(f"Minute accumulator unavailable, writing the tick directly: {e}")
+        return await self.database.apply_tick(platform, connected_users)
+
+    async def _flush_minutes(self, force=False, sync_roles=True):
+        """Flush the minute accumulator when due; failures only log, the
+        batch stays in Valkey for the next attempt."""
+        try:
+            changes = await self.minutes.flush_if_due(force=force)
+        except Exception as e:
+            logging.error(f"Minute flush failed: {e}")
+            return
+        if sync_roles:
+            self._sync_changed_roles(changes)
+
+    async def _checkpoint_presence(self, force=False, sync_roles=True):
+        """Credit the presence sessions when due and re-score the credited
+        users; failures only log, the batch is retried next checkpoint."""
+        try:
+            credited, changes = await self.presence.checkpoint_if_due(force=force)
+        except Exception as e:
+            logging.error(f"Presence checkpoint failed: {e}")
+            return
+        for platform, platform_uids in credited.items():
+            try:
+                await self.leaderboards.update(platform, platform_uids)
+            except (valkey.ValkeyError, DatabaseConnectionError) as e:
+                logging.error(f"Leaderboard update failed: {e}")
+        if sync_roles:
+            self._sync_changed_roles(changes)
+
+    def _sync_changed_roles(self, changes):
+        """Queue role checks for the users whose level or division changed
+        (``{platform: (level_changes, division_changes)}``) and drop their
+        levels from the TeamSpeak VPN check's cache."""
+        for platform, (level_changes, division_changes) in changes.items():
+            if platform == 'teamspeak' and level_changes and self.ts:
+                self.ts.forget_levels([uid for uid, _ in level_changes])
+            queue = self.role_sync.get(platform)
+            if queue is None:
+                continue
+            for user_id in {uid for uid, _ in level_changes + division_changes}:
+                queue.enqueue(user_id)
+
+    async def _check_discord_roles(self, user_id):
+        await self.dc.check_ranks(int(user_id), check_type="both")
+
+    async def _check_teamspeak_roles(self, user_id):
+        with query_priority(QueryPriority.BACKGROUND):
+            await self.ts.check_ranks(user_id)
+
+    async def _refresh_leaderboards(self, force=False):
+        """Rebuild the Valkey leaderboards after resets or when stale; the API
+        falls back to SQL while they are missing, so failures only log."""
+        try:
+            if force:
+                await self.leaderboards.rebuild()
+            else:
+                await self.leaderboards.refresh_if_stale()
+        except (valkey.ValkeyError, DatabaseConnectionError) as e:
+            logging.error(f"Leaderboard rebuild failed: {e}")
+
+    async def _bump_ranking_version(self):
+        """Expire the API's cached ranking responses once the tick has written."""
+        try:
+            await self.valkey.incr(RANKING_VERSION_KEY)
+        except valkey.ValkeyError as e:
+            logging.error(f"Ranking version bump failed: {e}")
+
     # -- website commands (valkey pubsub) ----------------------------------
 
     async def _command_listener(self):
@@ -246,7 +398,9 @@ class RankingSystem:
                 if channel == 'discord:commands':
                     await self.handle_discord_command(data)
                 elif channel == 'teamspeak:commands':
-                    await self.handle_teamspeak_command(data)
+                    # website actions go ahead of rescans and reconciliation
+                    with query_priority(QueryPriority.INTERACTIVE):
+                        await self.handle_teamspeak_command(data)
         except TimeoutError:
             logging.error(f"Timed out handling command on {channel}")
         except Exception as e:
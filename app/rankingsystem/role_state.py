@@ -0,0 +1,227 @@
+"""Last-applied role state per platform user.
+
+A role check compares the level/division the database expects with the
+groups the user holds, and reading those costs network round trips:
+``clientgetdbidfromuid`` plus ``servergroupsbyclientid`` on TeamSpeak,
+``guild.fetch_member`` over HTTP on Discord. ``RoleStateCache`` remembers
+per platform uid the rank and division groups last seen, so a check whose
+expected groups match the cache finishes without a round trip. (TeamSpeak
+database ids live in ``app.rankingsystem.bots.teamspeak.cldbid_map``.)
+
+The cache is fed by every full read a check does, by our own group writes,
+and by group events: ``servergroupclientadded`` / ``servergroupclientdeleted``
+on TeamSpeak and ``on_member_update`` on Discord. An entry older than
+``ROLE_STATE_MAX_AGE`` seconds is not trusted, so roles changed behind our
+back without an event are still noticed within that time by the role sync
+reconciliation pass.
+
+The entries and hit/miss counters are snapshotted to Valkey every
+``ROLE_STATE_SNAPSHOT_INTERVAL`` seconds (``role_state:<platform>``, field =
+uid, value = JSON; counters in ``role_state:stats``) and loaded back on
+startup.
+"""
+
+import asyncio
+import json
+import time
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional
+
+import valkey
+
+from app.config import Config
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+__all__ = [
+    'RoleState',
+    'RoleStateCache',
+    'get_role_state',
+]
+
+ROLE_STATE_STATS_KEY = "role_state:stats"
+
+
+def role_state_key(platform: str) -> str:
+    return f"role_state:{platform}"
+
+
+class RoleState(NamedTuple):
+    level_groups: FrozenSet[int]
+    division_groups: FrozenSet[int]
+    verified_at: float
+
+
+class RoleStateCache:
+    """uid -> ``RoleState`` for one platform.
+
+    ``level_map`` / ``division_map`` are the platform's rank -> group id
+    maps; only those groups are tracked.
+    """
+
+    def __init__(self, platform: str, level_map: Dict[int, int], division_map: Dict[int, int],
+                 max_age: float = None):
+        self.platform = platform
+        self.level_group_ids = frozenset(level_map.values())
+        self.division_group_ids = frozenset(division_map.values())
+        self.max_age = Config.ROLE_STATE_MAX_AGE if max_age is None else max_age
+        self._entries: Dict[str, RoleState] = {}
+        self._dirty = set()
+        self.hits = 0
+        self.misses = 0
+        self._unsaved_hits = 0
+        self._unsaved_misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _fresh(self, uid) -> Optional[RoleState]:
+        state = self._entries.get(str(uid))
+        if state is None or time.time() - state.verified_at > self.max_age:
+            return None
+        return state
+
+    def matches(self, uid, level_group: Optional[int], division_group: Optional[int]) -> bool:
+        """Whether ``uid`` is known to hold exactly ``level_group`` and
+        ``division_group``; counts a hit or a miss."""
+        state = self._fresh(uid)
+        hit = (
+            state is not None
+            and state.level_groups == {level_group}
+            and state.division_groups == {division_group}
+        )
+        if hit:
+            self.hits += 1
+            self._unsaved_hits += 1
+        else:
+            self.misses += 1
+            self._unsaved_misses += 1
+        return hit
+
+    def _store(self, uid: str, state: RoleState) -> None:
+        self._entries[uid] = state
+        self._dirty.add(uid)
+
+    def record(self, uid, group_ids: Iterable[int]) -> None:
+        """A full read of ``uid``'s groups."""
+        uid = str(uid)
+        group_ids = {int(group_id) for group_id in group_ids}
+        self._store(uid, RoleState(
+            frozenset(group_ids & self.level_group_ids),
+            frozenset(group_ids & self.division_group_ids),
+            time.time(),
+        ))
+
+    def set_groups(self, uid, level_groups: Iterable[int] = None, division_groups: Iterable[int] = None) -> None:
+        """Our own write replaced ``uid``'s level and/or division groups;
+        only applied to a known entry."""
+        uid = str(uid)
+        state = self._entries.get(uid)
+        if state is None:
+            return
+        self._store(uid, state._replace(
+            level_groups=state.level_groups if level_groups is None else frozenset(level_groups),
+            division_groups=state.division_groups if division_groups is None else frozenset(division_groups),
+        ))
+
+    def apply_group_event(self, group_id, added: bool, uid) -> None:
+        """A group add/remove event for a known entry."""
+        group_id = int(group_id)
+        if group_id not in self.level_group_ids and group_id not in self.division_group_ids:
+            return
+        uid = str(uid)
+        state = self._entries.get(uid)
+        if state is None:
+            return
+        change = (lambda groups: groups | {group_id}) if added else (lambda groups: groups - {group_id})
+        if group_id in self.level_group_ids:
+            state = state._replace(level_groups=change(state.level_groups))
+        else:
+            state = state._replace(division_groups=change(state.division_groups))
+        self._store(uid, state)
+
+    def invalidate(self, uid) -> None:
+        if self._entries.pop(str(uid), None) is not None:
+            self._dirty.add(str(uid))
+
+    # -- Valkey snapshot ---------------------------------------------------
+
+    async def load(self, valkey_client) -> None:
+        """Restore the entries of the last snapshot that are still fresh."""
+        fields = await valkey_client.hgetall(role_state_key(self.platform))
+        now = time.time()
+        for uid, value in (fields or {}).items():
+            try:
+                data = json.loads(value)
+                state = RoleState(frozenset(data['level']), frozenset(data['division']), float(data['verified_at']))
+            except (ValueError, KeyError, TypeError):
+                continue
+            if now - state.verified_at <= self.max_age and uid not in self._entries:
+                self._entries[uid] = state
+        logging.debug(f"Loaded {len(self._entries)} {self.platform} role states")
+
+    async def snapshot(self, valkey_client) -> None:
+        """Write the entries changed since the last snapshot and the counters."""
+        dirty, self._dirty = self._dirty, set()
+        hits, misses = self._unsaved_hits, self._unsaved_misses
+        self._unsaved_hits = self._unsaved_misses = 0
+        try:
+            pipe = valkey_client.pipeline(transaction=False)
+            key = role_state_key(self.platform)
+            for uid in dirty:
+                state = self._entries.get(uid)
+                if state is None:
+                    pipe.hdel(key, uid)
+                else:
+                    pipe.hset(key, uid, json.dumps({
+                        'level': sorted(state.level_groups),
+                        'division': sorted(state.division_groups),
+                        'verified_at': state.verified_at,
+                    }))
+            pipe.hincrby(ROLE_STATE_STATS_KEY, f"{self.platform}:hits", hits)
+            pipe.hincrby(ROLE_STATE_STATS_KEY, f"{self.platform}:misses", misses)
+            await pipe.execute()
+        except Exception:
+            self._dirty |= dirty
+            self._unsaved_hits += hits
+            self._unsaved_misses += misses
+            raise
+
+    async def run_forever(self, valkey_client, running, interval: float = None) -> None:
+        """Load the last snapshot, then snapshot every ``interval`` seconds
+        and once more when cancelled."""
+        interval = Config.ROLE_STATE_SNAPSHOT_INTERVAL if interval is None else interval
+        try:
+            await self.load(valkey_client)
+        except valkey.ValkeyError as e:
+            logging.error(f"Loading {self.platform} role states failed: {e}")
+        try:
+            while running():
+                await asyncio.sleep(interval)
+                try:
+                    await self.snapshot(valkey_client)
+                    logging.debug(
+                        f"{self.platform} role state cache: {len(self)} entries, "
+                        f"{self.hits} hits, {self.misses} misses")
+                except valkey.ValkeyError as e:
+                    logging.error(f"{self.platform} role state snapshot failed: {e}")
+        finally:
+            try:
+                await self.snapshot(valkey_client)
+            except Exception as e:
+                logging.debug(f"Final {self.platform} role state snapshot failed: {e}")
+
+
+_shared_instances: Dict[str, RoleStateCache] = {}
+
+
+def get_role_state(platform: str) -> RoleStateCache:
+    """Shared RoleStateCache of ``platform`` for the bot process."""
+    cache = _shared_instances.get(platform)
+    if cache is None:
+        if platform == 'discord':
+            cache = RoleStateCache(platform, Config.DISCORD_LEVEL_MAP, Config.DISCORD_DIVISION_MAP)
+        else:
+            cache = RoleStateCache(platform, Config.TEAMSPEAK_LEVEL_MAP, Config.TEAMSPEAK_DIVISION_MAP)
+        _shared_instances[platform] = cache
+    return cache
@@ -0,0 +1,132 @@
+"""Role sync queue.
+
+A role check (``DiscordBot.check_ranks`` / ``TeamspeakBot.check_ranks``)
+costs a Discord ``fetch_member`` HTTP call or several ServerQuery round
+trips, so the ranking tick no longer starts one per online user per minute.
+It enqueues only the users whose level or division changed; a slow
+reconciliation pass over everyone online every
+``ROLE_SYNC_RECONCILE_INTERVAL`` seconds catches roles edited by hand and
+checks that were dropped or failed.
+
+Each platform has one ``RoleSyncQueue``: a bounded queue drained by
+``ROLE_SYNC_CONCURRENCY`` workers that start at most ``ROLE_SYNC_RATE``
+checks per second. A user already waiting is not queued twice, and when
+the queue is full new users are dropped (the next reconciliation pass picks
+them up) instead of piling up tasks.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable
+
+from app.config import Config
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+__all__ = ['RoleSyncQueue']
+
+
+class RoleSyncQueue:
+    """Coalescing, rate-limited role checks for one platform.
+
+    ``check`` is the coroutine function checking one user's roles; it gets
+    the platform uid as a string, whatever type it was queued with, so a
+    Discord id from the tick and one from the bot coalesce.
+    """
+
+    def __init__(self, platform: str, check: Callable[[object], Awaitable], concurrency: int = None,
+                 rate: float = None, maxsize: int = None):
+        self.platform = platform
+        self.check = check
+        self.concurrency = Config.ROLE_SYNC_CONCURRENCY[platform] if concurrency is None else concurrency
+        self.rate = Config.ROLE_SYNC_RATE[platform] if rate is None else rate
+        self._queue = asyncio.Queue(Config.ROLE_SYNC_QUEUE_SIZE if maxsize is None else maxsize)
+        self._pending = set()
+        self._next_start = 0.0
+        self._throttle_lock = asyncio.Lock()
+        self.dropped = 0
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def enqueue(self, user_id) -> bool:
+        """Queue a check without waiting; False if the queue is full."""
+        user_id = str(user_id)
+        if user_id in self._pending:
+            return True
+        try:
+            self._queue.put_nowait(user_id)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logging.debug(f"{self.platform} role sync queue full, dropping {user_id}")
+            return False
+        self._pending.add(user_id)
+        return True
+
+    async def put(self, user_id) -> None:
+        """Queue a check, waiting for room (reconciliation)."""
+        user_id = str(user_id)
+        if user_id in self._pending:
+            return
+        self._pending.add(user_id)
+        try:
+            await self._queue.put(user_id)
+        except BaseException:
+            self._pending.discard(user_id)
+            raise
+
+    async def reconcile(self, user_ids: Iterable) -> None:
+        for user_id in user_ids:
+            await self.put(user_id)
+
+    async def _throttle(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._throttle_lock:
+            now = time.monotonic()
+            if self._next_start > now:
+                await asyncio.sleep(self._next_start - now)
+            self._next_start = max(now, self._next_start) + 1 / self.rate
+
+    async def _worker(self) -> None:
+        while True:
+            user_id = await self._queue.get()
+            # a change arriving while this check runs queues a fresh one
+            self._pending.discard(user_id)
+            try:
+                await self._throttle()
+                await self.check(user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"{self.platform} role sync failed for {user_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until every queued check has run."""
+        await self._queue.join()
+
+    async def run_forever(self, running, online_users: Callable[[], Iterable],
+                          reconcile_interval: float = None) -> None:
+        """Drain the queue and queue everyone ``online_users`` returns every
+        ``reconcile_interval`` seconds, until cancelled or ``running()`` is
+        false."""
+        interval = Config.ROLE_SYNC_RECONCILE_INTERVAL if reconcile_interval is None else reconcile_interval
+        workers = [asyncio.create_task(self._worker()) for _ in range(max(1, self.concurrency))]
+        try:
+            while running():
+                await asyncio.sleep(interval)
+                try:
+                    users = list(online_users())
+                    logging.debug(f"Reconciling {self.platform} roles for {len(users)} online users")
+                    await self.reconcile(users)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.error(f"{self.platform} role reconciliation failed: {e}")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
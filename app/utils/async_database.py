@@ -18,24 +18,42 @@ is raised for callers that handle outages.
 
 import asyncio
 from datetime import datetime
-from typing import List, Optional, Set, Tuple, Union
+from typing import List, Optional, Sequence, Set, Tuple, Union
 
 import asyncmy
 from asyncmy import errors as asyncmy_errors
 
+from app.achievements import (
+    USER_ACHIEVEMENTS_UPSERT,
+    user_achievement_rows,
+    user_achievement_source_queries,
+)
 from app.config import Config
 from app.utils.logger import RankingLogger
+from app.utils.name_search import name_index_statements, normalize_name
+from app.utils.rank_curves import rank_curves
 from app.utils.database import (
+    CURRENT_EPOCHS_QUERY,
     DatabaseConnectionError,
+    PERIOD_TIME_COLUMNS,
     SEASON_APEX_ACHIEVEMENT,
     _require_steam_id64,
     _ttt_win_breakdown,
     get_season_division_achievement_types,
     get_season_number_for_end_year,
+    current_period_filter,
+    heatmap_slot_bit,
     normalize_ttt_achievement_payload,
     parse_ttt_emitted_at,
+    period_epoch_column,
+    period_minutes_sql,
+    period_rollover_sql,
+    time_merge_query,
     ttt_stats_from_row,
+    user_identity_sync_statements,
+    user_totals_refresh_query,
 )
+from app.utils.hall_of_fame import TOP3_QUERIES
 
 logging = RankingLogger(__name__).get_logger()
 
@@ -112,29 +130,74 @@ class AsyncDatabaseManager:
 
     # -- time / activity tracking -------------------------------------------
 
+    @staticmethod
+    async def _current_epochs(cur) -> Tuple[int, ...]:
+        """Cursor-level current ``reset_log`` epoch per
+        ``PERIOD_TIME_COLUMNS`` period."""
+        await cur.execute(CURRENT_EPOCHS_QUERY)
+        rows = await cur.fetchall()
+        return tuple(int(epoch or 0) for epoch in rows[0]) if rows else (0,) * len(PERIOD_TIME_COLUMNS)
+
+    @classmethod
+    async def _upsert_times(cls, cur, uids: List[str], platform: str, minutes: Optional[List[int]] = None) -> None:
+        """Cursor-level (no commit) increment of the ``time`` rows of ``uids``
+        and of their combined ``user_totals`` rows by ``minutes`` (parallel
+        to ``uids``; one minute each when None). Period counters from an
+        older epoch restart from 0 (see
+        ``app.utils.database.PERIOD_TIME_COLUMNS``)."""
+        id_column = 'discord_id' if platform == 'discord' else 'teamspeak_id'
+        minutes = [1] * len(uids) if minutes is None else [int(value) for value in minutes]
+        epochs = await cls._current_epochs(cur)
+        period_columns = ', '.join(PERIOD_TIME_COLUMNS)
+        epoch_columns = ', '.join(period_epoch_column(column) for column in PERIOD_TIME_COLUMNS)
+        epoch_values = ', '.join(['%s'] * len(epochs))
+        rollovers = ',\n                '.join(
+            period_rollover_sql(column, f'VALUES({column})', '%s') for column in PERIOD_TIME_COLUMNS)
+        rollover_params = [epoch for epoch in epochs for _ in range(2)]
+        await cur.execute(f"""
+            INSERT INTO time (platform_uid, platform, total_time, {period_columns},
+                              {epoch_columns}, last_update)
+            VALUES {','.join([f'(%s, %s, %s, %s, %s, %s, %s, {epoch_values}, CURRENT_TIMESTAMP)'] * len(uids))}
+            ON DUPLICATE KEY UPDATE
+                total_time = total_time + VALUES(total_time),
+                {rollovers},
+                last_update = CURRENT_TIMESTAMP
+        """, [
+            item
+            for uid, value in zip(uids, minutes)
+            for item in (uid, platform, *([value] * (1 + len(PERIOD_TIME_COLUMNS))), *epochs)
+        ] + rollover_params)
+        await cur.execute(f"""
+            INSERT INTO user_totals (user_id, total_time, {period_columns},
+                                     {epoch_columns}, last_seen)
+            SELECT u.id, d.minutes, d.minutes, d.minutes, d.minutes, d.minutes, {epoch_values}, CURRENT_TIMESTAMP
+            FROM user u
+            INNER JOIN (
+                {' UNION ALL '.join(['SELECT %s AS platform_uid, %s AS minutes'] * len(uids))}
+            ) d ON d.platform_uid = u.{id_column}
+            ON DUPLICATE KEY UPDATE
+                total_time = total_time + VALUES(total_time),
+                {rollovers},
+                last_seen = CURRENT_TIMESTAMP
+        """, [*epochs, *(item for pair in zip(uids, minutes) for item in pair), *rollover_params])
+
     async def update_times(self, platform_uids: Set[Union[int, str]], platform: str) -> None:
-        """Batch update time values for multiple users"""
+        """Batch update time values for multiple users, together with their
+        combined ``user_totals`` row"""
         if not platform_uids:
             return
 
-        unique_uids = [str(uid) for uid in platform_uids]
-        query = f"""
-            INSERT INTO time (platform_uid, platform, total_time, daily_time,
-                            weekly_time, monthly_time, season_time, last_update)
-            VALUES {','.join(['(%s, %s, 1, 1, 1, 1, 1, CURRENT_TIMESTAMP)'] * len(unique_uids))}
-            ON DUPLICATE KEY UPDATE
-                total_time = total_time + 1,
-                daily_time = daily_time + 1,
-                weekly_time = weekly_time + 1,
-                monthly_time = monthly_time + 1,
-                season_time = season_time + 1,
-                last_update = CURRENT_TIMESTAMP
-        """
-        flat_params = [item for uid in unique_uids for item in (uid, platform)]
+        uids = [str(uid) for uid in platform_uids]
 
         async def op(conn):
-            async with conn.cursor() as cur:
-                await cur.execute(query, flat_params)
+            await conn.begin()
+            try:
+                async with conn.cursor() as cur:
+                    await self._upsert_times(cur, uids, platform)
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
 
         await self._run(op)
 
@@ -156,160 +219,434 @@ class AsyncDatabaseManager:
         else:
             return 'night'
 
+    @classmethod
+    async def _upsert_heatmap(cls, cur, uids: List[str], platform: str) -> Set[str]:
+        """Cursor-level (no commit) heatmap minute for ``uids`` in the current
+        slot, plus the slot's bit in their ``time.active_slot_mask``. Returns
+        the uids whose mask gained the bit."""
+        now = datetime.now()
+        day_of_week = now.weekday()
+        time_category = cls.get_time_category(now.hour)
+        return await cls._add_heatmap_minutes(
+            cur, platform, [(uid, day_of_week, time_category, 1) for uid in uids])
+
+    @staticmethod
+    async def _add_heatmap_minutes(cur, platform: str, rows: List[Tuple[str, int, str, int]]) -> Set[str]:
+        """Cursor-level (no commit) add of (platform_uid, day_of_week,
+        time_category, minutes) ``rows`` to ``activity_heatmap``, and of each
+        slot's bit to the uid's ``time.active_slot_mask``: one mask SELECT and
+        UPDATE per distinct slot, so at most 28 each, touching only the rows
+        that lack the bit. Returns the uids whose mask gained a bit."""
+        if not rows:
+            return set()
+        await cur.execute(f"""
+            INSERT INTO activity_heatmap
+                (platform_uid, platform, day_of_week, time_category, activity_minutes)
+            VALUES {','.join(['(%s, %s, %s, %s, %s)'] * len(rows))}
+            ON DUPLICATE KEY UPDATE
+                activity_minutes = activity_minutes + VALUES(activity_minutes),
+                last_update = CURRENT_TIMESTAMP
+        """, [
+            item
+            for uid, day_of_week, time_category, minutes in rows
+            for item in (uid, platform, day_of_week, time_category, minutes)
+        ])
+        uids_by_bit = {}
+        for uid, day_of_week, time_category, _ in rows:
+            uids_by_bit.setdefault(heatmap_slot_bit(day_of_week, time_category), []).append(uid)
+        new_slot_uids = set()
+        for bit, uids in uids_by_bit.items():
+            placeholders = ','.join(['%s'] * len(uids))
+            await cur.execute(f"""
+                SELECT platform_uid FROM time
+                WHERE platform = %s AND platform_uid IN ({placeholders}) AND active_slot_mask & %s = 0
+            """, (platform, *uids, bit))
+            gained = [row[0] for row in await cur.fetchall()]
+            if gained:
+                await cur.execute(f"""
+                    UPDATE time
+                    SET active_slot_mask = active_slot_mask | %s
+                    WHERE platform = %s AND platform_uid IN ({','.join(['%s'] * len(gained))})
+                """, (bit, platform, *gained))
+                new_slot_uids.update(str(uid) for uid in gained)
+        return new_slot_uids
+
     async def update_heatmap(self, platform_uids: Set[Union[int, str]], platform: str):
-        """Update the activity heatmap for multiple platform UIDs"""
+        """Update the activity heatmap for multiple platform UIDs and set the
+        slot's bit in their ``time.active_slot_mask``"""
         if not platform_uids:
             return
 
-        now = datetime.now()
-        day_of_week = now.weekday()
-        time_category = self.get_time_category(now.hour)
-
-        values = [(str(uid), platform, day_of_week, time_category) for uid in platform_uids]
+        uids = [str(uid) for uid in platform_uids]
 
         async def op(conn):
             async with conn.cursor() as cur:
-                await cur.executemany("""
-                    INSERT INTO activity_heatmap
-                        (platform_uid, platform, day_of_week, time_category, activity_minutes)
-                    VALUES (%s, %s, %s, %s, 1)
-                    ON DUPLICATE KEY UPDATE
-                        activity_minutes = activity_minutes + 1,
-                        last_update = CURRENT_TIMESTAMP
-                """, values)
+                await self._upsert_heatmap(cur, uids, platform)
 
         await self._run(op)
 
     # -- ranks --------------------------------------------------------------
 
-    async def update_ranks(self, users: Set[Union[int, str]], platform: str) -> List[Tuple[Union[int, str], int]]:
-        rankups = []
-        user_ids = [str(uid) for uid in users]
-        if not user_ids:
-            return rankups
-
+    @staticmethod
+    def _case_update(assignments: dict) -> Tuple[str, list]:
+        """``UPDATE user`` setting each column from a ``CASE id`` over
+        ``{column: {user_id: value}}``, limited to the ids involved: one
+        statement however many users changed."""
+        user_ids = sorted({user_id for values in assignments.values() for user_id in values})
+        clauses, params = [], []
+        for column, values in assignments.items():
+            whens = []
+            for user_id, value in values.items():
+                whens.append("WHEN %s THEN %s")
+                params.extend((user_id, value))
+            clauses.append(f"{column} = CASE id {' '.join(whens)} ELSE {column} END")
+        params.extend(user_ids)
+        return (
+            f"UPDATE user SET {', '.join(clauses)} WHERE id IN ({','.join(['%s'] * len(user_ids))})",
+            params,
+        )
+
+    @classmethod
+    async def _recalculate_ranks(cls, cur, uids: List[str], platform: str) -> Tuple[list, list]:
+        """Cursor-level (no commit) level and division recomputation for the
+        ranked users behind ``uids``, then the Division 6 reassignment.
+        Returns ``(level_changes, division_changes)`` as (platform_uid, value)
+        lists."""
         id_column = 'discord_id' if platform == 'discord' else 'teamspeak_id'
-        placeholders = ','.join(['%s'] * len(user_ids))
+        await cur.execute(f"""
+            SELECT
+                u.id,
+                u.{id_column},
+                COALESCE(ut.total_time, 0) AS total_time,
+                COALESCE({period_minutes_sql('ut', 'season_time')}, 0) AS season_time,
+                u.level,
+                u.division
+            FROM user u
+            LEFT JOIN user_totals ut ON ut.user_id = u.id
+            WHERE COALESCE(u.ranking_disabled, 0) = 0
+                AND u.{id_column} IN ({','.join(['%s'] * len(uids))})
+        """, uids)
+
+        rows = list(await cur.fetchall())
+        curves = rank_curves()
+        calculated_levels = curves.level.ranks_for([row[2] for row in rows])
+        calculated_divisions = curves.division.ranks_for([row[3] for row in rows])
+
+        levels, divisions = {}, {}
+        level_changes, division_changes = [], []
+        for (user_id, platform_uid, _total, _season, level, division), calculated_level, calculated_division in zip(
+                rows, calculated_levels, calculated_divisions):
+            if calculated_level != level:
+                levels[user_id] = calculated_level
+                level_changes.append((platform_uid, calculated_level))
+            if calculated_division != division and division <= 5:
+                divisions[user_id] = calculated_division
+                division_changes.append((platform_uid, calculated_division))
+                logging.debug(f"Updated {platform} user {platform_uid} to division {calculated_division}")
+
+        assignments = {column: values for column, values in (('level', levels), ('division', divisions)) if values}
+        if assignments:
+            await cur.execute(*cls._case_update(assignments))
+        await cls._update_top_division_ranks(cur, platform, division_changes)
+        return level_changes, division_changes
+
+    @classmethod
+    async def _update_top_division_ranks(cls, cur, platform: str, rankups: List[Tuple[Union[int, str], int]]) -> None:
+        """
+        Update the top division (Division 6) based on season time.
+        Only the top Config.TOP_DIVISION_PLAYER_AMOUNT players can be in Division 6.
+        Runs on the caller's cursor inside its transaction.
+        """
+        id_column = 'discord_id' if platform == 'discord' else 'teamspeak_id'
+
+        await cur.execute(f"""
+            SELECT u.id, u.{id_column}, COALESCE({period_minutes_sql('ut', 'season_time')}, 0) AS season_time,
+                u.division
+            FROM user u
+            LEFT JOIN user_totals ut ON ut.user_id = u.id
+            WHERE COALESCE(u.ranking_disabled, 0) = 0
+                AND u.division IN (5, 6) AND u.{id_column} IS NOT NULL
+            ORDER BY season_time DESC
+            LIMIT {Config.TOP_DIVISION_PLAYER_AMOUNT * 2}
+        """)
+        all_players = await cur.fetchall()
+
+        divisions = {}
+        for idx, (user_id, platform_uid, season_time, current_division) in enumerate(all_players):
+            target_division = 6 if idx < Config.TOP_DIVISION_PLAYER_AMOUNT else 5
+
+            if current_division != target_division:
+                divisions[user_id] = target_division
+                if target_division == 6:
+                    logging.debug(f"Promoted user {platform_uid} to Division 6")
+                else:
+                    logging.debug(f"Demoted user {platform_uid} to Division 5")
+                rankups.append((platform_uid, target_division))
+
+        if divisions:
+            await cur.execute(*cls._case_update({'division': divisions}))
+
+    # -- combined tick ------------------------------------------------------
+
+    async def apply_tick(self, platform: str, online_uids: Set[Union[int, str]]) -> Tuple[list, list]:
+        """One ranking minute for ``platform``'s online users on a single
+        connection and transaction: time and ``user_totals`` upsert, heatmap
+        upsert, level/division recomputation with Division 6 reassignment,
+        and the ``user_achievements`` refresh of the users whose achievement
+        inputs changed (see ``_refresh_changed_achievements``). Every step
+        is one set-based statement, so the statement count does not grow
+        with the number of online users.
+
+        Returns ``(level_changes, division_changes)`` as lists of
+        (platform_uid, new value)."""
+        uids = [str(uid) for uid in online_uids or ()]
+        if not uids:
+            return [], []
 
         async def op(conn):
             await conn.begin()
             try:
                 async with conn.cursor() as cur:
-                    await cur.execute(f"""
-                        SELECT
-                            u.{id_column},
-                            COALESCE(d.total_time, 0) + COALESCE(t.total_time, 0) AS total_time,
-                            u.level
-                        FROM user u
-                        LEFT JOIN time d
-                            ON d.platform = 'discord'
-                            AND d.platform_uid = u.discord_id
-                        LEFT JOIN time t
-                            ON t.platform = 'teamspeak'
-                            AND t.platform_uid = u.teamspeak_id
-                        WHERE COALESCE(u.ranking_disabled, 0) = 0
-                            AND u.{id_column} IN ({placeholders})
-                    """, user_ids)
-                    results = await cur.fetchall()
-
-                    for platform_uid, total_time, level in results:
-                        calculated_level = Config.get_level_for_minutes(total_time)
-                        if calculated_level != level:
-                            await cur.execute(
-                                f"UPDATE user SET level = %s WHERE {id_column} = %s",
-                                (calculated_level, platform_uid))
-                            rankups.append((platform_uid, calculated_level))
+                    await self._upsert_times(cur, uids, platform)
+                    new_slot_uids = await self._upsert_heatmap(cur, uids, platform)
+                    changes = await self._recalculate_ranks(cur, uids, platform)
+                    await self._refresh_changed_achievements(
+                        cur, platform, dict.fromkeys(uids, 1), new_slot_uids)
                 await conn.commit()
             except Exception:
                 await conn.rollback()
                 raise
+            return changes
+
+        level_changes, division_changes = await self._run(op)
+        if level_changes or division_changes:
+            logging.debug(f"Rank updates for {platform} users: {level_changes + division_changes}")
+        return level_changes, division_changes
+
+    async def recalculate_ranks(self, platform_uids: Set[Union[int, str]], platform: str) -> Tuple[list, list]:
+        """Level/division recomputation with Division 6 reassignment for
+        ``platform``'s users behind ``platform_uids`` on one transaction, after
+        refreshing their ``user_totals`` from ``time``. For writers that
+        rewrite ``time`` rows outside the tick (the legacy import).
+
+        Returns ``(level_changes, division_changes)`` like ``apply_tick``."""
+        uids = [str(uid) for uid in platform_uids or ()]
+        if not uids:
+            return [], []
+        id_column = 'discord_id' if platform == 'discord' else 'teamspeak_id'
 
-        await self._run(op)
-        return rankups
+        async def op(conn):
+            await conn.begin()
+            try:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        f"SELECT id FROM user WHERE {id_column} IN ({','.join(['%s'] * len(uids))})", uids)
+                    user_ids = [row[0] for row in await cur.fetchall()]
+                    if user_ids:
+                        await cur.execute(user_totals_refresh_query(len(user_ids)), user_ids)
+                    changes = await self._recalculate_ranks(cur, uids, platform)
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+            return changes
 
-    async def update_seasonal_ranks(self, users: Set[Union[int, str]], platform: str) -> List[Tuple[Union[int, str], int]]:
-        rankups = []
-        user_ids = [str(uid) for uid in users]
-        if not user_ids:
-            return rankups
+        return await self._run(op)
 
-        id_column = 'discord_id' if platform == 'discord' else 'teamspeak_id'
-        placeholders = ','.join(['%s'] * len(user_ids))
+    async def apply_minute_deltas(self, batch_id: str, deltas: dict,
+                                  sessions: Sequence[tuple] = ()) -> Optional[dict]:
+        """Write-behind counterpart of ``apply_tick`` for the minute
+        accumulator (``app.utils.minute_accumulator``) and the presence
+        checkpoint (``app.utils.presence``): credit a whole batch of
+        accumulated minutes in one transaction. ``deltas`` maps platform to
+        ``{'time': {platform_uid: minutes}, 'heatmap': [(platform_uid,
+        day_of_week, time_category, minutes), ...]}``; ``sessions`` are
+        closed (platform, platform_uid, started_at, ended_at, seconds)
+        rows for ``presence_sessions``.
+
+        ``batch_id`` is recorded in ``minute_flushes`` in the same
+        transaction, so replaying a batch after a crash is a no-op: returns
+        None then, otherwise ``{platform: (level_changes, division_changes)}``."""
 
         async def op(conn):
             await conn.begin()
             try:
                 async with conn.cursor() as cur:
-                    await cur.execute(f"""
-                        SELECT
-                            u.{id_column},
-                            COALESCE(d.season_time, 0) + COALESCE(t.season_time, 0) AS season_time,
-                            u.division
-                        FROM user u
-                        LEFT JOIN time d
-                            ON d.platform = 'discord'
-                            AND d.platform_uid = u.discord_id
-                        LEFT JOIN time t
-                            ON t.platform = 'teamspeak'
-                            AND t.platform_uid = u.teamspeak_id
-                        WHERE COALESCE(u.ranking_disabled, 0) = 0
-                            AND u.{id_column} IN ({placeholders})
-                    """, user_ids)
-                    results = await cur.fetchall()
-
-                    for platform_uid, season_time, division in results:
-                        calculated_division = Config.get_division_for_minutes(season_time)
-                        if calculated_division != division and division <= 5:
-                            await cur.execute(
-                                f"UPDATE user SET division = %s WHERE {id_column} = %s",
-                                (calculated_division, platform_uid))
-                            rankups.append((platform_uid, calculated_division))
-                            logging.debug(f"Updated {platform} user {platform_uid} to division {calculated_division}")
-
-                    await self._update_top_division_ranks(cur, platform, rankups)
+                    await cur.execute("INSERT IGNORE INTO minute_flushes (batch_id) VALUES (%s)", (batch_id,))
+                    if not cur.rowcount:
+                        await conn.rollback()
+                        return None
+                    changes = {}
+                    for platform, platform_deltas in deltas.items():
+                        times = platform_deltas.get('time') or {}
+                        uids = list(times)
+                        if uids:
+                            await self._upsert_times(cur, uids, platform, [times[uid] for uid in uids])
+                        new_slot_uids = await self._add_heatmap_minutes(
+                            cur, platform, platform_deltas.get('heatmap') or [])
+                        if uids:
+                            changes[platform] = await self._recalculate_ranks(cur, uids, platform)
+                        await self._refresh_changed_achievements(cur, platform, times, new_slot_uids)
+                    if sessions:
+                        await cur.execute(f"""
+                            INSERT INTO presence_sessions
+                                (platform, platform_uid, started_at, ended_at, seconds)
+                            VALUES {','.join(['(%s, %s, %s, %s, %s)'] * len(sessions))}
+                        """, [item for session in sessions for item in session])
+                    await cur.execute(
+                        "DELETE FROM minute_flushes WHERE flushed_at < NOW() - INTERVAL 7 DAY")
                 await conn.commit()
             except Exception:
                 await conn.rollback()
                 raise
+            return changes
 
-        await self._run(op)
-        if rankups:
-            logging.debug(f"Rank updates for {platform} users: {rankups}")
-        return rankups
+        return await self._run(op)
+
+    # -- leaderboards -------------------------------------------------------
+
+    async def get_leaderboard_rows(self, platform: Optional[str] = None,
+                                   platform_uids: Optional[Set[Union[int, str]]] = None) -> List[dict]:
+        """Combined per-user minutes for every leaderboard period. Without
+        arguments: all ranked users (full rebuild); with ``platform`` and
+        ``platform_uids``: just those users, including ranking-disabled ones so
+        the caller can drop them from the boards."""
+        params = []
+        where = "WHERE COALESCE(u.ranking_disabled, 0) = 0"
+        if platform is not None:
+            user_ids = [str(uid) for uid in platform_uids or ()]
+            if not user_ids:
+                return []
+            id_column = 'discord_id' if platform == 'discord' else 'teamspeak_id'
+            where = f"WHERE u.{id_column} IN ({','.join(['%s'] * len(user_ids))})"
+            params = user_ids
+
+        rows = await self.execute_query(f"""
+            SELECT
+                u.id,
+                COALESCE(u.name, 'Unknown'),
+                COALESCE(u.level, 1),
+                COALESCE(u.division, 1),
+                u.discord_id,
+                u.teamspeak_id,
+                COALESCE(u.ranking_disabled, 0),
+                COALESCE(ut.total_time, 0),
+                COALESCE({period_minutes_sql('ut', 'season_time')}, 0),
+                COALESCE({period_minutes_sql('ut', 'weekly_time')}, 0),
+                COALESCE({period_minutes_sql('ut', 'monthly_time')}, 0),
+                COALESCE({period_minutes_sql('ut', 'daily_time')}, 0),
+                COALESCE(ut.last_seen, '1970-01-01 00:00:00')
+            FROM user u
+            LEFT JOIN user_totals ut ON ut.user_id = u.id
+            {where}
+        """, tuple(params) if params else None)
+
+        return [
+            {
+                'id': row[0],
+                'name': row[1],
+                'level': row[2],
+                'division': row[3],
+                'discord_id': row[4],
+                'teamspeak_id': row[5],
+                'ranking_disabled': bool(row[6]),
+                'total': int(row[7]),
+                'season': int(row[8]),
+                'weekly': int(row[9]),
+                'monthly': int(row[10]),
+                'daily': int(row[11]),
+                'last_update': str(row[12])[:19],
+            }
+            for row in rows or []
+        ]
+
+    async def get_hall_of_fame_sources(self):
+        """Raw input of ``assemble_hall_of_fame``: the top-three rows per
+        board, read on one connection."""
+
+        async def op(conn):
+            async with conn.cursor() as cur:
+                top3_rows = {}
+                for board, query in TOP3_QUERIES.items():
+                    await cur.execute(query)
+                    top3_rows[board] = list(await cur.fetchall())
+                return top3_rows
+
+        return await self._run(op)
+
+    # -- achievement snapshot -----------------------------------------------
 
     @staticmethod
-    async def _update_top_division_ranks(cur, platform: str, rankups: List[Tuple[Union[int, str], int]]) -> None:
-        """
-        Update the top division (Division 6) based on season time.
-        Only the top Config.TOP_DIVISION_PLAYER_AMOUNT players can be in Division 6.
-        Runs on the caller's cursor inside its transaction.
-        """
+    async def _refresh_user_achievements(cur, user_ids) -> None:
+        """Cursor-level (no commit) refresh of the ``user_achievements``
+        snapshot for ``user_ids``."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        results = []
+        for query, params in user_achievement_source_queries(user_ids):
+            await cur.execute(query, params)
+            results.append(await cur.fetchall())
+        rows = user_achievement_rows(*results)
+        if rows:
+            await cur.executemany(USER_ACHIEVEMENTS_UPSERT, rows)
+
+    @classmethod
+    async def _refresh_platform_achievements(cls, cur, uids: List[str], platform: str) -> None:
+        """``_refresh_user_achievements`` for the users behind platform
+        ``uids``; 'discord' and 'teamspeak' resolve through
+        ``user_identity``, 'steam' through ``user.steam_id``."""
+        placeholders = ','.join(['%s'] * len(uids))
+        if platform == 'steam':
+            await cur.execute(f"SELECT id FROM user WHERE steam_id IN ({placeholders})", tuple(uids))
+        else:
+            await cur.execute(
+                f"SELECT user_id FROM user_identity WHERE platform = %s AND platform_uid IN ({placeholders})",
+                (platform, *uids),
+            )
+        await cls._refresh_user_achievements(cur, [row[0] for row in await cur.fetchall()])
+
+    @classmethod
+    async def _refresh_changed_achievements(cls, cur, platform: str, minutes: dict,
+                                            new_slot_uids: Set[str]) -> None:
+        """Cursor-level snapshot refresh after crediting ``minutes``
+        (platform_uid -> minutes) for the users whose achievement inputs the
+        credit changed: a new heatmap slot bit (``new_slot_uids``), a crossed
+        time tier, or no snapshot row yet (a new join). Logins and streaks
+        refresh in ``update_login_streak``; everyone else keeps their row."""
+        uids = sorted(set(minutes) | set(new_slot_uids))
+        if not uids:
+            return
         id_column = 'discord_id' if platform == 'discord' else 'teamspeak_id'
-
         await cur.execute(f"""
-            SELECT u.id, u.{id_column}, COALESCE(d.season_time, 0) + COALESCE(t.season_time, 0) AS season_time, u.division
+            SELECT u.id, u.{id_column}, COALESCE(ut.total_time, 0), ua.user_id IS NULL
             FROM user u
-            LEFT JOIN time d ON d.platform = 'discord' AND d.platform_uid = u.discord_id
-            LEFT JOIN time t ON t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id
-            WHERE COALESCE(u.ranking_disabled, 0) = 0
-                AND u.division IN (5, 6) AND u.{id_column} IS NOT NULL
-            ORDER BY season_time DESC
-            LIMIT {Config.TOP_DIVISION_PLAYER_AMOUNT * 2}
-        """)
-        all_players = await cur.fetchall()
-
-        for idx, (user_id, platform_uid, season_time, current_division) in enumerate(all_players):
-            target_division = 6 if idx < Config.TOP_DIVISION_PLAYER_AMOUNT else 5
+            LEFT JOIN user_totals ut ON ut.user_id = u.id
+            LEFT JOIN user_achievements ua ON ua.user_id = u.id
+            WHERE u.{id_column} IN ({','.join(['%s'] * len(uids))})
+        """, uids)
+        time_tiers = rank_curves().minutes
+        changed = [
+            user_id
+            for user_id, platform_uid, total_time, missing in await cur.fetchall()
+            if missing
+            or platform_uid in new_slot_uids
+            or time_tiers.rank_for(total_time) != time_tiers.rank_for(total_time - int(minutes.get(platform_uid, 0)))
+        ]
+        await cls._refresh_user_achievements(cur, changed)
+
+    async def refresh_user_achievements(self, platform_uids: Set[Union[int, str]], platform: str) -> None:
+        """Refresh the snapshot of the users behind ``platform_uids`` (see
+        ``_refresh_platform_achievements``)."""
+        uids = [str(uid) for uid in platform_uids or ()]
+        if not uids:
+            return
 
-            if current_division != target_division:
-                await cur.execute("UPDATE user SET division = %s WHERE id = %s", (target_division, user_id))
+        async def op(conn):
+            async with conn.cursor() as cur:
+                await self._refresh_platform_achievements(cur, uids, platform)
 
-                if target_division == 6:
-                    logging.debug(f"Promoted user {platform_uid} to Division 6")
-                    rankups.append((platform_uid, 6))
-                else:
-                    logging.debug(f"Demoted user {platform_uid} to Division 5")
-                    rankups.append((platform_uid, 5))
+        await self._run(op)
 
     # -- users / streaks / stats --------------------------------------------
 
@@ -319,13 +656,35 @@ class AsyncDatabaseManager:
         platform should be either 'discord' or 'teamspeak'
         """
         id_column = 'discord_id' if platform == 'discord' else 'teamspeak_id'
-        await self.execute_query(f"""
-            INSERT INTO user
-                ({id_column}, name, created_at)
-            VALUES (%s, %s, CURRENT_TIMESTAMP)
-            ON DUPLICATE KEY UPDATE
-                name = VALUES(name)
-        """, (str(user_id), name))
+
+        async def op(conn):
+            await conn.begin()
+            try:
+                async with conn.cursor() as cur:
+                    await cur.execute(f"""
+                        INSERT INTO user
+                            ({id_column}, name, created_at)
+                        VALUES (%s, %s, CURRENT_TIMESTAMP)
+                        ON DUPLICATE KEY UPDATE
+                            name = VALUES(name)
+                    """, (str(user_id), name))
+                    await cur.execute(f"""
+                        INSERT INTO user_identity (platform, platform_uid, user_id)
+                        SELECT %s, {id_column}, id FROM user WHERE {id_column} = %s
+                        ON DUPLICATE KEY UPDATE user_id = VALUES(user_id)
+                    """, (platform, str(user_id)))
+                    await cur.execute(
+                        f"SELECT id, name_normalized FROM user WHERE {id_column} = %s", (str(user_id),))
+                    row = await cur.fetchone()
+                    if row and row[1] != normalize_name(name):
+                        for statement, params in name_index_statements(row[0], name):
+                            await cur.execute(statement, params)
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+
+        await self._run(op)
 
     async def log_usage_stats(self, user_count: int, platform: str) -> None:
         await self.execute_query("""
@@ -348,7 +707,8 @@ class AsyncDatabaseManager:
         return rows[0] if rows else (None, None)
 
     async def update_login_streak(self, platform_uid: str, platform: str) -> None:
-        """Update login streak for a user"""
+        """Update login streak for a user and refresh their achievement
+        snapshot (logins and streak tiers)"""
 
         async def op(conn):
             await conn.begin()
@@ -387,6 +747,7 @@ class AsyncDatabaseManager:
                             longest_streak = VALUES(longest_streak),
                             last_login = VALUES(last_login)
                     """, (str(platform_uid), platform, current_streak, longest_streak, today))
+                    await self._refresh_platform_achievements(cur, [str(platform_uid)], platform)
                 await conn.commit()
             except Exception:
                 await conn.rollback()
@@ -411,7 +772,9 @@ class AsyncDatabaseManager:
     async def reset_time(self, period: str):
         """
         Reset time counters for all users for the given period (daily, weekly, monthly)
-        and update the reset_log table.
+        by starting a new epoch of it in the reset_log table. The ``time`` and
+        ``user_totals`` rows are not touched: rows from the previous epoch read
+        as 0 and restart on their next write.
         """
         column = {
             'daily': ('daily_time', 'last_daily_reset'),
@@ -421,20 +784,14 @@ class AsyncDatabaseManager:
         if column is None:
             return
         time_column, log_column = column
+        epoch_column = period_epoch_column(time_column)
         now = datetime.now()
 
-        async def op(conn):
-            await conn.begin()
-            try:
-                async with conn.cursor() as cur:
-                    await cur.execute(f"UPDATE time SET {time_column} = 0")
-                    await cur.execute(f"UPDATE reset_log SET {log_column} = %s WHERE id = 1", (now,))
-                await conn.commit()
-            except Exception:
-                await conn.rollback()
-                raise
-
-        await self._run(op)
+        await self.execute_query(f"""
+            UPDATE reset_log
+            SET {epoch_column} = {epoch_column} + 1, {log_column} = %s
+            WHERE id = 1
+        """, (now,))
 
     async def get_last_resets(self):
         rows = await self.execute_query("""
@@ -447,7 +804,9 @@ class AsyncDatabaseManager:
     async def close_season(self, closed_at: Optional[datetime] = None) -> dict:
         """
         Award end-of-season markers from the current division state, then reset
-        seasonal counters and divisions for the next season.
+        seasonal counters and divisions for the next season. Season minutes
+        reset by bumping ``reset_log.season_epoch`` (see ``reset_time``); only
+        users above Division 1 have their division rewritten.
         """
         closed_at = closed_at or datetime.now()
         season_number = get_season_number_for_end_year(closed_at.year)
@@ -456,23 +815,19 @@ class AsyncDatabaseManager:
             await conn.begin()
             try:
                 async with conn.cursor() as cur:
-                    await cur.execute("""
+                    await cur.execute(f"""
                         SELECT
                             u.id,
                             u.discord_id,
                             u.teamspeak_id,
                             COALESCE(u.division, 1) AS division,
-                            COALESCE(d.season_time, 0) + COALESCE(t.season_time, 0) AS season_time
-                        FROM user u
-                        LEFT JOIN time d
-                            ON d.platform = 'discord'
-                            AND d.platform_uid = u.discord_id
-                        LEFT JOIN time t
-                            ON t.platform = 'teamspeak'
-                            AND t.platform_uid = u.teamspeak_id
+                            ut.season_time
+                        FROM user_totals ut
+                        JOIN user u ON u.id = ut.user_id
                         WHERE COALESCE(u.ranking_disabled, 0) = 0
-                            AND COALESCE(d.season_time, 0) + COALESCE(t.season_time, 0) > 0
-                        ORDER BY season_time DESC, u.id ASC
+                            AND {current_period_filter('ut', 'season_time')}
+                            AND ut.season_time > 0
+                        ORDER BY ut.season_time DESC, u.id ASC
                     """)
                     participants = await cur.fetchall()
 
@@ -498,12 +853,12 @@ class AsyncDatabaseManager:
                                 (platform, platform_id, achievement_type)
                             VALUES (%s, %s, %s)
                         """, achievement_rows)
+                        await self._refresh_user_achievements(cur, [row[0] for row in participants])
 
-                    await cur.execute("UPDATE time SET season_time = 0")
-                    await cur.execute("UPDATE user SET division = 1")
+                    await cur.execute("UPDATE user SET division = 1 WHERE division > 1")
                     await cur.execute("""
                         UPDATE reset_log
-                        SET last_season_reset = %s
+                        SET season_epoch = season_epoch + 1, last_season_reset = %s
                         WHERE id = 1
                     """, (closed_at,))
                 await conn.commit()
@@ -579,24 +934,10 @@ class AsyncDatabaseManager:
     async def _move_ts_uid_keyed_data(cur, source_uid: str, target_uid: str) -> None:
         """Cursor-level (no commit) move of all teamspeak UID-keyed rows from
         source_uid onto target_uid: SUM the counters, GREATEST the timestamps/
-        streaks, INSERT IGNORE achievements, then delete the source rows. The
+        streaks, OR the heatmap slot masks, INSERT IGNORE achievements, then delete the source rows. The
         source table is aliased in every INSERT..SELECT so the ON DUPLICATE KEY
         UPDATE column references stay unambiguous (self-referential merge)."""
-        await cur.execute("""
-            INSERT INTO time (platform_uid, platform, total_time, daily_time,
-                              weekly_time, monthly_time, season_time, last_update)
-            SELECT %s, platform, total_time, daily_time, weekly_time,
-                   monthly_time, season_time, last_update
-            FROM time src
-            WHERE src.platform = 'teamspeak' AND src.platform_uid = %s
-            ON DUPLICATE KEY UPDATE
-                time.total_time   = time.total_time   + VALUES(total_time),
-                time.daily_time   = time.daily_time   + VALUES(daily_time),
-                time.weekly_time  = time.weekly_time  + VALUES(weekly_time),
-                time.monthly_time = time.monthly_time + VALUES(monthly_time),
-                time.season_time  = time.season_time  + VALUES(season_time),
-                time.last_update  = GREATEST(time.last_update, VALUES(last_update))
-        """, (target_uid, source_uid))
+        await cur.execute(time_merge_query("'teamspeak'"), (target_uid, source_uid))
         await cur.execute("DELETE FROM time WHERE platform = 'teamspeak' AND platform_uid = %s", (source_uid,))
 
         await cur.execute("""
@@ -635,20 +976,12 @@ class AsyncDatabaseManager:
 
     @staticmethod
     async def _recalculate_teamspeak_rank(cur, user_id: int) -> None:
-        """Cursor-level (no commit) recompute of level/division from a user's total
-        + season time across both platforms."""
-        await cur.execute("""
-            SELECT
-                COALESCE(SUM(CASE WHEN t.platform = 'discord'   THEN t.total_time  ELSE 0 END), 0) +
-                COALESCE(SUM(CASE WHEN t.platform = 'teamspeak' THEN t.total_time  ELSE 0 END), 0),
-                COALESCE(SUM(CASE WHEN t.platform = 'discord'   THEN t.season_time ELSE 0 END), 0) +
-                COALESCE(SUM(CASE WHEN t.platform = 'teamspeak' THEN t.season_time ELSE 0 END), 0)
-            FROM user u
-            LEFT JOIN time t ON
-                (t.platform = 'discord'   AND t.platform_uid = u.discord_id) OR
-                (t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id)
-            WHERE u.id = %s
-        """, (user_id,))
+        """Cursor-level (no commit) refresh of the user's ``user_totals`` row and
+        recompute of level/division from the combined total + season time."""
+        await cur.execute(user_totals_refresh_query(1), (user_id,))
+        await cur.execute(
+            f"SELECT total_time, {period_minutes_sql('user_totals', 'season_time')} FROM user_totals WHERE user_id = %s",
+            (user_id,))
         total_time, season_time = await cur.fetchone() or (0, 0)
         await cur.execute(
             "UPDATE user SET level = %s, division = %s WHERE id = %s",
@@ -689,10 +1022,19 @@ class AsyncDatabaseManager:
                             return {"merged": False, "reason": "cross_account_conflict"}
                     await self._move_ts_uid_keyed_data(cur, absorbed_uid, canonical_uid)
                     # Drop the now-empty placeholder user row(s) for the absorbed UID.
+                    for table in ('user_totals', 'user_identity', 'user_name_trigram', 'user_achievements'):
+                        await cur.execute(f"""
+                            DELETE x FROM {table} x
+                            JOIN user u ON u.id = x.user_id
+                            WHERE (u.teamspeak_id = %s OR u.teamspeak6_id = %s) AND u.id <> %s
+                        """, (absorbed_uid, absorbed_uid, canon_id))
                     await cur.execute(
                         "DELETE FROM user WHERE (teamspeak_id = %s OR teamspeak6_id = %s) AND id <> %s",
                         (absorbed_uid, absorbed_uid, canon_id))
+                    for statement, params in user_identity_sync_statements([canon_id]):
+                        await cur.execute(statement, params)
                     await self._recalculate_teamspeak_rank(cur, canon_id)
+                    await self._refresh_user_achievements(cur, [canon_id])
                 await conn.commit()
                 return {"merged": True, "canonical_uid": canonical_uid,
                         "absorbed_uid": absorbed_uid, "user_id": canon_id}
@@ -795,6 +1137,7 @@ class AsyncDatabaseManager:
             event['deaths'],
             emitted_at,
         ))
+        await self.refresh_user_achievements({event['steam_id64']}, 'steam')
         return {'ok': True, 'event_id': event['event_id']}
 
 
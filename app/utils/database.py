@@ -1,6 +1,10 @@
 from datetime import datetime, timezone
 from typing import List, Optional, Set, Tuple, Union, Callable, Iterable
+import os
+import threading
+import time
 import pymysql
+from app.migrations import SchemaVersionError, check_schema_version
 from app.utils.logger import RankingLogger
 from app.config import Config
 
@@ -98,7 +102,7 @@ def parse_ttt_season_skin_unlockable_type(unlockable_type: int) -> Tuple[int, in
 
 
 def can_upgrade_apex_channel(level: int, achievement_types: Iterable[int]) -> bool:
-    return level >= 25 or SEASON_APEX_ACHIEVEMENT in set(achievement_types)
+    return level >= Config.get_max_level() or SEASON_APEX_ACHIEVEMENT in set(achievement_types)
 
 
 TTT_EVENT_COUNTER_FIELDS = ('rounds_played', 'rounds_won', 'kills', 'deaths')
@@ -282,11 +286,319 @@ def _ttt_win_breakdown(event: dict) -> tuple[int, int, int]:
     return 0, 0, 0
 
 
+#: Combined Discord + TeamSpeak minutes kept per ``user.id`` in ``user_totals``.
+USER_TOTALS_COLUMNS = ('total_time', 'season_time', 'weekly_time', 'monthly_time', 'daily_time')
+
+#: Minutes columns of ``time``/``user_totals`` that restart every period.
+#: Each is stamped with the ``<period>_epoch`` it was last written in; the
+#: current epoch per period lives in ``reset_log``. A period reset only bumps
+#: the ``reset_log`` epoch: readers treat rows from an older epoch as 0 and
+#: writers restart them from 0 on their next write.
+PERIOD_TIME_COLUMNS = ('daily_time', 'weekly_time', 'monthly_time', 'season_time')
+
+
+def period_epoch_column(column: str) -> str:
+    """``daily_time`` -> ``daily_epoch``"""
+    return f"{column.removesuffix('_time')}_epoch"
+
+
+#: current epoch of every ``PERIOD_TIME_COLUMNS`` period, in that order
+CURRENT_EPOCHS_QUERY = (
+    f"SELECT {', '.join(period_epoch_column(column) for column in PERIOD_TIME_COLUMNS)} "
+    "FROM reset_log WHERE id = 1"
+)
+
+
+def current_epoch_sql(column: str) -> str:
+    """Scalar subquery for the current epoch of ``column``'s period."""
+    return f"(SELECT {period_epoch_column(column)} FROM reset_log WHERE id = 1)"
+
+
+def period_minutes_sql(alias: str, column: str) -> str:
+    """SQL for ``alias.column`` as of the current period: 0 when the row was
+    last written in an earlier epoch. Columns that never reset (``total_time``)
+    are returned as is."""
+    if column not in PERIOD_TIME_COLUMNS:
+        return f"{alias}.{column}"
+    return f"IF({alias}.{period_epoch_column(column)} = {current_epoch_sql(column)}, {alias}.{column}, 0)"
+
+
+def current_period_filter(alias: str, column: str) -> str:
+    """WHERE condition keeping the rows of ``alias`` written in the current
+    ``column`` period, so ``ORDER BY alias.column`` can use the
+    ``(<period>_epoch, <period>_time)`` indexes. ``TRUE`` for ``total_time``."""
+    if column not in PERIOD_TIME_COLUMNS:
+        return "TRUE"
+    return f"{alias}.{period_epoch_column(column)} = {current_epoch_sql(column)}"
+
+
+def period_rollover_sql(column: str, minutes: str, epoch: str, table: str = "") -> str:
+    """ON DUPLICATE KEY UPDATE assignments adding ``minutes`` to ``column``
+    in period ``epoch``, restarting from 0 when the row is from an older
+    epoch. The counter is assigned before its epoch stamp because MariaDB
+    applies the assignments left to right."""
+    prefix = f"{table}." if table else ""
+    epoch_column = period_epoch_column(column)
+    return (
+        f"{prefix}{column} = IF({prefix}{epoch_column} = {epoch}, {prefix}{column}, 0) + {minutes}, "
+        f"{prefix}{epoch_column} = {epoch}"
+    )
+
+
+def user_totals_refresh_query(user_count: Optional[int] = None) -> str:
+    """Upsert ``user_totals`` from the per-platform ``time`` rows for
+    ``user_count`` user ids (``%s`` placeholders), or for every user when
+    ``user_count`` is None. The ranking tick increments ``user_totals``
+    directly; this is for writers that move or rewrite ``time`` rows (admin
+    edits, transfers, account merges). Period columns are summed as of the
+    current epochs and stamped with them."""
+    where = ""
+    if user_count is not None:
+        where = f"WHERE u.id IN ({','.join(['%s'] * max(user_count, 1))})"
+    sums = ",\n            ".join(
+        f"COALESCE({period_minutes_sql('d', column)}, 0) + COALESCE({period_minutes_sql('t', column)}, 0)"
+        for column in USER_TOTALS_COLUMNS)
+    epoch_columns = [period_epoch_column(column) for column in PERIOD_TIME_COLUMNS]
+    epochs = ",\n            ".join(current_epoch_sql(column) for column in PERIOD_TIME_COLUMNS)
+    updates = ",\n            ".join(
+        f"{column} = VALUES({column})" for column in (*USER_TOTALS_COLUMNS, *epoch_columns))
+    return f"""
+        INSERT INTO user_totals (user_id, {', '.join(USER_TOTALS_COLUMNS)}, {', '.join(epoch_columns)}, last_seen)
+        SELECT
+            u.id,
+            {sums},
+            {epochs},
+            CASE
+                WHEN d.last_update IS NULL THEN t.last_update
+                WHEN t.last_update IS NULL THEN d.last_update
+                ELSE GREATEST(d.last_update, t.last_update)
+            END
+        FROM user u
+        LEFT JOIN time d ON d.platform = 'discord' AND d.platform_uid = u.discord_id
+        LEFT JOIN time t ON t.platform = 'teamspeak' AND t.platform_uid = u.teamspeak_id
+        {where}
+        ON DUPLICATE KEY UPDATE
+            {updates},
+            last_seen = VALUES(last_seen)
+    """
+
+
+def time_merge_query(platform: str = "%s") -> str:
+    """INSERT .. SELECT moving the ``time`` row of the source uid (second
+    ``%s``) onto the target uid (first ``%s``) on ``platform`` (an SQL
+    literal or placeholder between the two). Totals and current-period
+    minutes are added, a target period from an older epoch restarts from the
+    source's minutes, the later ``last_update`` wins and the heatmap slot
+    masks are ORed. The source table is aliased so the ON DUPLICATE KEY UPDATE
+    column references stay unambiguous (self-referential merge). Delete the
+    source row afterwards."""
+    periods = ",\n            ".join(period_minutes_sql('src', column) for column in PERIOD_TIME_COLUMNS)
+    epoch_columns = [period_epoch_column(column) for column in PERIOD_TIME_COLUMNS]
+    epochs = ",\n            ".join(current_epoch_sql(column) for column in PERIOD_TIME_COLUMNS)
+    rollovers = ",\n            ".join(
+        period_rollover_sql(column, f"VALUES({column})", f"VALUES({period_epoch_column(column)})", "time")
+        for column in PERIOD_TIME_COLUMNS)
+    return f"""
+        INSERT INTO time (
+            platform_uid, platform, total_time, {', '.join(PERIOD_TIME_COLUMNS)},
+            {', '.join(epoch_columns)}, last_update, active_slot_mask
+        )
+        SELECT
+            %s, platform, total_time,
+            {periods},
+            {epochs},
+            last_update, active_slot_mask
+        FROM time src
+        WHERE src.platform = {platform} AND src.platform_uid = %s
+        ON DUPLICATE KEY UPDATE
+            time.total_time = time.total_time + VALUES(total_time),
+            {rollovers},
+            time.last_update = GREATEST(time.last_update, VALUES(last_update)),
+            time.active_slot_mask = time.active_slot_mask | VALUES(active_slot_mask)
+    """
+
+
+def user_identity_sync_statements(user_ids: Iterable[int]) -> List[Tuple[str, tuple]]:
+    """Statements that rewrite the ``user_identity`` rows of ``user_ids`` from
+    their current ``discord_id``/``teamspeak_id``. Run them on the writer's
+    cursor after anything that moves a platform id between user rows
+    (verification merge, identity bridge, admin unlink/transfer)."""
+    user_ids = tuple(user_ids)
+    if not user_ids:
+        return []
+    placeholders = ','.join(['%s'] * len(user_ids))
+    return [
+        (f"DELETE FROM user_identity WHERE user_id IN ({placeholders})", user_ids),
+        (f"""
+            INSERT INTO user_identity (platform, platform_uid, user_id)
+            SELECT platform, platform_uid, user_id FROM (
+                SELECT 'discord' AS platform, discord_id AS platform_uid, id AS user_id
+                FROM user WHERE id IN ({placeholders}) AND discord_id IS NOT NULL
+                UNION ALL
+                SELECT 'teamspeak', teamspeak_id, id
+                FROM user WHERE id IN ({placeholders}) AND teamspeak_id IS NOT NULL
+            ) AS src
+            ON DUPLICATE KEY UPDATE user_id = VALUES(user_id)
+        """, user_ids + user_ids),
+    ]
+
+
+#: ``activity_heatmap.time_category`` values in slot-bit order
+HEATMAP_TIME_CATEGORIES = ('morning', 'noon', 'evening', 'night')
+_DAY_SLOT_BITS = (1 << len(HEATMAP_TIME_CATEGORIES)) - 1
+
+#: SQL for the ``time.active_slot_mask`` bit of an ``activity_heatmap`` row
+HEATMAP_SLOT_BIT_SQL = (
+    "1 << (day_of_week * 4 + FIELD(time_category, "
+    + ", ".join(f"'{category}'" for category in HEATMAP_TIME_CATEGORIES)
+    + ") - 1)"
+)
+
+
+def heatmap_slot_bit(day_of_week: int, time_category: str) -> int:
+    """Bit of one (day_of_week, time_category) heatmap slot in the 28-bit
+    ``time.active_slot_mask``: four bits per day, Monday in the low bits."""
+    return 1 << (day_of_week * len(HEATMAP_TIME_CATEGORIES) + HEATMAP_TIME_CATEGORIES.index(time_category))
+
+
+def active_slots_from_mask(mask: Optional[int]) -> int:
+    return int(mask or 0).bit_count()
+
+
+def active_days_from_mask(mask: Optional[int]) -> int:
+    mask = int(mask or 0)
+    return sum(1 for day in range(7) if (mask >> (day * len(HEATMAP_TIME_CATEGORIES))) & _DAY_SLOT_BITS)
+
+
 class DatabaseConnectionError(Exception):
     """Custom exception for database connection errors."""
     def __init__(self, message="Failed to reconnect to the database"):
         super().__init__(message)
 
+class ConnectionPool:
+    """Per-process pool of PyMySQL connections for the Flask API.
+
+    Every request used to open a fresh connection (and re-run the schema
+    DDL); gunicorn workers now borrow from this pool instead. Idle
+    connections are rolled back on checkout so no request inherits an open
+    REPEATABLE READ snapshot, pinged when they sat idle longer than
+    ``ping_interval`` and recycled once older than ``max_lifetime``. The pool
+    is keyed by pid, so a worker forked after the master touched it starts
+    with its own empty pool instead of sharing sockets.
+    """
+
+    def __init__(self, size: int, max_lifetime: float, ping_interval: float):
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self._idle = []  # (conn, created_at, returned_at)
+        self._born = {}  # id(conn) -> created_at for checked-out connections
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.schema_checked = False
+
+    def _check_fork(self) -> None:
+        if self._pid != os.getpid():
+            # Inherited sockets belong to the parent; drop them unclosed.
+            self._idle = []
+            self._born = {}
+            self._pid = os.getpid()
+            self.schema_checked = False
+
+    @staticmethod
+    def _open():
+        # autocommit stays off (PyMySQL default); note: conn.autocommit is
+        # a METHOD in PyMySQL, never assign to it
+        return pymysql.connect(
+            host=Config.DB_HOST,
+            port=int(Config.DB_PORT),
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            database=Config.DB_NAME,
+        )
+
+    @staticmethod
+    def _discard(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """Return a healthy connection, reusing an idle one when possible."""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                self._check_fork()
+                if not self._idle:
+                    break
+                conn, created_at, returned_at = self._idle.pop()
+            if now - created_at > self.max_lifetime:
+                self._discard(conn)
+                continue
+            try:
+                if now - returned_at > self.ping_interval:
+                    conn.ping(reconnect=False)
+                conn.rollback()
+            except pymysql.Error as e:
+                logging.debug(f"Discarding unhealthy pooled connection: {e}")
+                self._discard(conn)
+                continue
+            with self._lock:
+                self._born[id(conn)] = created_at
+            return conn
+
+        conn = self._open()
+        with self._lock:
+            self._born[id(conn)] = now
+        return conn
+
+    def release(self, conn, discard: bool = False) -> None:
+        """Hand a connection back; broken, expired or surplus ones are closed."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_fork()
+            created_at = self._born.pop(id(conn), None)
+        if discard or created_at is None or now - created_at > self.max_lifetime:
+            self._discard(conn)
+            return
+        try:
+            conn.rollback()
+        except pymysql.Error:
+            self._discard(conn)
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((conn, created_at, now))
+                return
+        self._discard(conn)
+
+    def clear(self) -> None:
+        """Close every idle connection (tests, shutdown)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> ConnectionPool:
+    """Process-wide pool used by ``DatabaseManager`` (lazy)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    Config.DB_POOL_SIZE,
+                    Config.DB_POOL_MAX_LIFETIME,
+                    Config.DB_POOL_PING_INTERVAL,
+                )
+    return _pool
+
+
 class DatabaseManager:
     """Synchronous manager for the Flask API (gunicorn workers are sync).
 
@@ -295,6 +607,11 @@ class DatabaseManager:
     ``app.utils.async_database.AsyncDatabaseManager`` — the bot process runs
     on one asyncio loop and must not block on the database. Both managers use
     PyMySQL-family drivers, so placeholders are ``%s`` everywhere.
+
+    Connections are borrowed from the per-process ``ConnectionPool`` and
+    handed back by ``close()``. The schema is owned by ``app.migrations``
+    (run ``python migrate.py`` at deploy); the first connection of each
+    worker only compares the schema version and logs if it is behind.
     """
 
     def __init__(self):
@@ -306,19 +623,18 @@ class DatabaseManager:
         """Establish database connection"""
         try:
             if self.conn:
-                self.close()
-            
-            # autocommit stays off (PyMySQL default); note: conn.autocommit is
-            # a METHOD in PyMySQL, never assign to it
-            self.conn = pymysql.connect(
-                host=Config.DB_HOST,
-                port=int(Config.DB_PORT),
-                user=Config.DB_USER,
-                password=Config.DB_PASSWORD,
-                database=Config.DB_NAME,
-            )
+                # connect() after an error means the old connection is suspect
+                self._release(discard=True)
+
+            pool = get_connection_pool()
+            self.conn = pool.acquire()
             self.cursor = self.conn.cursor()
-            self.create_tables()
+            if not pool.schema_checked:
+                pool.schema_checked = True
+                try:
+                    check_schema_version(self.cursor)
+                except SchemaVersionError as e:
+                    logging.error(str(e))
             return True
         except pymysql.Error as e:
             logging.error(f"Error connecting to database: {e}")
@@ -338,216 +654,11 @@ class DatabaseManager:
                 raise DatabaseConnectionError("Failed to reconnect to database")
         return wrapper
 
-    def create_tables(self):
-        try:
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    steam_id BIGINT UNIQUE,
-                    discord_id VARCHAR(255) UNIQUE,
-                    teamspeak_id VARCHAR(255) UNIQUE,
-                    name VARCHAR(255),
-                    level INT DEFAULT 1,
-                    division INT DEFAULT 1,
-                    discord_channel BIGINT,
-                    teamspeak_channel BIGINT,
-                    discord_moveable BOOL DEFAULT 1,
-                    teamspeak_moveable BOOL DEFAULT 1,
-                    ranking_disabled BOOLEAN DEFAULT 0,
-                    ranking_disabled_at TIMESTAMP NULL,
-                    ranking_disabled_reason VARCHAR(255) NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_steam (steam_id),
-                    INDEX idx_discord (discord_id),
-                    INDEX idx_teamspeak (teamspeak_id),
-                    INDEX idx_ranking_disabled (ranking_disabled)
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-            self.cursor.execute("""
-                ALTER TABLE user
-                ADD COLUMN IF NOT EXISTS ranking_disabled BOOLEAN DEFAULT 0
-            """)
-            self.cursor.execute("""
-                ALTER TABLE user
-                ADD COLUMN IF NOT EXISTS ranking_disabled_at TIMESTAMP NULL
-            """)
-            self.cursor.execute("""
-                ALTER TABLE user
-                ADD COLUMN IF NOT EXISTS ranking_disabled_reason VARCHAR(255) NULL
-            """)
-            # Stable myTeamSpeak account id, captured live from client_myteamspeak_id on
-            # connect. Unlike teamspeak_id (the SHA-1/SHA-256 UID) it is identical across
-            # TS3 and TS6, so it bridges a returning user's old UID to their new one.
-            self.cursor.execute("""
-                ALTER TABLE user
-                ADD COLUMN IF NOT EXISTS myteamspeak_id VARCHAR(255) NULL
-            """)
-            self.cursor.execute("""
-                ALTER TABLE user
-                ADD INDEX IF NOT EXISTS idx_myteamspeak (myteamspeak_id)
-            """)
-            # TeamSpeak 6 UID (SHA-256 fingerprint). Distinct from teamspeak_id, which holds
-            # the legacy TS3 UID (SHA-1). Kept separate so both can coexist during the TS3→TS6
-            # transition (either can identify a user); populated when a user is recognised on TS6.
-            self.cursor.execute("""
-                ALTER TABLE user
-                ADD COLUMN IF NOT EXISTS teamspeak6_id VARCHAR(255) NULL
-            """)
-            self.cursor.execute("""
-                ALTER TABLE user
-                ADD INDEX IF NOT EXISTS idx_teamspeak6 (teamspeak6_id)
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS time (
-                    platform_uid VARCHAR(255) NOT NULL,
-                    platform ENUM('discord', 'teamspeak') NOT NULL,
-                    total_time INT DEFAULT 0,
-                    daily_time INT DEFAULT 0,
-                    weekly_time INT DEFAULT 0,
-                    monthly_time INT DEFAULT 0,
-                    season_time INT DEFAULT 0,
-                    last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (platform, platform_uid)
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS usage_stats (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    timestamp DATETIME NOT NULL,
-                    user_count INT NOT NULL,
-                    platform ENUM('discord', 'teamspeak') NOT NULL,
-                    INDEX idx_timestamp (timestamp),
-                    INDEX idx_platform (platform)
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS activity_heatmap (
-                    platform_uid VARCHAR(255) NOT NULL,
-                    platform ENUM('discord', 'teamspeak') NOT NULL,
-                    day_of_week TINYINT NOT NULL CHECK (day_of_week BETWEEN 0 AND 6),
-                    time_category ENUM('morning', 'noon', 'evening', 'night') NOT NULL,
-                    activity_minutes INT DEFAULT 0,
-                    last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (platform, platform_uid, day_of_week, time_category)
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS verification (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    steam_id BIGINT NOT NULL,
-                    platform_id VARCHAR(255) NOT NULL,
-                    platform ENUM('discord', 'teamspeak') NOT NULL,
-                    verification_code VARCHAR(6) NOT NULL,
-                    attempts INT NOT NULL DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    expires_at TIMESTAMP NOT NULL,
-                    INDEX idx_user_platform (steam_id, platform),
-                    INDEX idx_expires (expires_at)
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-            self.cursor.execute("""
-                ALTER TABLE verification
-                ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0
-            """)
-
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS login_streak (
-                    platform_uid VARCHAR(255) NOT NULL,
-                    platform ENUM('discord', 'teamspeak') NOT NULL,
-                    logins INT DEFAULT 1,
-                    current_streak INT DEFAULT 1,
-                    longest_streak INT DEFAULT 1,
-                    last_login DATE NOT NULL,
-                    PRIMARY KEY (platform, platform_uid)
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS special_achievements (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    platform ENUM('discord', 'teamspeak') NOT NULL,
-                    platform_id VARCHAR(255) NOT NULL,
-                    achievement_type INT NOT NULL,
-                    awarded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE KEY unique_user_achievement (platform, platform_id, achievement_type),
-                    INDEX idx_platform_id (platform_id),
-                    INDEX idx_achievement_type (achievement_type)
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS unlockables (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    steam_id BIGINT NOT NULL,
-                    platform ENUM('discord', 'teamspeak', 'gameserver') NOT NULL,
-                    unlockable_type INT NOT NULL,
-                    unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE KEY unique_user_unlockable (steam_id, platform, unlockable_type),
-                    INDEX idx_platform_uid (steam_id),
-                    INDEX idx_unlockable_type (unlockable_type)
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS ttt_player_stats (
-                    steam_id BIGINT NOT NULL PRIMARY KEY,
-                    last_ttt_name VARCHAR(255),
-                    rounds_played INT NOT NULL DEFAULT 0,
-                    rounds_won INT NOT NULL DEFAULT 0,
-                    innocent_wins INT NOT NULL DEFAULT 0,
-                    detective_wins INT NOT NULL DEFAULT 0,
-                    traitor_wins INT NOT NULL DEFAULT 0,
-                    kills INT NOT NULL DEFAULT 0,
-                    deaths INT NOT NULL DEFAULT 0,
-                    last_played_at TIMESTAMP NULL,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    INDEX idx_ttt_last_played_at (last_played_at)
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS reset_log (
-                    id INT PRIMARY KEY DEFAULT 1,
-                    last_daily_reset DATETIME,
-                    last_weekly_reset DATETIME,
-                    last_monthly_reset DATETIME,
-                    last_season_reset DATETIME
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS admin_audit_log (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    admin_steam_id VARCHAR(32) NOT NULL,
-                    action VARCHAR(64) NOT NULL,
-                    target_identifiers JSON,
-                    summary JSON,
-                    result_status ENUM('success', 'failed') NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_admin_audit_created (created_at),
-                    INDEX idx_admin_audit_action (action),
-                    INDEX idx_admin_audit_admin (admin_steam_id)
-                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_520_ci;
-            """)
-            self.cursor.execute("""
-                ALTER TABLE reset_log
-                ADD COLUMN IF NOT EXISTS last_season_reset DATETIME
-            """)
-            self.cursor.execute("""
-                INSERT IGNORE INTO reset_log (
-                    id, last_daily_reset, last_weekly_reset, last_monthly_reset, last_season_reset
-                )
-                VALUES (1, NULL, NULL, NULL, NULL)
-            """)
+    @ensure_connection
+    def check_schema_version(self) -> int:
+        """Return the schema version or raise SchemaVersionError if it is behind."""
+        return check_schema_version(self.cursor)
 
-            self.conn.commit()
-        except pymysql.Error as e:
-            logging.error(f"Error creating tables: {e}")
-            self.conn.rollback()
-            raise
-    
     @ensure_connection
     def execute_query(self, query: str, params: tuple = None) -> Optional[List[Tuple]]:
         """
@@ -609,12 +720,19 @@ class DatabaseManager:
         """, (steam_id,))
         return ttt_stats_from_row(self.cursor.fetchone(), steam_id)
 
-    def close(self) -> None:
-        """Close database connection"""
+    def _release(self, discard: bool = False) -> None:
+        conn, cursor = self.conn, self.cursor
+        self.conn = None
+        self.cursor = None
         try:
-            if self.cursor:
-                self.cursor.close()
-            if self.conn:
-                self.conn.close()
+            if cursor:
+                cursor.close()
         except pymysql.Error as e:
-            logging.error(f"Error closing database connection: {e}")
+            logging.error(f"Error closing database cursor: {e}")
+            discard = True
+        if conn:
+            get_connection_pool().release(conn, discard=discard)
+
+    def close(self) -> None:
+        """Return the connection to the pool"""
+        self._release()
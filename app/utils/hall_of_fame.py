@@ -0,0 +1,168 @@
+"""Materialized hall of fame.
+
+The six hall-of-fame boards aggregate over every user (streaks, logins,
+heatmap slot masks, join dates and the ``user_achievements`` scores), which
+is too heavy to run per request. The bot process
+recomputes them every ``HALL_OF_FAME_INTERVAL`` seconds into one Valkey hash
+(``hall_of_fame``, field = board, value = JSON list) and the API route serves
+that hash with a single HGETALL.
+
+The hash expires after ``HALL_OF_FAME_TTL``; while it is missing (bot down,
+Valkey unavailable) the route computes the boards from MariaDB with the same
+queries, so the response never changes shape.
+"""
+
+import asyncio
+import json
+import time
+
+import valkey
+
+from app.config import Config
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+__all__ = [
+    'HALL_OF_FAME_BOARDS',
+    'HallOfFameJob',
+    'assemble_hall_of_fame',
+    'read_hall_of_fame',
+]
+
+HALL_OF_FAME_KEY = "hall_of_fame"
+HALL_OF_FAME_BOARDS = (
+    'longest_streak',
+    'most_logins',
+    'most_achievements',
+    'most_active_times',
+    'oldest_member',
+    'current_streak',
+)
+
+#: board -> query returning (id, name, level, value) for the top three users
+TOP3_QUERIES = {
+    'longest_streak': """
+        SELECT u.id, COALESCE(u.name,'Unknown'), u.level, MAX(ls.longest_streak) as val
+        FROM login_streak ls
+        INNER JOIN user_identity ui ON ui.platform=ls.platform AND ui.platform_uid=ls.platform_uid
+        INNER JOIN user u ON u.id=ui.user_id
+        WHERE COALESCE(u.ranking_disabled, 0) = 0
+        GROUP BY u.id, u.name, u.level
+        ORDER BY val DESC LIMIT 3
+    """,
+    'most_logins': """
+        SELECT u.id, COALESCE(u.name,'Unknown'), u.level, SUM(ls.logins) as val
+        FROM login_streak ls
+        INNER JOIN user_identity ui ON ui.platform=ls.platform AND ui.platform_uid=ls.platform_uid
+        INNER JOIN user u ON u.id=ui.user_id
+        WHERE COALESCE(u.ranking_disabled, 0) = 0
+        GROUP BY u.id, u.name, u.level
+        ORDER BY val DESC LIMIT 3
+    """,
+    'most_achievements': """
+        SELECT u.id, COALESCE(u.name,'Unknown'), u.level, ua.score as val
+        FROM user_achievements ua
+        INNER JOIN user u ON u.id=ua.user_id
+        WHERE COALESCE(u.ranking_disabled, 0) = 0
+        ORDER BY ua.score DESC LIMIT 3
+    """,
+    'most_active_times': """
+        SELECT u.id, COALESCE(u.name,'Unknown'), u.level,
+            BIT_COUNT(BIT_OR(t.active_slot_mask)) as val
+        FROM time t
+        INNER JOIN user_identity ui ON ui.platform=t.platform AND ui.platform_uid=t.platform_uid
+        INNER JOIN user u ON u.id=ui.user_id
+        WHERE COALESCE(u.ranking_disabled, 0) = 0
+            AND t.active_slot_mask <> 0
+        GROUP BY u.id, u.name, u.level
+        ORDER BY val DESC LIMIT 3
+    """,
+    'oldest_member': """
+        SELECT u.id, COALESCE(u.name,'Unknown'), u.level,
+            DATEDIFF(CURDATE(), DATE(u.created_at)) as val
+        FROM user u
+        WHERE COALESCE(u.ranking_disabled, 0) = 0
+            AND u.created_at IS NOT NULL
+        ORDER BY u.created_at ASC LIMIT 3
+    """,
+    'current_streak': """
+        SELECT u.id, COALESCE(u.name,'Unknown'), u.level, MAX(ls.current_streak) as val
+        FROM login_streak ls
+        INNER JOIN user_identity ui ON ui.platform=ls.platform AND ui.platform_uid=ls.platform_uid
+        INNER JOIN user u ON u.id=ui.user_id
+        WHERE COALESCE(u.ranking_disabled, 0) = 0
+            AND ls.last_login >= CURDATE() - INTERVAL 1 DAY
+        GROUP BY u.id, u.name, u.level
+        ORDER BY val DESC LIMIT 3
+    """,
+}
+
+
+def _top3_entries(rows):
+    return [{'id': r[0], 'name': r[1], 'level': r[2], 'value': r[3]} for r in rows or []]
+
+
+def assemble_hall_of_fame(top3_rows: dict) -> dict:
+    """Build the route payload from the results of ``TOP3_QUERIES``."""
+    return {board: _top3_entries(top3_rows.get(board)) for board in HALL_OF_FAME_BOARDS}
+
+
+# -- API side (sync valkey client) --------------------------------------------
+
+def read_hall_of_fame(client):
+    """The materialized boards, or None if the job has not run recently."""
+    try:
+        stored = client.hgetall(HALL_OF_FAME_KEY)
+    except valkey.ValkeyError as e:
+        logging.warning(f"Hall of fame unavailable, falling back to SQL: {e}")
+        return None
+    if not stored or any(board not in stored for board in HALL_OF_FAME_BOARDS):
+        return None
+    return {board: json.loads(stored[board]) for board in HALL_OF_FAME_BOARDS}
+
+
+# -- bot side (async valkey client) -------------------------------------------
+
+class HallOfFameJob:
+    """Recomputes the hall of fame from MariaDB into Valkey.
+
+    ``valkey_client`` is an async valkey client and ``database`` an
+    ``AsyncDatabaseManager``. Each run stores its duration next to the boards
+    (``duration_ms``) and logs it, so the cost can be watched as the user
+    base grows.
+    """
+
+    def __init__(self, valkey_client, database, interval: int = None):
+        self.valkey = valkey_client
+        self.database = database
+        self.interval = interval or Config.HALL_OF_FAME_INTERVAL
+
+    async def refresh(self) -> float:
+        """Recompute every board and swap the hash in atomically; returns the
+        runtime in milliseconds."""
+        started = time.monotonic()
+        boards = assemble_hall_of_fame(await self.database.get_hall_of_fame_sources())
+        duration_ms = (time.monotonic() - started) * 1000
+
+        pipe = self.valkey.pipeline(transaction=True)
+        pipe.delete(HALL_OF_FAME_KEY)
+        pipe.hset(HALL_OF_FAME_KEY, mapping={
+            **{board: json.dumps(entries, separators=(",", ":"), default=str) for board, entries in boards.items()},
+            'generated_at': int(time.time()),
+            'duration_ms': round(duration_ms),
+        })
+        pipe.expire(HALL_OF_FAME_KEY, Config.HALL_OF_FAME_TTL)
+        await pipe.execute()
+        logging.info(f"Hall of fame refreshed in {duration_ms:.0f} ms")
+        return duration_ms
+
+    async def run_forever(self, running):
+        while running():
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logging.error(f"Hall of fame refresh failed: {exc}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,152 @@
+"""VPN/Tor reputation of client IPs (vpnapi.io).
+
+The TeamSpeak bot kicks low-level users connecting through a VPN or Tor, and
+asked vpnapi.io about the IP on every such connect, reconnects from the same
+address included. ``IpReputation`` answers from a Valkey cache first
+(``ip_reputation:<ip>``): flagged verdicts live ``VPN_REPUTATION_TTL``
+seconds, clean ones ``VPN_REPUTATION_CLEAN_TTL``, so a connect burst after a
+TeamSpeak restart costs no external call for known addresses. Concurrent
+lookups of the same IP share one request, and all requests go through one
+aiohttp session. Failed lookups are not cached.
+
+``VPNAPI_URL`` points the service at another vpnapi.io compatible endpoint,
+e.g. a local stub.
+"""
+
+import asyncio
+import functools
+import json
+from typing import Dict, NamedTuple, Optional
+
+import aiohttp
+import valkey
+import valkey.asyncio as avalkey
+
+from app.config import Config
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+__all__ = [
+    'IpReputation',
+    'Verdict',
+    'get_ip_reputation',
+]
+
+
+def reputation_key(ip: str) -> str:
+    return f"ip_reputation:{ip}"
+
+
+class Verdict(NamedTuple):
+    vpn: bool
+    tor: bool
+
+    @property
+    def flagged(self) -> bool:
+        return self.vpn or self.tor
+
+
+class IpReputation:
+    """Cached vpnapi.io lookups; ``valkey_client`` is a ``valkey.asyncio``
+    client (or anything with its ``get`` / ``set``)."""
+
+    def __init__(self, valkey_client, api_key: str = None, base_url: str = None,
+                 flagged_ttl: int = None, clean_ttl: int = None, timeout: float = 5.0):
+        self.valkey = valkey_client
+        self.api_key = Config.VPNAPI_API_KEY if api_key is None else api_key
+        self.base_url = (Config.VPNAPI_URL if base_url is None else base_url).rstrip("/")
+        self.flagged_ttl = Config.VPN_REPUTATION_TTL if flagged_ttl is None else flagged_ttl
+        self.clean_ttl = Config.VPN_REPUTATION_CLEAN_TTL if clean_ttl is None else clean_ttl
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lookups: Dict[str, asyncio.Future] = {}
+        self.api_calls = 0
+        self.cache_hits = 0
+
+    async def verdict(self, ip) -> Optional[Verdict]:
+        """The verdict for ``ip``, or None if vpnapi.io could not rate it."""
+        ip = str(ip)
+        lookup = self._lookups.get(ip)
+        if lookup is None:
+            lookup = asyncio.ensure_future(self._lookup(ip))
+            self._lookups[ip] = lookup
+            lookup.add_done_callback(functools.partial(self._forget, ip))
+        # one caller timing out must not cancel the others' lookup
+        return await asyncio.shield(lookup)
+
+    def _forget(self, ip: str, lookup: asyncio.Future) -> None:
+        if self._lookups.get(ip) is lookup:
+            del self._lookups[ip]
+
+    async def _lookup(self, ip: str) -> Optional[Verdict]:
+        verdict = await self._cached(ip)
+        if verdict is not None:
+            self.cache_hits += 1
+            return verdict
+        verdict = await self._fetch(ip)
+        if verdict is not None:
+            try:
+                await self.valkey.set(
+                    reputation_key(ip),
+                    json.dumps(verdict._asdict()),
+                    ex=self.flagged_ttl if verdict.flagged else self.clean_ttl,
+                )
+            except valkey.ValkeyError as e:
+                logging.debug(f"Caching the reputation of {ip} failed: {e}")
+        return verdict
+
+    async def _cached(self, ip: str) -> Optional[Verdict]:
+        try:
+            value = await self.valkey.get(reputation_key(ip))
+        except valkey.ValkeyError as e:
+            logging.debug(f"Reputation cache unavailable: {e}")
+            return None
+        if value is None:
+            return None
+        try:
+            data = json.loads(value)
+            return Verdict(bool(data['vpn']), bool(data['tor']))
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def _fetch(self, ip: str) -> Optional[Verdict]:
+        if not self.api_key:
+            logging.debug(f"No VPNAPI_API_KEY set, not rating {ip}")
+            return None
+        self.api_calls += 1
+        try:
+            async with self._get_session().get(f"{self.base_url}/{ip}", params={"key": self.api_key}) as resp:
+                if resp.status != 200:
+                    logging.warning(f"vpnapi.io error: {resp.status}")
+                    return None
+                data = await resp.json(content_type=None)
+        except (asyncio.TimeoutError, aiohttp.ClientError, ValueError) as e:
+            logging.warning(f"vpnapi.io lookup for {ip} failed: {e}")
+            return None
+        security = data.get("security") or {}
+        return Verdict(bool(security.get("vpn", False)), bool(security.get("tor", False)))
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        try:
+            await self.valkey.aclose()
+        except Exception as e:
+            logging.debug(f"Error closing reputation valkey client: {e}")
+
+
+_shared_instance: Optional[IpReputation] = None
+
+
+def get_ip_reputation() -> IpReputation:
+    """Shared IpReputation for the bot process."""
+    global _shared_instance
+    if _shared_instance is None:
+        _shared_instance = IpReputation(avalkey.Valkey(**Config.valkey_connection_kwargs()))
+    return _shared_instance
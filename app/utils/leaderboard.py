@@ -0,0 +1,241 @@
+"""Valkey sorted-set leaderboards.
+
+The ranking tick keeps one ZSET per period (``leaderboard:<period>``, member =
+``user.id``, score = combined Discord + TeamSpeak minutes) plus a hash of the
+display fields (``leaderboard:users``). The public ranking routes page through
+them with ZCARD/ZREVRANGE instead of scanning ``user`` x ``time`` with a
+``RANK()`` window on every request.
+
+Only users with more than zero minutes in a period are members of that
+period's set, matching the ``> 0`` filter of the SQL fallback. The
+``leaderboard:ready`` marker is written by every full rebuild with a TTL; the
+API falls back to SQL whenever it is missing (bot down, admin change pending,
+Valkey unavailable), so a stale board is never served for long.
+
+``ranking:version`` is bumped after every tick and every invalidation; the
+public ranking routes key their response cache and ETags on it. Edits that
+only touch one profile (join date, special achievements) bump that user's
+field in ``ranking:profile_versions`` instead.
+"""
+
+import json
+import time
+
+import valkey
+
+from app.config import Config
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+__all__ = [
+    'LEADERBOARD_PERIODS',
+    'LeaderboardMaintainer',
+    'RANKING_VERSION_KEY',
+    'bump_ranking_version',
+    'PROFILE_VERSIONS_KEY',
+    'invalidate_leaderboards',
+    'leaderboard_size',
+    'read_leaderboard_rows',
+    'touch_profiles',
+]
+
+#: period -> ``time`` column summed into the board
+LEADERBOARD_PERIODS = {
+    'total': 'total_time',
+    'season': 'season_time',
+    'weekly': 'weekly_time',
+    'monthly': 'monthly_time',
+    'daily': 'daily_time',
+}
+LEADERBOARD_USERS_KEY = "leaderboard:users"
+LEADERBOARD_READY_KEY = "leaderboard:ready"
+RANKING_VERSION_KEY = "ranking:version"
+PROFILE_VERSIONS_KEY = "ranking:profile_versions"
+NEVER_SEEN = "1970-01-01 00:00:00"
+
+
+def leaderboard_key(period: str) -> str:
+    return f"leaderboard:{period}"
+
+
+def _user_payload(row: dict) -> str:
+    return json.dumps({
+        'name': row['name'],
+        'level': row['level'],
+        'division': row['division'],
+        'discord_id': row['discord_id'],
+        'teamspeak_id': row['teamspeak_id'],
+        'last_update': row['last_update'],
+    }, separators=(",", ":"))
+
+
+# -- API side (sync valkey client) --------------------------------------------
+
+def leaderboard_size(client, period: str):
+    """Number of ranked users in ``period``, or None if the board is unavailable."""
+    if period not in LEADERBOARD_PERIODS:
+        return None
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.exists(LEADERBOARD_READY_KEY)
+        pipe.zcard(leaderboard_key(period))
+        ready, size = pipe.execute()
+    except valkey.ValkeyError as e:
+        logging.warning(f"Leaderboard unavailable, falling back to SQL: {e}")
+        return None
+    return int(size) if ready else None
+
+
+def read_leaderboard_rows(client, period: str, offset: int, limit: int):
+    """One page of ``period`` as rows shaped like the SQL ranking query:
+    (id, name, level, division, minutes, last_update, rank, discord_uid,
+    teamspeak_uid). Ties share a rank, like ``RANK()``. Returns None if the
+    board is unavailable."""
+    key = leaderboard_key(period)
+    try:
+        members = client.zrevrange(key, offset, offset + limit - 1, withscores=True)
+        if not members:
+            return []
+        pipe = client.pipeline(transaction=False)
+        pipe.hmget(LEADERBOARD_USERS_KEY, [member for member, _ in members])
+        for _, score in members:
+            pipe.zcount(key, f"({score}", "+inf")
+        payloads, *higher_counts = pipe.execute()
+    except valkey.ValkeyError as e:
+        logging.warning(f"Leaderboard read failed, falling back to SQL: {e}")
+        return None
+
+    rows = []
+    for (member, score), payload, higher in zip(members, payloads, higher_counts):
+        user = json.loads(payload) if payload else {}
+        rows.append((
+            int(member),
+            user.get('name') or 'Unknown',
+            user.get('level') or 1,
+            user.get('division') or 1,
+            int(score),
+            user.get('last_update') or NEVER_SEEN,
+            int(higher) + 1,
+            user.get('discord_id'),
+            user.get('teamspeak_id'),
+        ))
+    return rows
+
+
+def bump_ranking_version(client) -> None:
+    """Expire every cached ranking response. Best-effort like the
+    invalidation itself; the cache TTL bounds staleness if this fails."""
+    try:
+        client.incr(RANKING_VERSION_KEY)
+    except valkey.ValkeyError as e:
+        logging.debug(f"Could not bump ranking version: {e}")
+
+
+def touch_profiles(client, user_ids) -> None:
+    """Change the ETag of these users' profile pages without expiring every
+    other ranking response."""
+    try:
+        pipe = client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.hincrby(PROFILE_VERSIONS_KEY, str(user_id), 1)
+        pipe.execute()
+    except valkey.ValkeyError as e:
+        logging.debug(f"Could not touch profiles {user_ids}: {e}")
+
+
+def invalidate_leaderboards(client) -> None:
+    """Force the API onto SQL until the bot's next rebuild (admin edits,
+    account merges). Best-effort: a Valkey outage already means SQL."""
+    try:
+        client.delete(LEADERBOARD_READY_KEY)
+    except valkey.ValkeyError as e:
+        logging.debug(f"Could not invalidate leaderboards: {e}")
+    bump_ranking_version(client)
+
+
+# -- bot side (async valkey client) -------------------------------------------
+
+class LeaderboardMaintainer:
+    """Keeps the leaderboard ZSETs in sync from the ranking tick.
+
+    ``valkey_client`` is an async valkey client and ``database`` an
+    ``AsyncDatabaseManager``. The tick calls ``update`` with the users it just
+    credited and ``refresh_if_stale`` once per minute; period resets, season
+    close and admin invalidations trigger a full ``rebuild``.
+
+    With an enabled ``MinuteAccumulator`` the scores are the MariaDB minutes
+    plus the minutes still pending in Valkey.
+    """
+
+    def __init__(self, valkey_client, database, rebuild_interval: int = None, accumulator=None):
+        self.valkey = valkey_client
+        self.database = database
+        self.rebuild_interval = rebuild_interval or Config.LEADERBOARD_REBUILD_INTERVAL
+        self.accumulator = accumulator
+        self.last_rebuild = 0.0
+
+    @staticmethod
+    def _add_pending_minutes(rows, pending) -> None:
+        for row in rows:
+            extra = (pending.get(('discord', str(row['discord_id'])), 0)
+                     + pending.get(('teamspeak', str(row['teamspeak_id'])), 0))
+            if extra:
+                for period in LEADERBOARD_PERIODS:
+                    row[period] += extra
+
+    async def rebuild(self) -> int:
+        """Rewrite every board from MariaDB and swap it in atomically."""
+        rows = await self.database.get_leaderboard_rows()
+        if self.accumulator is not None and self.accumulator.enabled:
+            self._add_pending_minutes(rows, await self.accumulator.pending_totals())
+        pipe = self.valkey.pipeline(transaction=True)
+        for period in LEADERBOARD_PERIODS:
+            key = leaderboard_key(period)
+            scores = {str(row['id']): row[period] for row in rows if row[period] > 0}
+            pipe.delete(key)
+            if scores:
+                pipe.zadd(key, scores)
+        pipe.delete(LEADERBOARD_USERS_KEY)
+        if rows:
+            pipe.hset(LEADERBOARD_USERS_KEY, mapping={str(row['id']): _user_payload(row) for row in rows})
+        pipe.set(LEADERBOARD_READY_KEY, int(time.time()), ex=Config.LEADERBOARD_READY_TTL)
+        await pipe.execute()
+        self.last_rebuild = time.monotonic()
+        logging.debug(f"Rebuilt leaderboards for {len(rows)} users")
+        return len(rows)
+
+    async def update(self, platform: str, platform_uids) -> None:
+        """Re-score the users credited this tick (O(k log n))."""
+        if not platform_uids:
+            return
+        rows = await self.database.get_leaderboard_rows(platform, platform_uids)
+        if not rows:
+            return
+        if self.accumulator is not None and self.accumulator.enabled:
+            identities = [
+                (id_platform, str(row[f'{id_platform}_id']))
+                for row in rows
+                for id_platform in ('discord', 'teamspeak')
+                if row[f'{id_platform}_id']
+            ]
+            self._add_pending_minutes(rows, await self.accumulator.pending_minutes(identities))
+        pipe = self.valkey.pipeline(transaction=False)
+        for row in rows:
+            member = str(row['id'])
+            for period in LEADERBOARD_PERIODS:
+                if row['ranking_disabled'] or row[period] <= 0:
+                    pipe.zrem(leaderboard_key(period), member)
+                else:
+                    pipe.zadd(leaderboard_key(period), {member: row[period]})
+            if row['ranking_disabled']:
+                pipe.hdel(LEADERBOARD_USERS_KEY, member)
+            else:
+                pipe.hset(LEADERBOARD_USERS_KEY, member, _user_payload(row))
+        await pipe.execute()
+
+    async def refresh_if_stale(self) -> None:
+        """Full rebuild on startup, after an invalidation, or every interval."""
+        due = time.monotonic() - self.last_rebuild >= self.rebuild_interval
+        if due or not await self.valkey.exists(LEADERBOARD_READY_KEY):
+            await self.rebuild()
@@ -0,0 +1,168 @@
+"""Write-behind minute accumulator.
+
+With ``MINUTE_FLUSH_INTERVAL`` > 0 the ranking tick stops writing MariaDB
+every minute. It HINCRBYs each online user's minute, and the heatmap slot the
+minute fell in, into one Valkey hash (``minutes:pending``). Every
+``MINUTE_FLUSH_INTERVAL`` minutes ``flush`` credits the whole batch through
+``AsyncDatabaseManager.apply_minute_deltas``: one transaction of bulk upserts
+instead of one per minute.
+
+Handoff is rename-and-drain. ``flush`` atomically RENAMEs the pending hash to
+``minutes:flushing`` and tags it with a batch id, applies it, then deletes
+it. A crash before the commit leaves ``minutes:flushing`` for the next flush
+to apply; a crash after the commit is caught by ``minute_flushes``, which
+records the batch id in the same transaction.
+
+While minutes sit in Valkey, MariaDB (profiles, rank checks, the SQL
+fallback) lags by up to one interval. The leaderboard ZSETs add the pending
+minutes (``pending_minutes`` / ``pending_totals``) to the database values,
+and the tick flushes before any period reset so a batch never spills into
+the next period.
+
+Hash fields: ``t|<platform>|<uid>`` (minutes) and
+``h|<platform>|<uid>|<day_of_week>|<time_category>`` (heatmap minutes).
+"""
+
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+from app.config import Config
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+__all__ = [
+    'FLUSHING_KEY',
+    'MinuteAccumulator',
+    'PENDING_KEY',
+    'parse_minute_deltas',
+]
+
+PENDING_KEY = "minutes:pending"
+FLUSHING_KEY = "minutes:flushing"
+BATCH_FIELD = "batch"
+
+
+def _time_field(platform: str, uid) -> str:
+    return f"t|{platform}|{uid}"
+
+
+def _heatmap_field(platform: str, uid, day_of_week: int, time_category: str) -> str:
+    return f"h|{platform}|{uid}|{day_of_week}|{time_category}"
+
+
+def parse_minute_deltas(fields: Dict[str, str]) -> dict:
+    """An accumulator hash as the ``deltas`` of
+    ``AsyncDatabaseManager.apply_minute_deltas``."""
+    deltas = {}
+    for field, value in fields.items():
+        parts = field.split('|')
+        if len(parts) < 3:
+            continue
+        minutes = int(value or 0)
+        if minutes <= 0:
+            continue
+        kind, platform, uid = parts[:3]
+        platform_deltas = deltas.setdefault(platform, {'time': {}, 'heatmap': []})
+        if kind == 't':
+            platform_deltas['time'][uid] = minutes
+        elif kind == 'h' and len(parts) == 5:
+            platform_deltas['heatmap'].append((uid, int(parts[3]), parts[4], minutes))
+    return deltas
+
+
+class MinuteAccumulator:
+    """Buffers tick minutes in Valkey and flushes them to MariaDB in batches.
+
+    ``valkey_client`` is an async valkey client and ``database`` an
+    ``AsyncDatabaseManager``. ``flush_interval`` is in minutes; 0 disables
+    the accumulator, which then only drains a batch left over from an
+    earlier run (once, at startup).
+    """
+
+    def __init__(self, valkey_client, database, flush_interval: int = None):
+        self.valkey = valkey_client
+        self.database = database
+        self.flush_interval = Config.MINUTE_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.last_flush = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval > 0
+
+    async def add(self, platform: str, platform_uids, now: datetime = None) -> None:
+        """Credit one minute to every uid, pipelined."""
+        now = now or datetime.now()
+        day_of_week = now.weekday()
+        time_category = self.database.get_time_category(now.hour)
+        pipe = self.valkey.pipeline(transaction=False)
+        for uid in platform_uids:
+            pipe.hincrby(PENDING_KEY, _time_field(platform, uid), 1)
+            pipe.hincrby(PENDING_KEY, _heatmap_field(platform, uid, day_of_week, time_category), 1)
+        await pipe.execute()
+
+    async def pending_minutes(self, identities: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """Minutes not yet in MariaDB per (platform, platform_uid)."""
+        identities = list(identities)
+        if not identities:
+            return {}
+        fields = [_time_field(platform, uid) for platform, uid in identities]
+        pipe = self.valkey.pipeline(transaction=False)
+        pipe.hmget(PENDING_KEY, fields)
+        pipe.hmget(FLUSHING_KEY, fields)
+        pending, flushing = await pipe.execute()
+        return {
+            identity: int(queued or 0) + int(draining or 0)
+            for identity, queued, draining in zip(identities, pending, flushing)
+            if queued or draining
+        }
+
+    async def pending_totals(self) -> Dict[Tuple[str, str], int]:
+        """``pending_minutes`` for every identity with pending minutes."""
+        pipe = self.valkey.pipeline(transaction=False)
+        pipe.hgetall(PENDING_KEY)
+        pipe.hgetall(FLUSHING_KEY)
+        totals = {}
+        for fields in await pipe.execute():
+            for platform, platform_deltas in parse_minute_deltas(fields or {}).items():
+                for uid, minutes in platform_deltas['time'].items():
+                    totals[(platform, uid)] = totals.get((platform, uid), 0) + minutes
+        return totals
+
+    async def flush(self) -> dict:
+        """Apply a batch left over by a crashed flush, or else the pending
+        minutes. Returns ``{platform: (level_changes, division_changes)}``."""
+        if not await self.valkey.exists(FLUSHING_KEY):
+            if not await self.valkey.exists(PENDING_KEY):
+                self.last_flush = time.monotonic()
+                return {}
+            pipe = self.valkey.pipeline(transaction=True)
+            pipe.rename(PENDING_KEY, FLUSHING_KEY)
+            pipe.hset(FLUSHING_KEY, BATCH_FIELD, uuid.uuid4().hex)
+            await pipe.execute()
+
+        fields = await self.valkey.hgetall(FLUSHING_KEY)
+        batch_id = fields.get(BATCH_FIELD) or uuid.uuid4().hex
+        deltas = parse_minute_deltas(fields)
+        changes = await self.database.apply_minute_deltas(batch_id, deltas) if deltas else {}
+        if changes is None:
+            logging.warning(f"Minute batch {batch_id} was already applied, dropping it")
+        await self.valkey.delete(FLUSHING_KEY)
+        self.last_flush = time.monotonic()
+        logging.debug(
+            f"Flushed minute batch {batch_id}: "
+            + ", ".join(f"{platform} {len(d['time'])} users" for platform, d in deltas.items())
+        )
+        return changes or {}
+
+    async def flush_if_due(self, force: bool = False) -> dict:
+        """``flush`` every ``flush_interval`` minutes, on ``force`` (period
+        resets, shutdown) and on the first call after startup."""
+        if self.last_flush is not None:
+            if not self.enabled:
+                return {}
+            if not force and time.monotonic() - self.last_flush < self.flush_interval * 60:
+                return {}
+        return await self.flush()
@@ -0,0 +1,97 @@
+"""Indexed player search.
+
+``user.name_normalized`` holds a case-/accent-folded copy of ``user.name``
+and ``user_name_trigram`` its distinct 3-character substrings. A substring
+search becomes "users owning every trigram of the term" (a PRIMARY KEY range
+per trigram) re-checked with LIKE on the few candidates, instead of a
+``name LIKE '%term%'`` scan over every user. Terms shorter than a trigram use
+a prefix match on ``idx_name_normalized``.
+
+Numeric IDs get exact or prefix lookups that stay on their indexes: SteamID64
+prefixes become a BIGINT range, Discord/TeamSpeak IDs a ``LIKE 'term%'``.
+"""
+
+import unicodedata
+from typing import List, Optional, Tuple
+
+__all__ = [
+    'id_search_subqueries',
+    'name_index_statements',
+    'name_search_filter',
+    'normalize_name',
+]
+
+TRIGRAM_LENGTH = 3
+STEAM_ID64_LENGTH = 17
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Fold case, accents and whitespace runs: ``"  Ëmber  Fox"`` -> ``"ember fox"``."""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())[:255]
+
+
+def name_trigrams(normalized: str) -> List[str]:
+    return sorted({
+        normalized[index:index + TRIGRAM_LENGTH]
+        for index in range(len(normalized) - TRIGRAM_LENGTH + 1)
+    })
+
+
+def escape_like(term: str) -> str:
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def name_index_statements(user_id: int, name: Optional[str]) -> List[Tuple[str, tuple]]:
+    """Statements that (re)index one user's name; run them on the writer's
+    cursor whenever ``user.name`` is inserted or changed."""
+    normalized = normalize_name(name)
+    statements = [
+        ("UPDATE user SET name_normalized = %s WHERE id = %s", (normalized, user_id)),
+        ("DELETE FROM user_name_trigram WHERE user_id = %s", (user_id,)),
+    ]
+    trigrams = name_trigrams(normalized)
+    if trigrams:
+        statements.append((
+            f"INSERT IGNORE INTO user_name_trigram (trigram, user_id) VALUES "
+            f"{','.join(['(%s, %s)'] * len(trigrams))}",
+            tuple(value for trigram in trigrams for value in (trigram, user_id)),
+        ))
+    return statements
+
+
+def name_search_filter(term: str, alias: str = 'user') -> Tuple[str, list]:
+    """SQL condition (without leading AND) and params matching users whose
+    name contains ``term``; short terms match as a prefix."""
+    normalized = normalize_name(term)
+    trigrams = name_trigrams(normalized)
+    if not trigrams:
+        return f"{alias}.name_normalized LIKE %s", [f"{escape_like(normalized)}%"]
+    return f"""{alias}.id IN (
+            SELECT user_id FROM user_name_trigram
+            WHERE trigram IN ({','.join(['%s'] * len(trigrams))})
+            GROUP BY user_id
+            HAVING COUNT(*) = %s
+        )
+        AND {alias}.name_normalized LIKE %s""", [*trigrams, len(trigrams), f"%{escape_like(normalized)}%"]
+
+
+def id_search_subqueries(term: str) -> List[Tuple[str, list]]:
+    """``SELECT id FROM user`` lookups for a term that may be a platform ID:
+    exact/prefix SteamID64 (numeric terms only), Discord and TeamSpeak ID
+    prefixes."""
+    term = term.strip()
+    if not term:
+        return []
+    prefix = f"{escape_like(term)}%"
+    subqueries = []
+    if term.isdigit() and len(term) <= STEAM_ID64_LENGTH:
+        scale = 10 ** (STEAM_ID64_LENGTH - len(term))
+        subqueries.append((
+            "SELECT id FROM user WHERE steam_id BETWEEN %s AND %s",
+            [int(term) * scale, (int(term) + 1) * scale - 1],
+        ))
+        subqueries.append(("SELECT id FROM user WHERE discord_id LIKE %s", [prefix]))
+    subqueries.append(("SELECT id FROM user WHERE teamspeak_id LIKE %s", [prefix]))
+    return subqueries
@@ -0,0 +1,210 @@
+"""Session-based presence accounting.
+
+With ``PRESENCE_CHECKPOINT_INTERVAL`` > 0 the ranking tick stops crediting a
+sampled minute per online user. Instead the bots report joins and leaves as
+they happen (TeamSpeak ``cliententerview`` / ``clientleftview``, Discord
+``on_voice_state_update``) and the periodic rescans reconcile the open
+sessions with who is actually online (``sync``). Sessions live in memory;
+every ``PRESENCE_CHECKPOINT_INTERVAL`` minutes ``checkpoint`` credits the
+time spent since the last checkpoint, and writes the sessions closed since
+then to ``presence_sessions``, in one
+``AsyncDatabaseManager.apply_minute_deltas`` transaction.
+
+Time is counted in seconds and credited in whole minutes; the remainder of
+each identity carries over to its next credit, so totals do not drift from
+rounding. Heatmap minutes go to the slot in which they complete.
+
+Open sessions are not persisted: a crash loses at most one checkpoint
+interval of time. A failed write keeps its batch (and batch id) for the next
+checkpoint, so a write that committed before the error is not credited
+twice.
+"""
+
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.config import Config
+from app.utils.async_database import get_async_db
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+__all__ = [
+    'PresenceLog',
+    'get_presence_log',
+]
+
+
+class _Session:
+    __slots__ = ('started_at', 'credited_until')
+
+    def __init__(self, started_at: datetime):
+        self.started_at = started_at
+        self.credited_until = started_at
+
+
+def _hour_slices(start: datetime, end: datetime):
+    """(slice start, seconds) for ``[start, end)`` cut at hour boundaries,
+    so every slice falls into one heatmap slot."""
+    while start < end:
+        boundary = start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        stop = min(boundary, end)
+        yield start, (stop - start).total_seconds()
+        start = stop
+
+
+class PresenceLog:
+    """In-memory voice sessions per (platform, platform_uid), credited to
+    MariaDB at coarse checkpoints.
+
+    ``database`` is an ``AsyncDatabaseManager``; ``checkpoint_interval`` is
+    in minutes and 0 disables the log (every call is then a no-op).
+    """
+
+    def __init__(self, database, checkpoint_interval: int = None):
+        self.database = database
+        self.checkpoint_interval = (
+            Config.PRESENCE_CHECKPOINT_INTERVAL if checkpoint_interval is None else checkpoint_interval
+        )
+        self.last_checkpoint = time.monotonic()
+        self._open: Dict[Tuple[str, str], _Session] = {}
+        self._carry: Dict[Tuple[str, str], float] = {}
+        self._minutes: Dict[str, Dict[str, int]] = {}
+        self._heatmap: Dict[str, Dict[Tuple[str, int, str], int]] = {}
+        self._closed = []
+        self._unwritten = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.checkpoint_interval > 0
+
+    def is_open(self, platform: str, platform_uid) -> bool:
+        return (platform, str(platform_uid)) in self._open
+
+    # -- events ------------------------------------------------------------
+
+    def join(self, platform: str, platform_uid, at: datetime = None) -> None:
+        """Open a session, unless one is already open."""
+        if not self.enabled:
+            return
+        key = (platform, str(platform_uid))
+        if key not in self._open:
+            self._open[key] = _Session(at or datetime.now())
+
+    def leave(self, platform: str, platform_uid, at: datetime = None) -> None:
+        """Close a session: credit its time and queue its row."""
+        session = self._open.pop((platform, str(platform_uid)), None)
+        if session is None:
+            return
+        ended_at = max(at or datetime.now(), session.started_at)
+        self._credit((platform, str(platform_uid)), session, ended_at)
+        self._closed.append((
+            platform,
+            str(platform_uid),
+            session.started_at.replace(microsecond=0),
+            ended_at.replace(microsecond=0),
+            int((ended_at - session.started_at).total_seconds()),
+        ))
+
+    def sync(self, platform: str, platform_uids: Iterable, at: datetime = None) -> None:
+        """Reconcile ``platform``'s open sessions with the uids actually
+        online (rescans, the tick): close the missing, open the new."""
+        if not self.enabled:
+            return
+        at = at or datetime.now()
+        online = {str(uid) for uid in platform_uids}
+        for open_platform, uid in list(self._open):
+            if open_platform == platform and uid not in online:
+                self.leave(platform, uid, at)
+        for uid in online:
+            self.join(platform, uid, at)
+
+    def close_all(self, at: datetime = None) -> None:
+        """Close every open session (shutdown)."""
+        at = at or datetime.now()
+        for platform, uid in list(self._open):
+            self.leave(platform, uid, at)
+
+    # -- crediting ---------------------------------------------------------
+
+    def _credit(self, key: Tuple[str, str], session: _Session, until: datetime) -> None:
+        platform, uid = key
+        carry = self._carry.get(key, 0.0)
+        credited = 0
+        for slice_start, seconds in _hour_slices(session.credited_until, until):
+            carry += seconds
+            minutes = int(carry // 60)
+            if minutes:
+                carry -= minutes * 60
+                credited += minutes
+                slot = (uid, slice_start.weekday(), self.database.get_time_category(slice_start.hour))
+                heatmap = self._heatmap.setdefault(platform, {})
+                heatmap[slot] = heatmap.get(slot, 0) + minutes
+        if credited:
+            platform_minutes = self._minutes.setdefault(platform, {})
+            platform_minutes[uid] = platform_minutes.get(uid, 0) + credited
+        self._carry[key] = carry
+        session.credited_until = max(until, session.credited_until)
+
+    def _take_batch(self, now: datetime) -> Optional[tuple]:
+        for key, session in self._open.items():
+            self._credit(key, session, now)
+        deltas = {}
+        for platform in set(self._minutes) | set(self._heatmap):
+            deltas[platform] = {
+                'time': self._minutes.get(platform, {}),
+                'heatmap': [(*slot, minutes) for slot, minutes in self._heatmap.get(platform, {}).items()],
+            }
+        sessions = self._closed
+        self._minutes, self._heatmap, self._closed = {}, {}, []
+        if not deltas and not sessions:
+            return None
+        return uuid.uuid4().hex, deltas, sessions
+
+    async def checkpoint(self, now: datetime = None) -> Tuple[dict, dict]:
+        """Credit the open sessions up to ``now`` and write everything since
+        the last checkpoint. Returns ``(credited, changes)``: the platform
+        uids credited per platform and ``{platform: (level_changes,
+        division_changes)}``.
+
+        A batch whose write raised is retried as is at the next checkpoint;
+        new time keeps collecting in memory until it is through."""
+        self.last_checkpoint = time.monotonic()
+        if self._unwritten is None:
+            self._unwritten = self._take_batch(now or datetime.now())
+        if self._unwritten is None:
+            return {}, {}
+        batch_id, deltas, sessions = self._unwritten
+        changes = await self.database.apply_minute_deltas(batch_id, deltas, sessions)
+        self._unwritten = None
+        if changes is None:
+            logging.warning(f"Presence batch {batch_id} was already applied, dropping it")
+        logging.debug(
+            f"Presence checkpoint {batch_id}: {len(sessions)} closed sessions, "
+            + ", ".join(f"{platform} {len(d['time'])} users" for platform, d in deltas.items())
+        )
+        credited = {platform: list(d['time']) for platform, d in deltas.items() if d['time']}
+        return credited, changes or {}
+
+    async def checkpoint_if_due(self, force: bool = False) -> Tuple[dict, dict]:
+        """``checkpoint`` every ``checkpoint_interval`` minutes and on
+        ``force`` (period resets, shutdown)."""
+        if not self.enabled:
+            return {}, {}
+        if not force and time.monotonic() - self.last_checkpoint < self.checkpoint_interval * 60:
+            return {}, {}
+        return await self.checkpoint()
+
+
+_shared_instance: Optional[PresenceLog] = None
+
+
+def get_presence_log() -> PresenceLog:
+    """Shared PresenceLog for the bot process: the bots report into it and
+    the ranking tick checkpoints it."""
+    global _shared_instance
+    if _shared_instance is None:
+        _shared_instance = PresenceLog(get_async_db())
+    return _shared_instance
@@ -0,0 +1,166 @@
+"""Compiled rank curves.
+
+A rank curve maps a counter (minutes, logins, kills, ...) to the highest rank
+whose threshold it reaches. Every curve the ranking system uses is compiled
+once into a sorted ``array`` of thresholds, so a lookup is a single
+``bisect_right`` and a batch lookup maps that over a whole column:
+
+* ``level``, ``division``: ``Config.LEVEL_REQUIREMENTS`` /
+  ``Config.DIVISION_REQUIREMENTS`` (rank -> minimum minutes)
+* ``streak``, ``logins``, ``minutes``, ``heatmap_days``: achievement tiers
+  (tier n = the n-th threshold reached, 0 below the first)
+* ``ttt_rounds_played``, ``ttt_rounds_won``, ``ttt_kills``: the
+  ``Config.TTT_*_THRESHOLDS`` tiers
+
+``RANK_CURVES_FILE`` may point at a JSON file that replaces any of these
+curves, e.g. for a seasonal experiment::
+
+    {"division": {"1": 0, "2": 1200, "3": 2400, "4": 4800, "5": 7200},
+     "streak": [3, 7, 14, 30]}
+
+Curves given as an object are rank -> threshold; curves given as a list are
+tier thresholds. Curves missing from the file keep the configured values.
+"""
+
+import json
+from array import array
+from bisect import bisect_right
+from functools import partial
+from typing import Dict, Iterable, Mapping, NamedTuple, Optional, Sequence
+
+from app.config import Config
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+__all__ = [
+    'RankCurve',
+    'RankCurves',
+    'load_rank_curves',
+    'rank_curves',
+    'use_rank_curves',
+]
+
+STREAK_THRESHOLDS = (2, 7, 14, 30)
+LOGIN_THRESHOLDS = (2, 30, 365, 3650)
+HOUR_THRESHOLDS = (1, 10, 100, 1000)
+HEATMAP_DAY_THRESHOLDS = (3, 5, 7)
+
+
+class RankCurve:
+    """Thresholds sorted ascending with the rank each one unlocks.
+
+    ``rank_for`` returns the highest rank whose threshold ``value`` reaches,
+    or 0 below the lowest threshold, which is what the sorted-descending
+    walk of ``Config.get_level_for_minutes`` used to compute.
+    """
+
+    __slots__ = ('thresholds', 'ranks', 'requirements', 'max_rank', '_ranks_by_index', '_contiguous', '_bisect')
+
+    def __init__(self, requirements: Mapping[int, int]):
+        if not requirements:
+            raise ValueError("rank curve needs at least one threshold")
+        ordered = sorted((int(rank), int(threshold)) for rank, threshold in requirements.items())
+        thresholds = [threshold for _, threshold in ordered]
+        if thresholds != sorted(thresholds):
+            raise ValueError("rank curve thresholds must not decrease as the rank grows")
+        self.requirements = dict(ordered)
+        self.thresholds = array('q', thresholds)
+        self.ranks = array('l', [rank for rank, _ in ordered])
+        self.max_rank = ordered[-1][0]
+        # index = number of thresholds reached; index 0 is below the curve
+        self._ranks_by_index = (0, *self.ranks)
+        # ranks 1..n (every shipped curve): the bisect index is the rank
+        self._contiguous = self._ranks_by_index == tuple(range(len(self._ranks_by_index)))
+        # bisect over a tuple: indexing an array boxes a new int per probe
+        self._bisect = partial(bisect_right, tuple(thresholds))
+
+    @classmethod
+    def from_thresholds(cls, thresholds: Iterable[int]) -> 'RankCurve':
+        """Tier curve: rank n for reaching the n-th lowest threshold."""
+        return cls({tier: threshold for tier, threshold in enumerate(sorted(thresholds), start=1)})
+
+    def rank_for(self, value) -> int:
+        return self._ranks_by_index[self._bisect(int(value or 0))]
+
+    def ranks_for(self, values: Sequence) -> array:
+        """``rank_for`` over a column; ``None`` counts as 0."""
+        indexes = list(map(self._bisect, [int(value or 0) for value in values]))
+        if self._contiguous:
+            return array('l', indexes)
+        return array('l', map(self._ranks_by_index.__getitem__, indexes))
+
+    def requirement(self, rank: int) -> int:
+        """Threshold of ``rank``; 0 for ranks the curve does not define."""
+        return self.requirements.get(rank, 0)
+
+    def __repr__(self):
+        return f"RankCurve({self.requirements!r})"
+
+
+class RankCurves(NamedTuple):
+    level: RankCurve
+    division: RankCurve
+    streak: RankCurve
+    logins: RankCurve
+    minutes: RankCurve
+    heatmap_days: RankCurve
+    ttt_rounds_played: RankCurve
+    ttt_rounds_won: RankCurve
+    ttt_kills: RankCurve
+
+
+def _configured_curves() -> Dict[str, object]:
+    return {
+        'level': Config.LEVEL_REQUIREMENTS,
+        'division': Config.DIVISION_REQUIREMENTS,
+        'streak': STREAK_THRESHOLDS,
+        'logins': LOGIN_THRESHOLDS,
+        # compared as minutes, so no column has to be divided first
+        'minutes': [hours * 60 for hours in HOUR_THRESHOLDS],
+        'heatmap_days': HEATMAP_DAY_THRESHOLDS,
+        'ttt_rounds_played': Config.TTT_ROUNDS_PLAYED_THRESHOLDS,
+        'ttt_rounds_won': Config.TTT_ROUNDS_WON_THRESHOLDS,
+        'ttt_kills': Config.TTT_KILLS_THRESHOLDS,
+    }
+
+
+def _compile(spec) -> RankCurve:
+    if isinstance(spec, Mapping):
+        return RankCurve(spec)
+    return RankCurve.from_thresholds(spec)
+
+
+def load_rank_curves(path: Optional[str] = None) -> RankCurves:
+    """Compile the configured curves, with those in the JSON file at
+    ``path`` (if any) replacing them."""
+    specs = _configured_curves()
+    if path:
+        with open(path, encoding='utf-8') as handle:
+            overrides = json.load(handle)
+        unknown = set(overrides) - set(RankCurves._fields)
+        if unknown:
+            raise ValueError(f"unknown rank curves in {path}: {', '.join(sorted(unknown))}")
+        specs.update(overrides)
+    return RankCurves(**{name: _compile(specs[name]) for name in RankCurves._fields})
+
+
+_active: Optional[RankCurves] = None
+
+
+def rank_curves() -> RankCurves:
+    """The curves in effect, compiled on first use."""
+    global _active
+    if _active is None:
+        path = Config.RANK_CURVES_FILE
+        if path:
+            logging.info(f"Loading rank curves from {path}")
+        _active = load_rank_curves(path)
+    return _active
+
+
+def use_rank_curves(curves: Optional[RankCurves]) -> None:
+    """Swap the curves in effect (None recompiles from the config on the
+    next lookup)."""
+    global _active
+    _active = curves
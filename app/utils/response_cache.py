@@ -0,0 +1,138 @@
+"""Tick-versioned caching for the public ranking routes.
+
+The data behind the ranking pages only changes when the bot runs its
+per-minute tick, which bumps ``ranking:version``.
+
+``cached_response`` stores the serialized JSON body of a route under (path,
+query args, version), so every gunicorn worker hits MariaDB once per tick and
+route instead of once per request. A version bump makes the old entries
+unreachable; the TTL cleans them up and bounds staleness while the bot is
+down.
+
+``conditional_response`` derives an ETag from the same version (plus the
+user's ``ranking:profile_versions`` marker on profile routes), answers a
+matching ``If-None-Match`` with 304 before the route runs, and marks the
+response cacheable by nginx/CDNs for ``PUBLIC_CACHE_S_MAXAGE`` seconds.
+Routes that embed live presence (``presence=True``) also fold a digest of the
+``<platform>:online_users`` sets into the ETag and are sent ``no-cache``, so
+a shared cache has to revalidate them instead of serving a stale "Online".
+
+Usage, below ``@handle_errors`` and the rate limit::
+
+    @bp.route('/api/ranking/stats')
+    @handle_errors
+    @limiter.limit("60 per minute")
+    @conditional_response()
+    @cached_response
+    def get_stats(): ...
+"""
+
+import hashlib
+from functools import wraps
+
+import valkey
+from flask import Response, g, make_response, request
+
+from app.config import Config
+from app.utils.leaderboard import PROFILE_VERSIONS_KEY, RANKING_VERSION_KEY
+from app.utils.logger import RankingLogger
+from app.utils.valkey_manager import ValkeyManager
+
+logging = RankingLogger(__name__).get_logger()
+
+valkey_manager = ValkeyManager()
+
+#: Platforms whose ``<platform>:online_users`` set a presence route embeds.
+PRESENCE_PLATFORMS = ('discord', 'teamspeak')
+
+__all__ = ['cached_response', 'conditional_response', 'response_cache_key', 'response_etag']
+
+
+def _query_digest(args) -> str:
+    query = "&".join(
+        f"{name}={value}"
+        for name in sorted(args)
+        for value in args.getlist(name)
+    )
+    return hashlib.sha1(query.encode()).hexdigest()[:16]
+
+
+def _ranking_version(client):
+    """``ranking:version``, read at most once per request."""
+    if 'ranking_version' not in g:
+        g.ranking_version = client.get(RANKING_VERSION_KEY) or 0
+    return g.ranking_version
+
+
+def response_cache_key(path: str, args, version) -> str:
+    return f"response_cache:{version or 0}:{path}:{_query_digest(args)}"
+
+
+def response_etag(path: str, args, *markers) -> str:
+    source = ":".join([path, _query_digest(args), *(str(marker or 0) for marker in markers)])
+    return hashlib.sha1(source.encode()).hexdigest()[:20]
+
+
+def cached_response(f):
+    """Serve a JSON route from Valkey until the next ranking tick. Only 200
+    JSON responses are stored; any Valkey error falls through to the route."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        client = valkey_manager.valkey
+        key = None
+        try:
+            key = response_cache_key(request.path, request.args, _ranking_version(client))
+            body = client.get(key)
+            if body is not None:
+                return Response(body, mimetype='application/json')
+        except valkey.ValkeyError as e:
+            logging.warning(f"Response cache unavailable for {request.path}: {e}")
+
+        response = make_response(f(*args, **kwargs))
+        if key and response.status_code == 200 and response.is_json:
+            try:
+                client.set(key, response.get_data(as_text=True), ex=Config.RESPONSE_CACHE_TTL)
+            except valkey.ValkeyError as e:
+                logging.warning(f"Could not cache response for {request.path}: {e}")
+        return response
+    return decorated_function
+
+
+def conditional_response(user_arg: str = None, presence: bool = False):
+    """ETag + ``Cache-Control: public, s-maxage`` for a public GET route.
+    ``user_arg`` names the query arg holding the profile's ``user.id``, whose
+    change marker is folded into the ETag. ``presence`` marks a route whose
+    body shows who is online: the online sets join the ETag and the response
+    is ``no-cache`` instead of shared-cacheable. Without Valkey the route runs
+    normally and the response is sent without validators."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            client = valkey_manager.valkey
+            etag = None
+            try:
+                markers = [_ranking_version(client)]
+                if user_arg:
+                    markers.append(client.hget(PROFILE_VERSIONS_KEY, request.args.get(user_arg, '').strip()))
+                if presence:
+                    markers.extend(client.get(f"{platform}:online_users") for platform in PRESENCE_PLATFORMS)
+                etag = response_etag(request.path, request.args, *markers)
+            except valkey.ValkeyError as e:
+                logging.warning(f"ETag unavailable for {request.path}: {e}")
+
+            if etag and request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if not etag or response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if presence:
+                response.headers['Cache-Control'] = "no-cache"
+            else:
+                response.headers['Cache-Control'] = (
+                    f"public, max-age=0, s-maxage={Config.PUBLIC_CACHE_S_MAXAGE}"
+                )
+            return response
+        return decorated_function
+    return decorator
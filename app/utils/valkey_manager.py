@@ -3,6 +3,7 @@ import json
 import uuid
 import valkey
 from app.config import Config
+from app.utils.leaderboard import invalidate_leaderboards, touch_profiles
 from app.utils.logger import RankingLogger
 
 logging = RankingLogger(__name__).get_logger()
@@ -45,6 +46,14 @@ class ValkeyManager:
             return json.loads(users)
         return []
         
+    def invalidate_leaderboards(self):
+        """Serve rankings from SQL until the bot rebuilds its leaderboards"""
+        invalidate_leaderboards(self.valkey)
+
+    def touch_profiles(self, *user_ids):
+        """Revalidate cached profile pages of users changed outside the tick"""
+        touch_profiles(self.valkey, user_ids)
+
     def create_owned_channel(self, platform: str, user_id, channel_name: str):
         """Send command to create an owned channel and wait for response"""
         message_id = f"{platform}:channel:{user_id}:{int(time.time())}"
@@ -5,6 +5,8 @@ import pymysql
 from app.config import Config
 from app.utils.logger import RankingLogger
 from app.utils.async_database import AsyncDatabaseManager
+from app.utils.database import user_identity_sync_statements
+from app.utils.name_search import name_index_statements
 import datetime
 
 logging = RankingLogger(__name__).get_logger()
@@ -23,6 +25,7 @@ def import_bak_user_data():
         cursor.execute("SELECT uuid, name, count, lastseen, firstcon FROM bak_user")
         bak_users = cursor.fetchall()
 
+        user_ids = []
         for uuid, name, count, last, first in bak_users:
 
             last_login = datetime.datetime.fromtimestamp(last)
@@ -38,12 +41,16 @@ def import_bak_user_data():
                 logging.info(f"Skipping bot user: {name}")
                 continue
 
-            # Create user entry
+            # Create user entry (LAST_INSERT_ID(id): lastrowid is the row's id
+            # for existing users too)
             cursor.execute("""
                 INSERT INTO user (teamspeak_id, name, created_at)
                 VALUES (%s, %s, %s)
-                ON DUPLICATE KEY UPDATE name = VALUES(name)
+                ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id), name = VALUES(name)
             """, (uuid, name, first_login))
+            user_ids.append(cursor.lastrowid)
+            for statement, params in name_index_statements(cursor.lastrowid, name):
+                cursor.execute(statement, params)
 
             # Create time entry
             total_time = (count + 59) // 60  # Round up count / 60
@@ -53,6 +60,11 @@ def import_bak_user_data():
                 ON DUPLICATE KEY UPDATE total_time = VALUES(total_time)
             """, (uuid, total_time, last_login))
 
+        # identity-joined reads (stats, hall of fame, achievements) only see
+        # users with user_identity rows
+        for statement, params in user_identity_sync_statements(user_ids):
+            cursor.execute(statement, params)
+
         cursor.execute("SELECT uuid, total_connections FROM bak_stats_user")
         bak_users = cursor.fetchall()
 
@@ -88,8 +100,6 @@ def recalculate_ranks():
         for platform in ['discord', 'teamspeak']:
             cursor.execute(f"SELECT platform_uid FROM time WHERE platform = '{platform}'")
             users = cursor.fetchall()
-            # rank updates live on the async manager now (one-off script: just
-            # drive the loop here)
             asyncio.run(_recalculate_platform_ranks([u[0] for u in users], platform))
 
         conn.commit()
@@ -106,9 +116,9 @@ def recalculate_ranks():
 async def _recalculate_platform_ranks(user_ids, platform):
     db = AsyncDatabaseManager()
     try:
-        for user_id in user_ids:
-            await db.update_ranks([user_id], platform)
-            await db.update_seasonal_ranks([user_id], platform)
+        await db.recalculate_ranks(user_ids, platform)
+        # profile, /api/user and /achievements read the snapshot
+        await db.refresh_user_achievements(user_ids, platform)
     finally:
         await db.close()
 
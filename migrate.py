@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Apply pending schema migrations. Run once per deploy, before the API
+workers and the bot start:
+
+    python migrate.py            # migrate to the latest version
+    python migrate.py --status   # show current/latest version and pending steps
+"""
+
+import argparse
+import sys
+
+import pymysql
+
+from app.achievements import backfill_user_achievements
+from app.migrations import (
+    LATEST_SCHEMA_VERSION,
+    apply_migrations,
+    get_schema_version,
+    pending_migrations,
+)
+from app.utils.database import ConnectionPool
+from app.utils.logger import RankingLogger
+
+logging = RankingLogger(__name__).get_logger()
+
+
+def backfill(conn):
+    """Data backfills that need the live app code, so only against the
+    latest schema (migrations themselves never import app code)."""
+    cursor = conn.cursor()
+    try:
+        if get_schema_version(cursor) < LATEST_SCHEMA_VERSION:
+            return
+        backfilled = backfill_user_achievements(cursor)
+        conn.commit()
+        if backfilled:
+            logging.info(f"Backfilled achievement snapshots for {backfilled} users")
+    finally:
+        cursor.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FirePhenix schema migrations")
+    parser.add_argument("--status", action="store_true", help="Only report the schema version")
+    parser.add_argument("--target", type=int, default=None, help="Migrate up to this version")
+    args = parser.parse_args(argv)
+
+    try:
+        # A dedicated connection; the pool is for long-lived processes.
+        conn = ConnectionPool._open()
+    except pymysql.Error as e:
+        logging.error(f"Could not connect to the database: {e}")
+        return 1
+
+    try:
+        if args.status:
+            cursor = conn.cursor()
+            current = get_schema_version(cursor)
+            cursor.close()
+            pending = pending_migrations(current, args.target)
+            print(f"Schema version {current} (latest {LATEST_SCHEMA_VERSION})")
+            for migration in pending:
+                print(f"  pending {migration.version}: {migration.description}")
+            return 0
+
+        applied = apply_migrations(conn, args.target)
+        if applied:
+            logging.info(f"Applied migrations: {', '.join(str(version) for version in applied)}")
+        else:
+            logging.info("Schema is up to date.")
+        backfill(conn)
+        return 0
+    except pymysql.Error as e:
+        logging.error(f"Migration failed: {e}")
+        return 1
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Per-user cost of the achievement engine.
+
+Scores a synthetic population through the batch path (as the hall of fame
+does) and user by user (as the profile routes do), and prints the time per
+user. Pure Python, no database or Valkey needed:
+
+    python scripts/benchmark_achievements.py --users 20000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.achievements import AchievementInputs, evaluate_achievements, evaluate_batch  # noqa: E402
+
+
+def synthetic_population(size: int, seed: int = 1):
+    rng = random.Random(seed)
+    specials = [(), (1,), (2,), (1, 1001, 1002), (200, 1001, 1002, 1003, 1004, 1005, 1006)]
+    return [
+        AchievementInputs(
+            longest_streak=rng.randint(0, 60),
+            total_logins=rng.randint(0, 4000),
+            total_minutes=rng.randint(0, 90_000),
+            active_days=rng.randint(0, 7),
+            active_slots=rng.randint(0, 28),
+            special_types=rng.choice(specials),
+            ttt_rounds_played=rng.randint(0, 150),
+            ttt_rounds_won=rng.randint(0, 60),
+            ttt_kills=rng.randint(0, 300),
+        )
+        for _ in range(size)
+    ]
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    population = synthetic_population(args.users)
+    columns = {field: [getattr(user, field) for user in population] for field in AchievementInputs._fields}
+
+    batch = best_of(args.repeat, lambda: evaluate_batch(columns))
+    single = best_of(args.repeat, lambda: [evaluate_achievements(user) for user in population])
+
+    if evaluate_batch(columns)['score'] != [evaluate_achievements(user)['score'] for user in population]:
+        raise SystemExit("batch and single-user evaluation disagree")
+
+    print(f"users: {args.users}")
+    print(f"batch:  {batch * 1000:8.2f} ms total, {batch / args.users * 1e6:6.2f} us/user")
+    print(f"single: {single * 1000:8.2f} ms total, {single / args.users * 1e6:6.2f} us/user")
+
+
+if __name__ == "__main__":
+    main()
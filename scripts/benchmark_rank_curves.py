@@ -0,0 +1,73 @@
+"""Cost of a level/division lookup.
+
+Compares the old ``sorted(...items(), reverse=True)`` walk with the compiled
+bisect curves, per value and as one batch over a column (as the ranking tick
+does for every online user). Pure Python, no database or Valkey needed:
+
+    python scripts/benchmark_rank_curves.py --users 2000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.config import Config  # noqa: E402
+from app.utils.rank_curves import rank_curves  # noqa: E402
+
+
+def sorted_walk(requirements, minutes):
+    for rank, requirement in sorted(requirements.items(), reverse=True):
+        if minutes >= requirement:
+            return rank
+    return 0
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    minutes = [rng.randint(0, 2_000_000) for _ in range(args.users)]
+    curves = rank_curves()
+
+    results = {
+        "sorted walk": best_of(args.repeat, lambda: (
+            [sorted_walk(Config.LEVEL_REQUIREMENTS, value) for value in minutes],
+            [sorted_walk(Config.DIVISION_REQUIREMENTS, value) for value in minutes],
+        )),
+        "bisect": best_of(args.repeat, lambda: (
+            [curves.level.rank_for(value) for value in minutes],
+            [curves.division.rank_for(value) for value in minutes],
+        )),
+        "bisect batch": best_of(args.repeat, lambda: (
+            curves.level.ranks_for(minutes),
+            curves.division.ranks_for(minutes),
+        )),
+    }
+
+    expected = [sorted_walk(Config.LEVEL_REQUIREMENTS, value) for value in minutes]
+    if list(curves.level.ranks_for(minutes)) != expected:
+        raise SystemExit("bisect curve and sorted walk disagree")
+
+    print(f"users: {args.users} (level + division per user)")
+    for name, seconds in results.items():
+        print(f"{name:13s} {seconds * 1000:8.2f} ms total, {seconds / args.users * 1e6:6.2f} us/user")
+
+
+if __name__ == "__main__":
+    main()
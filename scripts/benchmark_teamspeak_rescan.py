@@ -0,0 +1,185 @@
+"""Cost of a TeamSpeak client rescan.
+
+Runs the real atsq client against an in-process fake ServerQuery server that
+answers every command after ``--rtt-ms`` (the query round trip) and compares
+the old per-client rescan (``clientlist``, then ``clientinfo`` and
+``servergroupsbyclientid`` per voice client: 2N+1 sequential round trips)
+with ``ClientManager.handle_initial_clients`` / ``validate_connected_users``
+on one ``clientlist -uid -groups -info -ip``. No TeamSpeak server, database
+or Valkey needed:
+
+    python scripts/benchmark_teamspeak_rescan.py --clients 500 --rtt-ms 2
+"""
+
+import argparse
+import asyncio
+import logging as python_logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import atsq  # noqa: E402
+from atsq.errors import ConnectionClosedError  # noqa: E402
+from atsq.escape import escape, unescape  # noqa: E402
+
+from app.config import Config  # noqa: E402
+from app.rankingsystem.bots.teamspeak.client_manager import ClientManager  # noqa: E402
+
+GREETING = (
+    b"TS3",
+    b"Welcome to the TeamSpeak 3 ServerQuery interface, type \"help\" for a list of commands.",
+)
+
+
+def make_clients(count: int):
+    clients = [{
+        "clid": "1", "cid": "1", "client_database_id": "1", "client_nickname": "serveradmin",
+        "client_type": "1", "client_unique_identifier": "serveradmin", "client_servergroups": "2",
+        "connection_client_ip": "127.0.0.1",
+    }]
+    for n in range(count):
+        clients.append({
+            "clid": str(n + 2),
+            "cid": str(n % 20 + 1),
+            "client_database_id": str(n + 100),
+            "client_nickname": f"Player {n}",
+            "client_type": "0",
+            "client_unique_identifier": f"uid{n:04d}+base64=",
+            "client_servergroups": f"{Config.TEAMSPEAK_LEVEL_MAP[1]},{Config.TEAMSPEAK_DIVISION_MAP[1]}",
+            "client_version": "3.6.2 [Build: 1695203293]",
+            "client_platform": "Windows",
+            # private range: the VPN check skips it without a lookup
+            "connection_client_ip": f"10.0.{n // 250}.{n % 250 + 1}",
+        })
+    return clients
+
+
+CLIENTLIST_FIELDS = ("clid", "cid", "client_database_id", "client_nickname", "client_type")
+CLIENTLIST_OPTION_FIELDS = {
+    "uid": ("client_unique_identifier",),
+    "groups": ("client_servergroups",),
+    "info": ("client_version", "client_platform"),
+    "ip": ("connection_client_ip",),
+}
+
+
+class FakeServerQuery:
+    """Transport speaking the ServerQuery line protocol for a fixed client
+    list; every command is answered ``rtt`` seconds after it was sent."""
+
+    def __init__(self, clients, rtt: float):
+        self.clients = {client["clid"]: client for client in clients}
+        self.rtt = rtt
+        self.commands = 0
+        self._lines = asyncio.Queue()
+        self._closed = False
+        for line in GREETING:
+            self._lines.put_nowait(line)
+
+    async def read_line(self) -> bytes:
+        line = await self._lines.get()
+        if line is None:
+            raise ConnectionClosedError("transport closed")
+        return line
+
+    async def send_line(self, data: bytes) -> None:
+        self.commands += 1
+        asyncio.get_running_loop().call_later(self.rtt, self._answer, data)
+
+    async def close(self) -> None:
+        self._closed = True
+        self._lines.put_nowait(None)
+
+    @property
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def _answer(self, data: bytes) -> None:
+        name, *tokens = data.decode().split(" ")
+        options = {token[1:] for token in tokens if token.startswith("-")}
+        params = dict(
+            (key, unescape(value))
+            for key, _, value in (token.partition("=") for token in tokens if "=" in token)
+        )
+        rows = self._rows(name, options, params)
+        if rows:
+            self._lines.put_nowait("|".join(
+                " ".join(f"{key}={escape(str(value))}" for key, value in row.items()) for row in rows
+            ).encode())
+        self._lines.put_nowait(b"error id=0 msg=ok")
+
+    def _rows(self, name, options, params):
+        if name == "clientlist":
+            fields = CLIENTLIST_FIELDS + tuple(
+                field for option in sorted(options) for field in CLIENTLIST_OPTION_FIELDS.get(option, ()))
+            return [{field: client.get(field, "") for field in fields} for client in self.clients.values()]
+        if name == "clientinfo":
+            return [dict(self.clients[params["clid"]])]
+        if name == "servergroupsbyclientid":
+            client = next(c for c in self.clients.values() if c["client_database_id"] == params["cldbid"])
+            return [
+                {"name": f"group {sgid}", "sgid": sgid, "cldbid": params["cldbid"]}
+                for sgid in client["client_servergroups"].split(",")
+            ]
+        return []
+
+
+async def legacy_rescan(client, excluded_role_id):
+    """The rescan before the extended clientlist: 2N+1 round trips."""
+    tracked = {}
+    for row in await client.client_list():
+        if row.get("client_type") != atsq.ClientType.VOICE:
+            continue
+        info = await client.client_info(row["clid"])
+        groups = await client.server_groups_by_client(info["client_database_id"])
+        if excluded_role_id in [int(group.get("sgid", 0)) for group in groups]:
+            continue
+        tracked[info["client_unique_identifier"]] = info["client_nickname"]
+    return tracked
+
+
+async def run(clients: int, rtt: float):
+    transport = FakeServerQuery(make_clients(clients), rtt)
+
+    async def connect():
+        return transport
+
+    client = atsq.Client("fake", server_id=1, transport_factory=connect, keepalive_interval=3600)
+    await client.start()
+    manager = ClientManager(Config, rank_manager=None, client=client)
+    results = {}
+    try:
+        for name, scan in (
+            ("per-client rescan", lambda: legacy_rescan(client, manager.excluded_role_id)),
+            ("initial scan", manager.handle_initial_clients),
+            ("validation", manager.validate_connected_users),
+        ):
+            commands = transport.commands
+            started = time.perf_counter()
+            await scan()
+            results[name] = (time.perf_counter() - started, transport.commands - commands)
+    finally:
+        await client.close()
+    if len(manager.connected_users) != clients:
+        raise SystemExit(f"tracked {len(manager.connected_users)} of {clients} clients")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    python_logging.disable(python_logging.INFO)
+
+    results = asyncio.run(run(args.clients, args.rtt_ms / 1000))
+
+    print(f"voice clients: {args.clients}, query round trip: {args.rtt_ms} ms")
+    for name, (seconds, commands) in results.items():
+        print(f"{name:18s} {seconds * 1000:9.1f} ms {commands:6d} commands")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,4 +30,5 @@ export ADMIN_STEAM_IDS="${ADMIN_STEAM_IDS:-76561198000000001}"
 export TS3_HOST=teamspeak-disabled
 export TS3_PASSWORD=disabled
 
+uv run python migrate.py
 uv run python -m unittest discover -s tests/integration -t . -v "$@"
@@ -39,6 +39,7 @@ def create_test_app():
 
 def open_database():
     """Real DatabaseManager connected to the integration database."""
+    from app.migrations import apply_migrations
     from app.utils.database import DatabaseManager
 
     db = DatabaseManager()
@@ -46,6 +47,7 @@ def open_database():
         raise RuntimeError(
             "Could not connect to the integration database - is it running?"
         )
+    apply_migrations(db.conn)
     return db
 
 
@@ -58,7 +60,11 @@ TABLES_TO_CLEAR = (
     "activity_heatmap",
     "usage_stats",
     "ttt_player_stats",
+    "user_achievements",
     "time",
+    "user_totals",
+    "user_identity",
+    "user_name_trigram",
     "user",
 )
 
@@ -82,7 +88,7 @@ def seed_user(db, *, steam_id=None, discord_id=None, teamspeak_id=None,
          ranking_disabled),
     )
     user_id = db.cursor.lastrowid
-    db.conn.commit()
+    refresh_user_tables(db)
     return user_id
 
 
@@ -97,6 +103,26 @@ def seed_time(db, *, platform, platform_uid, total_time=0, daily_time=0,
         (platform_uid, platform, total_time, daily_time, weekly_time,
          monthly_time, season_time),
     )
+    refresh_user_tables(db)
+
+
+def refresh_user_tables(db):
+    """Rebuild ``user_totals``, ``user_identity``, ``user_achievements`` and
+    the name search index from the seeded rows (seeds bypass the ranking
+    tick)."""
+    from app.achievements import refresh_user_achievements
+    from app.utils.database import user_identity_sync_statements, user_totals_refresh_query
+    from app.utils.name_search import name_index_statements
+
+    db.cursor.execute("SELECT id, name FROM user")
+    users = db.cursor.fetchall()
+    for statement, params in user_identity_sync_statements([row[0] for row in users]):
+        db.cursor.execute(statement, params)
+    for user_id, name in users:
+        for statement, params in name_index_statements(user_id, name):
+            db.cursor.execute(statement, params)
+    db.cursor.execute(user_totals_refresh_query())
+    refresh_user_achievements(db.cursor)
     db.conn.commit()
 
 
@@ -108,6 +134,9 @@ def seed_special_achievement(db, *, platform, platform_id, achievement_type):
         """,
         (platform, platform_id, achievement_type),
     )
+    from app.achievements import refresh_user_achievements
+
+    refresh_user_achievements(db.cursor)
     db.conn.commit()
 
 
@@ -0,0 +1,155 @@
+import unittest
+
+from app.achievements import (
+    AchievementInputs,
+    achievement_levels_from_row,
+    evaluate_achievements,
+    evaluate_batch,
+    refresh_user_achievements,
+    user_achievement_rows,
+    user_achievement_source_queries,
+)
+from app.utils.database import active_days_from_mask, active_slots_from_mask, heatmap_slot_bit
+
+
+class FakeCursor:
+    def __init__(self, results):
+        self.results = list(results)
+        self.executed = []
+        self.upserts = None
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+    def executemany(self, query, rows):
+        self.upserts = (query, list(rows))
+
+
+class AchievementEngineTests(unittest.TestCase):
+    def test_threshold_boundaries(self):
+        levels = evaluate_achievements(AchievementInputs(
+            longest_streak=14,
+            total_logins=29,
+            total_minutes=600,
+            active_days=5,
+            active_slots=20,
+        ))
+
+        self.assertEqual(
+            (levels['streak'], levels['logins'], levels['time'], levels['heatmap']),
+            (3, 1, 2, 2),
+        )
+
+    def test_all_heatmap_slots_is_the_top_level(self):
+        levels = evaluate_achievements(AchievementInputs(active_days=7, active_slots=28))
+
+        self.assertEqual(levels['heatmap'], 4)
+
+    def test_special_markers_and_score(self):
+        levels = evaluate_achievements(AchievementInputs(
+            special_types=[1, 2, 200, 1001, 1002, 1003],
+            ttt_rounds_played=50,
+            ttt_rounds_won=10,
+            ttt_kills=25,
+        ))
+
+        self.assertEqual(
+            (levels['old_member'], levels['legacy_supporter'], levels['apex'], levels['division']),
+            (1, 1, 1, 3),
+        )
+        self.assertEqual(levels['division_markers'], 3)
+        self.assertEqual(levels['ttt'], 7)
+        self.assertEqual(levels['score'], 1 + 1 + 1 + 3 + 7)
+
+    def test_batch_matches_single_user_evaluation_and_tolerates_nulls(self):
+        users = [
+            AchievementInputs(longest_streak=30, total_logins=3650, total_minutes=60_000),
+            AchievementInputs(longest_streak=None, total_logins=None, active_days=None),
+            AchievementInputs(active_days=3, special_types=(1,), ttt_kills=250),
+        ]
+
+        batch = evaluate_batch({
+            field: [getattr(user, field) for user in users] for field in AchievementInputs._fields
+        })
+
+        for index, user in enumerate(users):
+            single = evaluate_achievements(user)
+            self.assertEqual({key: values[index] for key, values in batch.items()}, single)
+        self.assertEqual(batch['score'], [12, 0, 6])
+
+    def test_missing_columns_count_as_zero(self):
+        batch = evaluate_batch({'total_logins': [2, 30]})
+
+        self.assertEqual(batch['logins'], [1, 2])
+        self.assertEqual(batch['score'], [1, 2])
+
+
+class HeatmapSlotMaskTests(unittest.TestCase):
+    def test_slot_bits_and_popcounts(self):
+        mask = (
+            heatmap_slot_bit(0, 'morning')
+            | heatmap_slot_bit(0, 'night')
+            | heatmap_slot_bit(6, 'evening')
+        )
+
+        self.assertEqual(mask, 0b1001 | (1 << 26))
+        self.assertEqual(active_slots_from_mask(mask), 3)
+        self.assertEqual(active_days_from_mask(mask), 2)
+        self.assertEqual(active_days_from_mask((1 << 28) - 1), 7)
+        self.assertEqual((active_slots_from_mask(None), active_days_from_mask(None)), (0, 0))
+
+
+class UserAchievementSnapshotTests(unittest.TestCase):
+    # user_id, total_time, longest_streak, total_logins, active_slot_mask,
+    # ttt rounds played/won, kills; user 1 was active in every slot Mon-Fri
+    SOURCES = [
+        (1, 600, 14, 29, (1 << 20) - 1, 50, 10, 25),
+        (2, 0, None, None, None, 0, 0, 0),
+    ]
+    SPECIALS = [(1, 200), (1, 1002), (1, 1001)]
+
+    def test_rows_round_trip_through_the_reader(self):
+        rows = user_achievement_rows(self.SOURCES, self.SPECIALS)
+
+        self.assertEqual([row[0] for row in rows], [1, 2])
+        self.assertEqual(rows[0][5], "200,1001,1002")
+        levels = achievement_levels_from_row(rows[0][1:])
+        expected = evaluate_achievements(AchievementInputs(
+            longest_streak=14, total_logins=29, total_minutes=600, active_days=5,
+            active_slots=20, special_types=[200, 1001, 1002],
+            ttt_rounds_played=50, ttt_rounds_won=10, ttt_kills=25,
+        ))
+        for key, value in expected.items():
+            self.assertEqual(levels[key], value, key)
+        self.assertEqual(levels['special_types'], [200, 1001, 1002])
+        self.assertEqual((levels['active_days'], levels['active_slots']), (5, 20))
+        self.assertEqual(achievement_levels_from_row(rows[1][1:])['score'], 0)
+
+    def test_missing_snapshot_reads_as_nothing_earned(self):
+        levels = achievement_levels_from_row(None)
+
+        self.assertEqual(levels['score'], 0)
+        self.assertEqual(levels['special_types'], [])
+
+    def test_source_queries_filter_to_the_touched_users(self):
+        (sources, source_params), (specials, special_params) = user_achievement_source_queries([3, 1, 3])
+
+        self.assertEqual(source_params, (1, 3, 1, 3, 1, 3))
+        self.assertEqual(sources.count("IN (%s,%s)"), 3)
+        self.assertEqual(special_params, (1, 3))
+        self.assertIsNone(user_achievement_source_queries()[0][1])
+
+    def test_refresh_upserts_one_row_per_user(self):
+        cursor = FakeCursor([self.SOURCES, self.SPECIALS])
+
+        self.assertEqual(refresh_user_achievements(cursor, [1, 2]), 2)
+        self.assertIn("INSERT INTO user_achievements", cursor.upserts[0])
+        self.assertEqual(len(cursor.upserts[1]), 2)
+        self.assertEqual(refresh_user_achievements(FakeCursor([]), []), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
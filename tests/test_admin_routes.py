@@ -75,6 +75,12 @@ class StubAdminValkeyManager:
         self.calls.append((platform, user_id))
         return self.result
 
+    def invalidate_leaderboards(self):
+        self.invalidated = True
+
+    def touch_profiles(self, *user_ids):
+        self.touched = user_ids
+
 
 class AuthCheckAdminFlagTests(unittest.TestCase):
     def setUp(self):
@@ -388,6 +394,8 @@ class AdminSeasonSkinGrantTests(unittest.TestCase):
             (123, "76561198000000000", "discord-user", "teamspeak-user", "Player", 1, 1, 0),
             None,
         ]
+        stub = StubAdminValkeyManager()
+        admin_routes.valkey_manager = stub
 
         with self.make_app().test_client() as client:
             response = self.post_endpoint_as_admin(
@@ -411,6 +419,7 @@ class AdminSeasonSkinGrantTests(unittest.TestCase):
             query for query in queries if "INSERT INTO special_achievements" in query[0]
         )
         self.assertEqual(grant_insert[1], ("discord", "discord-user", 1))
+        self.assertEqual(stub.touched, (123,))
 
     def test_special_achievement_revoke_is_idempotent_and_audited(self):
         FakeDatabase.fetchone_results = [
@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import atsq
+
+from app.config import Config
+from app.rankingsystem.bots.teamspeak.channel_manager import ChannelManager
+from app.rankingsystem.bots.teamspeak.cldbid_map import CLDBID_KEY, CldbidMap
+from app.rankingsystem.bots.teamspeak.rank_manager import RankManager
+from tests.valkey_fakes import FakeHashValkey
+
+
+class CldbidMapTests(unittest.TestCase):
+    def test_resolve_looks_up_each_uid_once(self):
+        cldbids = CldbidMap()
+        lookup = AsyncMock(return_value="7")
+
+        async def run():
+            return [await cldbids.resolve("uid1", lookup) for _ in range(3)]
+
+        self.assertEqual(asyncio.run(run()), ["7", "7", "7"])
+        lookup.assert_awaited_once_with("uid1")
+        self.assertEqual((cldbids.hits, cldbids.misses), (2, 1))
+
+    def test_pairs_survive_a_restart_through_valkey(self):
+        valkey = FakeHashValkey()
+        cldbids = CldbidMap()
+        cldbids.remember("uid1", 7)
+        cldbids.remember("uid2", 8)
+        cldbids.forget("uid2")
+
+        asyncio.run(cldbids.flush(valkey))
+        restored = CldbidMap()
+        restored.remember("uid3", 9)
+        asyncio.run(restored.load(valkey))
+
+        self.assertEqual(valkey.data[CLDBID_KEY], {"uid1": "7"})
+        self.assertEqual((restored.get("uid1"), restored.get("uid2"), restored.get("uid3")), ("7", None, "9"))
+        self.assertEqual(restored.uid_for(7), "uid1")
+
+    def test_reverse_lookup_follows_changed_and_forgotten_ids(self):
+        cldbids = CldbidMap()
+        cldbids.remember("uid1", 7)
+        cldbids.remember("uid1", 12)
+        cldbids.remember("uid2", 8)
+        cldbids.forget("uid2")
+
+        self.assertEqual((cldbids.uid_for(7), cldbids.uid_for(12), cldbids.uid_for(8)), (None, "uid1", None))
+
+    def test_failed_flush_keeps_the_pairs_for_the_next_one(self):
+        valkey = FakeHashValkey()
+        valkey.fail = True
+        cldbids = CldbidMap()
+        cldbids.remember("uid1", 7)
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(cldbids.flush(valkey))
+        valkey.fail = False
+        asyncio.run(cldbids.flush(valkey))
+
+        self.assertEqual(valkey.data[CLDBID_KEY], {"uid1": "7"})
+
+
+class RankManagerCldbidTests(unittest.TestCase):
+    def make_manager(self, ts):
+        manager = RankManager(Config, MagicMock(), ts)
+        manager.cldbids = CldbidMap()
+        return manager
+
+    def test_known_uid_skips_the_lookup_round_trip(self):
+        ts = MagicMock()
+        ts.client_dbid_from_uid = AsyncMock(return_value="7")
+        ts.server_groups_by_client = AsyncMock(return_value=[{"sgid": "41"}])
+        manager = self.make_manager(ts)
+        manager.cldbids.remember("uid1", "7")
+
+        result = asyncio.run(manager.set_server_group("uid1", 41))
+
+        self.assertTrue(result["ok"])
+        ts.client_dbid_from_uid.assert_not_awaited()
+
+    def test_query_error_forgets_a_stale_id(self):
+        ts = MagicMock()
+        ts.client_dbid_from_uid = AsyncMock(return_value="9")
+        ts.server_groups_by_client = AsyncMock(side_effect=atsq.QueryError.create(512, "invalid clientID"))
+        manager = self.make_manager(ts)
+        manager.cldbids.remember("uid1", "7")
+
+        self.assertFalse(asyncio.run(manager.set_server_group("uid1", 41))["ok"])
+        self.assertIsNone(manager.cldbids.get("uid1"))
+
+
+class ChannelManagerCldbidTests(unittest.TestCase):
+    def test_query_error_forgets_a_stale_id(self):
+        ts = MagicMock()
+        ts.channel_create = AsyncMock(return_value="60")
+        ts.set_client_channel_group = AsyncMock(side_effect=atsq.QueryError.create(512, "invalid clientID"))
+        manager = ChannelManager(Config, ts)
+        manager.cldbids = CldbidMap()
+        manager.cldbids.remember("uid1", "7")
+
+        self.assertIsNone(asyncio.run(manager.create_owned_channel("uid1", "Tester's Channel")))
+        self.assertIsNone(manager.cldbids.get("uid1"))
+
+    def test_unmatched_verification_target_forgets_the_id(self):
+        ts = MagicMock()
+        ts.client_list = AsyncMock(return_value=[{"clid": "2", "client_database_id": "9"}])
+        manager = ChannelManager(Config, ts)
+        manager.cldbids = CldbidMap()
+        manager.cldbids.remember("uid1", "7")
+
+        self.assertFalse(asyncio.run(manager.send_verification("uid1", "1234")))
+        self.assertIsNone(manager.cldbids.get("uid1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import patch
+
+import pymysql
+
+from app.migrations import LATEST_SCHEMA_VERSION
+from app.utils import database
+from app.utils.database import ConnectionPool, DatabaseManager
+
+
+class FakePooledConnection:
+    def __init__(self):
+        self.closed = False
+        self.pings = 0
+        self.rollbacks = 0
+        self.fail_ping = False
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if self.fail_ping:
+            raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def cursor(self):
+        return FakePooledCursor()
+
+    def close(self):
+        self.closed = True
+
+
+class FakePooledCursor:
+    def execute(self, query, params=None):
+        self.query = query
+
+    def fetchone(self):
+        return (LATEST_SCHEMA_VERSION,)
+
+    def close(self):
+        pass
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.opened = []
+
+        def fake_open():
+            conn = FakePooledConnection()
+            self.opened.append(conn)
+            return conn
+
+        patcher = patch.object(ConnectionPool, "_open", staticmethod(fake_open))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.clock = [1000.0]
+        clock_patcher = patch.object(database.time, "monotonic", lambda: self.clock[0])
+        clock_patcher.start()
+        self.addCleanup(clock_patcher.stop)
+
+    def test_released_connection_is_reused_and_reset(self):
+        pool = ConnectionPool(size=2, max_lifetime=1800, ping_interval=30)
+        conn = pool.acquire()
+        pool.release(conn)
+
+        again = pool.acquire()
+
+        self.assertIs(again, conn)
+        self.assertEqual(len(self.opened), 1)
+        # rollback on release and again on checkout
+        self.assertEqual(conn.rollbacks, 2)
+        self.assertEqual(conn.pings, 0)
+
+    def test_idle_connection_is_pinged_and_dropped_when_dead(self):
+        pool = ConnectionPool(size=2, max_lifetime=1800, ping_interval=30)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.fail_ping = True
+        self.clock[0] += 60
+
+        fresh = pool.acquire()
+
+        self.assertIsNot(fresh, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(conn.pings, 1)
+
+    def test_connection_past_max_lifetime_is_recycled(self):
+        pool = ConnectionPool(size=2, max_lifetime=100, ping_interval=30)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.clock[0] += 101
+
+        fresh = pool.acquire()
+
+        self.assertIsNot(fresh, conn)
+        self.assertTrue(conn.closed)
+
+    def test_surplus_and_discarded_connections_are_closed(self):
+        pool = ConnectionPool(size=1, max_lifetime=1800, ping_interval=30)
+        first, second, broken = pool.acquire(), pool.acquire(), pool.acquire()
+
+        pool.release(first)
+        pool.release(second)
+        pool.release(broken, discard=True)
+
+        self.assertFalse(first.closed)
+        self.assertTrue(second.closed)
+        self.assertTrue(broken.closed)
+
+    def test_database_manager_borrows_and_checks_schema_once(self):
+        pool = ConnectionPool(size=2, max_lifetime=1800, ping_interval=30)
+        with patch.object(database, "get_connection_pool", return_value=pool), \
+                patch.object(database, "check_schema_version") as check:
+            db = DatabaseManager()
+            conn = db.conn
+            db.close()
+            second = DatabaseManager()
+
+        check.assert_called_once()
+        self.assertTrue(pool.schema_checked)
+        self.assertIs(second.conn, conn)
+        self.assertIsNone(db.conn)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -44,12 +44,10 @@ class FakeDatabase:
             )]
         if "WHERE u.division = 6" in query:
             return [(10, 4500)]
-        if "FROM special_achievements" in query:
-            return [(1001,), (1002,), (200,)]
-        if "FROM login_streak" in query:
-            return [(30, 7)]
-        if "FROM activity_heatmap" in query:
-            return [(5, 9)]
+        if "FROM user_achievements" in query:
+            # longest_streak, total_logins, active_days, active_slots,
+            # special_types, then the engine levels, markers and score
+            return [(7, 30, 5, 9, "200,1001,1002", 1, 2, 1, 1, 0, 0, 2, 1, 7, 2, 15)]
         raise AssertionError(f"Unexpected query: {query}")
 
     def get_ttt_player_stats(self, steam_id):
@@ -149,6 +147,8 @@ class ProfileCommandFormattingTests(unittest.TestCase):
         self.assertEqual(profile["time_to_next_level"], 2030)
         self.assertEqual(profile["time_to_next_division"], 500)
         self.assertEqual(profile["achievement_summary"]["division"], 2)
+        self.assertEqual(profile["achievement_summary"]["total_logins"], 30)
+        self.assertEqual(profile["special_achievements"], [200, 1001, 1002])
         self.assertEqual(profile["ttt_stats"]["kills"], 25)
 
     def test_service_reports_missing_user(self):
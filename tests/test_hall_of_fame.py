@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+
+from flask import Flask
+
+from app.api.ranking.top import routes as top_routes
+from app.utils.hall_of_fame import (
+    HALL_OF_FAME_BOARDS,
+    HALL_OF_FAME_KEY,
+    TOP3_QUERIES,
+    HallOfFameJob,
+    assemble_hall_of_fame,
+    read_hall_of_fame,
+)
+
+
+class FakeHashStore:
+    def __init__(self):
+        self.data = {}
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def hset(self, key, mapping=None):
+        self.data.setdefault(key, {}).update({field: str(value) for field, value in mapping.items()})
+
+    def expire(self, key, seconds):
+        self.expires = (key, seconds)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+
+class FakeAsyncPipeline:
+    def __init__(self, store):
+        self.store = store
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return record
+
+    async def execute(self):
+        return [getattr(self.store, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakeAsyncValkey:
+    def __init__(self, store):
+        self.store = store
+
+    def pipeline(self, transaction=True):
+        return FakeAsyncPipeline(self.store)
+
+
+class FakeSourcesDatabase:
+    async def get_hall_of_fame_sources(self):
+        return {
+            'longest_streak': [(2, "Bravo", 4, 31)],
+            'most_logins': [(1, "Alpha", 5, 400)],
+            'most_achievements': [(2, "Bravo", 4, 11), (1, "Alpha", 5, 8)],
+            'most_active_times': [],
+            'oldest_member': [(1, "Alpha", 5, 900)],
+            'current_streak': [],
+        }
+
+
+class FailingDatabase:
+    def __init__(self):
+        raise AssertionError("a materialized hall of fame must not hit MariaDB")
+
+
+class StubValkeyManager:
+    def __init__(self, store):
+        self.valkey = store
+
+
+class HallOfFameTests(unittest.TestCase):
+    def test_assemble_keeps_board_order_and_reads_snapshot_scores(self):
+        top3_rows = asyncio.run(FakeSourcesDatabase().get_hall_of_fame_sources())
+
+        boards = assemble_hall_of_fame(top3_rows)
+
+        self.assertEqual(tuple(boards), HALL_OF_FAME_BOARDS)
+        self.assertEqual(
+            [(entry['id'], entry['value']) for entry in boards['most_achievements']],
+            [(2, 11), (1, 8)],
+        )
+        self.assertEqual(boards['longest_streak'], [{'id': 2, 'name': "Bravo", 'level': 4, 'value': 31}])
+
+    def test_most_achievements_reads_the_snapshot_score_index(self):
+        query = " ".join(TOP3_QUERIES['most_achievements'].split())
+
+        self.assertIn("FROM user_achievements ua", query)
+        self.assertTrue(query.endswith("ORDER BY ua.score DESC LIMIT 3"))
+
+    def test_job_materializes_boards_and_records_its_runtime(self):
+        store = FakeHashStore()
+        job = HallOfFameJob(FakeAsyncValkey(store), FakeSourcesDatabase(), interval=1)
+
+        duration_ms = asyncio.run(job.refresh())
+
+        stored = store.data[HALL_OF_FAME_KEY]
+        self.assertGreaterEqual(duration_ms, 0)
+        self.assertIn('duration_ms', stored)
+        self.assertIn('generated_at', stored)
+        self.assertEqual(read_hall_of_fame(store)['most_logins'][0]['name'], "Alpha")
+
+    def test_route_reads_the_materialized_hash(self):
+        store = FakeHashStore()
+        asyncio.run(HallOfFameJob(FakeAsyncValkey(store), FakeSourcesDatabase()).refresh())
+        originals = (top_routes.DatabaseManager, top_routes.valkey_manager)
+        top_routes.DatabaseManager = FailingDatabase
+        top_routes.valkey_manager = StubValkeyManager(store)
+        app = Flask(__name__)
+        app.config["RATELIMIT_ENABLED"] = False
+        app.register_blueprint(top_routes.ranking_top_bp)
+        try:
+            with app.test_client() as client:
+                response = client.get("/api/ranking/hall-of-fame")
+        finally:
+            top_routes.DatabaseManager, top_routes.valkey_manager = originals
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['oldest_member'][0]['value'], 900)
+
+    def test_missing_board_means_not_materialized(self):
+        store = FakeHashStore()
+        store.hset(HALL_OF_FAME_KEY, mapping={'most_logins': "[]"})
+
+        self.assertIsNone(read_hall_of_fame(store))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import valkey
+from aiohttp import web
+
+from app.config import Config
+from app.rankingsystem.bots.teamspeak.client_manager import ClientManager
+from app.utils.ip_reputation import IpReputation, Verdict, reputation_key
+
+FLAGGED = {
+    "203.0.113.7": {"vpn": True, "tor": False},
+    "203.0.113.8": {"vpn": False, "tor": True},
+    # public address: the kick path skips non-global ones before any lookup
+    "185.220.101.1": {"vpn": False, "tor": True},
+}
+
+
+class VpnApiStub:
+    """Local stand-in for vpnapi.io: ``GET /api/<ip>?key=...``."""
+
+    def __init__(self, delay=0.0, status=200):
+        self.delay = delay
+        self.status = status
+        self.requests = []
+        self.url = None
+        self._runner = None
+
+    async def handle(self, request):
+        self.requests.append((request.match_info["ip"], request.query.get("key")))
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.json_response({"message": "error"}, status=self.status)
+        security = FLAGGED.get(request.match_info["ip"], {"vpn": False, "tor": False})
+        return web.json_response({"ip": request.match_info["ip"], "security": {**security, "proxy": False}})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/api/{ip}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/api"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+class FakeValkey:
+    def __init__(self, down=False):
+        self.data = {}
+        self.ttls = {}
+        self.down = down
+
+    async def get(self, key):
+        if self.down:
+            raise valkey.ConnectionError("valkey down")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        if self.down:
+            raise valkey.ConnectionError("valkey down")
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    async def aclose(self):
+        pass
+
+
+def run_with_stub(scenario, **stub_options):
+    """Run ``scenario(stub)`` against a fresh vpnapi.io stub."""
+
+    async def run():
+        async with VpnApiStub(**stub_options) as stub:
+            return await scenario(stub)
+
+    return asyncio.run(run())
+
+
+class IpReputationTests(unittest.TestCase):
+    def test_verdicts_are_cached_flagged_and_clean(self):
+        store = FakeValkey()
+
+        async def scenario(stub):
+            reputation = IpReputation(store, api_key="test", base_url=stub.url, flagged_ttl=100, clean_ttl=10)
+            try:
+                first = [await reputation.verdict(ip) for ip in ("203.0.113.7", "198.51.100.1")]
+                second = [await reputation.verdict(ip) for ip in ("203.0.113.7", "198.51.100.1")]
+            finally:
+                await reputation.close()
+            return first, second, stub.requests, reputation.cache_hits
+
+        first, second, requests, cache_hits = run_with_stub(scenario)
+
+        self.assertEqual(first, [Verdict(True, False), Verdict(False, False)])
+        self.assertEqual(second, first)
+        self.assertEqual(requests, [("203.0.113.7", "test"), ("198.51.100.1", "test")])
+        self.assertEqual(cache_hits, 2)
+        self.assertEqual(store.ttls[reputation_key("203.0.113.7")], 100)
+        self.assertEqual(store.ttls[reputation_key("198.51.100.1")], 10)
+
+    def test_concurrent_lookups_of_one_ip_share_a_request(self):
+        async def scenario(stub):
+            reputation = IpReputation(FakeValkey(), api_key="test", base_url=stub.url)
+            try:
+                verdicts = await asyncio.gather(*(reputation.verdict("203.0.113.8") for _ in range(10)))
+            finally:
+                await reputation.close()
+            return verdicts, stub.requests
+
+        verdicts, requests = run_with_stub(scenario, delay=0.05)
+
+        self.assertEqual(set(verdicts), {Verdict(False, True)})
+        self.assertEqual(len(requests), 1)
+
+    def test_failed_lookups_are_not_cached(self):
+        store = FakeValkey()
+
+        async def scenario(stub):
+            reputation = IpReputation(store, api_key="test", base_url=stub.url)
+            try:
+                return await reputation.verdict("203.0.113.7")
+            finally:
+                await reputation.close()
+
+        self.assertIsNone(run_with_stub(scenario, status=429))
+        self.assertEqual(store.data, {})
+
+    def test_lookups_work_while_valkey_is_down(self):
+        async def scenario(stub):
+            reputation = IpReputation(FakeValkey(down=True), api_key="test", base_url=stub.url)
+            try:
+                return await reputation.verdict("203.0.113.7")
+            finally:
+                await reputation.close()
+
+        self.assertEqual(run_with_stub(scenario), Verdict(True, False))
+
+
+class VpnKickTests(unittest.TestCase):
+    def make_manager(self, ts, reputation):
+        manager = ClientManager(Config, rank_manager=MagicMock(), client=ts)
+        manager.reputation = reputation
+        manager.db = MagicMock()
+        manager.db.execute_query = AsyncMock(return_value=[(3,)])
+        return manager
+
+    def test_flagged_low_level_user_is_kicked_and_the_level_cached(self):
+        ts = MagicMock()
+        ts.client_kick = AsyncMock()
+
+        async def scenario(stub):
+            reputation = IpReputation(FakeValkey(), api_key="test", base_url=stub.url)
+            manager = self.make_manager(ts, reputation)
+            info = {"client_unique_identifier": "uid-vpn", "connection_client_ip": "185.220.101.1"}
+            try:
+                await manager.check_vpn_and_kick_if_needed(info, "3")
+                await manager.check_vpn_and_kick_if_needed(info, "4")
+            finally:
+                await reputation.close()
+            return manager, stub.requests
+
+        manager, requests = run_with_stub(scenario)
+
+        self.assertEqual([call.args[0] for call in ts.client_kick.await_args_list], ["3", "4"])
+        self.assertEqual(len(requests), 1)
+        manager.db.execute_query.assert_awaited_once()
+
+    def test_level_cache_drops_expired_and_levelled_users(self):
+        manager = self.make_manager(MagicMock(), reputation=None)
+        manager._levels = {"uid-gone": (2, 0.0), "uid-up": (8, float("inf"))}
+
+        async def scenario():
+            manager.forget_levels(["uid-up"])
+            manager.db.execute_query.return_value = [(9,)]
+            return await manager._get_user_level("uid-up")
+
+        self.assertEqual(asyncio.run(scenario()), 9)
+        self.assertEqual(set(manager._levels), {"uid-up"})
+
+
+if __name__ == "__main__":
+    unittest.main()
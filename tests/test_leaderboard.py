@@ -0,0 +1,483 @@
+import asyncio
+import unittest
+
+from flask import Flask
+from werkzeug.datastructures import MultiDict
+
+from app.api.ranking import keyset
+from app.api.ranking import routes as ranking_routes
+from app.api.request_args import encode_ranking_cursor
+from app.api.ranking.profile.achievements import routes as achievements_routes
+from app.api.ranking.top import routes as top_routes
+from app.api.ranking.usage import routes as usage_routes
+from app.utils import response_cache
+from app.utils.leaderboard import (
+    LEADERBOARD_READY_KEY,
+    RANKING_VERSION_KEY,
+    LeaderboardMaintainer,
+    invalidate_leaderboards,
+    leaderboard_size,
+    read_leaderboard_rows,
+    touch_profiles,
+)
+
+
+class FakeValkeyStore:
+    """In-memory subset of the valkey commands the leaderboards use."""
+
+    def __init__(self):
+        self.data = {}
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = str(value)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update({m: float(s) for m, s in mapping.items()})
+
+    def zrem(self, key, member):
+        self.data.get(key, {}).pop(member, None)
+
+    def zcard(self, key):
+        return len(self.data.get(key, {}))
+
+    def zcount(self, key, low, high):
+        bound = float(low.lstrip("("))
+        return sum(1 for score in self.data.get(key, {}).values() if score > bound)
+
+    def zrevrange(self, key, start, end, withscores=False):
+        items = sorted(self.data.get(key, {}).items(), key=lambda item: (-item[1], item[0]))
+        return items[start:end + 1]
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        target = self.data.setdefault(key, {})
+        if mapping:
+            target.update(mapping)
+        if field is not None:
+            target[field] = value
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hincrby(self, key, field, amount=1):
+        target = self.data.setdefault(key, {})
+        target[field] = str(int(target.get(field, 0)) + amount)
+        return int(target[field])
+
+    def hdel(self, key, field):
+        self.data.get(key, {}).pop(field, None)
+
+    def hmget(self, key, fields):
+        return [self.data.get(key, {}).get(field) for field in fields]
+
+
+class FakePipeline:
+    def __init__(self, store, is_async):
+        self.store = store
+        self.is_async = is_async
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return record
+
+    def _run(self):
+        return [getattr(self.store, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+    def execute(self):
+        if self.is_async:
+            async def run():
+                return self._run()
+            return run()
+        return self._run()
+
+
+class FakeSyncValkey(FakeValkeyStore):
+    def pipeline(self, transaction=True):
+        return FakePipeline(self, is_async=False)
+
+
+class FakeAsyncValkey:
+    def __init__(self, store):
+        self.store = store
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.store, is_async=True)
+
+    async def exists(self, key):
+        return self.store.exists(key)
+
+
+def leaderboard_row(user_id, name, total, season=0, weekly=0, disabled=False):
+    return {
+        'id': user_id,
+        'name': name,
+        'level': 3,
+        'division': 2,
+        'discord_id': None,
+        'teamspeak_id': f"ts-{user_id}",
+        'ranking_disabled': disabled,
+        'total': total,
+        'season': season,
+        'weekly': weekly,
+        'monthly': 0,
+        'daily': 0,
+        'last_update': "2026-01-01 12:00:00",
+    }
+
+
+class FakeLeaderboardDatabase:
+    def __init__(self, rows, updated_rows=None):
+        self.rows = rows
+        self.updated_rows = updated_rows or []
+
+    async def get_leaderboard_rows(self, platform=None, platform_uids=None):
+        return self.updated_rows if platform else self.rows
+
+
+def build_leaderboard(rows, updated_rows=None):
+    store = FakeSyncValkey()
+    maintainer = LeaderboardMaintainer(
+        FakeAsyncValkey(store), FakeLeaderboardDatabase(rows, updated_rows))
+    asyncio.run(maintainer.rebuild())
+    return store, maintainer
+
+
+class LeaderboardTests(unittest.TestCase):
+    def test_rebuild_pages_with_shared_ranks_and_skips_zero_periods(self):
+        store, _ = build_leaderboard([
+            leaderboard_row(1, "Alpha", 900, weekly=10),
+            leaderboard_row(2, "Bravo", 500, weekly=400),
+            leaderboard_row(3, "Charlie", 500),
+        ])
+
+        self.assertEqual(leaderboard_size(store, 'total'), 3)
+        self.assertEqual(leaderboard_size(store, 'weekly'), 2)
+        rows = read_leaderboard_rows(store, 'total', 0, 10)
+        self.assertEqual([(row[0], row[4], row[6]) for row in rows], [(1, 900, 1), (2, 500, 2), (3, 500, 2)])
+        self.assertEqual(rows[0][1], "Alpha")
+        self.assertEqual(rows[1][8], "ts-2")
+        self.assertEqual(read_leaderboard_rows(store, 'total', 2, 10)[0][0], 3)
+
+    def test_update_rescores_users_and_drops_disabled_ones(self):
+        store, maintainer = build_leaderboard(
+            [leaderboard_row(1, "Alpha", 900), leaderboard_row(2, "Bravo", 500)],
+            updated_rows=[leaderboard_row(2, "Bravo", 1000), leaderboard_row(1, "Alpha", 901, disabled=True)],
+        )
+
+        asyncio.run(maintainer.update('teamspeak', {"ts-1", "ts-2"}))
+
+        rows = read_leaderboard_rows(store, 'total', 0, 10)
+        self.assertEqual([(row[0], row[4]) for row in rows], [(2, 1000)])
+
+    def test_invalidated_board_is_unavailable_until_rebuilt(self):
+        store, maintainer = build_leaderboard([leaderboard_row(1, "Alpha", 900)])
+
+        invalidate_leaderboards(store)
+
+        self.assertNotIn(LEADERBOARD_READY_KEY, store.data)
+        self.assertEqual(store.data[RANKING_VERSION_KEY], "1")
+        self.assertIsNone(leaderboard_size(store, 'total'))
+        asyncio.run(maintainer.refresh_if_stale())
+        self.assertEqual(leaderboard_size(store, 'total'), 1)
+
+
+class FailingDatabase:
+    def __init__(self):
+        raise AssertionError("leaderboard pages must not hit MariaDB")
+
+
+class FakeKeysetDatabase:
+    queries = []
+    rows = []
+    tie_count = 0
+
+    def execute_query(self, query, params=None):
+        FakeKeysetDatabase.queries.append((" ".join(query.split()), params))
+        if "COUNT(*)" in query:
+            return [(FakeKeysetDatabase.tie_count,)]
+        return list(FakeKeysetDatabase.rows)
+
+    def close(self):
+        pass
+
+
+class StubRankingValkeyManager:
+    def __init__(self, store):
+        self.valkey = store
+
+    def get_online_users(self, platform):
+        return ["ts-2"] if platform == 'teamspeak' else []
+
+
+class LeaderboardRouteTests(unittest.TestCase):
+    def setUp(self):
+        self.store, _ = build_leaderboard([
+            leaderboard_row(1, "Alpha", 900, weekly=10),
+            leaderboard_row(2, "Bravo", 500, weekly=400),
+        ])
+        self.originals = (
+            ranking_routes.DatabaseManager, ranking_routes.valkey_manager,
+            top_routes.DatabaseManager, top_routes.valkey_manager,
+            response_cache.valkey_manager,
+        )
+        manager = StubRankingValkeyManager(self.store)
+        ranking_routes.DatabaseManager = FailingDatabase
+        ranking_routes.valkey_manager = manager
+        top_routes.DatabaseManager = FailingDatabase
+        top_routes.valkey_manager = manager
+        response_cache.valkey_manager = manager
+
+    def tearDown(self):
+        (
+            ranking_routes.DatabaseManager, ranking_routes.valkey_manager,
+            top_routes.DatabaseManager, top_routes.valkey_manager,
+            response_cache.valkey_manager,
+        ) = self.originals
+
+    def make_app(self):
+        app = Flask(__name__)
+        app.config["RATELIMIT_ENABLED"] = False
+        app.register_blueprint(ranking_routes.ranking_bp)
+        app.register_blueprint(top_routes.ranking_top_bp)
+        return app
+
+    def test_ranking_page_is_served_from_leaderboard(self):
+        with self.make_app().test_client() as client:
+            response = client.get("/api/ranking?page=2&limit=1")
+
+        body = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((body["total"], body["pages"], body["page"]), (2, 2, 2))
+        self.assertEqual(body["players"][0]["name"], "Bravo")
+        self.assertEqual(body["players"][0]["rank"], 2)
+        self.assertEqual(body["players"][0]["last_online"], "Online")
+
+    def test_cursor_page_uses_keyset_and_reconstructs_ranks(self):
+        original = keyset.DatabaseManager
+        keyset.DatabaseManager = FakeKeysetDatabase
+        FakeKeysetDatabase.queries = []
+        FakeKeysetDatabase.rows = [
+            (5, "Echo", 2, 1, 300, "2026-01-01 12:00:00", None, "ts-5"),
+            (4, "Delta", 2, 1, 300, "2026-01-01 12:00:00", None, "ts-4"),
+            (3, "Charlie", 2, 1, 200, "2026-01-01 12:00:00", None, "ts-3"),
+        ]
+        cursor = encode_ranking_cursor("next", 450, 9, 7)
+        try:
+            with self.make_app().test_client() as client:
+                response = client.get(f"/api/ranking?limit=2&search=a&cursor={cursor}")
+        finally:
+            keyset.DatabaseManager = original
+
+        body = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(p["id"], p["rank"]) for p in body["players"]], [(5, 8), (4, 8)])
+        self.assertEqual(body["next_cursor"], encode_ranking_cursor("next", 300, 4, 8, 1))
+        self.assertEqual(body["prev_cursor"], encode_ranking_cursor("prev", 300, 5, 8, 0))
+        self.assertNotIn("OFFSET", FakeKeysetDatabase.queries[0][0])
+        self.assertEqual(FakeKeysetDatabase.queries[0][1], ("a%", 450, 450, 9, 3))
+        self.assertEqual(len(FakeKeysetDatabase.queries), 1)
+
+    def test_next_page_continues_the_cursor_tie(self):
+        original = keyset.DatabaseManager
+        keyset.DatabaseManager = FakeKeysetDatabase
+        FakeKeysetDatabase.queries = []
+        FakeKeysetDatabase.rows = [
+            (3, "Charlie", 2, 1, 300, "2026-01-01 12:00:00", None, "ts-3"),
+            (2, "Bravo", 2, 1, 200, "2026-01-01 12:00:00", None, "ts-2"),
+        ]
+        cursor = encode_ranking_cursor("next", 300, 4, 8, 1)
+        try:
+            with self.make_app().test_client() as client:
+                response = client.get(f"/api/ranking?limit=2&cursor={cursor}")
+        finally:
+            keyset.DatabaseManager = original
+
+        body = response.get_json()
+        self.assertEqual([(p["id"], p["rank"]) for p in body["players"]], [(3, 8), (2, 11)])
+        self.assertIsNone(body["next_cursor"])
+        self.assertEqual(body["prev_cursor"], encode_ranking_cursor("prev", 300, 3, 8, 2))
+        self.assertEqual(len(FakeKeysetDatabase.queries), 1)
+
+    def test_prev_page_counts_only_the_tie_above_it(self):
+        original = keyset.DatabaseManager
+        keyset.DatabaseManager = FakeKeysetDatabase
+        FakeKeysetDatabase.queries = []
+        FakeKeysetDatabase.tie_count = 1
+        # ascending: the third row ties with the page's top row
+        FakeKeysetDatabase.rows = [
+            (4, "Delta", 2, 1, 300, "2026-01-01 12:00:00", None, "ts-4"),
+            (5, "Echo", 2, 1, 300, "2026-01-01 12:00:00", None, "ts-5"),
+            (6, "Foxtrot", 2, 1, 300, "2026-01-01 12:00:00", None, "ts-6"),
+        ]
+        cursor = encode_ranking_cursor("prev", 200, 3, 10)
+        try:
+            with self.make_app().test_client() as client:
+                response = client.get(f"/api/ranking?limit=2&cursor={cursor}")
+        finally:
+            keyset.DatabaseManager = original
+            FakeKeysetDatabase.tie_count = 0
+
+        body = response.get_json()
+        self.assertEqual([(p["id"], p["rank"]) for p in body["players"]], [(5, 7), (4, 7)])
+        self.assertEqual(body["next_cursor"], encode_ranking_cursor("next", 300, 4, 7, 2))
+        self.assertEqual(body["prev_cursor"], encode_ranking_cursor("prev", 300, 5, 7, 1))
+        count_query, count_params = FakeKeysetDatabase.queries[1]
+        self.assertIn("user_totals.total_time = %s AND user_totals.user_id > %s", count_query)
+        self.assertEqual(count_params, (300, 5))
+
+    def test_first_cursor_page_ranks_from_leaderboard(self):
+        original = keyset.DatabaseManager
+        keyset.DatabaseManager = FakeKeysetDatabase
+        FakeKeysetDatabase.queries = []
+        FakeKeysetDatabase.rows = [(1, "Alpha", 3, 2, 900, "2026-01-01 12:00:00", None, "ts-1")]
+        try:
+            with self.make_app().test_client() as client:
+                response = client.get("/api/ranking?cursor=")
+        finally:
+            keyset.DatabaseManager = original
+
+        body = response.get_json()
+        self.assertEqual(body["players"][0]["rank"], 1)
+        self.assertIsNone(body["next_cursor"])
+        self.assertIsNone(body["prev_cursor"])
+        self.assertEqual(len(FakeKeysetDatabase.queries), 1)
+
+    def test_ranking_etag_follows_presence_and_is_not_shared_cached(self):
+        with self.make_app().test_client() as client:
+            first = client.get("/api/ranking?limit=1")
+            etag = first.headers["ETag"]
+            self.assertEqual(first.headers["Cache-Control"], "no-cache")
+            self.assertEqual(client.get("/api/ranking?limit=1", headers={"If-None-Match": etag}).status_code, 304)
+
+            self.store.set("teamspeak:online_users", '["ts-1"]')
+            changed = client.get("/api/ranking?limit=1", headers={"If-None-Match": etag})
+
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
+    def test_top_weekly_is_served_from_leaderboard(self):
+        with self.make_app().test_client() as client:
+            response = client.get("/api/ranking/top?period=weekly")
+
+        self.assertEqual([p["name"] for p in response.get_json()], ["Bravo", "Alpha"])
+
+
+class CountingUsageDatabase:
+    queries = 0
+
+    def execute_query(self, query, params=None):
+        CountingUsageDatabase.queries += 1
+        return []
+
+    def close(self):
+        pass
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.store = FakeSyncValkey()
+        self.originals = (usage_routes.DatabaseManager, response_cache.valkey_manager)
+        usage_routes.DatabaseManager = CountingUsageDatabase
+        response_cache.valkey_manager = StubRankingValkeyManager(self.store)
+        CountingUsageDatabase.queries = 0
+
+    def tearDown(self):
+        usage_routes.DatabaseManager, response_cache.valkey_manager = self.originals
+
+    def make_app(self):
+        app = Flask(__name__)
+        app.config["RATELIMIT_ENABLED"] = False
+        app.register_blueprint(usage_routes.ranking_usage_bp)
+        return app
+
+    def test_response_is_reused_until_the_tick_bumps_the_version(self):
+        with self.make_app().test_client() as client:
+            first = client.get("/api/ranking/usage?period=weekly")
+            second = client.get("/api/ranking/usage?period=weekly")
+            self.assertEqual(CountingUsageDatabase.queries, 1)
+            self.assertEqual(second.get_json(), first.get_json())
+
+            client.get("/api/ranking/usage?period=daily")
+            self.assertEqual(CountingUsageDatabase.queries, 2)
+
+            self.store.incr(RANKING_VERSION_KEY)
+            client.get("/api/ranking/usage?period=weekly")
+            self.assertEqual(CountingUsageDatabase.queries, 3)
+
+    def test_matching_etag_returns_304_without_running_the_route(self):
+        with self.make_app().test_client() as client:
+            first = client.get("/api/ranking/usage")
+            etag = first.headers["ETag"]
+            self.assertIn("s-maxage=", first.headers["Cache-Control"])
+            self.assertTrue(first.headers["Cache-Control"].startswith("public"))
+
+            self.store.data.clear()
+            self.store.set(RANKING_VERSION_KEY, 0)
+            revalidated = client.get("/api/ranking/usage", headers={"If-None-Match": etag})
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertEqual(CountingUsageDatabase.queries, 1)
+
+            self.store.incr(RANKING_VERSION_KEY)
+            changed = client.get("/api/ranking/usage", headers={"If-None-Match": etag})
+            self.assertEqual(changed.status_code, 200)
+            self.assertNotEqual(changed.headers["ETag"], etag)
+
+
+class CountingAchievementsDatabase:
+    queries = 0
+
+    def execute_query(self, query, params=None):
+        CountingAchievementsDatabase.queries += 1
+        return []
+
+    def close(self):
+        pass
+
+
+class ProfileEtagTests(unittest.TestCase):
+    def setUp(self):
+        self.store = FakeSyncValkey()
+        self.originals = (achievements_routes.DatabaseManager, response_cache.valkey_manager)
+        achievements_routes.DatabaseManager = CountingAchievementsDatabase
+        response_cache.valkey_manager = StubRankingValkeyManager(self.store)
+
+    def tearDown(self):
+        achievements_routes.DatabaseManager, response_cache.valkey_manager = self.originals
+
+    def test_profile_etag_follows_the_users_change_marker(self):
+        app = Flask(__name__)
+        app.config["RATELIMIT_ENABLED"] = False
+        app.register_blueprint(achievements_routes.user_ranking_profile_achievements_bp)
+        CountingAchievementsDatabase.queries = 0
+        path = "/api/ranking/profile/achievements"
+        etag = response_cache.response_etag(path, MultiDict({"id": "5"}), 0, None)
+
+        with app.test_client() as client:
+            cached = client.get(f"{path}?id=5", headers={"If-None-Match": f'"{etag}"'})
+            touch_profiles(self.store, [7])
+            other = client.get(f"{path}?id=5", headers={"If-None-Match": f'"{etag}"'})
+            touch_profiles(self.store, [5])
+            own = client.get(f"{path}?id=5", headers={"If-None-Match": f'"{etag}"'})
+
+        self.assertEqual((cached.status_code, other.status_code), (304, 304))
+        self.assertEqual(cached.headers["ETag"], f'"{etag}"')
+        self.assertEqual(own.status_code, 404)
+        self.assertEqual(CountingAchievementsDatabase.queries, 1)
+
+if __name__ == "__main__":
+    unittest.main()
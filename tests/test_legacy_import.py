@@ -0,0 +1,87 @@
+import unittest
+from unittest import mock
+
+import legacy_database_import
+
+# uuid, name, count (seconds), lastseen, firstcon
+BAK_USERS = [
+    ("ts-1", "Ëmber Fox", 3600, 1700000000, 1500000000),
+    ("ts-bot", "FireBot", 60, 1700000000, 0),
+    ("ts-2", "Bravo", 90, 1700000000, 0),
+]
+
+
+class FakeImportCursor:
+    def __init__(self):
+        self.executed = []
+        self.lastrowid = None
+        self._next_id = 0
+        self._rows = []
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        self.executed.append((query, params))
+        if query.startswith("SELECT uuid, name"):
+            self._rows = BAK_USERS
+        elif query.startswith("SELECT uuid, total_connections"):
+            self._rows = [("ts-1", 12)]
+        elif query.startswith("INSERT INTO user "):
+            self._next_id += 1
+            self.lastrowid = self._next_id
+
+    def executemany(self, query, rows):
+        self.executed.append((" ".join(query.split()), list(rows)))
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeImportConnection:
+    def __init__(self):
+        self.cursor_ = FakeImportCursor()
+        self.commits = 0
+
+    def cursor(self):
+        return self.cursor_
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class LegacyImportTests(unittest.TestCase):
+    def run_import(self):
+        conn = FakeImportConnection()
+        with mock.patch.object(legacy_database_import.pymysql, "connect", return_value=conn):
+            legacy_database_import.import_bak_user_data()
+        return conn.cursor_.executed, conn
+
+    def test_imported_users_get_identity_rows_in_the_same_transaction(self):
+        executed, conn = self.run_import()
+
+        statements = [query for query, _ in executed]
+        identity_delete = next(index for index, query in enumerate(statements)
+                               if query.startswith("DELETE FROM user_identity"))
+        self.assertEqual(executed[identity_delete][1], (1, 2))
+        self.assertTrue(statements[identity_delete + 1].startswith("INSERT INTO user_identity"))
+        self.assertEqual(conn.commits, 1)
+
+    def test_imported_names_are_indexed_for_search(self):
+        executed, _ = self.run_import()
+
+        normalized = [params for query, params in executed if query.startswith("UPDATE user SET name_normalized")]
+        self.assertEqual(normalized, [("ember fox", 1), ("bravo", 2)])
+        trigrams = [params for query, params in executed if query.startswith("INSERT IGNORE INTO user_name_trigram")]
+        self.assertIn("mbe", trigrams[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
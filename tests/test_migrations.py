@@ -0,0 +1,128 @@
+import ast
+import inspect
+import unittest
+
+import pymysql
+
+from app import migrations
+from app.migrations import (
+    LATEST_SCHEMA_VERSION,
+    MIGRATIONS,
+    SchemaVersionError,
+    apply_migrations,
+    check_schema_version,
+    get_schema_version,
+)
+
+
+class FakeMigrationCursor:
+    def __init__(self, version=None, table_exists=True):
+        self.version = version
+        self.table_exists = table_exists
+        self.executed = []
+        self._result = None
+
+    def execute(self, query, params=None):
+        self.executed.append((" ".join(query.split()), params))
+        normalized = query.strip().upper()
+        if normalized.startswith("SELECT MAX(VERSION)"):
+            if not self.table_exists:
+                raise pymysql.err.ProgrammingError(1146, "Table 'schema_migrations' doesn't exist")
+            self._result = (self.version,)
+        elif normalized.startswith("SELECT GET_LOCK") or normalized.startswith("SELECT RELEASE_LOCK"):
+            self._result = (1,)
+        elif normalized.startswith("CREATE TABLE IF NOT EXISTS SCHEMA_MIGRATIONS"):
+            self.table_exists = True
+        elif normalized.startswith("INSERT INTO SCHEMA_MIGRATIONS"):
+            self.version = params[0]
+
+    def fetchone(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class FakeMigrationConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class MigrationTests(unittest.TestCase):
+    def test_migrations_are_numbered_from_one_without_gaps(self):
+        versions = [migration.version for migration in MIGRATIONS]
+        self.assertEqual(versions, list(range(1, len(versions) + 1)))
+        self.assertEqual(LATEST_SCHEMA_VERSION, versions[-1])
+
+    def test_schema_version_is_zero_before_first_migration(self):
+        cursor = FakeMigrationCursor(table_exists=False)
+        self.assertEqual(get_schema_version(cursor), 0)
+
+    def test_check_schema_version_rejects_outdated_schema(self):
+        with self.assertRaises(SchemaVersionError) as ctx:
+            check_schema_version(FakeMigrationCursor(version=LATEST_SCHEMA_VERSION - 1))
+        self.assertEqual(ctx.exception.expected, LATEST_SCHEMA_VERSION)
+        self.assertEqual(
+            check_schema_version(FakeMigrationCursor(version=LATEST_SCHEMA_VERSION)),
+            LATEST_SCHEMA_VERSION,
+        )
+
+    def test_apply_runs_only_pending_migrations_and_records_them(self):
+        calls = []
+        fake = [
+            migrations.Migration(1, "v0001_a", "a", lambda cursor: calls.append(1)),
+            migrations.Migration(2, "v0002_b", "b", lambda cursor: calls.append(2)),
+        ]
+        original = migrations.MIGRATIONS, migrations.LATEST_SCHEMA_VERSION
+        migrations.MIGRATIONS, migrations.LATEST_SCHEMA_VERSION = fake, 2
+        try:
+            cursor = FakeMigrationCursor(version=1)
+            applied = apply_migrations(FakeMigrationConnection(cursor))
+        finally:
+            migrations.MIGRATIONS, migrations.LATEST_SCHEMA_VERSION = original
+
+        self.assertEqual(applied, [2])
+        self.assertEqual(calls, [2])
+        self.assertEqual(cursor.version, 2)
+        self.assertTrue(cursor.executed[-1][0].startswith("SELECT RELEASE_LOCK"))
+
+    def test_backfill_waits_for_the_latest_schema(self):
+        import migrate
+
+        cursor = FakeMigrationCursor(version=LATEST_SCHEMA_VERSION - 1)
+        conn = FakeMigrationConnection(cursor)
+        migrate.backfill(conn)
+
+        self.assertEqual([query for query, _ in cursor.executed], ["SELECT MAX(version) FROM schema_migrations"])
+        self.assertEqual(conn.commits, 0)
+
+    def test_migrations_do_not_import_app_code(self):
+        # app code follows the latest schema; a migration importing it breaks
+        # every later from-scratch run once that code changes
+        for migration in MIGRATIONS:
+            tree = ast.parse(inspect.getsource(inspect.getmodule(migration.upgrade)))
+            for node in ast.walk(tree):
+                if isinstance(node, ast.ImportFrom):
+                    modules = [node.module or ""]
+                elif isinstance(node, ast.Import):
+                    modules = [alias.name for alias in node.names]
+                else:
+                    continue
+                for module in modules:
+                    self.assertFalse(
+                        module == "app" or module.startswith("app."),
+                        f"{migration.name} imports {module}")
+
+
+if __name__ == "__main__":
+    unittest.main()
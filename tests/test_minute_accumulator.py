@@ -0,0 +1,112 @@
+import asyncio
+import unittest
+from datetime import datetime
+
+from app.utils.async_database import AsyncDatabaseManager
+from app.utils.leaderboard import LeaderboardMaintainer
+from app.utils.minute_accumulator import (
+    FLUSHING_KEY,
+    PENDING_KEY,
+    MinuteAccumulator,
+    parse_minute_deltas,
+)
+from tests.valkey_fakes import FakeHashValkey
+
+
+class FakeMinuteDatabase:
+    get_time_category = staticmethod(AsyncDatabaseManager.get_time_category)
+
+    def __init__(self, applied=()):
+        self.batches = []
+        self.applied = set(applied)
+
+    async def apply_minute_deltas(self, batch_id, deltas):
+        if batch_id in self.applied:
+            return None
+        self.applied.add(batch_id)
+        self.batches.append(deltas)
+        return {platform: ([], []) for platform in deltas}
+
+
+# Sunday 20:00 -> evening
+SUNDAY_EVENING = datetime(2026, 10, 18, 20, 0)
+
+
+class MinuteAccumulatorTests(unittest.TestCase):
+    def setUp(self):
+        self.valkey = FakeHashValkey()
+        self.database = FakeMinuteDatabase()
+        self.accumulator = MinuteAccumulator(self.valkey, self.database, flush_interval=5)
+
+    def add(self, platform, uids, times=1):
+        for _ in range(times):
+            asyncio.run(self.accumulator.add(platform, uids, now=SUNDAY_EVENING))
+
+    def test_minutes_and_heatmap_slots_accumulate_per_identity(self):
+        self.add('teamspeak', ['ts-1', 'ts-2'], times=3)
+        self.add('discord', ['42'])
+
+        deltas = parse_minute_deltas(self.valkey.data[PENDING_KEY])
+
+        self.assertEqual(deltas['teamspeak']['time'], {'ts-1': 3, 'ts-2': 3})
+        self.assertEqual(sorted(deltas['teamspeak']['heatmap']), [('ts-1', 6, 'evening', 3), ('ts-2', 6, 'evening', 3)])
+        self.assertEqual(deltas['discord']['time'], {'42': 1})
+
+    def test_flush_drains_the_batch_into_one_database_call(self):
+        self.add('teamspeak', ['ts-1'], times=4)
+
+        changes = asyncio.run(self.accumulator.flush())
+
+        self.assertEqual(changes, {'teamspeak': ([], [])})
+        self.assertEqual(self.database.batches, [{
+            'teamspeak': {'time': {'ts-1': 4}, 'heatmap': [('ts-1', 6, 'evening', 4)]},
+        }])
+        self.assertNotIn(PENDING_KEY, self.valkey.data)
+        self.assertNotIn(FLUSHING_KEY, self.valkey.data)
+
+    def test_leftover_batch_from_a_crash_is_applied_once(self):
+        self.add('teamspeak', ['ts-1'], times=2)
+        self.valkey.apply('rename', PENDING_KEY, FLUSHING_KEY)
+        self.valkey.apply('hset', FLUSHING_KEY, 'batch', 'crashed')
+        self.add('teamspeak', ['ts-1'])
+
+        asyncio.run(self.accumulator.flush())
+
+        self.assertEqual(self.database.batches[0]['teamspeak']['time'], {'ts-1': 2})
+        self.assertEqual(self.valkey.data[PENDING_KEY]['t|teamspeak|ts-1'], '1')
+
+        # the same batch committed before the crash is only dropped
+        self.valkey.apply('rename', PENDING_KEY, FLUSHING_KEY)
+        self.valkey.apply('hset', FLUSHING_KEY, 'batch', 'crashed')
+        self.assertEqual(asyncio.run(self.accumulator.flush()), {})
+        self.assertEqual(len(self.database.batches), 1)
+        self.assertNotIn(FLUSHING_KEY, self.valkey.data)
+
+    def test_flush_if_due_waits_for_the_interval_unless_forced(self):
+        self.assertEqual(asyncio.run(self.accumulator.flush_if_due()), {})
+        self.add('teamspeak', ['ts-1'])
+
+        self.assertEqual(asyncio.run(self.accumulator.flush_if_due()), {})
+        self.assertEqual(self.database.batches, [])
+        asyncio.run(self.accumulator.flush_if_due(force=True))
+        self.assertEqual(len(self.database.batches), 1)
+
+    def test_leaderboard_scores_include_pending_minutes(self):
+        self.add('teamspeak', ['ts-1'], times=2)
+        self.add('discord', ['42'])
+        row = {
+            'id': 1, 'name': "Alpha", 'level': 3, 'division': 2, 'discord_id': '42',
+            'teamspeak_id': 'ts-1', 'ranking_disabled': False, 'total': 100, 'season': 10,
+            'weekly': 0, 'monthly': 0, 'daily': 0, 'last_update': "2026-01-01 12:00:00",
+        }
+        maintainer = LeaderboardMaintainer(self.valkey, None, accumulator=self.accumulator)
+        pending = asyncio.run(self.accumulator.pending_minutes([('discord', '42'), ('teamspeak', 'ts-1')]))
+
+        maintainer._add_pending_minutes([row], pending)
+
+        self.assertEqual((row['total'], row['season'], row['weekly']), (103, 13, 3))
+        self.assertEqual(asyncio.run(self.accumulator.pending_totals()), pending)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+from flask import Flask
+
+from app.api.admin import routes as admin_routes
+from app.config import Config
+from app.utils.name_search import (
+    id_search_subqueries,
+    name_index_statements,
+    name_search_filter,
+    normalize_name,
+)
+
+
+class NameSearchTests(unittest.TestCase):
+    def test_normalize_folds_case_accents_and_whitespace(self):
+        self.assertEqual(normalize_name("  Ëmber   FOX "), "ember fox")
+        self.assertEqual(normalize_name(None), "")
+
+    def test_index_statements_store_distinct_trigrams(self):
+        statements = name_index_statements(7, "Anana")
+
+        self.assertEqual(statements[0][1], ("anana", 7))
+        self.assertEqual(statements[2][1], ("ana", 7, "nan", 7))
+
+    def test_long_terms_use_trigrams_and_short_terms_a_prefix(self):
+        sql, params = name_search_filter("Fox_1")
+        self.assertIn("FROM user_name_trigram", sql)
+        self.assertEqual(params, ["fox", "ox_", "x_1", 3, "%fox\\_1%"])
+
+        sql, params = name_search_filter("Ë")
+        self.assertNotIn("user_name_trigram", sql)
+        self.assertEqual(params, ["e%"])
+
+    def test_numeric_terms_become_steam_id_ranges(self):
+        lookups = id_search_subqueries("7656119800")
+
+        self.assertIn("steam_id BETWEEN", lookups[0][0])
+        self.assertEqual(lookups[0][1], [76561198000000000, 76561198009999999])
+        self.assertEqual(lookups[1][1], ["7656119800%"])
+        self.assertEqual([sql for sql, _ in id_search_subqueries("abc=")],
+                         ["SELECT id FROM user WHERE teamspeak_id LIKE %s"])
+
+
+class FakeSearchCursor:
+    def __init__(self):
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+
+    def fetchall(self):
+        return [(3, 76561198000000003, None, "ts-3", "Ember", 4, 2, 0)]
+
+
+class FakeSearchDatabase:
+    instances = []
+
+    def __init__(self):
+        self.cursor = FakeSearchCursor()
+        FakeSearchDatabase.instances.append(self)
+
+    def close(self):
+        pass
+
+
+class AdminPlayerSearchTests(unittest.TestCase):
+    def setUp(self):
+        self.original_db = admin_routes.DatabaseManager
+        self.original_admins = list(Config.ADMIN_STEAM_IDS)
+        admin_routes.DatabaseManager = FakeSearchDatabase
+        FakeSearchDatabase.instances = []
+        Config.ADMIN_STEAM_IDS = ["76561198000000001"]
+
+    def tearDown(self):
+        admin_routes.DatabaseManager = self.original_db
+        Config.ADMIN_STEAM_IDS = self.original_admins
+
+    def test_search_unions_indexed_lookups_without_casting_steam_id(self):
+        app = Flask(__name__)
+        app.secret_key = "test-secret"
+        app.register_blueprint(admin_routes.admin_bp)
+
+        with app.test_client() as client:
+            with client.session_transaction() as session:
+                session["steam_id"] = "76561198000000001"
+            response = client.get("/api/admin/players/search?q=7656")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["players"][0]["name"], "Ember")
+        query, params = FakeSearchDatabase.instances[0].cursor.queries[0]
+        self.assertNotIn("CAST(steam_id", query)
+        self.assertEqual(query.count("UNION ALL"), 3)
+        self.assertIn(76560000000000000, params)
+
+
+if __name__ == "__main__":
+    unittest.main()
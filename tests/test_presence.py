@@ -0,0 +1,105 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+
+from app.utils.async_database import AsyncDatabaseManager
+from app.utils.presence import PresenceLog
+
+
+class FakePresenceDatabase:
+    get_time_category = staticmethod(AsyncDatabaseManager.get_time_category)
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    async def apply_minute_deltas(self, batch_id, deltas, sessions=()):
+        if self.fail:
+            raise ConnectionError("lost connection")
+        self.batches.append((batch_id, deltas, list(sessions)))
+        return {platform: ([], []) for platform in deltas}
+
+
+# Sunday 17:59:30 -> the first half minute is noon, the rest evening
+JOINED = datetime(2026, 10, 18, 17, 59, 30)
+
+
+class PresenceLogTests(unittest.TestCase):
+    def setUp(self):
+        self.database = FakePresenceDatabase()
+        self.presence = PresenceLog(self.database, checkpoint_interval=5)
+
+    def checkpoint(self, now):
+        return asyncio.run(self.presence.checkpoint(now=now))
+
+    def test_closed_session_is_credited_to_the_second_and_logged(self):
+        self.presence.join('teamspeak', 'ts-1', at=JOINED)
+        self.presence.leave('teamspeak', 'ts-1', at=JOINED + timedelta(minutes=2, seconds=45))
+
+        credited, changes = self.checkpoint(JOINED + timedelta(minutes=5))
+
+        batch_id, deltas, sessions = self.database.batches[0]
+        self.assertEqual(credited, {'teamspeak': ['ts-1']})
+        self.assertEqual(changes, {'teamspeak': ([], [])})
+        self.assertEqual(deltas['teamspeak']['time'], {'ts-1': 2})
+        self.assertEqual(deltas['teamspeak']['heatmap'], [('ts-1', 6, 'evening', 2)])
+        self.assertEqual(sessions, [(
+            'teamspeak', 'ts-1', JOINED, JOINED + timedelta(minutes=2, seconds=45), 165,
+        )])
+
+    def test_remainder_seconds_carry_over_to_the_next_session(self):
+        for start in (0, 10):
+            joined = JOINED + timedelta(minutes=start)
+            self.presence.join('discord', 42, at=joined)
+            self.presence.leave('discord', 42, at=joined + timedelta(seconds=90))
+
+        self.checkpoint(JOINED + timedelta(minutes=15))
+
+        _, deltas, sessions = self.database.batches[0]
+        self.assertEqual(deltas['discord']['time'], {'42': 3})
+        self.assertEqual([session[4] for session in sessions], [90, 90])
+
+    def test_checkpoint_credits_open_sessions_without_closing_them(self):
+        self.presence.join('teamspeak', 'ts-1', at=JOINED)
+
+        self.checkpoint(JOINED + timedelta(minutes=5))
+        self.checkpoint(JOINED + timedelta(minutes=8))
+
+        self.assertEqual([batch[1]['teamspeak']['time'] for batch in self.database.batches], [{'ts-1': 5}, {'ts-1': 3}])
+        self.assertEqual([batch[2] for batch in self.database.batches], [[], []])
+        self.assertTrue(self.presence.is_open('teamspeak', 'ts-1'))
+
+    def test_sync_closes_missing_and_opens_new_sessions(self):
+        self.presence.join('teamspeak', 'ts-1', at=JOINED)
+        self.presence.join('discord', 42, at=JOINED)
+
+        self.presence.sync('teamspeak', ['ts-2'], at=JOINED + timedelta(minutes=1))
+
+        self.assertFalse(self.presence.is_open('teamspeak', 'ts-1'))
+        self.assertTrue(self.presence.is_open('teamspeak', 'ts-2'))
+        self.assertTrue(self.presence.is_open('discord', 42))
+
+    def test_failed_write_is_retried_with_the_same_batch_id(self):
+        self.presence.join('teamspeak', 'ts-1', at=JOINED)
+        self.database.fail = True
+        with self.assertRaises(ConnectionError):
+            self.checkpoint(JOINED + timedelta(minutes=5))
+        failed_batch_id = self.presence._unwritten[0]
+
+        self.database.fail = False
+        self.checkpoint(JOINED + timedelta(minutes=10))
+        self.checkpoint(JOINED + timedelta(minutes=10))
+
+        self.assertEqual(self.database.batches[0][0], failed_batch_id)
+        self.assertEqual([batch[1]['teamspeak']['time'] for batch in self.database.batches], [{'ts-1': 5}, {'ts-1': 5}])
+
+    def test_disabled_log_ignores_events(self):
+        presence = PresenceLog(self.database, checkpoint_interval=0)
+        presence.join('teamspeak', 'ts-1', at=JOINED)
+
+        self.assertFalse(presence.is_open('teamspeak', 'ts-1'))
+        self.assertEqual(asyncio.run(presence.checkpoint_if_due(force=True)), ({}, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
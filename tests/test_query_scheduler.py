@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+
+from app.rankingsystem.bots.teamspeak.query_scheduler import QueryPriority, QueryScheduler, query_priority
+
+
+class SlowClient:
+    """atsq.Client stand-in answering one command at a time."""
+
+    def __init__(self, delay=0.001):
+        self.delay = delay
+        self.commands = []
+        self.dialect = "ts3"
+        self._lock = asyncio.Lock()
+
+    async def _exec(self, *command):
+        async with self._lock:
+            await asyncio.sleep(self.delay)
+            self.commands.append(command)
+            return [{"command": command[0]}]
+
+    async def client_info(self, clid):
+        return await self._exec("clientinfo", clid)
+
+    async def server_groups_by_client(self, cldbid):
+        return await self._exec("servergroupsbyclientid", cldbid)
+
+    async def server_group_add_client(self, sgid, cldbid):
+        await self._exec("servergroupaddclient", sgid, cldbid)
+
+
+class QuerySchedulerTests(unittest.TestCase):
+    def test_interactive_commands_overtake_a_running_rescan(self):
+        client = SlowClient()
+        query = QueryScheduler(client, window=1)
+
+        async def rescan():
+            with query_priority(QueryPriority.BACKGROUND):
+                await asyncio.gather(*(query.client_info(clid) for clid in range(20)))
+
+        async def website_action():
+            await asyncio.sleep(0.003)
+            with query_priority(QueryPriority.INTERACTIVE):
+                await query.server_group_add_client(41, 7)
+
+        async def run():
+            await asyncio.gather(rescan(), website_action())
+
+        asyncio.run(run())
+
+        position = client.commands.index(("servergroupaddclient", 41, 7))
+        self.assertLess(position, 5)
+        self.assertEqual(len(client.commands), 21)
+
+    def test_identical_reads_share_one_round_trip(self):
+        client = SlowClient()
+        query = QueryScheduler(client, window=1)
+
+        async def run():
+            return await asyncio.gather(*(query.server_groups_by_client("7") for _ in range(5)))
+
+        results = asyncio.run(run())
+
+        self.assertEqual(client.commands, [("servergroupsbyclientid", "7")])
+        self.assertEqual(len(results), 5)
+        self.assertEqual(query.coalesced, 4)
+
+    def test_writes_are_never_coalesced(self):
+        client = SlowClient()
+        query = QueryScheduler(client, window=2)
+
+        async def run():
+            await asyncio.gather(*(query.server_group_add_client(41, 7) for _ in range(2)))
+
+        asyncio.run(run())
+
+        self.assertEqual(len(client.commands), 2)
+
+    def test_cancelled_waiters_give_up_their_place(self):
+        client = SlowClient(delay=0.01)
+        query = QueryScheduler(client, window=1)
+
+        async def run():
+            first = asyncio.create_task(query.client_info(1))
+            waiting = asyncio.create_task(query.client_info(2))
+            await asyncio.sleep(0)
+            waiting.cancel()
+            await asyncio.gather(first, waiting, return_exceptions=True)
+            await query.client_info(3)
+
+        asyncio.run(run())
+
+        self.assertEqual(client.commands, [("clientinfo", 1), ("clientinfo", 3)])
+        self.assertEqual((len(query), query._in_flight), (0, 0))
+
+    def test_other_attributes_pass_through(self):
+        client = SlowClient()
+        query = QueryScheduler(client)
+
+        self.assertEqual(query.dialect, "ts3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.config import Config
+from app.utils.rank_curves import RankCurve, load_rank_curves, rank_curves, use_rank_curves
+
+
+def legacy_rank(requirements, minutes):
+    for rank, requirement in sorted(requirements.items(), reverse=True):
+        if minutes >= requirement:
+            return rank
+    return 0
+
+
+class RankCurveTests(unittest.TestCase):
+    def tearDown(self):
+        use_rank_curves(None)
+
+    def test_matches_the_sorted_walk_at_every_boundary(self):
+        curve = RankCurve(Config.LEVEL_REQUIREMENTS)
+        samples = sorted({0, -1, *(
+            requirement + offset
+            for requirement in Config.LEVEL_REQUIREMENTS.values()
+            for offset in (-1, 0, 1)
+        )})
+
+        for minutes in samples:
+            self.assertEqual(curve.rank_for(minutes), legacy_rank(Config.LEVEL_REQUIREMENTS, minutes), minutes)
+        self.assertEqual(list(curve.ranks_for(samples)),
+                         [legacy_rank(Config.LEVEL_REQUIREMENTS, minutes) for minutes in samples])
+
+    def test_tier_curves_count_reached_thresholds(self):
+        curve = RankCurve.from_thresholds([30, 2, 14, 7])
+
+        self.assertEqual(list(curve.ranks_for([None, 1, 2, 13, 14, 30, 99])), [0, 0, 1, 2, 3, 4, 4])
+        self.assertEqual(curve.max_rank, 4)
+
+    def test_non_contiguous_ranks_map_back_to_the_rank(self):
+        curve = RankCurve({10: 0, 20: 100})
+
+        self.assertEqual(list(curve.ranks_for([-5, 0, 99, 100])), [0, 10, 10, 20])
+        self.assertEqual(curve.requirement(20), 100)
+        self.assertEqual(curve.requirement(30), 0)
+
+    def test_rejects_thresholds_that_decrease(self):
+        with self.assertRaises(ValueError):
+            RankCurve({1: 0, 2: 500, 3: 400})
+
+    def test_file_overrides_replace_only_the_given_curves(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as handle:
+            json.dump({"division": {"1": 0, "2": 1200}, "streak": [3, 10]}, handle)
+        self.addCleanup(os.unlink, handle.name)
+
+        curves = load_rank_curves(handle.name)
+
+        self.assertEqual(curves.division.rank_for(1200), 2)
+        self.assertEqual(curves.streak.rank_for(9), 1)
+        self.assertEqual(curves.level.rank_for(600), 3)
+
+    def test_unknown_curve_names_are_rejected(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as handle:
+            json.dump({"levels": {"1": 0}}, handle)
+        self.addCleanup(os.unlink, handle.name)
+
+        with self.assertRaises(ValueError):
+            load_rank_curves(handle.name)
+
+    def test_config_lookups_follow_the_curves_in_effect(self):
+        use_rank_curves(load_rank_curves()._replace(level=RankCurve({1: 0, 2: 10})))
+
+        self.assertEqual(Config.get_level_for_minutes(10), 2)
+        self.assertEqual(Config.get_level_requirement(2), 10)
+        self.assertEqual(Config.get_max_level(), 2)
+        use_rank_curves(None)
+        self.assertEqual(rank_curves().level.max_rank, 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
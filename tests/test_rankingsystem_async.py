@@ -2,6 +2,8 @@ import asyncio
 import json
 import threading
 import unittest
+from datetime import datetime
+from unittest import mock
 from unittest.mock import AsyncMock, MagicMock
 
 from asyncmy import errors as asyncmy_errors
@@ -10,6 +12,8 @@ from app.rankingsystem import rankingsystem as rs_module
 from app.rankingsystem.rankingsystem import RankingSystem
 from app.utils.async_database import AsyncDatabaseManager
 
+import legacy_database_import
+
 
 class FakeAsyncValkey:
     def __init__(self):
@@ -159,5 +163,301 @@ class AsyncDatabaseRetryTests(unittest.TestCase):
         db._dispose_pool.assert_awaited_once()
 
 
+class RecordingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @property
+    def rowcount(self):
+        return self.conn.rowcount
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def execute(self, query, params=None):
+        self.conn.log.append((" ".join(query.split()), params))
+
+    async def executemany(self, query, rows):
+        self.conn.log.append((" ".join(query.split()), list(rows)))
+
+    async def fetchall(self):
+        query, params = self.conn.log[-1]
+        for marker, rows in self.conn.results.items():
+            if marker in query:
+                return rows(params) if callable(rows) else rows
+        return []
+
+    async def fetchone(self):
+        rows = await self.fetchall()
+        return rows[0] if rows else None
+
+
+class RecordingConnection:
+    def __init__(self, results=None):
+        self.log = []
+        # query substring -> rows returned by fetchall (or a function of the
+        # statement's params returning them)
+        self.results = results or {}
+        self.rowcount = 1
+
+    async def begin(self):
+        self.log.append(("BEGIN", None))
+
+    async def commit(self):
+        self.log.append(("COMMIT", None))
+
+    async def rollback(self):
+        self.log.append(("ROLLBACK", None))
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+
+class UserTotalsTests(unittest.TestCase):
+    def run_op(self, coro_factory, results=None):
+        db = AsyncDatabaseManager()
+        conn = RecordingConnection(results)
+
+        async def fake_run(op):
+            return await op(conn)
+
+        db._run = fake_run
+        asyncio.run(coro_factory(db))
+        return conn.log
+
+    def test_update_times_increments_user_totals_in_same_transaction(self):
+        # current daily, weekly, monthly, season epochs
+        log = self.run_op(lambda db: db.update_times({"ts-1"}, "teamspeak"), {"FROM reset_log": [(3, 1, 0, 2)]})
+
+        statements = [query for query, _ in log]
+        self.assertEqual(statements[0], "BEGIN")
+        self.assertTrue(statements[1].startswith("SELECT daily_epoch, weekly_epoch"))
+        self.assertTrue(statements[2].startswith("INSERT INTO time"))
+        self.assertEqual(log[2][1][:11], ["ts-1", "teamspeak", 1, 1, 1, 1, 1, 3, 1, 0, 2])
+        self.assertTrue(statements[3].startswith("INSERT INTO user_totals"))
+        self.assertIn("ON d.platform_uid = u.teamspeak_id", statements[3])
+        self.assertEqual(log[3][1], [3, 1, 0, 2, "ts-1", 1, 3, 3, 1, 1, 0, 0, 2, 2])
+        self.assertEqual(statements[4], "COMMIT")
+
+    def test_stale_period_counters_restart_on_the_next_write(self):
+        log = self.run_op(lambda db: db.update_times({"ts-1"}, "teamspeak"))
+
+        for statement in (log[2][0], log[3][0]):
+            self.assertIn(
+                "daily_time = IF(daily_epoch = %s, daily_time, 0) + VALUES(daily_time), daily_epoch = %s",
+                statement)
+            self.assertIn(
+                "season_time = IF(season_epoch = %s, season_time, 0) + VALUES(season_time), season_epoch = %s",
+                statement)
+            self.assertIn("total_time = total_time + VALUES(total_time)", statement)
+
+    def test_period_reset_only_bumps_the_epoch(self):
+        log = self.run_op(lambda db: db.reset_time("weekly"))
+
+        self.assertEqual(len(log), 1)
+        self.assertEqual(
+            log[0][0],
+            "UPDATE reset_log SET weekly_epoch = weekly_epoch + 1, last_weekly_reset = %s WHERE id = 1",
+        )
+
+    def test_season_close_bumps_the_epoch_and_demotes_only_promoted_users(self):
+        log = self.run_op(
+            lambda db: db.close_season(datetime(2027, 6, 1)),
+            {"FROM user_totals ut": [(1, "dc-1", None, 3, 900)]},
+        )
+
+        statements = [query for query, _ in log]
+        self.assertIn("ut.season_epoch = (SELECT season_epoch FROM reset_log WHERE id = 1)", statements[1])
+        self.assertIn("UPDATE user SET division = 1 WHERE division > 1", statements)
+        self.assertFalse([query for query in statements if query.startswith(("UPDATE time", "UPDATE user_totals"))])
+        season_reset = [query for query in statements if query.startswith("UPDATE reset_log")]
+        self.assertEqual(
+            season_reset,
+            ["UPDATE reset_log SET season_epoch = season_epoch + 1, last_season_reset = %s WHERE id = 1"],
+        )
+        self.assertEqual(statements[-1], "COMMIT")
+
+    def test_update_heatmap_sets_the_slot_bit(self):
+        # Sunday 20:00 -> evening, the third slot of the last day
+        sunday_evening = datetime(2026, 10, 18, 20, 0)
+        with mock.patch("app.utils.async_database.datetime") as fake_datetime:
+            fake_datetime.now.return_value = sunday_evening
+            log = self.run_op(lambda db: db.update_heatmap({"ts-1"}, "teamspeak"),
+                              {"active_slot_mask & %s = 0": [("ts-1",)]})
+
+        self.assertTrue(log[0][0].startswith("INSERT INTO activity_heatmap"))
+        self.assertEqual(log[0][1], ["ts-1", "teamspeak", 6, "evening", 1])
+        self.assertEqual(log[1][1], ("teamspeak", "ts-1", 1 << 26))
+        self.assertTrue(log[2][0].startswith("UPDATE time SET active_slot_mask = active_slot_mask | %s"))
+        self.assertEqual(log[2][1], (1 << 26, "teamspeak", "ts-1"))
+
+    def test_slot_bit_is_only_written_where_missing(self):
+        log = self.run_op(lambda db: db.update_heatmap({"ts-1"}, "teamspeak"))
+
+        self.assertFalse([query for query, _ in log if query.startswith("UPDATE time")])
+
+
+
+class ApplyTickTests(unittest.TestCase):
+    def run_tick(self, uids, results=None):
+        db = AsyncDatabaseManager()
+        conn = RecordingConnection(results)
+
+        async def fake_run(op):
+            return await op(conn)
+
+        db._run = fake_run
+        changes = asyncio.run(db.apply_tick("teamspeak", uids))
+        return changes, conn.log
+
+    def test_tick_runs_in_one_transaction_and_returns_rank_changes(self):
+        changes, log = self.run_tick({"ts-1", "ts-2"}, {
+            # id, platform uid, total_time, season_time, level, division
+            "COALESCE(ut.total_time, 0) AS total_time": [
+                (1, "ts-1", 300, 10, 1, 1),
+                (2, "ts-2", 5, 1500, 1, 1),
+            ],
+        })
+
+        statements = [query for query, _ in log]
+        self.assertEqual(statements[0], "BEGIN")
+        self.assertEqual(statements[-1], "COMMIT")
+        self.assertEqual(changes, ([("ts-1", 2)], [("ts-2", 2)]))
+        updates = [(query, params) for query, params in log if query.startswith("UPDATE user SET")]
+        self.assertEqual(len(updates), 1)
+        self.assertIn("level = CASE id WHEN %s THEN %s ELSE level END", updates[0][0])
+        self.assertIn("division = CASE id WHEN %s THEN %s ELSE division END", updates[0][0])
+        self.assertEqual(updates[0][1], [1, 2, 2, 2, 1, 2])
+
+    def test_statement_count_does_not_grow_with_online_users(self):
+        def rank_rows(count):
+            return [(index, f"ts-{index}", 300, 1500, 1, 1) for index in range(count)]
+
+        counts = []
+        for count in (50, 2000):
+            uids = {f"ts-{index}" for index in range(count)}
+            changes, log = self.run_tick(uids, {"COALESCE(ut.total_time, 0) AS total_time": rank_rows(count)})
+            self.assertEqual(len(changes[0]), count)
+            counts.append(len(log))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_minute_batch_credits_accumulated_minutes_in_one_transaction(self):
+        db = AsyncDatabaseManager()
+        # every uid still lacks every slot bit
+        conn = RecordingConnection({
+            "active_slot_mask & %s = 0": lambda params: [(uid,) for uid in params[1:-1]],
+        })
+
+        async def fake_run(op):
+            return await op(conn)
+
+        db._run = fake_run
+        deltas = {'teamspeak': {
+            'time': {'ts-1': 5, 'ts-2': 2},
+            'heatmap': [('ts-1', 6, 'evening', 3), ('ts-1', 0, 'night', 2), ('ts-2', 6, 'evening', 2)],
+        }}
+        changes = asyncio.run(db.apply_minute_deltas("batch-1", deltas))
+
+        statements = [query for query, _ in conn.log]
+        self.assertEqual(changes, {'teamspeak': ([], [])})
+        self.assertEqual(conn.log[1], ("INSERT IGNORE INTO minute_flushes (batch_id) VALUES (%s)", ("batch-1",)))
+        time_upsert = next(params for query, params in conn.log if query.startswith("INSERT INTO time"))
+        self.assertEqual(time_upsert[:7], ["ts-1", "teamspeak", 5, 5, 5, 5, 5])
+        masks = [params for query, params in conn.log if query.startswith("UPDATE time SET active_slot_mask")]
+        self.assertEqual(masks, [(1 << 26, "teamspeak", "ts-1", "ts-2"), (1 << 3, "teamspeak", "ts-1")])
+        self.assertEqual(statements.count("BEGIN"), 1)
+        self.assertEqual(statements[-1], "COMMIT")
+
+        conn.log.clear()
+        session = ('teamspeak', 'ts-1', datetime(2026, 1, 4, 20, 0), datetime(2026, 1, 4, 20, 5, 30), 330)
+        asyncio.run(db.apply_minute_deltas("batch-2", {}, [session]))
+        inserts = [params for query, params in conn.log if query.startswith("INSERT INTO presence_sessions")]
+        self.assertEqual(inserts, [list(session)])
+
+        conn.log.clear()
+        conn.rowcount = 0
+        self.assertIsNone(asyncio.run(db.apply_minute_deltas("batch-1", deltas)))
+        self.assertEqual([query for query, _ in conn.log][-1], "ROLLBACK")
+
+    def test_tick_refreshes_only_users_whose_achievement_inputs_changed(self):
+        _, log = self.run_tick({"ts-1", "ts-2", "ts-3", "ts-4"}, {
+            "active_slot_mask & %s = 0": [("ts-2",)],
+            # id, platform uid, total_time after the credit, no snapshot row
+            "ua.user_id IS NULL": [
+                (1, "ts-1", 300, 0),  # nothing new
+                (2, "ts-2", 300, 0),  # new heatmap slot
+                (3, "ts-3", 5, 1),  # first credited minute, no snapshot yet
+                (4, "ts-4", 600, 0),  # just reached the 10 hour time tier
+            ],
+        })
+
+        specials = [params for query, params in log if "FROM special_achievements sa" in query]
+        self.assertEqual(specials, [(2, 3, 4)])
+
+    def test_quiet_tick_leaves_the_snapshots_alone(self):
+        _, log = self.run_tick({"ts-1", "ts-2"}, {
+            "ua.user_id IS NULL": [(1, "ts-1", 300, 0), (2, "ts-2", 7000, 0)],
+        })
+
+        self.assertFalse([query for query, _ in log if "FROM special_achievements sa" in query])
+        self.assertFalse([query for query, _ in log if query.startswith("UPDATE time SET active_slot_mask")])
+
+    def test_login_streak_refreshes_the_snapshot_of_its_user(self):
+        db = AsyncDatabaseManager()
+        conn = RecordingConnection({"SELECT user_id FROM user_identity": [(7,)]})
+
+        async def fake_run(op):
+            return await op(conn)
+
+        db._run = fake_run
+        asyncio.run(db.update_login_streak("ts-1", "teamspeak"))
+
+        statements = [query for query, _ in conn.log]
+        self.assertLess(
+            next(index for index, query in enumerate(statements) if query.startswith("INSERT INTO login_streak")),
+            next(index for index, query in enumerate(statements) if "FROM special_achievements sa" in query))
+        self.assertEqual(
+            [params for query, params in conn.log if "FROM special_achievements sa" in query], [(7,)])
+        self.assertEqual(statements[-1], "COMMIT")
+
+    def test_empty_tick_is_a_no_op(self):
+        self.assertEqual(self.run_tick(set()), (([], []), []))
+
+
+class RecalculateRanksTests(unittest.TestCase):
+    def test_totals_refresh_and_rank_recomputation_share_one_transaction(self):
+        db = AsyncDatabaseManager()
+        conn = RecordingConnection({
+            "SELECT id FROM user WHERE teamspeak_id IN": [(1,), (2,)],
+            "COALESCE(ut.total_time, 0) AS total_time": [(1, "ts-1", 300, 10, 1, 1)],
+        })
+
+        async def fake_run(op):
+            return await op(conn)
+
+        db._run = fake_run
+        changes = asyncio.run(db.recalculate_ranks(["ts-1", "ts-2"], "teamspeak"))
+
+        statements = [query for query, _ in conn.log]
+        self.assertEqual((statements[0], statements[-1]), ("BEGIN", "COMMIT"))
+        self.assertTrue(statements[2].startswith("INSERT INTO user_totals"))
+        self.assertEqual(conn.log[2][1], [1, 2])
+        self.assertEqual(changes, ([("ts-1", 2)], []))
+
+    def test_legacy_import_recomputes_ranks_then_snapshots(self):
+        db = mock.create_autospec(AsyncDatabaseManager, instance=True)
+        with mock.patch.object(legacy_database_import, "AsyncDatabaseManager", return_value=db):
+            asyncio.run(legacy_database_import._recalculate_platform_ranks(["ts-1", "ts-2"], "teamspeak"))
+
+        db.recalculate_ranks.assert_awaited_once_with(["ts-1", "ts-2"], "teamspeak")
+        db.refresh_user_achievements.assert_awaited_once_with(["ts-1", "ts-2"], "teamspeak")
+        self.assertEqual(
+            [name for name, _, _ in db.mock_calls], ["recalculate_ranks", "refresh_user_achievements", "close"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -4,9 +4,12 @@ from werkzeug.datastructures import MultiDict
 
 from app.api.request_args import (
     RANKING_SEARCH_MAX_LENGTH,
+    RankingCursor,
     clamp_page_to_total,
+    encode_ranking_cursor,
     pages_for,
     positive_int_arg,
+    ranking_cursor_arg,
     ranking_request_args,
     search_arg,
 )
@@ -54,6 +57,23 @@ class RequestArgValidationTests(unittest.TestCase):
         self.assertEqual(clamp_page_to_total(9999, 101, 50), 3)
         self.assertEqual(clamp_page_to_total(9999, 0, 50), 1)
 
+    def test_cursor_is_opt_in_and_round_trips(self):
+        self.assertIsNone(ranking_cursor_arg(MultiDict({'page': '3'})))
+        self.assertEqual(ranking_cursor_arg(MultiDict({'cursor': ''})), RankingCursor('next'))
+
+        token = encode_ranking_cursor('prev', 1234, 56, 40, 2)
+
+        self.assertEqual(
+            ranking_cursor_arg(MultiDict({'cursor': token})),
+            RankingCursor('prev', 1234, 56, 40, 2),
+        )
+
+    def test_cursor_rejects_tampered_values(self):
+        for value in ('not base64!', encode_ranking_cursor('next', 10, 1, 3)[:-2], 'c2lkZTox',
+                      encode_ranking_cursor('next', 10, 1, 0)):
+            with self.assertRaisesRegex(ValueError, 'cursor is invalid'):
+                ranking_cursor_arg(MultiDict({'cursor': value}))
+
 
 if __name__ == '__main__':
     unittest.main()
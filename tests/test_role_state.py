@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.config import Config
+from app.rankingsystem.bots.teamspeak.cldbid_map import CldbidMap
+from app.rankingsystem.bots.teamspeak.rank_manager import RankManager
+from app.rankingsystem.role_state import ROLE_STATE_STATS_KEY, RoleStateCache
+from tests.valkey_fakes import FakeHashValkey
+
+LEVEL_MAP = {1: 101, 2: 102, 3: 103}
+DIVISION_MAP = {1: 201, 2: 202}
+
+
+def make_cache(**kwargs):
+    return RoleStateCache('teamspeak', LEVEL_MAP, DIVISION_MAP, **kwargs)
+
+
+class RoleStateCacheTests(unittest.TestCase):
+    def test_recorded_groups_answer_checks_and_count_hits(self):
+        cache = make_cache()
+        self.assertFalse(cache.matches('uid1', 102, 201))
+
+        cache.record('uid1', [6, 102, 201])
+
+        self.assertTrue(cache.matches('uid1', 102, 201))
+        self.assertFalse(cache.matches('uid1', 103, 201))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_duplicate_rank_groups_never_match(self):
+        cache = make_cache()
+        cache.record('uid1', [101, 102, 201])
+
+        self.assertFalse(cache.matches('uid1', 102, 201))
+
+    def test_own_writes_and_events_update_the_entry(self):
+        cache = make_cache()
+        cache.record('uid1', [101, 201])
+
+        cache.set_groups('uid1', level_groups=[102])
+        self.assertTrue(cache.matches('uid1', 102, 201))
+
+        cache.apply_group_event(202, True, 'uid1')
+        cache.apply_group_event(201, False, 'uid1')
+        self.assertTrue(cache.matches('uid1', 102, 202))
+
+        cache.apply_group_event(103, True, 'uid1')
+        self.assertFalse(cache.matches('uid1', 102, 202))
+
+    def test_stale_entries_are_not_trusted(self):
+        cache = make_cache(max_age=60)
+        cache.record('uid1', [101, 201])
+
+        with patch('app.rankingsystem.role_state.time.time', return_value=cache._entries['uid1'].verified_at + 61):
+            self.assertFalse(cache.matches('uid1', 101, 201))
+
+    def test_snapshot_round_trips_through_valkey(self):
+        valkey = FakeHashValkey()
+        cache = make_cache()
+        cache.record('uid1', [101, 201])
+        cache.record('uid2', [102, 202])
+        cache.matches('uid1', 101, 201)
+        cache.invalidate('uid2')
+
+        asyncio.run(cache.snapshot(valkey))
+        restored = make_cache()
+        asyncio.run(restored.load(valkey))
+
+        self.assertEqual(len(restored), 1)
+        self.assertTrue(restored.matches('uid1', 101, 201))
+        self.assertEqual(valkey.data[ROLE_STATE_STATS_KEY], {'teamspeak:hits': '1', 'teamspeak:misses': '0'})
+
+
+class RankManagerCacheTests(unittest.TestCase):
+    def test_cached_roles_skip_the_server_query_round_trips(self):
+        ts = MagicMock()
+        ts.client_dbid_from_uid = AsyncMock(return_value="7")
+        level_group, division_group = Config.TEAMSPEAK_LEVEL_MAP[2], Config.TEAMSPEAK_DIVISION_MAP[1]
+        ts.server_groups_by_client = AsyncMock(return_value=[{"sgid": str(level_group)}, {"sgid": str(division_group)}])
+        db = MagicMock()
+        db.get_user_roles = AsyncMock(return_value=(2, 1))
+        manager = RankManager(Config, db, ts)
+        manager.role_state = RoleStateCache('teamspeak', Config.TEAMSPEAK_LEVEL_MAP, Config.TEAMSPEAK_DIVISION_MAP)
+        manager.cldbids = CldbidMap()
+
+        asyncio.run(manager.check_user_roles("uid1"))
+        asyncio.run(manager.check_user_roles("uid1"))
+
+        ts.client_dbid_from_uid.assert_awaited_once()
+        ts.server_groups_by_client.assert_awaited_once()
+        self.assertEqual((manager.role_state.hits, manager.role_state.misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
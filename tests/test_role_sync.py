@@ -0,0 +1,131 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from app.rankingsystem.rankingsystem import RankingSystem
+from app.rankingsystem.role_sync import RoleSyncQueue
+
+
+class RecordingCheck:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, user_id):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            self.calls.append(user_id)
+        finally:
+            self.running -= 1
+
+
+def drain(queue):
+    """Run ``queue``'s workers until every queued check is done."""
+
+    async def run():
+        task = asyncio.create_task(queue.run_forever(lambda: True, lambda: (), reconcile_interval=3600))
+        await queue.join()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+
+
+class RoleSyncQueueTests(unittest.TestCase):
+    def test_queued_users_coalesce(self):
+        check = RecordingCheck()
+        queue = RoleSyncQueue('discord', check, concurrency=1, rate=0, maxsize=10)
+
+        for user_id in (42, '42', 7, 42):
+            queue.enqueue(user_id)
+        drain(queue)
+
+        self.assertEqual(check.calls, ['42', '7'])
+
+    def test_full_queue_drops_instead_of_growing(self):
+        queue = RoleSyncQueue('teamspeak', RecordingCheck(), concurrency=1, rate=0, maxsize=2)
+
+        results = [queue.enqueue(uid) for uid in ('a', 'b', 'c')]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual((len(queue), queue.dropped), (2, 1))
+
+    def test_workers_respect_the_concurrency_budget(self):
+        check = RecordingCheck(delay=0.01)
+        queue = RoleSyncQueue('discord', check, concurrency=2, rate=0, maxsize=10)
+
+        for user_id in range(6):
+            queue.enqueue(user_id)
+        drain(queue)
+
+        self.assertEqual(len(check.calls), 6)
+        self.assertEqual(check.max_running, 2)
+
+    def test_failed_check_does_not_stop_the_worker(self):
+        calls = []
+
+        async def flaky(user_id):
+            calls.append(user_id)
+            if user_id == 'a':
+                raise RuntimeError("member fetch failed")
+
+        queue = RoleSyncQueue('teamspeak', flaky, concurrency=1, rate=0, maxsize=10)
+        queue.enqueue('a')
+        queue.enqueue('b')
+        drain(queue)
+
+        self.assertEqual(calls, ['a', 'b'])
+
+    def test_reconciliation_queues_everyone_online(self):
+        check = RecordingCheck()
+        queue = RoleSyncQueue('teamspeak', check, concurrency=1, rate=0, maxsize=1)
+
+        async def run():
+            running = [True]
+            task = asyncio.create_task(queue.run_forever(lambda: running[0], lambda: ['a', 'b', 'c'], reconcile_interval=0))
+            while len(check.calls) < 3:
+                await asyncio.sleep(0)
+            running[0] = False
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(run())
+
+        self.assertEqual(check.calls[:3], ['a', 'b', 'c'])
+
+
+class RankChangeRoutingTests(unittest.TestCase):
+    def test_only_rank_changes_are_queued(self):
+        rs = object.__new__(RankingSystem)
+        rs.role_sync = {
+            'discord': RoleSyncQueue('discord', RecordingCheck(), maxsize=10),
+            'teamspeak': RoleSyncQueue('teamspeak', RecordingCheck(), maxsize=10),
+        }
+
+        rs._sync_changed_roles({
+            'discord': ([('42', 3)], [('42', 2)]),
+            'teamspeak': ([], [('ts-1', 4)]),
+        })
+
+        self.assertEqual(len(rs.role_sync['discord']), 1)
+        self.assertEqual(len(rs.role_sync['teamspeak']), 1)
+
+    def test_teamspeak_level_changes_invalidate_the_vpn_level_cache(self):
+        rs = object.__new__(RankingSystem)
+        rs.role_sync = {}
+        rs.ts = MagicMock()
+
+        rs._sync_changed_roles({
+            'discord': ([('42', 9)], []),
+            'teamspeak': ([('ts-1', 9)], [('ts-2', 2)]),
+        })
+
+        rs.ts.forget_levels.assert_called_once_with(['ts-1'])
+
+
+if __name__ == "__main__":
+    unittest.main()
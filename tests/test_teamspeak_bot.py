@@ -58,6 +58,103 @@ class TeamspeakClientTrackingTests(unittest.TestCase):
         self.assertIsNone(uid)
         ts.client_info.assert_not_awaited()
 
+    def test_connect_event_fields_skip_the_query_round_trips(self):
+        ts = MagicMock()
+        ts.client_info = AsyncMock()
+        ts.server_groups_by_client = AsyncMock()
+        manager = make_client_manager(ts)
+        manager._get_user_level = AsyncMock(return_value=12)
+
+        uid = asyncio.run(manager.handle_client_connect({
+            "client_type": "0",
+            "clid": "3",
+            "client_unique_identifier": "uid-fast",
+            "client_nickname": "Tester",
+            "client_database_id": "7",
+            "client_servergroups": "6,8",
+        }))
+
+        self.assertEqual(uid, "uid-fast")
+        self.assertEqual(manager.client_name_map["uid-fast"], "Tester")
+        ts.client_info.assert_not_awaited()
+        ts.server_groups_by_client.assert_not_awaited()
+
+    def test_connect_event_groups_apply_the_excluded_role(self):
+        ts = MagicMock()
+        ts.client_info = AsyncMock()
+        manager = make_client_manager(ts)
+
+        uid = asyncio.run(manager.handle_client_connect({
+            "client_type": "0",
+            "clid": "3",
+            "client_unique_identifier": "uid-fast",
+            "client_nickname": "Tester",
+            "client_database_id": "7",
+            "client_servergroups": f"6,{Config.TS3_EXCLUDED_ROLE_ID}",
+        }))
+
+        self.assertIsNone(uid)
+        ts.client_info.assert_not_awaited()
+
+    def test_connect_fast_path_fetches_the_ip_only_below_the_vpn_level(self):
+        ts = MagicMock()
+        ts.client_info = AsyncMock(return_value={"connection_client_ip": "10.0.0.5"})
+        manager = make_client_manager(ts)
+        manager._get_user_level = AsyncMock(return_value=3)
+        event = {
+            "client_unique_identifier": "uid-fast",
+            "client_nickname": "Tester",
+            "client_servergroups": "6",
+        }
+
+        asyncio.run(manager.check_vpn_and_kick_if_needed(event, "3"))
+
+        ts.client_info.assert_awaited_once_with("3")
+
+    def test_rescan_is_one_extended_clientlist_call(self):
+        ts = MagicMock()
+        ts.dialect = None
+        ts.client_list = AsyncMock(return_value=[
+            {"clid": "1", "client_type": "0", "client_unique_identifier": "uid-a", "client_nickname": "A",
+             "client_database_id": "11", "client_servergroups": "6", "connection_client_ip": "10.0.0.1"},
+            {"clid": "2", "client_type": "0", "client_unique_identifier": "uid-b", "client_nickname": "B",
+             "client_database_id": "12", "client_servergroups": f"6,{Config.TS3_EXCLUDED_ROLE_ID}"},
+            {"clid": "3", "client_type": "1", "client_nickname": "serveradmin"},
+        ])
+        ts.client_info = AsyncMock()
+        ts.server_groups_by_client = AsyncMock()
+        manager = make_client_manager(ts)
+
+        asyncio.run(manager.handle_initial_clients())
+
+        ts.client_list.assert_awaited_once_with("uid", "groups", "info", "ip")
+        ts.client_info.assert_not_awaited()
+        ts.server_groups_by_client.assert_not_awaited()
+        self.assertEqual(manager.connected_users, {"uid-a"})
+        self.assertEqual(manager.client_uid_map, {"1": "uid-a"})
+
+    def test_validation_diffs_the_clientlist_against_tracking(self):
+        ts = MagicMock()
+        ts.dialect = None
+        ts.client_list = AsyncMock(return_value=[
+            {"clid": "1", "client_type": "0", "client_unique_identifier": "uid-a", "client_nickname": "A",
+             "client_database_id": "11", "client_servergroups": "6"},
+            {"clid": "4", "client_type": "0", "client_unique_identifier": "uid-new", "client_nickname": "New",
+             "client_database_id": "14", "client_servergroups": "6"},
+        ])
+        ts.client_info = AsyncMock()
+        manager = make_client_manager(ts)
+        manager.connected_users = {"uid-a", "uid-gone"}
+        manager.client_uid_map = {"1": "uid-a", "2": "uid-gone"}
+        manager.client_name_map = {"uid-a": "A", "uid-gone": "Gone"}
+
+        asyncio.run(manager.validate_connected_users())
+
+        self.assertEqual(manager.connected_users, {"uid-a", "uid-new"})
+        self.assertEqual(manager.client_uid_map, {"1": "uid-a", "4": "uid-new"})
+        self.assertEqual(manager.client_name_map, {"uid-a": "A", "uid-new": "New"})
+        ts.client_info.assert_not_awaited()
+
     def test_disconnect_event_removes_tracking(self):
         manager = make_client_manager(MagicMock())
         manager.connected_users = {"uid1"}
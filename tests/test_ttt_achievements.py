@@ -5,6 +5,7 @@ from datetime import datetime
 
 from flask import Flask
 
+from app.achievements import user_achievement_rows
 from app.api.ranking.profile.achievements import routes as achievement_routes
 from app.api.ranking.top import routes as top_routes
 from app.api.user import routes as user_routes
@@ -67,7 +68,12 @@ class DatabaseTttIngestTests(unittest.TestCase):
             db.executed.append((query, params))
             return None
 
+        async def fake_refresh(platform_uids, platform):
+            db.refreshed.append((set(platform_uids), platform))
+
         db.execute_query = fake_execute
+        db.refreshed = []
+        db.refresh_user_achievements = fake_refresh
         return db
 
     def test_ingest_ttt_achievement_event_updates_stats(self):
@@ -87,6 +93,7 @@ class DatabaseTttIngestTests(unittest.TestCase):
         self.assertEqual(stats_params[6], 0)
         self.assertEqual(stats_params[7], 4)
         self.assertIsInstance(stats_params[9], datetime)
+        self.assertEqual(db.refreshed, [({"76561198000000000"}, "steam")])
 
 
 class FakeStreamValkey:
@@ -239,6 +246,7 @@ class UserRouteTttStatsTests(unittest.TestCase):
             20,
             30,
             40,
+            "200,1002",
         )
         FakeUserDatabase.ttt_stats = {
             **zero_ttt_player_stats("76561198000000000"),
@@ -256,6 +264,8 @@ class UserRouteTttStatsTests(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.get_json()["ttt_stats"]["rounds_played"], 10)
         self.assertEqual(response.get_json()["ttt_stats"]["kills"], 25)
+        self.assertTrue(response.get_json()["apex_division"])
+        self.assertEqual(response.get_json()["best_division_by_season"]["1"], 2)
 
 
 class FakeAchievementDatabase:
@@ -267,14 +277,9 @@ class FakeAchievementDatabase:
         FakeAchievementDatabase.instances.append(self)
 
     def execute_query(self, query, params=None):
-        if "SUM(logins)" in query:
-            return [(None, None)]
-        if "FROM activity_heatmap" in query:
-            return []
-        if "FROM special_achievements" in query:
-            return []
         if "WHERE u.id = %s" in query:
-            return [("76561198000000000", "discord-id", "teamspeak-id", 600)]
+            # steam_id, total_time, then a user without a snapshot row yet
+            return [("76561198000000000", 600) + (None,) * 16]
         return []
 
     def get_ttt_player_stats(self, steam_id):
@@ -324,12 +329,10 @@ class AchievementRouteTttStatsTests(unittest.TestCase):
 
 class FakeTopDatabase:
     def execute_query(self, query, params=None):
-        if "ttt_rounds_played" in query:
-            return [
-                (1, "TTT Player", 1, None, None, 0, 0, 0, 0, 0, 100, 50, 250),
-            ]
-        if query.strip().startswith("SELECT platform, platform_id, achievement_type"):
-            return []
+        if "FROM user_achievements ua" in query:
+            # snapshot of a TTT-only player: 100 rounds, 50 wins, 250 kills
+            snapshot = user_achievement_rows([(1, 0, 0, 0, 0, 100, 50, 250)], [])[0]
+            return [(1, "TTT Player", 1, snapshot[-1])]
         return []
 
     def close(self):
@@ -65,6 +65,9 @@ class FakeValkeyManager:
     def publish_command(self, platform, command, **kwargs):
         self.commands.append((platform, command, kwargs))
 
+    def invalidate_leaderboards(self):
+        self.commands.append((None, 'invalidate_leaderboards', {}))
+
 
 class VerificationMergeTests(unittest.TestCase):
     def setUp(self):
@@ -142,6 +145,32 @@ class VerificationMergeTests(unittest.TestCase):
         self.assertEqual(update_params[11], "Bot Account")
         self.assertEqual(update_params[12], 1)
 
+    def test_merge_moves_identity_and_totals_to_primary_user(self):
+        FakeDatabase.existing_users = [(
+            1, "76561198000000000", "discord-id", None, "Primary", 3, 2,
+            None, None, 1, 1, 0, None, None,
+        )]
+        FakeDatabase.merge_users = [(1, 1, None, None, 1, 1, 0, None, None)]
+
+        with self.make_app().test_client() as client:
+            response = self.post_verify(client)
+
+        self.assertEqual(response.status_code, 200)
+        queries = FakeDatabase.instances[0].cursor.queries
+        statements = [" ".join(query.split()) for query, _ in queries]
+        dropped = [s for s in statements if s.startswith("DELETE x FROM user_identity")]
+        self.assertEqual(len(dropped), 1)
+        identity_insert = next(
+            (query, params) for query, params in queries if "INSERT INTO user_identity" in query
+        )
+        self.assertEqual(identity_insert[1], (1, 1))
+        totals = next(params for query, params in queries if "INSERT INTO user_totals" in query)
+        self.assertEqual(totals, (1,))
+        self.assertLess(
+            statements.index(dropped[0]),
+            next(i for i, s in enumerate(statements) if s.startswith("DELETE FROM user WHERE")),
+        )
+
 
 class VerificationAttemptLimitTests(unittest.TestCase):
     def setUp(self):
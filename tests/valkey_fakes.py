@@ -0,0 +1,71 @@
+"""In-memory async Valkey fake shared by the unit tests."""
+
+
+class FakeHashValkey:
+    """Async subset of the valkey client over in-memory hashes in ``data``.
+    Every command can be awaited directly or queued on a ``pipeline()``;
+    while ``fail`` is set both raise ConnectionError."""
+
+    def __init__(self):
+        self.data = {}
+        self.fail = False
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def apply(self, command, *args):
+        """Run one command against ``data`` synchronously."""
+        if self.fail:
+            raise ConnectionError("valkey down")
+        return getattr(self, f"_{command}")(*args)
+
+    async def exists(self, key):
+        return self.apply('exists', key)
+
+    async def delete(self, key):
+        return self.apply('delete', key)
+
+    async def hgetall(self, key):
+        return self.apply('hgetall', key)
+
+    def _exists(self, key):
+        return int(key in self.data)
+
+    def _delete(self, key):
+        return int(self.data.pop(key, None) is not None)
+
+    def _rename(self, source, target):
+        self.data[target] = self.data.pop(source)
+
+    def _hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def _hmget(self, key, fields):
+        return [self.data.get(key, {}).get(field) for field in fields]
+
+    def _hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = value
+
+    def _hdel(self, key, field):
+        return int(self.data.get(key, {}).pop(field, None) is not None)
+
+    def _hincrby(self, key, field, amount=1):
+        target = self.data.setdefault(key, {})
+        target[field] = str(int(target.get(field, 0)) + amount)
+        return int(target[field])
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.calls = []
+
+    def __getattr__(self, command):
+        def queue(*args):
+            self.calls.append((command, args))
+        return queue
+
+    async def execute(self):
+        if self.store.fail:
+            raise ConnectionError("valkey down")
+        return [self.store.apply(command, *args) for command, args in self.calls]